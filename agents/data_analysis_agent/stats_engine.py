@@ -0,0 +1,432 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+统计计算引擎
+从数据分析问题中提取数据与权数，精确计算平均数、加权平均数、中位数、众数、极差、方差与标准差：
+纯计算题直接按解题模板回答，其余题目将已验证的计算结果注入提示词
+"""
+
+import re
+import math
+from collections import Counter
+from fractions import Fraction
+from typing import Dict, List, Optional, Tuple
+
+from agents.tool_agent.fast_path import FastPathSolver, FastPathResult, FAST_PATH_DIRECT, FAST_PATH_INJECT, build_answer, build_facts
+from agents.tool_agent.radical import RadicalValue
+
+try:
+    import numpy as np
+except ImportError:  # 未安装NumPy时全部使用精确分数计算
+    np = None
+
+# 数据个数达到该值且安装了NumPy时使用向量化计算（结果为浮点近似值），否则使用分数精确计算
+VECTORIZE_THRESHOLD = 256
+# 解题过程中逐项展开的数据个数上限
+EXPAND_LIMIT = 12
+
+STAT_MEAN = "mean"
+STAT_WEIGHTED_MEAN = "weighted_mean"
+STAT_MEDIAN = "median"
+STAT_MODE = "mode"
+STAT_RANGE = "range"
+STAT_VARIANCE = "variance"
+STAT_STD = "std"
+
+STAT_NAMES = {
+    STAT_MEAN: "平均数",
+    STAT_WEIGHTED_MEAN: "加权平均数",
+    STAT_MEDIAN: "中位数",
+    STAT_MODE: "众数",
+    STAT_RANGE: "极差",
+    STAT_VARIANCE: "方差",
+    STAT_STD: "标准差",
+}
+# 关键词按出现位置排序，加权平均优先于平均
+_STAT_KEYWORDS = (
+    (re.compile(r"加权平均"), STAT_WEIGHTED_MEAN),
+    (re.compile(r"(?<!加权)平均(?:数|值|分|成绩)?"), STAT_MEAN),
+    (re.compile(r"中位数"), STAT_MEDIAN),
+    (re.compile(r"众数"), STAT_MODE),
+    (re.compile(r"极差"), STAT_RANGE),
+    (re.compile(r"方差"), STAT_VARIANCE),
+    (re.compile(r"标准差"), STAT_STD),
+)
+
+_NUMBER = r"-?\d+(?:\.\d+)?"
+_UNIT = r"(?:%|分|个|人|次|元|米|厘米|千克|克|件|本|棵|天|岁|度|小时|分钟|秒)?"
+_SEPARATOR = r"(?:\s*[,;]\s*|和|与|及|\s+)"
+# 和/与/及只用于连接同一组数据的最后一项（如“2,4,6和8”）
+_CONJUNCTION_PATTERN = re.compile(r"和|与|及")
+_NUMBER_PATTERN = re.compile(_NUMBER)
+_LIST_PATTERN = re.compile(rf"{_NUMBER}{_UNIT}(?:{_SEPARATOR}{_NUMBER}{_UNIT})+")
+_WEIGHT_LIST_PATTERN = re.compile(rf"权(?:重|数)?(?:分别)?(?:是|为)?:?({_NUMBER}{_UNIT}(?:{_SEPARATOR}{_NUMBER}{_UNIT})+)")
+_RATIO_PATTERN = re.compile(rf"{_NUMBER}(?::{_NUMBER})+")
+# 题目给出了统计量（如“平均数是5，求x”），属于逆向求解，不走快速路径
+_GIVEN_STAT_PATTERN = re.compile(r"(?:平均|中位数|众数|极差|方差|标准差)\S{0,2}?(?:是|为|=|等于)-?\d")
+_UNKNOWN_PATTERN = re.compile(r"[a-zA-Z]")
+# 多组数据（如“甲乙两组数据”）各自有统计量，合并为一组计算的结果不是题目所问
+_MULTI_GROUP_PATTERN = re.compile(r"[甲乙丙]|[两二三几多各每哪]组|第[一二三四1-4]组|分别")
+# 对数据做了变换（去掉最大值、每个数加2等），按原数据计算的结果不是题目所问
+_TRANSFORM_PATTERN = re.compile(
+    r"去掉|去除|除去|删去|删除|剔除|增加|减少|加上|减去|添加|加入|再加|补充|替换|改为|变为|变成|扩大|缩小|"
+    r"每个数|每一个数|每个数据|各个数|各数|都加|都减|都乘|都除|原来|原数据|新数据|[×÷+]"
+)
+# 比较：与统计量比较时（如“平均数比中位数大多少”）计算结果仍可注入，与其他对象比较时不走快速路径
+_COMPARE_PATTERN = re.compile(r"比(?!例)")
+_COMPARE_STAT_PATTERN = re.compile(r"比(?:较)?(?:这组数据的|数据的|的)?(?:加权平均|平均|中位数|众数|极差|方差|标准差)")
+# 直接回答前，去除数据与统计量关键词后仍含有这些词时，题目所问不止统计量本身（如求两者之差），需大模型讲解
+_COMPARISON_WORD_PATTERN = re.compile(r"比|差|倍|(?:大|小|高|低|多|少)多少|相等|大小|哪个")
+_GLUE_PATTERN = re.compile(
+    r"求出?|计算|算出?|这组|一组|这些|下列|以下|如下|数据|成绩|得分|样本|分别|各|是|为|等于|多少|几|的|和|与|及|"
+    r"权重|权数|按|比例|加权|[,;:?.!]"
+)
+
+
+class StatsQuery:
+    """
+    从问题中提取的统计计算请求
+    """
+    __slots__ = ("values", "weights", "stats")
+
+    def __init__(self, values: List[Fraction], weights: Optional[List[Fraction]], stats: List[str]):
+        """
+        初始化统计计算请求
+
+        Args:
+            values (List[Fraction]): 数据
+            weights (Optional[List[Fraction]]): 权数，与数据一一对应
+            stats (List[str]): 要计算的统计量
+        """
+        self.values = values
+        self.weights = weights
+        self.stats = stats
+
+
+def _parse_numbers(text: str) -> List[Fraction]:
+    """
+    解析文本中的所有数字
+
+    Args:
+        text (str): 文本
+
+    Returns:
+        List[Fraction]: 数字列表
+    """
+    return [Fraction(number) for number in _NUMBER_PATTERN.findall(text)]
+
+
+def format_number(value: Fraction) -> str:
+    """
+    格式化精确值：整数与有限小数直接输出，无限循环小数输出分数及近似值
+
+    Args:
+        value (Fraction): 精确值
+
+    Returns:
+        str: 格式化结果
+    """
+    if value.denominator == 1:
+        return str(value.numerator)
+    denominator = value.denominator
+    for factor in (2, 5):
+        while denominator % factor == 0:
+            denominator //= factor
+    if denominator == 1:
+        return f"{float(value):.10f}".rstrip("0").rstrip(".")
+    return f"{value.numerator}/{value.denominator}（≈{float(value):.2f}）"
+
+
+def _format_float(value: float) -> str:
+    """
+    格式化浮点近似值
+
+    Args:
+        value (float): 数值
+
+    Returns:
+        str: 保留至多4位小数的结果
+    """
+    return f"{value:.4f}".rstrip("0").rstrip(".")
+
+
+def _join(values: List[Fraction], separator: str = ", ") -> str:
+    """
+    拼接数据，超过展开上限时省略中间部分
+
+    Args:
+        values (List[Fraction]): 数据
+        separator (str): 分隔符
+
+    Returns:
+        str: 拼接结果
+    """
+    items = [format_number(value) for value in values]
+    if len(items) > EXPAND_LIMIT:
+        items = items[:3] + ["…"] + items[-2:]
+    return separator.join(items)
+
+
+class StatsEngine(FastPathSolver):
+    """
+    数据分析智能体的统计计算快速路径
+    """
+
+    def extract(self, question: str) -> Optional[StatsQuery]:
+        """
+        从规范化后的问题中提取数据、权数与要计算的统计量
+
+        Args:
+            question (str): 规范化后的问题
+
+        Returns:
+            Optional[StatsQuery]: 统计计算请求，无法可靠提取时返回None
+        """
+        found = sorted((match.start(), stat) for pattern, stat in _STAT_KEYWORDS for match in pattern.finditer(question))
+        stats = list(dict.fromkeys(stat for _, stat in found))
+        if not stats or _GIVEN_STAT_PATTERN.search(question) or _UNKNOWN_PATTERN.search(question):
+            return None
+
+        # 权数：“权重分别为3,3,4”或“按3:3:4的比例”
+        weights, weight_span = None, None
+        weight_match = _WEIGHT_LIST_PATTERN.search(question)
+        if weight_match:
+            weights, weight_span = _parse_numbers(weight_match.group(1)), weight_match.span(1)
+        else:
+            ratio_match = _RATIO_PATTERN.search(question)
+            if ratio_match:
+                weights, weight_span = _parse_numbers(ratio_match.group(0)), ratio_match.span()
+
+        # 多组数据、数据变换与非统计量之间的比较：程序计算的结果不能直接对应题目所问
+        text = question[:weight_match.start()] + question[weight_match.end():] if weight_match else question
+        if _MULTI_GROUP_PATTERN.search(text) or _TRANSFORM_PATTERN.search(text):
+            return None
+        if any(not _COMPARE_STAT_PATTERN.match(question, match.start()) for match in _COMPARE_PATTERN.finditer(question)):
+            return None
+
+        candidates = [match for match in _LIST_PATTERN.finditer(question)
+                      if weight_span is None or match.end() <= weight_span[0] or match.start() >= weight_span[1]]
+        if candidates:
+            data_match = max(candidates, key=lambda match: len(_NUMBER_PATTERN.findall(match.group(0))))
+            # 和/与/及连接的是多个数据时（如“1,2,3和4,5,6”）视为多组数据
+            parts = _CONJUNCTION_PATTERN.split(data_match.group(0))
+            if len(parts) > 2 or (len(parts) == 2 and len(_NUMBER_PATTERN.findall(parts[1])) > 1):
+                return None
+            values = _parse_numbers(data_match.group(0))
+        elif weights is not None:
+            # 带标签的数据（如“数学85分,语文90分”）：权数以外的数字依次作为数据
+            values = _parse_numbers(question[:weight_span[0]] + " " + question[weight_span[1]:])
+        else:
+            return None
+
+        # 题目中的所有数字都必须属于数据或权数，否则可能是频数表等复杂题型
+        if len(_parse_numbers(question)) != len(values) + (len(weights) if weights else 0):
+            return None
+        if weights is not None and (len(weights) != len(values) or sum(weights) <= 0 or min(weights) < 0):
+            return None
+        if STAT_WEIGHTED_MEAN in stats and weights is None:
+            return None
+        if weights is not None and STAT_MEAN in stats:
+            stats = [STAT_WEIGHTED_MEAN if stat == STAT_MEAN else stat for stat in stats]
+            stats = list(dict.fromkeys(stats))
+        return StatsQuery(values, weights, stats)
+
+    def compute(self, query: StatsQuery) -> Dict[str, str]:
+        """
+        计算统计量
+
+        Args:
+            query (StatsQuery): 统计计算请求
+
+        Returns:
+            Dict[str, str]: 统计量 -> 格式化结果
+
+        Raises:
+            ValueError: 众数不存在（各数据出现次数相同）
+        """
+        if np is not None and len(query.values) >= VECTORIZE_THRESHOLD:
+            return self._compute_vectorized(query)
+        return {stat: value for stat, (value, _) in self._compute_exact(query).items()}
+
+    def _solve(self, question: str) -> Optional[FastPathResult]:
+        """
+        求解统计计算问题
+
+        Args:
+            question (str): 规范化后的问题
+
+        Returns:
+            Optional[FastPathResult]: 纯计算题返回直接回答，其余返回注入提示词的计算结果
+        """
+        query = self.extract(question)
+        if query is None:
+            return None
+        if np is not None and len(query.values) >= VECTORIZE_THRESHOLD:
+            return FastPathResult(FAST_PATH_INJECT, facts=self._facts(query, self._compute_vectorized(query)))
+        results = self._compute_exact(query)
+        facts = self._facts(query, {stat: value for stat, (value, _) in results.items()})
+        remainder = _LIST_PATTERN.sub("", _RATIO_PATTERN.sub("", question))
+        for pattern, _ in _STAT_KEYWORDS:
+            remainder = pattern.sub("", remainder)
+        # 只有数据、统计量与固定的提问用语时直接回答；比较（求差、倍数）或其他要求由大模型基于计算结果回答
+        if _COMPARISON_WORD_PATTERN.search(remainder) or _GLUE_PATTERN.sub("", remainder):
+            return FastPathResult(FAST_PATH_INJECT, facts=facts)
+        return FastPathResult(FAST_PATH_DIRECT, answer=self._answer(query, results), facts=facts)
+
+    def _compute_exact(self, query: StatsQuery) -> Dict[str, Tuple[str, str]]:
+        """
+        使用分数精确计算统计量，并生成解题步骤
+
+        Args:
+            query (StatsQuery): 统计计算请求
+
+        Returns:
+            Dict[str, Tuple[str, str]]: 统计量 -> (格式化结果, 解题步骤)
+        """
+        values = query.values
+        n = len(values)
+        total = sum(values)
+        mean = total / n
+        results: Dict[str, Tuple[str, str]] = {}
+        for stat in query.stats:
+            if stat == STAT_MEAN:
+                results[stat] = (format_number(mean),
+                                 f"平均数 = 数据之和 ÷ 数据个数 = ({_join(values, ' + ')}) ÷ {n} = "
+                                 f"{format_number(total)} ÷ {n} = {format_number(mean)}")
+            elif stat == STAT_WEIGHTED_MEAN:
+                weights = query.weights
+                weighted_total = sum(value * weight for value, weight in zip(values, weights))
+                weight_total = sum(weights)
+                weighted_mean = weighted_total / weight_total
+                products = " + ".join(f"{format_number(value)}×{format_number(weight)}" for value, weight in zip(values, weights)) \
+                    if n <= EXPAND_LIMIT else "各数据×对应权数之和"
+                results[stat] = (format_number(weighted_mean),
+                                 f"加权平均数 = (数据×权数之和) ÷ 权数之和 = ({products}) ÷ ({_join(weights, ' + ')}) = "
+                                 f"{format_number(weighted_total)} ÷ {format_number(weight_total)} = {format_number(weighted_mean)}")
+            elif stat == STAT_MEDIAN:
+                ordered = sorted(values)
+                if n % 2:
+                    median = ordered[n // 2]
+                    step = f"共{n}个数据，中间的第{n // 2 + 1}个数是{format_number(median)}"
+                else:
+                    left, right = ordered[n // 2 - 1], ordered[n // 2]
+                    median = (left + right) / 2
+                    step = (f"共{n}个数据，取中间第{n // 2}个和第{n // 2 + 1}个数的平均数："
+                            f"({format_number(left)} + {format_number(right)}) ÷ 2 = {format_number(median)}")
+                results[stat] = (format_number(median), f"将数据从小到大排列：{_join(ordered)}；{step}，所以中位数是{format_number(median)}")
+            elif stat == STAT_MODE:
+                counts = Counter(values)
+                top = max(counts.values())
+                if len(counts) > 1 and all(count == top for count in counts.values()):
+                    raise ValueError("各数据出现次数相同")
+                modes = sorted(value for value, count in counts.items() if count == top)
+                mode_text = "和".join(format_number(value) for value in modes)
+                results[stat] = (mode_text, f"出现次数最多的数据是{mode_text}（出现{top}次），所以众数是{mode_text}")
+            elif stat == STAT_RANGE:
+                low, high = min(values), max(values)
+                results[stat] = (format_number(high - low),
+                                 f"极差 = 最大值 − 最小值 = {format_number(high)} − {format_number(low)} = {format_number(high - low)}")
+            elif stat in (STAT_VARIANCE, STAT_STD):
+                squares = [(value - mean) ** 2 for value in values]
+                variance = sum(squares) / n
+                if STAT_VARIANCE not in results:
+                    terms = " + ".join(f"({format_number(value)} − {format_number(mean)})²" for value in values) \
+                        if n <= EXPAND_LIMIT else "各数据与平均数之差的平方和"
+                    results[STAT_VARIANCE] = (format_number(variance),
+                                              f"平均数为{format_number(mean)}，方差 s² = [{terms}] ÷ {n} = "
+                                              f"{format_number(sum(squares))} ÷ {n} = {format_number(variance)}")
+                if stat == STAT_STD:
+                    std = self._sqrt(variance)
+                    radicand = format_number(variance).split("（")[0]
+                    radical = f"√({radicand})" if "/" in radicand else f"√{radicand}"
+                    step = f"标准差 s = √方差 = {std}" if std.startswith(f"{radical}≈") else f"标准差 s = √方差 = {radical} = {std}"
+                    results[stat] = (std, step)
+        if STAT_VARIANCE not in query.stats:
+            results.pop(STAT_VARIANCE, None)
+        return results
+
+    def _compute_vectorized(self, query: StatsQuery) -> Dict[str, str]:
+        """
+        使用NumPy向量化计算统计量（大量数据时使用）
+
+        Args:
+            query (StatsQuery): 统计计算请求
+
+        Returns:
+            Dict[str, str]: 统计量 -> 格式化的近似结果
+        """
+        values = np.array([float(value) for value in query.values])
+        results = {}
+        for stat in query.stats:
+            if stat == STAT_MEAN:
+                results[stat] = _format_float(values.mean())
+            elif stat == STAT_WEIGHTED_MEAN:
+                results[stat] = _format_float(np.average(values, weights=[float(weight) for weight in query.weights]))
+            elif stat == STAT_MEDIAN:
+                results[stat] = _format_float(np.median(values))
+            elif stat == STAT_MODE:
+                unique, counts = np.unique(values, return_counts=True)
+                if unique.size > 1 and counts.min() == counts.max():
+                    raise ValueError("各数据出现次数相同")
+                results[stat] = "和".join(_format_float(value) for value in unique[counts == counts.max()])
+            elif stat == STAT_RANGE:
+                results[stat] = _format_float(np.ptp(values))
+            elif stat == STAT_VARIANCE:
+                results[stat] = _format_float(values.var())
+            elif stat == STAT_STD:
+                results[stat] = _format_float(values.std())
+        return results
+
+    @staticmethod
+    def _sqrt(value: Fraction) -> str:
+        """
+        开平方：完全平方数给出精确值，否则给出最简二次根式与近似值
+
+        Args:
+            value (Fraction): 被开方数
+
+        Returns:
+            str: 格式化结果
+        """
+        root = RadicalValue.sqrt(value)
+        if root.is_rational:
+            return format_number(root.to_fraction())
+        return f"{root}≈{math.sqrt(value):.2f}"
+
+    @staticmethod
+    def _facts(query: StatsQuery, results: Dict[str, str]) -> str:
+        """
+        构建注入系统提示词的已验证结果
+
+        Args:
+            query (StatsQuery): 统计计算请求
+            results (Dict[str, str]): 统计量 -> 格式化结果
+
+        Returns:
+            str: 提示词片段
+        """
+        lines = [f"数据（共{len(query.values)}个）：{_join(query.values)}"]
+        if query.weights is not None:
+            lines.append(f"权数：{_join(query.weights)}")
+        lines.extend(f"{STAT_NAMES[stat]}：{value}" for stat, value in results.items())
+        return build_facts(lines)
+
+    @staticmethod
+    def _answer(query: StatsQuery, results: Dict[str, Tuple[str, str]]) -> str:
+        """
+        按“审题—思路—解答”的模板生成直接回答
+
+        Args:
+            query (StatsQuery): 统计计算请求
+            results (Dict[str, Tuple[str, str]]): 统计量 -> (格式化结果, 解题步骤)
+
+        Returns:
+            str: 回答
+        """
+        names = "、".join(STAT_NAMES[stat] for stat in results)
+        approach = (f"先列出题目中的{len(query.values)}个数据" + ("及对应的权数" if query.weights is not None else "")
+                    + f"，再按定义依次计算{names}。")
+        steps = [f"数据：{_join(query.values)}" + (f"；权数：{_join(query.weights)}" if query.weights is not None else "")]
+        steps.extend(f"{index}. {step}" for index, (_, step) in enumerate(results.values(), 1))
+        conclusion = "，".join(f"{STAT_NAMES[stat]}是{value}" for stat, (value, _) in results.items())
+        return build_answer(f"{names}的计算", approach, steps, conclusion)
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+一次函数求解器
+识别“一次函数（直线y=kx+b）经过两点求解析式”与“正比例函数经过一点求解析式”的问题，使用分数精确求解k、b：
+纯计算题直接按解题模板回答，其余题目将已验证的结果注入提示词
+"""
+
+import re
+from fractions import Fraction
+from typing import List, Optional, Tuple
+
+from agents.tool_agent.fast_path import FastPathSolver, FastPathResult, FAST_PATH_DIRECT, FAST_PATH_INJECT, build_answer, build_facts
+from agents.tool_agent.radical import format_fraction
+
+
+_NUMBER = r"-?\d+(?:\.\d+)?"
+_POINT_PATTERN = re.compile(rf"[A-Z]?\(({_NUMBER}),({_NUMBER})\)")
+_NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+_FORM_PATTERN = re.compile(r"y=kx(?:\+b)?")
+_FUNCTION_PATTERN = re.compile(r"一次函数|正比例函数|直线|解析式|表达式|关系式")
+_PROPORTIONAL_PATTERN = re.compile(r"正比例函数|y=kx(?!\+)")
+_ASKS_COEFFICIENTS_PATTERN = re.compile(r"k,b|k和b|k与b|k、b|k的值|b的值")
+_EXPLAIN_PATTERN = re.compile(r"为什么|怎么|如何|说明|理由|概念|定义|区别|性质|增减|象限|交点|面积|平移")
+_GLUE_PATTERN = re.compile(
+    r"已知|若|设|一次函数|正比例函数|函数|图像|图象|直线|经过|过|点|两点|和|与|求出?|这个|该|此|它|其|的|"
+    r"解析式|表达式|关系式|确定|写出|值|y=kx\+b|y=kx|k|b|[A-Z]|[,;:?.!、]"
+)
+
+
+def _term(coefficient: Fraction, variable: str, leading: bool = False) -> str:
+    """
+    书写“系数×变量”项
+
+    Args:
+        coefficient (Fraction): 系数
+        variable (str): 变量名
+        leading (bool): 是否为首项（首项为正时不写加号）
+
+    Returns:
+        str: 如“2x”“-x”“+(1/2)x”，系数为0时返回空字符串
+    """
+    if coefficient == 0:
+        return ""
+    sign = "-" if coefficient < 0 else ("" if leading else "+")
+    magnitude = abs(coefficient)
+    if magnitude == 1:
+        body = variable
+    elif magnitude.denominator == 1:
+        body = f"{magnitude.numerator}{variable}"
+    else:
+        body = f"({format_fraction(magnitude)}){variable}"
+    return f"{sign}{body}"
+
+
+def _constant(value: Fraction, leading: bool = False) -> str:
+    """
+    书写常数项
+
+    Args:
+        value (Fraction): 常数
+        leading (bool): 是否为首项
+
+    Returns:
+        str: 如“+1”“-1/2”，非首项的0返回空字符串
+    """
+    if value == 0 and not leading:
+        return ""
+    sign = "-" if value < 0 else ("" if leading else "+")
+    return f"{sign}{format_fraction(abs(value))}"
+
+
+def format_linear(k: Fraction, b: Fraction) -> str:
+    """
+    书写一次函数解析式
+
+    Args:
+        k (Fraction): 一次项系数
+        b (Fraction): 常数项
+
+    Returns:
+        str: 如“y=2x+1”
+    """
+    return f"y={_term(k, 'x', leading=True)}{_constant(b)}"
+
+
+def _point(x: Fraction, y: Fraction) -> str:
+    return f"({format_fraction(x)},{format_fraction(y)})"
+
+
+class LinearFunctionSolver(FastPathSolver):
+    """
+    一次函数智能体的待定系数法快速路径
+    """
+
+    def extract(self, question: str) -> Optional[Tuple[List[Tuple[Fraction, Fraction]], bool]]:
+        """
+        从规范化后的问题中提取已知点
+
+        Args:
+            question (str): 规范化后的问题
+
+        Returns:
+            Optional[Tuple[List[Tuple[Fraction, Fraction]], bool]]: (已知点, 是否为正比例函数)，无法可靠提取时返回None
+        """
+        if not _FUNCTION_PATTERN.search(question) or not re.search(r"经过|过", question):
+            return None
+        # 只允许y=kx+b与待求的k、b中出现小写字母（如“与x轴的交点”属于其他题型）
+        if set(re.findall(r"[a-z]", _FORM_PATTERN.sub("", question))) - {"k", "b"}:
+            return None
+        points = [(Fraction(x), Fraction(y)) for x, y in _POINT_PATTERN.findall(question)]
+        proportional = _PROPORTIONAL_PATTERN.search(question) is not None
+        if len(points) != (1 if proportional else 2):
+            return None
+        if len(_NUMBER_PATTERN.findall(question)) != 2 * len(points):
+            return None
+        return points, proportional
+
+    def _solve(self, question: str) -> Optional[FastPathResult]:
+        """
+        用待定系数法求一次函数（正比例函数）的解析式
+
+        Args:
+            question (str): 规范化后的问题
+
+        Returns:
+            Optional[FastPathResult]: 纯计算题返回直接回答，其余返回注入提示词的计算结果
+        """
+        extracted = self.extract(question)
+        if extracted is None:
+            return None
+        points, proportional = extracted
+        if proportional:
+            (x1, y1), = points
+            if x1 == 0:
+                return None
+            k, b = y1 / x1, Fraction(0)
+            steps = [f"设正比例函数的解析式为y=kx，把点{_point(x1, y1)}代入得 {format_fraction(y1)}={_term(x1, 'k', True)}",
+                     f"解得 k = {format_fraction(k)}"]
+            knowledge, name = "用待定系数法求正比例函数的解析式", "这个正比例函数"
+            approach = "正比例函数y=kx只有一个待定系数k，把已知点的坐标代入解析式，解出k即可。"
+        else:
+            (x1, y1), (x2, y2) = points
+            if x1 == x2:
+                return None
+            k = (y2 - y1) / (x2 - x1)
+            b = y1 - k * x1
+            if k == 0:
+                return None
+            steps = [f"设一次函数的解析式为y=kx+b，把点{_point(x1, y1)}、{_point(x2, y2)}代入得方程组："
+                     f"{format_fraction(y1)}={_term(x1, 'k', True)}+b，{format_fraction(y2)}={_term(x2, 'k', True)}+b"
+                     .replace("=+b", "=b"),
+                     f"两式相减得 {format_fraction(y2 - y1)}={_term(x2 - x1, 'k', True)}，解得 k = {format_fraction(k)}",
+                     f"把k={format_fraction(k)}代入第一个方程，解得 b = {format_fraction(b)}"]
+            knowledge, name = "用待定系数法求一次函数的解析式", "这个一次函数"
+            approach = "设解析式为y=kx+b，把两个已知点的坐标分别代入，得到关于k、b的二元一次方程组，解方程组求出k、b。"
+        expression = format_linear(k, b)
+        conclusion = f"{name}的解析式为{expression}"
+        if _ASKS_COEFFICIENTS_PATTERN.search(question):
+            conclusion += f"，k={format_fraction(k)}" + ("" if proportional else f"，b={format_fraction(b)}")
+        facts = build_facts(steps + [f"解析式：{expression}"])
+        remainder = _GLUE_PATTERN.sub("", _POINT_PATTERN.sub("", question))
+        # 只有已知点与固定的提问用语时直接回答；其余要求（如求k+b）由大模型基于计算结果回答
+        if _EXPLAIN_PATTERN.search(question) or remainder:
+            return FastPathResult(FAST_PATH_INJECT, facts=facts)
+        lines = [f"{index}. {step}" for index, step in enumerate(steps, 1)]
+        return FastPathResult(FAST_PATH_DIRECT, answer=build_answer(knowledge, approach, lines, conclusion), facts=facts)
@@ -0,0 +1,275 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+勾股定理求解器
+识别已知两边求第三边（两直角边求斜边、斜边与一直角边求另一直角边、Rt△ABC中按字母标注的边）
+与判断三边能否构成直角三角形（勾股定理的逆定理）的问题，使用有理数与二次根式精确计算：
+纯计算题直接按解题模板回答，其余题目将已验证的结果注入提示词
+"""
+
+import re
+from typing import List, NamedTuple, Optional
+
+from agents.tool_agent.fast_path import FastPathSolver, FastPathResult, FAST_PATH_DIRECT, FAST_PATH_INJECT, build_answer, build_facts
+from agents.tool_agent.radical import RadicalValue, evaluate
+
+
+_SIDE = r"(?:\d+(?:\.\d+)?)?√\d+(?:\.\d+)?|\d+(?:\.\d+)?"
+_UNIT = r"(?:cm|mm|dm|km|m|厘米|毫米|分米|千米|米)?"
+_AND = r"(?:和|与|,)"
+_NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+_UNIT_PATTERN = re.compile(r"(?<=\d)(?:cm|mm|dm|km|m)(?![a-z])")
+_LOWERCASE_PATTERN = re.compile(r"[a-z]")
+
+_LEGS_PATTERN = re.compile(rf"直角边(?:长)?(?:分别)?(?:是|为|长)?({_SIDE})({_UNIT}){_AND}({_SIDE}){_UNIT}")
+_HYPOTENUSE_PATTERN = re.compile(rf"斜边(?:长)?(?:是|为|长)?({_SIDE})({_UNIT})")
+_ONE_LEG_PATTERN = re.compile(rf"(?<!另)(?:一条)?直角边(?:长)?(?:是|为|长)?({_SIDE})({_UNIT})")
+_THREE_SIDES_PATTERN = re.compile(rf"({_SIDE})({_UNIT}){_AND}({_SIDE}){_UNIT}{_AND}({_SIDE}){_UNIT}")
+_RIGHT_ANGLE_PATTERN = re.compile(r"∠([A-Z])=90°?")
+_TRIANGLE_PATTERN = re.compile(r"(?:Rt)?△([A-Z]{3})")
+_LABELLED_SIDE_PATTERN = re.compile(rf"(?<![A-Z])([A-Z]{{2}})=({_SIDE})({_UNIT})")
+_LABELLED_TARGET_PATTERN = re.compile(r"求(?:边)?([A-Z]{2})|(?<![A-Z])([A-Z]{2})(?:的长|长)?(?:是|为|等于)?多少")
+_JUDGE_PATTERN = re.compile(r"吗|是否|是不是|能否|能不能|判断|可以构成|能构成|可以组成|能组成")
+_EXPLAIN_PATTERN = re.compile(r"为什么|怎么|如何|证明|说明|理由|原理|概念|定义|区别")
+_GLUE_PATTERN = re.compile(
+    r"在|Rt|△[A-Z]{3}|∠[A-Z]=90°?|中|已知|一个|这个|直角三角形|三角形|勾股数|两条|两|一条|另一条|另一|直角边|斜边|三条边|三边|边长|边|"
+    r"分别|长度|长|的|是|为|求出?|多少|等于|以|能否|能不能|是否|不是|能|可以|构成|组成|判断|吗|一组|这组|和|与|[,;:?.!]"
+)
+
+
+class PythagoreanSolution(NamedTuple):
+    """
+    勾股定理问题的求解结果
+    """
+    used: List[str]
+    knowledge: str
+    approach: str
+    steps: List[str]
+    conclusion: str
+
+
+def _square_text(side: str) -> str:
+    """
+    边长平方的书写形式
+
+    Args:
+        side (str): 边长文本
+
+    Returns:
+        str: 如“3²”“(√2)²”
+    """
+    return f"({side})²" if "√" in side else f"{side}²"
+
+
+def _square(side: str) -> RadicalValue:
+    """
+    计算边长的平方
+
+    Args:
+        side (str): 边长文本
+
+    Returns:
+        RadicalValue: 平方值（有理数）
+
+    Raises:
+        ValueError: 边长为0或平方不是有理数
+    """
+    value = evaluate(side)
+    if not value.terms:
+        raise ValueError("边长必须大于0")
+    square = value ** 2
+    square.to_fraction()
+    return square
+
+
+def _root_step(name: str, square: RadicalValue) -> str:
+    """
+    开平方求边长的步骤
+
+    Args:
+        name (str): 边的名称
+        square (RadicalValue): 边长的平方
+
+    Returns:
+        str: 如“c = √25 = 5”
+    """
+    root = str(RadicalValue.sqrt(square.to_fraction()))
+    if root == f"√{square}":
+        return f"{name} = {root}"
+    return f"{name} = √{square} = {root}"
+
+
+def _only_numbers(question: str, used: List[str]) -> bool:
+    """
+    判断题目中的数字是否都属于已识别的条件（直角标记中的90除外），否则可能是周长、面积等其他题型
+
+    Args:
+        question (str): 规范化后的问题
+        used (List[str]): 已识别的条件文本
+
+    Returns:
+        bool: 是否没有其他数字
+    """
+    total = len(_NUMBER_PATTERN.findall(_RIGHT_ANGLE_PATTERN.sub("", question)))
+    return total == sum(len(_NUMBER_PATTERN.findall(text)) for text in used)
+
+
+class PythagoreanSolver(FastPathSolver):
+    """
+    勾股定理智能体的求边与判定快速路径
+    """
+
+    def _solve(self, question: str) -> Optional[FastPathResult]:
+        """
+        求解勾股定理计算问题
+
+        Args:
+            question (str): 规范化后的问题
+
+        Returns:
+            Optional[FastPathResult]: 纯计算题返回直接回答，其余返回注入提示词的计算结果
+        """
+        if _LOWERCASE_PATTERN.search(_UNIT_PATTERN.sub("", question.replace("Rt", ""))):
+            return None
+        solution = self._solve_labelled(question) or self._solve_sides(question)
+        if solution is None:
+            return None
+        facts = build_facts(solution.steps + [f"结论：{solution.conclusion}"])
+        remainder = question
+        for text in solution.used:
+            remainder = remainder.replace(text, "")
+        remainder = _GLUE_PATTERN.sub("", remainder)
+        # 只有已知条件与固定的提问用语时直接回答；其余要求（如“求斜边上的高”）由大模型基于计算结果回答
+        if _EXPLAIN_PATTERN.search(question) or remainder:
+            return FastPathResult(FAST_PATH_INJECT, facts=facts)
+        answer = build_answer(solution.knowledge, solution.approach,
+                              [f"{index}. {step}" for index, step in enumerate(solution.steps, 1)], solution.conclusion)
+        return FastPathResult(FAST_PATH_DIRECT, answer=answer, facts=facts)
+
+    @staticmethod
+    def _solve_sides(question: str) -> Optional[PythagoreanSolution]:
+        """
+        求解以“直角边/斜边”描述或直接给出三边的问题
+
+        Args:
+            question (str): 规范化后的问题
+
+        Returns:
+            Optional[PythagoreanSolution]: 求解结果，无法识别时返回None
+        """
+        legs = _LEGS_PATTERN.search(question)
+        if legs and "斜边" in question and _only_numbers(question, [legs.group(0)]):
+            a, unit, b = legs.group(1), legs.group(2), legs.group(3)
+            square = _square(a) + _square(b)
+            hypotenuse = RadicalValue.sqrt(square.to_fraction())
+            steps = [f"设斜边为c，由勾股定理 c² = {_square_text(a)} + {_square_text(b)} = {_square(a)} + {_square(b)} = {square}",
+                     _root_step("c", square)]
+            return PythagoreanSolution([legs.group(0)], "勾股定理（已知两条直角边求斜边）",
+                                       "直角三角形两条直角边的平方和等于斜边的平方，先求斜边的平方，再开平方。",
+                                       steps, f"斜边长为{hypotenuse}{unit}")
+
+        hypotenuse_match = _HYPOTENUSE_PATTERN.search(question)
+        leg_match = _ONE_LEG_PATTERN.search(question)
+        if hypotenuse_match and leg_match and "另" in question:
+            used = [hypotenuse_match.group(0), leg_match.group(0)]
+            if not _only_numbers(question, used):
+                return None
+            c, unit, a = hypotenuse_match.group(1), hypotenuse_match.group(2), leg_match.group(1)
+            square = _square(c) - _square(a)
+            if square.to_fraction() <= 0:
+                raise ValueError("斜边必须大于直角边")
+            leg = RadicalValue.sqrt(square.to_fraction())
+            steps = [f"设另一条直角边为b，由勾股定理 b² = {_square_text(c)} − {_square_text(a)} = {_square(c)} − {_square(a)} = {square}",
+                     _root_step("b", square)]
+            return PythagoreanSolution(used, "勾股定理（已知斜边和一条直角边求另一条直角边）",
+                                       "另一条直角边的平方等于斜边的平方减去已知直角边的平方，求出后再开平方。",
+                                       steps, f"另一条直角边长为{leg}{unit}")
+
+        sides = _THREE_SIDES_PATTERN.search(question)
+        if sides and _JUDGE_PATTERN.search(question) and _only_numbers(question, [sides.group(0)]):
+            return PythagoreanSolver._judge(sides.group(0), [sides.group(1), sides.group(3), sides.group(4)],
+                                            "勾股数" in question)
+        return None
+
+    @staticmethod
+    def _judge(used: str, sides: List[str], pythagorean_triple: bool) -> PythagoreanSolution:
+        """
+        用勾股定理的逆定理判断三边能否构成直角三角形（或是否为勾股数）
+
+        Args:
+            used (str): 已识别的条件文本
+            sides (List[str]): 三边长文本
+            pythagorean_triple (bool): 是否判断勾股数
+
+        Returns:
+            PythagoreanSolution: 求解结果
+        """
+        squares = {side: _square(side) for side in sides}
+        a, b, c = sorted(sides, key=lambda side: squares[side].to_fraction())
+        total = squares[a] + squares[b]
+        right = total == squares[c]
+        steps = [f"三边中最长的边是{c}，{_square_text(a)} + {_square_text(b)} = {squares[a]} + {squares[b]} = {total}，"
+                 f"{_square_text(c)} = {squares[c]}",
+                 f"{total} {'=' if right else '≠'} {squares[c]}，较短两边的平方和{'等于' if right else '不等于'}最长边的平方"]
+        if pythagorean_triple:
+            integers = all(evaluate(side).is_rational and evaluate(side).to_fraction().denominator == 1 for side in sides)
+            if not integers:
+                steps.append("勾股数必须都是正整数")
+            conclusion = f"{'、'.join(sides)}{'是' if right and integers else '不是'}一组勾股数"
+            return PythagoreanSolution([used], "勾股数的判断", "勾股数是满足a²+b²=c²的三个正整数，先看是否都是正整数，再比较较短两边的平方和与最长边的平方。",
+                                       steps, conclusion)
+        conclusion = f"以{'、'.join(sides)}为边的三角形{'是' if right else '不是'}直角三角形"
+        return PythagoreanSolution([used], "勾股定理的逆定理", "找出最长边，比较较短两边的平方和与最长边的平方是否相等。",
+                                   steps, conclusion)
+
+    @staticmethod
+    def _solve_labelled(question: str) -> Optional[PythagoreanSolution]:
+        """
+        求解“Rt△ABC中，∠C=90°，AC=3，BC=4，求AB”形式的问题
+
+        Args:
+            question (str): 规范化后的问题
+
+        Returns:
+            Optional[PythagoreanSolution]: 求解结果，无法识别时返回None
+        """
+        right_angle = _RIGHT_ANGLE_PATTERN.search(question)
+        target_match = _LABELLED_TARGET_PATTERN.search(question)
+        known = _LABELLED_SIDE_PATTERN.findall(question)
+        if right_angle is None or target_match is None or len(known) != 2:
+            return None
+        vertex = right_angle.group(1)
+        target = target_match.group(1) or target_match.group(2)
+        triangle = _TRIANGLE_PATTERN.search(question)
+        vertices = set(triangle.group(1)) if triangle else set(vertex + target + known[0][0] + known[1][0])
+        sides = [frozenset(name) for name, _, _ in known] + [frozenset(target)]
+        if len(vertices) != 3 or vertex not in vertices or len(set(sides)) != 3 or any(
+                len(side) != 2 or not side <= vertices for side in sides):
+            return None
+        used = [match.group(0) for match in _LABELLED_SIDE_PATTERN.finditer(question)]
+        if not _only_numbers(question, used):
+            return None
+        used.extend([right_angle.group(0), target_match.group(0)])
+        unit = known[0][2] or known[1][2]
+        if vertex not in target:
+            (leg_a, a, _), (leg_b, b, _) = known
+            square = _square(a) + _square(b)
+            steps = [f"∠{vertex}=90°，{target}是斜边，由勾股定理 {target}² = {leg_a}² + {leg_b}² = "
+                     f"{_square_text(a)} + {_square_text(b)} = {_square(a)} + {_square(b)} = {square}",
+                     _root_step(target, square)]
+            knowledge = "勾股定理（已知两条直角边求斜边）"
+        else:
+            (hypotenuse, c, _), = [side for side in known if vertex not in side[0]] or [(None, None, None)]
+            if hypotenuse is None:
+                return None
+            (leg, a, _), = [side for side in known if vertex in side[0]]
+            square = _square(c) - _square(a)
+            if square.to_fraction() <= 0:
+                raise ValueError("斜边必须大于直角边")
+            steps = [f"∠{vertex}=90°，{hypotenuse}是斜边，由勾股定理 {target}² = {hypotenuse}² − {leg}² = "
+                     f"{_square_text(c)} − {_square_text(a)} = {_square(c)} − {_square(a)} = {square}",
+                     _root_step(target, square)]
+            knowledge = "勾股定理（已知斜边和一条直角边求另一条直角边）"
+        result = RadicalValue.sqrt(square.to_fraction())
+        return PythagoreanSolution(used, knowledge, "先根据直角确定斜边，再用勾股定理列式求出所求边的平方，最后开平方。",
+                                   steps, f"{target} = {result}{unit}")
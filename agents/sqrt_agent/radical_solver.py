@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+二次根式求解器
+从问题中提取二次根式表达式（如“√48”“2√3+√12”“√18÷√2”）并精确计算：
+纯化简/计算题直接按解题模板回答，其余题目将已验证的结果注入提示词
+"""
+
+import re
+import math
+from fractions import Fraction
+from typing import List, Optional
+
+from agents.tool_agent.fast_path import FastPathSolver, FastPathResult, FAST_PATH_DIRECT, FAST_PATH_INJECT, build_answer, build_facts
+from agents.tool_agent.radical import RadicalValue, evaluate
+
+# 数字位数上限，超出时不走快速路径（分解平方因数的耗时随数字增大）
+MAX_NUMBER_DIGITS = 8
+
+# 含√的最长算式片段，首尾不能是运算符
+_EXPRESSION_PATTERN = re.compile(r"[\d.√()+\-×÷/^]*√[\d.√()+\-×÷/^]*")
+_NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+_SIMPLE_SQRT_PATTERN = re.compile(r"√(\d+(?:\.\d+)?|\(\d+/\d+\))")
+_UNKNOWN_PATTERN = re.compile(r"[a-zA-Z]")
+# 规范化只转换“乘以”“除以”，算式中单独的“乘”“除”在此转换
+_OPERATOR_WORD_PATTERN = re.compile(r"(?<=[\d)])(乘|除)(?=[√(\d])")
+# 判断、比较、估算、讲解类问题，计算结果只作为提示词中的已验证结果
+_EXPLAIN_PATTERN = re.compile(r"吗|是否|是不是|能否|判断|比较|估算|估计|之间|范围|为什么|怎么|如何|意义|取值|概念|定义|区别")
+_GLUE_PATTERN = re.compile(r"化简|计算|求出?|算出?|的值|结果|是多少|多少|等于|最简二次根式|最简|二次根式|化成|化为|下列|式子|算式|[=,;:?.!]")
+
+
+def _sqrt_step(radicand_text: str) -> Optional[str]:
+    """
+    生成单个二次根式的化简步骤
+
+    Args:
+        radicand_text (str): 被开方数文本（如“48”“(1/2)”）
+
+    Returns:
+        Optional[str]: 化简步骤，已是最简二次根式时返回None
+    """
+    value = Fraction(radicand_text.strip("()"))
+    simplified = str(RadicalValue.sqrt(value))
+    original = f"√{radicand_text}"
+    if simplified == original:
+        return None
+    if value.denominator != 1:
+        return f"{original} = √({value.numerator}×{value.denominator})/{value.denominator} = {simplified}（分母有理化）"
+    radicand = value.numerator
+    square = max((i * i for i in range(2, math.isqrt(radicand) + 1) if radicand % (i * i) == 0), default=1)
+    if square == radicand:
+        return f"{original} = √{math.isqrt(radicand)}² = {simplified}"
+    return f"{original} = √({square}×{radicand // square}) = {simplified}"
+
+
+class RadicalSolver(FastPathSolver):
+    """
+    二次根式智能体的化简与运算快速路径
+    """
+
+    def extract(self, question: str) -> Optional[str]:
+        """
+        从规范化后的问题中提取二次根式表达式
+
+        Args:
+            question (str): 规范化后的问题（“乘”“除”已转换为运算符）
+
+        Returns:
+            Optional[str]: 表达式，没有或有多个表达式、含未知数时返回None
+        """
+        if _UNKNOWN_PATTERN.search(question):
+            return None
+        expressions = [match.group(0).strip("+-×÷/^.") for match in _EXPRESSION_PATTERN.finditer(question)]
+        expressions = [expression for expression in expressions if "√" in expression]
+        if len(expressions) != 1:
+            return None
+        expression = expressions[0]
+        # 题目中的数字都必须在表达式内，否则可能有其他条件（如“当x=2时”）
+        numbers = _NUMBER_PATTERN.findall(expression)
+        if len(_NUMBER_PATTERN.findall(question)) != len(numbers) or any(len(number) > MAX_NUMBER_DIGITS for number in numbers):
+            return None
+        return expression
+
+    def _solve(self, question: str) -> Optional[FastPathResult]:
+        """
+        求解二次根式化简与运算问题
+
+        Args:
+            question (str): 规范化后的问题
+
+        Returns:
+            Optional[FastPathResult]: 纯化简/计算题返回直接回答，其余返回注入提示词的计算结果
+        """
+        question = _OPERATOR_WORD_PATTERN.sub(lambda match: "×" if match.group(1) == "乘" else "÷", question)
+        expression = self.extract(question)
+        if expression is None:
+            return None
+        result = str(evaluate(expression))
+        single = _SIMPLE_SQRT_PATTERN.fullmatch(expression) is not None
+        steps = [step for step in dict.fromkeys(
+            _sqrt_step(match.group(1)) for match in _SIMPLE_SQRT_PATTERN.finditer(expression)) if step]
+        if single and not steps:
+            steps = [f"被开方数不含能开得尽方的因数，{expression}已是最简二次根式"]
+        lines = steps if single else steps + [f"{expression} = {result}"]
+        facts = build_facts(lines + [f"计算结果：{result}"])
+        remainder = _GLUE_PATTERN.sub("", question.replace(expression, ""))
+        # 只有表达式与固定的提问用语时直接回答；其余要求（如倒数、相反数、平方根）由大模型基于计算结果回答
+        if _EXPLAIN_PATTERN.search(question) or remainder:
+            return FastPathResult(FAST_PATH_INJECT, facts=facts)
+        return FastPathResult(FAST_PATH_DIRECT, answer=self._answer(expression, result, steps, single), facts=facts)
+
+    @staticmethod
+    def _answer(expression: str, result: str, steps: List[str], single: bool) -> str:
+        """
+        按“审题—思路—解答”的模板生成直接回答
+
+        Args:
+            expression (str): 表达式
+            result (str): 计算结果
+            steps (List[str]): 各二次根式的化简步骤
+            single (bool): 是否为单个二次根式的化简
+
+        Returns:
+            str: 回答
+        """
+        if single:
+            knowledge = "二次根式的化简"
+            approach = "把被开方数分解出完全平方因数（分数先做分母有理化），开方后移到根号外，化成最简二次根式。"
+        else:
+            knowledge = "二次根式的运算"
+            approach = ("先把各二次根式化成最简二次根式，再按运算顺序计算："
+                        "乘除用√a×√b=√(ab)、√a÷√b=√(a/b)，加减时合并同类二次根式。")
+        lines = [f"{index}. {step}" for index, step in enumerate(steps, 1)]
+        if not single:
+            lines.append(f"{len(lines) + 1}. 原式 = {expression} = {result}")
+        conclusion = f"{expression} = {result}" if expression != result else f"{expression}已是最简二次根式"
+        return build_answer(knowledge, approach, lines, conclusion)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+智能体匹配
+按智能体描述中的【关键词匹配】规则判断问题涉及的知识领域，跨领域的问题（如“用勾股定理求平行四边形对角线”）同时交给多个智能体处理
+"""
+
+import re
+from collections import Counter
+from typing import Dict, Iterable, List
+
+_KEYWORD_SECTION = re.compile(r"【关键词匹配】(.*?)。")
+_KEYWORD = re.compile(r"‘([^’]+)’")
+
+
+def parse_keywords(description: str) -> List[str]:
+    """
+    从智能体描述中解析关键词
+
+    Args:
+        description (str): 智能体描述
+
+    Returns:
+        List[str]: 【关键词匹配】中列出的关键词，未列出时为空
+    """
+    section = _KEYWORD_SECTION.search(description)
+    if section is None:
+        return []
+    return [keyword.strip() for keyword in _KEYWORD.findall(section.group(1)) if keyword.strip()]
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", "", text).lower()
+
+
+class AgentMatch:
+    """
+    单个智能体的匹配结果
+    """
+    __slots__ = ("name", "keywords")
+
+    def __init__(self, name: str, keywords: List[str]):
+        """
+        初始化匹配结果
+
+        Args:
+            name (str): 智能体名称
+            keywords (List[str]): 问题中出现的关键词
+        """
+        self.name = name
+        self.keywords = keywords
+
+
+class AgentMatcher:
+    """
+    关键词匹配器，多个智能体共有的关键词（如‘几何证明’）无法区分领域，不参与匹配
+    """
+
+    def __init__(self, agent_keywords: Dict[str, List[str]]):
+        """
+        初始化匹配器
+
+        Args:
+            agent_keywords (Dict[str, List[str]]): 智能体名称 -> 关键词，按声明顺序
+        """
+        owners = Counter(keyword for keywords in agent_keywords.values() for keyword in {_normalize(k) for k in keywords})
+        self.keywords: Dict[str, List[str]] = {}
+        for agent, keywords in agent_keywords.items():
+            self.keywords[agent] = [keyword for keyword in keywords if owners[_normalize(keyword)] == 1]
+
+    @classmethod
+    def from_agents_info(cls, agents_info: Iterable) -> "AgentMatcher":
+        """
+        由智能体信息创建匹配器
+
+        Args:
+            agents_info (Iterable): AgentInfo列表
+
+        Returns:
+            AgentMatcher: 匹配器
+        """
+        return cls({info.name: parse_keywords(info.description) for info in agents_info})
+
+    def match(self, question: str) -> List[AgentMatch]:
+        """
+        匹配问题涉及的智能体
+
+        Args:
+            question (str): 规范化后的问题
+
+        Returns:
+            List[AgentMatch]: 命中关键词的智能体，按命中数从多到少排列，相同时按声明顺序
+        """
+        text = _normalize(question)
+        matches = []
+        for agent, keywords in self.keywords.items():
+            hits = [keyword for keyword in keywords if _normalize(keyword) in text]
+            if hits:
+                matches.append(AgentMatch(agent, hits))
+        matches.sort(key=lambda match: -len(match.keywords))
+        return matches
@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+确定性快速路径
+智能体可注册求解器，对可确定计算的问题直接给出回答（跳过大模型），
+或将已验证的计算结果注入提示词（缩短大模型回答并避免计算错误）
+"""
+
+import abc
+import time
+import threading
+from typing import Dict, List, Optional
+
+# 快速路径结果类型
+FAST_PATH_DIRECT = "direct"
+FAST_PATH_INJECT = "inject"
+# 注入系统提示词的已验证结果标题
+FACTS_HEADER = "# 已验证的计算结果\n以下结果已由程序精确计算，回答时直接使用，不要重新计算或改动数值："
+
+
+def build_facts(lines: List[str]) -> str:
+    """
+    构建注入系统提示词的已验证结果
+
+    Args:
+        lines (List[str]): 结果条目
+
+    Returns:
+        str: 提示词片段
+    """
+    return "\n".join([FACTS_HEADER] + [f"- {line}" for line in lines])
+
+
+def build_answer(knowledge: str, approach: str, steps: List[str], conclusion: str) -> str:
+    """
+    按提示词约定的“审题—思路—解答”三步模板生成直接回答
+
+    Args:
+        knowledge (str): 考查的知识点
+        approach (str): 解题思路
+        steps (List[str]): 解答步骤
+        conclusion (str): 结论
+
+    Returns:
+        str: 回答
+    """
+    lines = [
+        f"第一步：审题目，定知识点。这道题考查{knowledge}。",
+        f"第二步：理清解题思路。{approach}",
+        "第三步：答案生成。",
+    ]
+    lines.extend(steps)
+    lines.append(f"所以，{conclusion}。")
+    return "\n".join(lines)
+
+
+class FastPathResult:
+    """
+    快速路径结果
+    """
+    __slots__ = ("kind", "answer", "facts")
+
+    def __init__(self, kind: str, answer: Optional[str] = None, facts: Optional[str] = None):
+        """
+        初始化快速路径结果
+
+        Args:
+            kind (str): 结果类型（direct：直接回答；inject：注入提示词）
+            answer (Optional[str]): 直接回答的内容
+            facts (Optional[str]): 注入系统提示词的已验证结果
+        """
+        self.kind = kind
+        self.answer = answer
+        self.facts = facts
+
+
+class FastPathStats:
+    """
+    快速路径命中率与节省耗时统计
+    节省耗时按直接回答次数乘以同一智能体未走快速路径时的大模型平均耗时估算
+    """
+
+    def __init__(self):
+        """
+        初始化统计
+        """
+        self.lookups = 0
+        self.hits: Dict[str, int] = {FAST_PATH_DIRECT: 0, FAST_PATH_INJECT: 0}
+        self.solve_seconds = 0.0
+        self.llm_calls = 0
+        self.llm_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record_lookup(self, result: Optional[FastPathResult], seconds: float):
+        """
+        记录一次快速路径查询
+
+        Args:
+            result (Optional[FastPathResult]): 查询结果，未命中时为None
+            seconds (float): 求解耗时（秒）
+        """
+        with self._lock:
+            self.lookups += 1
+            self.solve_seconds += seconds
+            if result is not None:
+                self.hits[result.kind] += 1
+
+    def record_llm(self, seconds: float):
+        """
+        记录一次未被直接回答替代的大模型调用耗时
+
+        Args:
+            seconds (float): 大模型耗时（秒）
+        """
+        with self._lock:
+            self.llm_calls += 1
+            self.llm_seconds += seconds
+
+    def stats(self) -> Dict[str, float]:
+        """
+        获取统计信息
+
+        Returns:
+            Dict[str, float]: 查询数、各类命中数、命中率、平均求解耗时与估算节省耗时
+        """
+        with self._lock:
+            hits = sum(self.hits.values())
+            avg_llm = self.llm_seconds / self.llm_calls if self.llm_calls else 0.0
+            return {
+                "lookups": self.lookups,
+                "direct_hits": self.hits[FAST_PATH_DIRECT],
+                "inject_hits": self.hits[FAST_PATH_INJECT],
+                "hit_rate": round(hits / self.lookups, 4) if self.lookups else 0.0,
+                "avg_solve_ms": round(self.solve_seconds / self.lookups * 1000, 3) if self.lookups else 0.0,
+                "saved_seconds": round(max(self.hits[FAST_PATH_DIRECT] * avg_llm - self.solve_seconds, 0.0), 3),
+            }
+
+
+class FastPathSolver(abc.ABC):
+    """
+    快速路径求解器基类，子类实现_solve
+    """
+
+    def __init__(self):
+        """
+        初始化求解器
+        """
+        self.statistics = FastPathStats()
+
+    def solve(self, question: str) -> Optional[FastPathResult]:
+        """
+        求解问题并记录统计
+
+        Args:
+            question (str): 规范化后的问题
+
+        Returns:
+            Optional[FastPathResult]: 求解结果，无法确定计算时返回None
+        """
+        start = time.perf_counter()
+        try:
+            result = self._solve(question)
+        except (ValueError, ArithmeticError):
+            result = None
+        self.statistics.record_lookup(result, time.perf_counter() - start)
+        return result
+
+    @abc.abstractmethod
+    def _solve(self, question: str) -> Optional[FastPathResult]:
+        """
+        求解问题
+
+        Args:
+            question (str): 规范化后的问题
+
+        Returns:
+            Optional[FastPathResult]: 求解结果，无法确定计算时返回None
+
+        Raises:
+            ValueError: 题目数据无法计算
+            ArithmeticError: 计算出错
+        """
@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+生成档位选择
+按请求的延迟模式（fast/balanced/thorough）与本地难度估计，为每个请求选择快速档（较小、较便宜的模型）
+或完整档（大模型），各智能体可覆盖两档的模型、最大输出token数与温度，并统计各模式的耗时与估算成本
+"""
+
+import re
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from llms.qwen_llm import GenerationProfile
+from utils.session_store import estimate_tokens
+
+MODE_FAST = "fast"
+MODE_BALANCED = "balanced"
+MODE_THOROUGH = "thorough"
+MODES = (MODE_FAST, MODE_BALANCED, MODE_THOROUGH)
+
+TIER_FAST = "fast"
+TIER_FULL = "full"
+
+# 定义、概念类问题
+_DEFINITION_PATTERN = re.compile(r"什么是|是什么|什么叫|叫做什么|的定义|的概念|的含义|指什么|有哪些|有什么")
+# 多步推理、证明类问题
+_MULTI_STEP_PATTERN = re.compile(r"证明|求证|说明理由|推导|综合|分别|并且|然后|再求|若.+则|已知.+求")
+# 小问编号与多个问号
+_SUB_QUESTION_PATTERN = re.compile(r"[（(][1-9一二三四][)）]|[①②③④]|[？?]")
+_NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+
+
+def estimate_difficulty(question: str) -> float:
+    """
+    按问题长度、数字个数、小问数与关键词粗略估计难度，只用正则，耗时在微秒级
+
+    Args:
+        question (str): 规范化后的问题
+
+    Returns:
+        float: 0~1之间的难度，定义类短问题接近0，多步证明与多小问的题目接近1
+    """
+    score = 0.3
+    if _DEFINITION_PATTERN.search(question):
+        score -= 0.3
+    score += 0.3 * min(len(_MULTI_STEP_PATTERN.findall(question)), 2)
+    numbers = len(_NUMBER_PATTERN.findall(question))
+    if numbers >= 6:
+        score += 0.3
+    elif numbers >= 3:
+        score += 0.15
+    if len(question) > 120:
+        score += 0.35
+    elif len(question) > 60:
+        score += 0.2
+    if len(_SUB_QUESTION_PATTERN.findall(question)) >= 2:
+        score += 0.2
+    return round(min(max(score, 0.0), 1.0), 2)
+
+
+class GenerationChoice:
+    """
+    单个请求选中的生成档位
+    """
+    __slots__ = ("mode", "tier", "difficulty", "profile")
+
+    def __init__(self, mode: str, tier: str, difficulty: float, profile: GenerationProfile):
+        """
+        初始化选择结果
+
+        Args:
+            mode (str): 请求的延迟模式
+            tier (str): 选中的档位（fast/full）
+            difficulty (float): 难度估计
+            profile (GenerationProfile): 生成参数
+        """
+        self.mode = mode
+        self.tier = tier
+        self.difficulty = difficulty
+        self.profile = profile
+
+
+class _ModeStats:
+    """
+    单个（模式, 档位）的大模型调用统计
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+
+
+class GenerationProfiles:
+    """
+    生成档位配置与选择
+    fast模式总是使用快速档，thorough模式总是使用完整档，balanced模式下难度达到阈值的问题使用完整档；
+    未配置快速档模型时所有请求都使用完整档，不改变原有的生成参数
+    """
+
+    def __init__(self, fast: Optional[GenerationProfile], full: GenerationProfile, prices: Dict[str, float],
+                 difficulty_threshold: float, overrides: Optional[Dict[str, Dict[str, Dict[str, Any]]]] = None):
+        """
+        初始化生成档位
+
+        Args:
+            fast (Optional[GenerationProfile]): 默认快速档，为None时不启用快速档（含各智能体对快速档的覆盖）
+            full (GenerationProfile): 默认完整档
+            prices (Dict[str, float]): 档位 -> 每千token价格，用于估算成本
+            difficulty_threshold (float): balanced模式下使用完整档的难度阈值
+            overrides (Optional[Dict[str, Dict[str, Dict[str, Any]]]]): 智能体名称 -> 档位 -> 覆盖的model/max_tokens/temperature
+        """
+        self.prices = prices
+        self.difficulty_threshold = difficulty_threshold
+        self.fast_enabled = fast is not None
+        self._defaults = {TIER_FAST: fast, TIER_FULL: full}
+        self._profiles: Dict[Tuple[str, str], GenerationProfile] = {}
+        for agent, tiers in (overrides or {}).items():
+            for tier, fields in tiers.items():
+                if tier not in self._defaults:
+                    raise ValueError(f"{agent} 的生成档位未知: {tier}，应为 {TIER_FAST}/{TIER_FULL}")
+                if tier == TIER_FAST and not self.fast_enabled:
+                    continue
+                base = self._defaults[tier]
+                self._profiles[(agent, tier)] = GenerationProfile(
+                    fields.get("model") or base.model,
+                    fields.get("max_tokens", base.max_tokens),
+                    fields.get("temperature", base.temperature),
+                )
+        self._stats: Dict[Tuple[str, str], _ModeStats] = defaultdict(_ModeStats)
+        self._lock = threading.Lock()
+
+    def profile(self, agent: str, tier: str) -> GenerationProfile:
+        """
+        获取智能体某个档位的生成参数
+
+        Args:
+            agent (str): 智能体名称
+            tier (str): 档位（fast/full）
+
+        Returns:
+            GenerationProfile: 生成参数，未启用快速档时总是完整档的参数
+        """
+        if not self.fast_enabled:
+            tier = TIER_FULL
+        return self._profiles.get((agent, tier), self._defaults[tier])
+
+    def select(self, agent: str, mode: str, question: str) -> GenerationChoice:
+        """
+        为请求选择生成档位
+
+        Args:
+            agent (str): 智能体名称
+            mode (str): 延迟模式（fast/balanced/thorough）
+            question (str): 规范化后的问题
+
+        Returns:
+            GenerationChoice: 选择结果
+        """
+        difficulty = estimate_difficulty(question)
+        if not self.fast_enabled:
+            tier = TIER_FULL
+        elif mode == MODE_FAST:
+            tier = TIER_FAST
+        elif mode == MODE_THOROUGH:
+            tier = TIER_FULL
+        else:
+            tier = TIER_FULL if difficulty >= self.difficulty_threshold else TIER_FAST
+        return GenerationChoice(mode, tier, difficulty, self.profile(agent, tier))
+
+    def record(self, choice: GenerationChoice, seconds: float, prompt_texts: List[str], answer: str):
+        """
+        记录一次大模型调用，token数按字符粗略估算
+
+        Args:
+            choice (GenerationChoice): 选择结果
+            seconds (float): 大模型耗时（秒）
+            prompt_texts (List[str]): 系统提示词、历史消息与问题
+            answer (str): 回答
+        """
+        prompt_tokens = sum(estimate_tokens(text) for text in prompt_texts)
+        completion_tokens = estimate_tokens(answer)
+        with self._lock:
+            stats = self._stats[(choice.mode, choice.tier)]
+            stats.calls += 1
+            stats.seconds += seconds
+            stats.prompt_tokens += prompt_tokens
+            stats.completion_tokens += completion_tokens
+            stats.cost += (prompt_tokens + completion_tokens) / 1000 * self.prices.get(choice.tier, 0.0)
+
+    def stats(self) -> Dict[Tuple[str, str], Dict[str, float]]:
+        """
+        获取各（模式, 档位）的调用统计
+
+        Returns:
+            Dict[Tuple[str, str], Dict[str, float]]: (模式, 档位) -> 调用数、平均耗时、估算token数与成本
+        """
+        with self._lock:
+            return {
+                key: {
+                    "calls": stats.calls,
+                    "avg_llm_ms": round(stats.seconds / stats.calls * 1000, 1),
+                    "prompt_tokens": stats.prompt_tokens,
+                    "completion_tokens": stats.completion_tokens,
+                    "cost": round(stats.cost, 6),
+                }
+                for key, stats in self._stats.items()
+            }
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+知识检索器
+调用外部推荐系统API检索课程和报告信息，成功的检索结果写入缓存供各worker复用
+"""
+
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Any, Optional, Tuple
+from core.conf import config
+
+logger = logging.getLogger(__name__)
+
+
+class KnowledgeRetriever:
+    """
+    知识检索器类
+    """
+
+    def __init__(self, cache: Optional[Any] = None):
+        """
+        初始化知识检索器
+
+        Args:
+            cache (Optional[Any]): 提供get/set/coalesce接口的缓存（TieredCache），为None时不缓存
+        """
+        self.cache = cache
+        # 共享的HTTP会话，复用到推荐系统的连接
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=config.POOL_RETRIEVAL_WORKERS)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def preconnect(self) -> bool:
+        """
+        预先建立到推荐系统的连接
+
+        Returns:
+            bool: 是否成功连通
+        """
+        try:
+            self.session.head(config.GET_IP_URL, timeout=5)
+            return True
+        except requests.RequestException as e:
+            logger.warning(f"推荐系统预连接失败: {e}")
+            return False
+
+    def search_courses(self, query: str, top_k: int = 1) -> Tuple[int, Optional[dict]]:
+        """
+        检索课程信息
+        GET /api/v1/recommendation/rag/search/courses?query={查询字符串}&top_k=1
+
+        Args:
+            query (str): 处理后的问题
+            top_k (int): 返回的课程数量
+
+        Returns:
+            Tuple[int, Optional[dict]]: 状态码与课程数据，请求失败时数据为None
+        """
+        url = config.GET_IP_URL + f"/api/v1/recommendation/rag/search/courses?query={query}&top_k={top_k}"
+        return self._get(f"courses:{top_k}:{query}", url)
+
+    def search_reports(self, course_uuid: str, query: str, top_k: int = 1) -> Tuple[int, Optional[dict]]:
+        """
+        检索课程下的报告信息
+        GET /api/v1/recommendation/rag/search/reports/{course_id}?query={查询字符串}&top_k=1
+
+        Args:
+            course_uuid (str): 课程ID
+            query (str): 处理后的问题
+            top_k (int): 返回的报告数量
+
+        Returns:
+            Tuple[int, Optional[dict]]: 状态码与报告数据，请求失败时数据为None
+        """
+        url = config.GET_IP_URL + f"/api/v1/recommendation/rag/search/reports/{course_uuid}?query={query}&top_k={top_k}"
+        return self._get(f"reports:{course_uuid}:{top_k}:{query}", url)
+
+    def _get(self, cache_key: str, url: str) -> Tuple[int, Optional[dict]]:
+        """
+        先查缓存，未命中时请求外部API并缓存成功结果
+
+        Args:
+            cache_key (str): 缓存键
+            url (str): 请求地址
+
+        Returns:
+            Tuple[int, Optional[dict]]: 状态码与响应数据
+        """
+        if self.cache is None:
+            return self._fetch(url)
+        key = f"retrieval:{cache_key}"
+        cached = self.cache.get(key)
+        if cached is not None:
+            logger.debug(f"检索缓存命中: {cache_key}")
+            return 200, cached
+
+        # 同一检索的并发未命中（含其他实例）只请求一次上游，其余等待结果写入缓存
+        with self.cache.coalesce(key) as cached:
+            if cached is not None:
+                logger.debug(f"检索请求已合并: {cache_key}")
+                return 200, cached
+            status_code, data = self._fetch(url)
+            if status_code == 200:
+                self.cache.set(key, data, config.RETRIEVAL_CACHE_TTL)
+            return status_code, data
+
+    def _fetch(self, url: str) -> Tuple[int, Optional[dict]]:
+        """
+        请求外部API
+
+        Args:
+            url (str): 请求地址
+
+        Returns:
+            Tuple[int, Optional[dict]]: 状态码与响应数据，请求失败时数据为None
+        """
+        response = self.session.get(url)
+        if response.status_code != 200:
+            return response.status_code, None
+        return response.status_code, response.json()
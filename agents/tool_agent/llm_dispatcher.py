@@ -6,93 +6,145 @@
 """
 
 import logging
-from llms.qwen_llm import QwenLLM
+from llms.qwen_llm import GenerationProfile, QwenLLM, TRUNCATED_NOTICE
 from core.conf import config
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Dict, List, Optional
+from utils.agent_manager import AgentManager, STAGE_LLM
 import traceback
 
 logger = logging.getLogger(__name__)
 
+# 大模型调用失败时返回的提示
+LLM_ERROR_ANSWER = "抱歉，我暂时无法回答您的问题，请稍后重试。"
+# QwenLLM调用出错时返回内容的前缀
+LLM_ERROR_PREFIX = "调用大模型时出错"
+
+
+def is_error_answer(answer: str) -> bool:
+    """
+    判断回答是否为大模型调用出错时的提示
+
+    Args:
+        answer (str): 回答
+
+    Returns:
+        bool: 是否为出错提示
+    """
+    return not answer or LLM_ERROR_ANSWER in answer or LLM_ERROR_PREFIX in answer
+
+
+def is_truncated_answer(answer: str) -> bool:
+    """
+    判断回答是否因达到最大输出token数而被截断
+
+    Args:
+        answer (str): 回答
+
+    Returns:
+        bool: 是否被截断
+    """
+    return answer.endswith(TRUNCATED_NOTICE)
+
 class LLMDispatcher:
     """
     大模型调度器类
     """
     
-    def __init__(self):
+    def __init__(self, llm: Optional[QwenLLM] = None, agent_manager: Optional[AgentManager] = None):
         """
         初始化大模型调度器
 
+        Args:
+            llm (Optional[QwenLLM]): 共享的大模型接口，未提供时单独创建
+            agent_manager (Optional[AgentManager]): 智能体管理器，提供时流式生成在大模型I/O线程池中执行
         """
-        # 初始化大模型接口
-        self.llm = QwenLLM(config.LLM_API_KEY, config.LLM_API_URL)
+        # 复用注册器中的大模型接口，避免创建多个客户端和连接池
+        self.llm = llm or QwenLLM(config.LLM_API_KEY, config.LLM_API_URL)
+        self.agent_manager = agent_manager
 
     
-    def dispatch_with_knowledge(self, system_prompt: str, user_question: str) -> str:
+    def dispatch_with_knowledge(self, system_prompt: str, user_question: str, history: Optional[List[Dict[str, str]]] = None, profile: Optional[GenerationProfile] = None) -> str:
         """
         使用知识库信息调度大模型生成回答
         
         Args:
             system_prompt (str): 包含知识库信息的系统提示词
             user_question (str): 用户问题
+            history (Optional[List[Dict[str, str]]]): 多轮对话历史消息
+            profile (Optional[GenerationProfile]): 生成参数，为None时使用默认档位
             
         Returns:
             str: 大模型生成的回答
         """
         try:
-            return self.llm.generate_with_knowledge(system_prompt, user_question)
+            return self.llm.generate_with_knowledge(system_prompt, user_question, history, profile)
         except Exception as e:
             logger.error(f"调用大模型时出错: {e}", exc_info=True)
-            return "抱歉，我暂时无法回答您的问题，请稍后重试。"
+            return LLM_ERROR_ANSWER
     
-    def dispatch_fallback(self, system_prompt: str, user_question: str) -> str:
+    def dispatch_fallback(self, system_prompt: str, user_question: str, history: Optional[List[Dict[str, str]]] = None, profile: Optional[GenerationProfile] = None) -> str:
         """
         使用备用方式调度大模型生成回答
         
         Args:
             system_prompt (str): 系统提示词
             user_question (str): 用户问题
+            history (Optional[List[Dict[str, str]]]): 多轮对话历史消息
+            profile (Optional[GenerationProfile]): 生成参数，为None时使用默认档位
             
         Returns:
             str: 大模型生成的回答
         """
         try:
-            return self.llm.generate_fallback(system_prompt, user_question)
+            return self.llm.generate_fallback(system_prompt, user_question, history, profile)
         except Exception as e:
             logger.error(f"调用大模型时出错: {e}", exc_info=True)
-            return "抱歉，我暂时无法回答您的问题，请稍后重试。"
+            return LLM_ERROR_ANSWER
     
-    async def dispatch_with_knowledge_stream(self, system_prompt: str, user_question: str) -> AsyncGenerator[str, None]:
+    async def dispatch_with_knowledge_stream(self, system_prompt: str, user_question: str, history: Optional[List[Dict[str, str]]] = None, profile: Optional[GenerationProfile] = None) -> AsyncGenerator[str, None]:
         """
         使用知识库信息调度大模型生成流式回答
         
         Args:
             system_prompt (str): 包含知识库信息的系统提示词
             user_question (str): 用户问题
+            history (Optional[List[Dict[str, str]]]): 多轮对话历史消息
+            profile (Optional[GenerationProfile]): 生成参数，为None时使用默认档位
             
         Yields:
             str: 大模型生成的文本片段
         """
         try:
-            async for chunk in self.llm.generate_with_knowledge_stream(system_prompt, user_question):
+            if self.agent_manager is not None:
+                chunks = self.agent_manager.iterate(STAGE_LLM, self.llm.iter_with_knowledge(system_prompt, user_question, history, profile))
+            else:
+                chunks = self.llm.generate_with_knowledge_stream(system_prompt, user_question, history, profile)
+            async for chunk in chunks:
                 yield chunk
         except Exception as e:
             logger.error(f"调用大模型时出错: {e}", exc_info=True)
-            yield "抱歉，我暂时无法回答您的问题，请稍后重试。"
+            yield LLM_ERROR_ANSWER
     
-    async def dispatch_fallback_stream(self, system_prompt: str, user_question: str) -> AsyncGenerator[str, None]:
+    async def dispatch_fallback_stream(self, system_prompt: str, user_question: str, history: Optional[List[Dict[str, str]]] = None, profile: Optional[GenerationProfile] = None) -> AsyncGenerator[str, None]:
         """
         使用备用方式调度大模型生成流式回答
         
         Args:
             system_prompt (str): 系统提示词
             user_question (str): 用户问题
+            history (Optional[List[Dict[str, str]]]): 多轮对话历史消息
+            profile (Optional[GenerationProfile]): 生成参数，为None时使用默认档位
             
         Yields:
             str: 大模型生成的文本片段
         """
         try:
-            async for chunk in self.llm.generate_fallback_stream(system_prompt, user_question):
+            if self.agent_manager is not None:
+                chunks = self.agent_manager.iterate(STAGE_LLM, self.llm.iter_fallback(system_prompt, user_question, history, profile))
+            else:
+                chunks = self.llm.generate_fallback_stream(system_prompt, user_question, history, profile)
+            async for chunk in chunks:
                 yield chunk
         except Exception as e:
             logger.error(f"调用大模型时出错: {e}", exc_info=True)
-            yield "抱歉，我暂时无法回答您的问题，请稍后重试。"
\ No newline at end of file
+            yield LLM_ERROR_ANSWER
\ No newline at end of file
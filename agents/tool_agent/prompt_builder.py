@@ -6,7 +6,7 @@ Prompt构建器
 """
 
 from utils.prompt_manager import PromptManager
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 class PromptBuilder:
     """
@@ -44,4 +44,18 @@ class PromptBuilder:
         Returns:
             str: 备用提示词
         """
-        return self.prompt_manager.get_fallback_prompt(user_question, file_path)
\ No newline at end of file
+        return self.prompt_manager.get_fallback_prompt(user_question, file_path)
+    
+    def build_synthesis(self, question: str, answers: List[Tuple[str, str]], file_path: Optional[str] = None) -> str:
+        """
+        构建多智能体协作的汇总提示词
+        
+        Args:
+            question (str): 用户问题
+            answers (List[Tuple[str, str]]): (领域名称, 该领域智能体的回答)列表
+            file_path (Optional[str]): 提示词模板文件路径
+            
+        Returns:
+            str: 汇总提示词
+        """
+        return self.prompt_manager.get_synthesis_prompt(question, answers, file_path)
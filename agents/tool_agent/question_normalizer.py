@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+问题规范化器
+将表述不同但含义相同的问题规范为同一形式，提高检索缓存、回答缓存与请求合并的命中率：
+全角/半角折叠（NFKC）、标点与客套用语规范、数学记号统一（√/根号/sqrt、²/^2、×/*）、数字规范
+千分位逗号与数据列表（如“95,100,105”）无法区分，不做处理
+"""
+
+import re
+import unicodedata
+
+# NFKC会把上标折叠为普通数字（²→2），需在NFKC之前先转换为^n
+_SUPERSCRIPTS = str.maketrans({"²": "^2", "³": "^3"})
+# 乘号、引号与中文标点统一
+_SYMBOLS = str.maketrans({
+    "·": "×", "∙": "×", "⋅": "×",
+    "。": ".", "、": ",",
+    "“": None, "”": None, "‘": None, "’": None,
+    "「": None, "」": None, "『": None, "』": None,
+})
+
+_SQRT_PATTERN = re.compile(r"(?:根号下?|sqrt|SQRT|Sqrt)\s*")
+_SQRT_SIMPLE_PATTERN = re.compile(r"√\((\d+(?:\.\d+)?)\)")
+# “平方根”“立方根”“平方差”“平方和”“平方数”不是乘方
+_POWER_PATTERN = re.compile(r"\*\*|的(平方|立方)(?![根差和数])")
+_MULTIPLY_PATTERN = re.compile(r"\*|乘以")
+_DIVIDE_PATTERN = re.compile(r"除以")
+
+_CN_DIGITS = {"零": 0, "一": 1, "二": 2, "两": 2, "三": 3, "四": 4, "五": 5, "六": 6, "七": 7, "八": 8, "九": 9}
+_CN_UNITS = {"十": 10, "百": 100, "千": 1000, "万": 10000}
+_CN_NUMBER = "[零一二两三四五六七八九十百千万]+"
+# 中文数字只在数学上下文中转换（根号后、乘方前），避免误改“二次根式”“一次函数”等术语
+_CN_NUMBER_PATTERN = re.compile(rf"(?<=√){_CN_NUMBER}|{_CN_NUMBER}(?=\^)")
+
+_DECIMAL_PATTERN = re.compile(r"(?<![\d.])(\d+)\.(\d*?)0+(?![\d.])")
+
+_LEADING_FILLER_PATTERN = re.compile(
+    r"^(?:(?:请问|老师好|老师|你好|您好|麻烦您?|我想问一下|我想问|我想知道|想问一下|问一下|请帮我|帮我|请)[\s,!.:~]*)+"
+)
+_TRAILING_FILLER_PATTERN = re.compile(r"(?:[\s,!?.:~]*(?:谢谢老师|谢谢您|谢谢|多谢|呢|呀|啊|吧|哈))+[\s,!?.:~]*$")
+_TRAILING_PUNCT_PATTERN = re.compile(r"[\s,!?.:;~…]+$")
+_REPEATED_PUNCT_PATTERN = re.compile(r"([,!?.:;~])\1+")
+# 仅保留两个ASCII字母数字之间的空白（如“sin x”），其余空白删除
+_SPACE_PATTERN = re.compile(r"(?<![A-Za-z0-9])\s+|\s+(?![A-Za-z0-9])")
+_MULTI_SPACE_PATTERN = re.compile(r"\s+")
+
+
+def _cn_to_int(text: str) -> str:
+    """
+    将中文数字转换为阿拉伯数字
+
+    Args:
+        text (str): 中文数字（如“十二”“一百零五”）
+
+    Returns:
+        str: 阿拉伯数字字符串
+    """
+    total, section, digit = 0, 0, 0
+    for char in text:
+        if char in _CN_DIGITS:
+            digit = _CN_DIGITS[char]
+        elif char == "万":
+            total += (section + digit) * 10000
+            section, digit = 0, 0
+        else:
+            section += (digit or 1) * _CN_UNITS[char]
+            digit = 0
+    return str(total + section + digit)
+
+
+def _strip_decimal_zeros(match: re.Match) -> str:
+    """
+    去除小数末尾的0（2.50→2.5，3.0→3）
+
+    Args:
+        match (re.Match): 匹配结果
+
+    Returns:
+        str: 规范化后的数字
+    """
+    integer, fraction = match.group(1), match.group(2)
+    return f"{integer}.{fraction}" if fraction else integer
+
+
+class QuestionNormalizer:
+    """
+    问题规范化器，所有正则与字符映射表在模块加载时预编译
+    规范化结果只用作检索查询、缓存与FAQ键：去除语气词、改写数学记号可能改变原意（如“对吧”“√(48)的平方”），
+    发送给大模型的问题使用clean的结果
+    """
+
+    @staticmethod
+    def clean(question: str) -> str:
+        """
+        只整理空白的原问题，用于提示词与对话历史
+
+        Args:
+            question (str): 原始问题
+
+        Returns:
+            str: 连续空白合并为一个空格并去除首尾空白的问题
+        """
+        return _MULTI_SPACE_PATTERN.sub(" ", question).strip()
+
+    def normalize(self, question: str) -> str:
+        """
+        规范化问题
+
+        Args:
+            question (str): 原始问题
+
+        Returns:
+            str: 规范化后的问题，规范化后为空时返回去除首尾空白的原问题
+        """
+        text = question.translate(_SUPERSCRIPTS)
+        # 快速检查已是NFKC形式时跳过规范化（完整NFKC的开销约为其余步骤之和）
+        if not unicodedata.is_normalized("NFKC", text):
+            text = unicodedata.normalize("NFKC", text)
+        text = text.translate(_SYMBOLS)
+
+        # 数学记号
+        text = _SQRT_PATTERN.sub("√", text)
+        text = _POWER_PATTERN.sub(self._power, text)
+        text = _MULTIPLY_PATTERN.sub("×", text)
+        text = _DIVIDE_PATTERN.sub("÷", text)
+        if "√" in text or "^" in text:
+            text = _CN_NUMBER_PATTERN.sub(lambda match: _cn_to_int(match.group(0)), text)
+
+        # 数字
+        if "." in text:
+            text = _DECIMAL_PATTERN.sub(_strip_decimal_zeros, text)
+        if "√(" in text:
+            text = _SQRT_SIMPLE_PATTERN.sub(r"√\1", text)
+
+        # 空白、客套用语与标点
+        text = _MULTI_SPACE_PATTERN.sub(" ", text).strip()
+        text = _LEADING_FILLER_PATTERN.sub("", text)
+        text = _TRAILING_FILLER_PATTERN.sub("", text)
+        text = _TRAILING_PUNCT_PATTERN.sub("", text)
+        text = _REPEATED_PUNCT_PATTERN.sub(r"\1", text)
+        if " " in text:
+            text = _SPACE_PATTERN.sub("", text)
+        return text or question.strip()
+
+    @staticmethod
+    def _power(match: re.Match) -> str:
+        """
+        将**、“的平方”“的立方”统一为^记号
+
+        Args:
+            match (re.Match): 匹配结果
+
+        Returns:
+            str: ^记号
+        """
+        word = match.group(1)
+        if word == "平方":
+            return "^2"
+        if word == "立方":
+            return "^3"
+        return "^"
@@ -5,8 +5,8 @@
 处理用户输入的自然语言问题，提取二次根式相关的核心诉求
 """
 
-import re
 import logging
+from agents.tool_agent.question_normalizer import QuestionNormalizer
 
 logger = logging.getLogger(__name__)
 
@@ -19,11 +19,13 @@ class QuestionProcessor:
         """
         初始化问题处理器
         """
-        pass
+        self.normalizer = QuestionNormalizer()
     
     def process(self, user_question: str) -> str:
         """
         处理用户问题
+        规范化后的问题同时作为检索查询与缓存键，表述不同但含义相同的问题可命中同一缓存；
+        规范化可能改变原意，不作为发送给大模型的问题
         
         Args:
             user_question (str): 用户输入的自然语言问题
@@ -31,15 +33,16 @@ class QuestionProcessor:
         Returns:
             str: 处理后的问题
         """
-        # 去除问题前后的空格
-        processed_question = user_question.strip()
-        
-        # 去除问题末尾的问号（如果有的话）
-        if processed_question.endswith('?') or processed_question.endswith('？'):
-            processed_question = processed_question[:-1]
-            
-        # 简单的关键词提取和规范化
-        # 这里可以添加更复杂的自然语言处理逻辑
-        processed_question = re.sub(r'\s+', ' ', processed_question)  # 合并多个空格为一个
-        
-        return processed_question
\ No newline at end of file
+        return self.normalizer.normalize(user_question)
+
+    def clean(self, user_question: str) -> str:
+        """
+        整理发送给大模型的问题，只合并空白，保留原问题的措辞与记号
+
+        Args:
+            user_question (str): 用户输入的自然语言问题
+
+        Returns:
+            str: 整理后的问题
+        """
+        return self.normalizer.clean(user_question)
@@ -0,0 +1,281 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+二次根式精确运算
+以“有理系数 × 最简二次根式”的线性组合表示数值，支持加、减、乘、除（除数为单项式）、乘方与表达式解析，
+供各智能体的确定性快速路径使用
+"""
+
+import re
+import math
+from fractions import Fraction
+from typing import Dict, List, Tuple, Union
+
+_TOKEN_PATTERN = re.compile(r"\d+(?:\.\d+)?|[√()+\-×÷/^]")
+# 试除上限：试除后剩余部分的质因数都大于该值，被开方数小于其立方时至多含两个质因数，可由完全平方检查精确判断
+_TRIAL_DIVISION_LIMIT = 1000
+
+
+def simplify_sqrt(value: Fraction) -> Tuple[Fraction, int]:
+    """
+    将√value化为最简二次根式：系数 × √被开方数（被开方数不含平方因数，分母有理化）
+
+    Args:
+        value (Fraction): 非负被开方数
+
+    Returns:
+        Tuple[Fraction, int]: (系数, 被开方数)，完全平方数的被开方数为1
+
+    Raises:
+        ValueError: 被开方数为负数
+    """
+    if value < 0:
+        raise ValueError("被开方数不能为负数")
+    # √(a/b) = √(ab) / b
+    radicand = value.numerator * value.denominator
+    coefficient = Fraction(1, value.denominator)
+    for factor in range(2, _TRIAL_DIVISION_LIMIT + 1):
+        square = factor * factor
+        if square > radicand:
+            break
+        while radicand % square == 0:
+            radicand //= square
+            coefficient *= factor
+    root = math.isqrt(radicand)
+    if root * root == radicand:
+        return coefficient * root, 1
+    return coefficient, radicand
+
+
+class RadicalValue:
+    """
+    二次根式线性组合的精确值：sum(系数 × √被开方数)，被开方数均为最简形式
+    """
+    __slots__ = ("terms",)
+
+    def __init__(self, terms: Dict[int, Fraction] = None):
+        """
+        初始化精确值
+
+        Args:
+            terms (Dict[int, Fraction]): 被开方数 -> 系数，被开方数1表示有理数部分
+        """
+        self.terms = {radicand: coefficient for radicand, coefficient in (terms or {}).items() if coefficient != 0}
+
+    @classmethod
+    def rational(cls, value: Union[int, Fraction]) -> "RadicalValue":
+        return cls({1: Fraction(value)})
+
+    @classmethod
+    def sqrt(cls, value: Union[int, Fraction]) -> "RadicalValue":
+        coefficient, radicand = simplify_sqrt(Fraction(value))
+        return cls({radicand: coefficient})
+
+    @property
+    def is_rational(self) -> bool:
+        return all(radicand == 1 for radicand in self.terms)
+
+    def to_fraction(self) -> Fraction:
+        """
+        获取有理数值
+
+        Returns:
+            Fraction: 有理数值
+
+        Raises:
+            ValueError: 不是有理数
+        """
+        if not self.is_rational:
+            raise ValueError("不是有理数")
+        return self.terms.get(1, Fraction(0))
+
+    def __add__(self, other: "RadicalValue") -> "RadicalValue":
+        terms = dict(self.terms)
+        for radicand, coefficient in other.terms.items():
+            terms[radicand] = terms.get(radicand, Fraction(0)) + coefficient
+        return RadicalValue(terms)
+
+    def __neg__(self) -> "RadicalValue":
+        return RadicalValue({radicand: -coefficient for radicand, coefficient in self.terms.items()})
+
+    def __sub__(self, other: "RadicalValue") -> "RadicalValue":
+        return self + (-other)
+
+    def __mul__(self, other: "RadicalValue") -> "RadicalValue":
+        result = RadicalValue()
+        for radicand_a, coefficient_a in self.terms.items():
+            for radicand_b, coefficient_b in other.terms.items():
+                coefficient, radicand = simplify_sqrt(Fraction(radicand_a * radicand_b))
+                result = result + RadicalValue({radicand: coefficient_a * coefficient_b * coefficient})
+        return result
+
+    def __truediv__(self, other: "RadicalValue") -> "RadicalValue":
+        if len(other.terms) != 1:
+            raise ValueError("除数必须为单项式")
+        (radicand, coefficient), = other.terms.items()
+        # a ÷ (c√r) = a × √r ÷ (c × r)
+        return self * RadicalValue({radicand: 1 / (coefficient * radicand)})
+
+    def __pow__(self, exponent: int) -> "RadicalValue":
+        result = RadicalValue.rational(1)
+        for _ in range(exponent):
+            result = result * self
+        return result
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, RadicalValue) and self.terms == other.terms
+
+    def __float__(self) -> float:
+        return sum((float(coefficient) * math.sqrt(radicand) for radicand, coefficient in self.terms.items()), 0.0)
+
+    def __str__(self) -> str:
+        if not self.terms:
+            return "0"
+        parts = []
+        # 有理数部分在前，根式部分按被开方数升序
+        for radicand in sorted(self.terms):
+            coefficient = self.terms[radicand]
+            sign = "-" if coefficient < 0 else "+"
+            magnitude = abs(coefficient)
+            if radicand == 1:
+                body = format_fraction(magnitude)
+            elif magnitude == 1:
+                body = f"√{radicand}"
+            elif magnitude.denominator == 1:
+                body = f"{magnitude.numerator}√{radicand}"
+            elif magnitude.numerator == 1:
+                body = f"√{radicand}/{magnitude.denominator}"
+            else:
+                body = f"{magnitude.numerator}√{radicand}/{magnitude.denominator}"
+            parts.append((sign, body))
+        text = ("-" if parts[0][0] == "-" else "") + parts[0][1]
+        return text + "".join(f"{sign}{body}" for sign, body in parts[1:])
+
+
+def format_fraction(value: Fraction) -> str:
+    """
+    格式化有理数：整数直接输出，其余输出最简分数
+
+    Args:
+        value (Fraction): 有理数
+
+    Returns:
+        str: 格式化结果
+    """
+    if value.denominator == 1:
+        return str(value.numerator)
+    return f"{value.numerator}/{value.denominator}"
+
+
+class ExpressionParser:
+    """
+    二次根式表达式解析器（递归下降）
+    语法：表达式 = 项 {(+|-) 项}；项 = 因式 {(×|÷|/) 因式 | 紧邻的因式}；因式 = [-] 基本式 [^整数]；
+    基本式 = 数字 | √基本式 | (表达式)
+    """
+
+    def __init__(self, expression: str):
+        """
+        初始化解析器
+
+        Args:
+            expression (str): 表达式文本
+
+        Raises:
+            ValueError: 表达式含无法识别的字符
+        """
+        self.tokens: List[str] = _TOKEN_PATTERN.findall(expression)
+        if "".join(self.tokens) != expression.replace(" ", ""):
+            raise ValueError(f"无法识别的表达式: {expression}")
+        self.position = 0
+
+    def parse(self) -> RadicalValue:
+        """
+        解析并计算表达式
+
+        Returns:
+            RadicalValue: 精确值
+
+        Raises:
+            ValueError: 表达式不合法或无法精确计算
+        """
+        value = self._expression()
+        if self.position != len(self.tokens):
+            raise ValueError("表达式不完整")
+        return value
+
+    def _peek(self) -> str:
+        return self.tokens[self.position] if self.position < len(self.tokens) else ""
+
+    def _take(self) -> str:
+        token = self._peek()
+        if not token:
+            raise ValueError("表达式不完整")
+        self.position += 1
+        return token
+
+    def _expression(self) -> RadicalValue:
+        value = self._term()
+        while self._peek() in ("+", "-"):
+            if self._take() == "+":
+                value = value + self._term()
+            else:
+                value = value - self._term()
+        return value
+
+    def _term(self) -> RadicalValue:
+        value = self._factor()
+        while True:
+            token = self._peek()
+            if token in ("×", "÷", "/"):
+                self._take()
+                value = value * self._factor() if token == "×" else value / self._factor()
+            elif token == "√" or token == "(":
+                # 省略乘号的写法：2√3、3(√2+1)
+                value = value * self._factor()
+            else:
+                return value
+
+    def _factor(self) -> RadicalValue:
+        if self._peek() == "-":
+            self._take()
+            return -self._factor()
+        value = self._primary()
+        if self._peek() == "^":
+            self._take()
+            exponent = self._take()
+            if not exponent.isdigit() or int(exponent) > 10:
+                raise ValueError("仅支持不超过10的非负整数指数")
+            value = value ** int(exponent)
+        return value
+
+    def _primary(self) -> RadicalValue:
+        token = self._take()
+        if token == "√":
+            # √a^n按(√a)^n计算，被开方数非负时与√(a^n)相等
+            return RadicalValue.sqrt(self._primary().to_fraction())
+        if token == "(":
+            value = self._expression()
+            if self._take() != ")":
+                raise ValueError("括号不匹配")
+            return value
+        if token[0].isdigit():
+            return RadicalValue.rational(Fraction(token))
+        raise ValueError(f"意外的符号: {token}")
+
+
+def evaluate(expression: str) -> RadicalValue:
+    """
+    精确计算二次根式表达式
+
+    Args:
+        expression (str): 表达式，如“2√3+√12”“√18÷√2”
+
+    Returns:
+        RadicalValue: 精确值
+
+    Raises:
+        ValueError: 表达式不合法或无法精确计算（如被开方数为负数、除数为多项式）
+        ZeroDivisionError: 除数为0
+    """
+    return ExpressionParser(expression).parse()
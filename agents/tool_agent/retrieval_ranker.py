@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+检索结果重排
+对top-k课程及各课程下的报告组成的（课程, 报告）候选，结合推荐系统返回的相似度与问题的字面重合度重新排序
+"""
+
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Set
+
+# 参与字面重合度计算的字符：汉字、字母、数字与数学符号
+_TOKEN_PATTERN = re.compile(r"[一-鿿A-Za-z0-9√²^=+\-×÷△∠°]+")
+
+
+class RankedCandidate(NamedTuple):
+    """
+    重排后的候选
+    """
+    course: Dict[str, Any]
+    report: Dict[str, Any]
+    # 推荐系统相似度（课程与报告相似度的平均）
+    upstream_score: float
+    # 问题与课程/报告文本的字面重合度
+    lexical_score: float
+    # 综合得分
+    score: float
+
+
+def _bigrams(text: str) -> Set[str]:
+    """
+    提取字符二元组（单字符文本返回该字符）
+
+    Args:
+        text (str): 文本
+
+    Returns:
+        Set[str]: 二元组集合
+    """
+    grams = set()
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        if len(token) == 1:
+            grams.add(token)
+        grams.update(token[i:i + 2] for i in range(len(token) - 1))
+    return grams
+
+
+def lexical_overlap(query: str, text: str) -> float:
+    """
+    计算问题的字符二元组在候选文本中出现的比例
+
+    Args:
+        query (str): 规范化后的问题
+        text (str): 候选文本
+
+    Returns:
+        float: 0~1之间的重合度
+    """
+    query_grams = _bigrams(query)
+    if not query_grams:
+        return 0.0
+    return len(query_grams & _bigrams(text)) / len(query_grams)
+
+
+def _candidate_text(course: Dict[str, Any], report: Dict[str, Any]) -> str:
+    """
+    拼接候选的课程名称、文件名、视频摘要与报告关键点
+    """
+    parts = [str(course.get(field, "")) for field in ("resource_name", "file_name", "video_summary")]
+    parts.extend(str(point) for point in report.get("key_points") or [])
+    return " ".join(parts)
+
+
+def _score(item: Dict[str, Any]) -> float:
+    try:
+        return float(item.get("score") or 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def rank_candidates(query: str, courses: List[Dict[str, Any]], reports: List[Optional[Dict[str, Any]]],
+                    lexical_weight: float) -> List[RankedCandidate]:
+    """
+    对（课程, 报告）候选重排
+
+    Args:
+        query (str): 规范化后的问题
+        courses (List[Dict[str, Any]]): 推荐系统返回的课程
+        reports (List[Optional[Dict[str, Any]]]): 与courses一一对应的报告检索结果（data字段），失败时为None
+        lexical_weight (float): 字面重合度的权重（0~1），其余权重给推荐系统相似度
+
+    Returns:
+        List[RankedCandidate]: 按综合得分从高到低排列的候选，同分时保持推荐系统的原有顺序
+    """
+    candidates = []
+    for course, course_reports in zip(courses, reports):
+        for report in course_reports or []:
+            upstream = (_score(course) + _score(report)) / 2
+            lexical = lexical_overlap(query, _candidate_text(course, report))
+            score = (1 - lexical_weight) * upstream + lexical_weight * lexical
+            candidates.append(RankedCandidate(course, report, round(upstream, 4), round(lexical, 4), round(score, 4)))
+    # sorted为稳定排序
+    return sorted(candidates, key=lambda candidate: -candidate.score)
+
+
+def merge_key_points(reports: List[Dict[str, Any]]) -> List[str]:
+    """
+    按顺序合并多个报告的关键点并去重
+
+    Args:
+        reports (List[Dict[str, Any]]): 报告
+
+    Returns:
+        List[str]: 合并后的关键点
+    """
+    merged = []
+    for report in reports:
+        for point in report.get("key_points") or []:
+            if point not in merged:
+                merged.append(point)
+    return merged
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+课程相似度阈值
+推荐系统返回的最佳课程相似度低于智能体阈值时跳过报告检索，直接使用备用方式回答，节省一次上游往返
+"""
+
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+
+def parse_thresholds(text: str) -> Dict[str, float]:
+    """
+    解析按智能体配置的阈值
+
+    Args:
+        text (str): 形如 "sqrt_agent:0.55,pythagorean_agent:0.62" 的配置
+
+    Returns:
+        Dict[str, float]: 智能体名称 -> 阈值
+
+    Raises:
+        ValueError: 配置格式错误
+    """
+    thresholds = {}
+    for item in text.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        agent, separator, value = item.partition(":")
+        if not separator or not agent.strip():
+            raise ValueError(f"阈值配置格式错误: {item}，应为 智能体名称:阈值")
+        thresholds[agent.strip()] = float(value)
+    return thresholds
+
+
+def best_course_score(courses: List[Dict[str, Any]]) -> Optional[float]:
+    """
+    获取课程中的最高相似度
+
+    Args:
+        courses (List[Dict[str, Any]]): 推荐系统返回的课程
+
+    Returns:
+        Optional[float]: 最高相似度，课程均未返回score字段时为None
+    """
+    scores = []
+    for course in courses:
+        try:
+            scores.append(float(course["score"]))
+        except (KeyError, TypeError, ValueError):
+            continue
+    return max(scores) if scores else None
+
+
+class ScoreGate:
+    """
+    按智能体的课程相似度阈值判断是否检索报告，并统计各智能体的跳过率
+    """
+
+    def __init__(self, default: float, overrides: Optional[Dict[str, float]] = None):
+        """
+        初始化阈值判断
+
+        Args:
+            default (float): 默认阈值，为0时不跳过
+            overrides (Optional[Dict[str, float]]): 智能体名称 -> 阈值
+        """
+        self.default = default
+        self.overrides = overrides or {}
+        self._checked: Dict[str, int] = defaultdict(int)
+        self._skipped: Dict[str, int] = defaultdict(int)
+
+    def threshold(self, agent: str) -> float:
+        """
+        获取智能体的阈值
+
+        Args:
+            agent (str): 智能体名称
+
+        Returns:
+            float: 阈值
+        """
+        return self.overrides.get(agent, self.default)
+
+    def allow(self, agent: str, score: Optional[float], record: bool = True) -> bool:
+        """
+        判断是否检索报告，推荐系统未返回相似度时总是检索
+
+        Args:
+            agent (str): 智能体名称
+            score (Optional[float]): 最佳课程相似度
+            record (bool): 是否计入统计
+
+        Returns:
+            bool: 是否检索报告
+        """
+        if score is None:
+            return True
+        allowed = score >= self.threshold(agent)
+        if record:
+            self._checked[agent] += 1
+            if not allowed:
+                self._skipped[agent] += 1
+        return allowed
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        获取各智能体的阈值与跳过率
+
+        Returns:
+            Dict[str, Dict[str, Any]]: 智能体名称 -> 阈值、判断次数、跳过次数、跳过率
+        """
+        return {
+            agent: {
+                "threshold": self.threshold(agent),
+                "checked": checked,
+                "skipped": self._skipped[agent],
+                "skip_rate": round(self._skipped[agent] / checked, 4),
+            }
+            for agent, checked in self._checked.items()
+        }
@@ -5,4 +5,7 @@ from . import agents_router
 from . import pythagorean_router
 from . import parallelogram_router
 from . import linear_function_router
-from . import data_analysis_router
\ No newline at end of file
+from . import data_analysis_router
+from . import session_router
+from . import admin_router
+from . import collaborate_router
\ No newline at end of file
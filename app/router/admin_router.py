@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+管理路由
+定义/admin/profile与/admin/tracemalloc接口，用于在线上worker中按需进行CPU与内存剖析，
+需在请求头X-Admin-Token中携带ADMIN_TOKEN，未配置ADMIN_TOKEN时接口不可用
+"""
+
+import hmac
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import Response
+from pydantic import BaseModel, Field
+from core.conf import config
+from utils.profiler import (
+    profiler, MODE_CPROFILE, start_tracemalloc, stop_tracemalloc, tracemalloc_status, tracemalloc_top
+)
+
+
+async def verify_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """
+    校验管理令牌
+
+    Args:
+        x_admin_token (Optional[str]): 请求头中的管理令牌
+
+    Raises:
+        HTTPException: 未配置令牌时返回404，令牌错误时返回403
+    """
+    if not config.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, config.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="管理令牌无效")
+
+
+# 创建路由实例
+router = APIRouter(prefix="/admin", tags=["管理"], dependencies=[Depends(verify_admin_token)])
+
+
+class ProfileRequest(BaseModel):
+    """
+    剖析任务请求模型
+    """
+    path_prefix: str = Field(..., description="要剖析的请求路径前缀，如 /api/v1/sqrt")
+    requests: int = Field(10, ge=1, le=1000, description="要剖析的后续请求数")
+    mode: str = Field(MODE_CPROFILE, description="剖析方式：cprofile 或 sampling")
+    interval_ms: float = Field(5, gt=0, le=1000, description="sampling方式的采样间隔（毫秒）")
+
+
+@router.post("/profile")
+async def start_profile(request: ProfileRequest):
+    """
+    开始剖析当前worker中匹配路径的后续N个请求
+
+    Args:
+        request (ProfileRequest): 剖析任务请求
+
+    Returns:
+        dict: 剖析任务状态
+    """
+    try:
+        return profiler.start(request.path_prefix, request.requests, request.mode, request.interval_ms / 1000)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.get("/profile")
+async def get_profile_status():
+    """
+    获取剖析任务状态
+
+    Returns:
+        dict: 剖析任务状态
+    """
+    status = profiler.status()
+    if status is None:
+        raise HTTPException(status_code=404, detail="没有剖析任务")
+    return status
+
+
+@router.delete("/profile")
+async def cancel_profile():
+    """
+    提前结束剖析任务，已采集的数据可继续导出
+
+    Returns:
+        dict: 剖析任务状态
+    """
+    status = profiler.cancel()
+    if status is None:
+        raise HTTPException(status_code=404, detail="没有剖析任务")
+    return status
+
+
+@router.get("/profile/result")
+async def get_profile_result(format: str = "pstats", limit: int = 50):
+    """
+    导出剖析结果
+
+    Args:
+        format (str): cprofile方式为pstats或text，sampling方式为collapsed
+        limit (int): text格式输出的函数数量
+
+    Returns:
+        Response: 剖析结果文件
+    """
+    try:
+        content = profiler.result(format, limit)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if format == "pstats":
+        return Response(content, media_type="application/octet-stream",
+                        headers={"Content-Disposition": "attachment; filename=profile.pstats"})
+    return Response(content, media_type="text/plain; charset=utf-8")
+
+
+@router.post("/tracemalloc/start")
+async def tracemalloc_start(frames: int = 10):
+    """
+    开始跟踪内存分配（开启期间所有分配都有额外开销，排查结束后应及时停止）
+
+    Args:
+        frames (int): 每次分配记录的调用栈深度
+
+    Returns:
+        dict: 跟踪状态
+    """
+    return start_tracemalloc(frames)
+
+
+@router.post("/tracemalloc/stop")
+async def tracemalloc_stop():
+    """
+    停止跟踪内存分配
+
+    Returns:
+        dict: 跟踪状态
+    """
+    return stop_tracemalloc()
+
+
+@router.get("/tracemalloc")
+async def tracemalloc_report(limit: int = 20, group_by: str = "lineno"):
+    """
+    获取内存分配最多的位置
+
+    Args:
+        limit (int): 返回条数
+        group_by (str): 分组方式（lineno/filename/traceback）
+
+    Returns:
+        dict: 跟踪状态与分配热点
+    """
+    if group_by not in ("lineno", "filename", "traceback"):
+        raise HTTPException(status_code=400, detail=f"不支持的分组方式: {group_by}")
+    try:
+        top = tracemalloc_top(limit, group_by)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {**tracemalloc_status(), "top": top}
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+多智能体协作路由
+定义POST /api/v1/math/collaborate接口，跨领域的问题由多个智能体并发回答后汇总
+"""
+
+import time
+import logging
+from fastapi import APIRouter
+from app.schema.math_schema import ChatRequest, ChatResponse
+from utils.json_codec import FastJSONResponse
+from app.router import sqrt_router, pythagorean_router, parallelogram_router, linear_function_router, data_analysis_router
+from app.router.shared_math_handler import handle_collaborate_question, handle_collaborate_stream
+
+logger = logging.getLogger(__name__)
+
+# 参与协作的智能体：智能体名称 -> (领域名称, 提示词文件路径字典)
+AGENTS = {
+    "sqrt_agent": ("二次根式", sqrt_router.PROMPT_PATHS),
+    "pythagorean_agent": ("勾股定理", pythagorean_router.PROMPT_PATHS),
+    "parallelogram_agent": ("平行四边形", parallelogram_router.PROMPT_PATHS),
+    "linear_function_agent": ("一次函数", linear_function_router.PROMPT_PATHS),
+    "data_analysis_agent": ("数据分析", data_analysis_router.PROMPT_PATHS),
+}
+
+# 创建路由实例
+router = APIRouter(prefix="/api/v1/math", tags=["多智能体协作"])
+
+@router.post("/collaborate", response_model=ChatResponse)
+async def collaborate_chat(request: ChatRequest):
+    """
+    多智能体协作问答接口
+    
+    Args:
+        request (ChatRequest): 聊天请求数据
+        
+    Returns:
+        ChatResponse: 包含汇总回答和各智能体相关知识点的响应数据
+    """
+    start_time = time.time()
+    logger.debug(f"开始处理协作问题: {request.user_question}")
+    
+    response = await handle_collaborate_question(request, AGENTS)
+    
+    process_time = time.time() - start_time
+    logger.debug(f"协作问题处理完成，耗时: {process_time:.2f}秒")
+    
+    return FastJSONResponse(response)
+
+@router.post("/collaborate/stream")
+async def collaborate_chat_stream(request: ChatRequest):
+    """
+    多智能体协作问答流式接口
+    
+    Args:
+        request (ChatRequest): 聊天请求数据
+        
+    Returns:
+        StreamingResponse: SSE流式响应
+    """
+    logger.debug(f"开始流式处理协作问题: {request.user_question}")
+    return await handle_collaborate_stream(request, AGENTS)
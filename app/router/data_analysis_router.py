@@ -8,9 +8,11 @@
 import time
 import logging
 import os
-from fastapi import APIRouter
-from app.schema.math_schema import ChatRequest, ChatResponse
-from app.router.shared_math_handler import handle_math_question, handle_math_question_stream
+from typing import Optional
+from fastapi import APIRouter, Header, WebSocket
+from app.schema.math_schema import ChatRequest, ChatResponse, BatchChatRequest, BatchChatResponse
+from utils.json_codec import FastJSONResponse
+from app.router.shared_math_handler import handle_math_question, handle_math_question_stream, handle_math_batch, handle_math_batch_stream, handle_math_websocket
 from core.conf import config
 
 logger = logging.getLogger(__name__)
@@ -36,32 +38,80 @@ async def data_analysis_chat(request: ChatRequest):
         ChatResponse: 包含回答和相关知识点的响应数据
     """
     start_time = time.time()
-    logger.info(f"开始处理数据分析问题: {request.user_question}")
+    logger.debug(f"开始处理数据分析问题: {request.user_question}")
     
     response = await handle_math_question(request, PROMPT_PATHS)
     
     process_time = time.time() - start_time
-    logger.info(f"数据分析问题处理完成，耗时: {process_time:.2f}秒")
+    logger.debug(f"数据分析问题处理完成，耗时: {process_time:.2f}秒")
     
-    return response
+    return FastJSONResponse(response)
 
 @router.post("/data_analysis/stream")
-async def data_analysis_chat_stream(request: ChatRequest):
+async def data_analysis_chat_stream(request: ChatRequest, last_event_id: Optional[str] = Header(None)):
     """
     数据的分析问答流式接口
     
     Args:
         request (ChatRequest): 聊天请求数据
+        last_event_id (Optional[str]): 断线重连时的Last-Event-ID请求头
         
     Returns:
         StreamingResponse: SSE流式响应
     """
     start_time = time.time()
-    logger.info(f"开始流式处理数据分析问题: {request.user_question}")
+    logger.debug(f"开始流式处理数据分析问题: {request.user_question}")
+    
+    response = await handle_math_question_stream(request, PROMPT_PATHS, last_event_id)
+    
+    process_time = time.time() - start_time
+    logger.debug(f"数据分析流式问题处理完成，耗时: {process_time:.2f}秒")
+    
+    return response
+
+@router.post("/data_analysis/batch", response_model=BatchChatResponse)
+async def data_analysis_chat_batch(request: BatchChatRequest):
+    """
+    数据分析批量问答接口，规范化后相同的问题只处理一次，结果按请求顺序返回
+    
+    Args:
+        request (BatchChatRequest): 批量聊天请求数据
+        
+    Returns:
+        BatchChatResponse: 按请求顺序排列的回答
+    """
+    start_time = time.time()
+    logger.debug(f"开始批量处理数据分析问题，问题数: {len(request.questions)}")
     
-    response = await handle_math_question_stream(request, PROMPT_PATHS)
+    response = await handle_math_batch(request, PROMPT_PATHS)
     
     process_time = time.time() - start_time
-    logger.info(f"数据分析流式问题处理完成，耗时: {process_time:.2f}秒")
+    logger.debug(f"数据分析批量问题处理完成，耗时: {process_time:.2f}秒")
+    
+    return FastJSONResponse(response)
+
+@router.post("/data_analysis/batch/stream")
+async def data_analysis_chat_batch_stream(request: BatchChatRequest):
+    """
+    数据分析批量问答流式接口，每个问题完成后立即输出一行NDJSON
     
-    return response
\ No newline at end of file
+    Args:
+        request (BatchChatRequest): 批量聊天请求数据
+        
+    Returns:
+        StreamingResponse: NDJSON流式响应
+    """
+    logger.debug(f"开始批量流式处理数据分析问题，问题数: {len(request.questions)}")
+    return await handle_math_batch_stream(request, PROMPT_PATHS)
+
+# FastAPI 0.68的APIRouter不会为WebSocket路由添加prefix，需写入完整路径
+@router.websocket(f"{router.prefix}/data_analysis/ws")
+async def data_analysis_chat_ws(websocket: WebSocket):
+    """
+    数据分析多问题会话WebSocket接口，一个连接上连续提问，回答片段带问题ID流式返回
+    
+    Args:
+        websocket (WebSocket): WebSocket连接
+    """
+    logger.debug("数据分析WebSocket会话连接")
+    await handle_math_websocket(websocket, PROMPT_PATHS)
@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+会话信息路由
+定义GET /api/v1/sessions接口，用于查看多轮对话会话的内存占用
+"""
+
+from fastapi import APIRouter, HTTPException
+from core.registrar import registrar
+
+# 创建路由实例
+router = APIRouter(prefix="/api/v1", tags=["会话信息"])
+
+
+@router.get("/sessions")
+async def get_sessions_stats():
+    """
+    获取会话存储的整体统计信息
+
+    Returns:
+        dict: 会话数量、总内存占用与内存上限
+    """
+    session_store = registrar.get_component("session_store")
+    if session_store is None:
+        raise HTTPException(status_code=503, detail="系统初始化未完成，请稍后重试。")
+    return session_store.stats()
+
+
+@router.get("/sessions/{session_id}")
+async def get_session_stats(session_id: str):
+    """
+    获取单个会话的统计信息
+
+    Args:
+        session_id (str): 会话ID
+
+    Returns:
+        dict: 对话轮数、token数、内存占用等信息
+    """
+    session_store = registrar.get_component("session_store")
+    if session_store is None:
+        raise HTTPException(status_code=503, detail="系统初始化未完成，请稍后重试。")
+    session = session_store.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="会话不存在或已过期")
+    return session.stats()
@@ -5,346 +5,1686 @@
 用于处理具有相同逻辑但不同配置的数学问题路由
 """
 
-import requests
+import os
+import asyncio
 import logging
 import time
-import json
-from app.schema.math_schema import ChatRequest, ChatResponse
+import uuid
+from contextlib import aclosing
+from app.schema.math_schema import ChatRequest, ChatResponse, BatchChatRequest, BatchChatResponse, BatchItemResponse
 from core.registrar import registrar
 from core.conf import config
+from utils.session_store import DialogueTurn
+from utils.agent_manager import STAGE_RETRIEVAL, STAGE_LLM, STAGE_CPU
+from agents.tool_agent.llm_dispatcher import is_error_answer, is_truncated_answer
+from agents.tool_agent.fast_path import FastPathSolver, FastPathResult, FAST_PATH_DIRECT
+from agents.tool_agent.retrieval_ranker import rank_candidates, merge_key_points
+from agents.tool_agent.score_gate import best_course_score
+from agents.tool_agent.generation_profiles import GenerationChoice, TIER_FAST, TIER_FULL
+from llms.qwen_llm import GenerationProfile
+from utils.metrics import RequestTimer, current_timer, start_request_timer
+from utils.log_pipeline import log_payload, log_request_summary, begin_request_logging
+from utils.json_codec import dumps_str, loads
+from utils.cache_warmer import is_warmup_request
+from utils.admission import AdmissionRejected, AdmissionTicket
+from utils.degradation import LEVEL_NORMAL, LEVEL_SKIP_REPORTS, LEVEL_CAP_TOKENS, LEVEL_FAST_MODEL, LEVEL_CACHE_ONLY
+from utils.pipeline import Pipeline, PipelineContext, Stage, TimingHook, CacheHook
+from fastapi import HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.responses import StreamingResponse
-from typing import AsyncGenerator, Dict, Any
+from pydantic import ValidationError
+from typing import AsyncGenerator, Callable, Dict, Any, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
-async def handle_math_question(request: ChatRequest, prompt_paths: dict) -> ChatResponse:
+
+def _sse_event(event_type: str, data: Any) -> str:
+    """
+    构建一条SSE事件数据
+
+    Args:
+        event_type (str): 事件类型（stage/knowledge/answer_chunk/complete/error）
+        data (Any): 事件数据
+
+    Returns:
+        str: SSE格式的数据片段
+    """
+    return f"data: {dumps_str({'type': event_type, 'data': data})}\n\n"
+
+
+async def _run_stage(stage: str, func, *args):
+    """
+    在智能体管理器对应阶段的线程池中执行阻塞调用，管理器未注册时直接执行
+
+    Args:
+        stage (str): 阶段类型（retrieval/llm/cpu）
+        func: 要执行的阻塞函数
+        *args: 函数位置参数
+
+    Returns:
+        Any: 函数返回值
+    """
+    agent_manager = registrar.get_component("agent_manager")
+    if agent_manager is None:
+        return func(*args)
+    return await agent_manager.run(stage, func, *args)
+
+
+async def _cache_io(func, *args):
+    """
+    执行缓存读写：配置了网络共享缓存时读写可能涉及网络往返，放到检索线程池执行，避免阻塞事件循环
+
+    Args:
+        func: 缓存读写函数
+        *args: 函数位置参数
+
+    Returns:
+        Any: 函数返回值
+    """
+    cache = registrar.get_component("cache")
+    if cache is not None and getattr(cache, "remote", None) is not None:
+        return await _run_stage(STAGE_RETRIEVAL, func, *args)
+    return func(*args)
+
+
+async def _search_reports(knowledge_retriever, processed_question: str,
+                          courses: List[Dict[str, Any]]) -> Tuple[int, List[Tuple[Dict[str, Any], Dict[str, Any]]]]:
+    """
+    检索课程下的报告，选出用于回答的（课程, 报告）
+    只有一个课程时直接检索其报告；多个课程时在检索线程池中并发检索各课程的报告（耗时约为一次报告检索），
+    按推荐系统相似度与字面重合度重排后取最佳候选，开启 RETRIEVAL_MERGE_KEY_POINTS 时再附加次优候选
+
+    Args:
+        knowledge_retriever: 知识检索器
+        processed_question (str): 处理后的问题
+        courses (List[Dict[str, Any]]): 推荐系统返回的课程
+
+    Returns:
+        Tuple[int, List[Tuple[Dict[str, Any], Dict[str, Any]]]]: (状态码, 选中的（课程, 报告）)，
+            全部课程的报告检索失败时返回首个课程的状态码，没有匹配的报告时列表为空
+    """
+    if len(courses) == 1:
+        reports_status, reports_data = await _run_stage(STAGE_RETRIEVAL, knowledge_retriever.search_reports, courses[0]["course_uuid"], processed_question)
+        if reports_status != 200:
+            return reports_status, []
+        log_payload(logger, "报告数据解析完成", reports_data)
+        reports = reports_data.get("data")
+        return reports_status, [(courses[0], reports[0])] if reports else []
+
+    results = await asyncio.gather(*(_run_stage(STAGE_RETRIEVAL, knowledge_retriever.search_reports, course["course_uuid"], processed_question)
+                                     for course in courses), return_exceptions=True)
+    course_reports = []
+    for course, result in zip(courses, results):
+        if isinstance(result, Exception) or result[0] != 200:
+            logger.warning(f"报告信息获取失败，course_uuid: {course['course_uuid']}，结果: {result if isinstance(result, Exception) else result[0]}")
+            course_reports.append(None)
+        else:
+            course_reports.append(result[1].get("data"))
+    if all(reports is None for reports in course_reports):
+        if isinstance(results[0], Exception):
+            raise results[0]
+        return results[0][0], []
+    log_payload(logger, "报告数据解析完成", course_reports)
+
+    ranked = rank_candidates(processed_question, courses, course_reports, config.RETRIEVAL_LEXICAL_WEIGHT)
+    logger.debug(f"检索候选重排完成: {[(c.course['course_uuid'], c.upstream_score, c.lexical_score, c.score) for c in ranked]}")
+    selected = ranked[:2] if config.RETRIEVAL_MERGE_KEY_POINTS else ranked[:1]
+    return 200, [(candidate.course, candidate.report) for candidate in selected]
+
+
+def _passes_score_gate(prompt_paths: dict, course_score: Optional[float]) -> bool:
+    """
+    判断最佳课程相似度是否达到智能体阈值，未注册阈值判断或推荐系统未返回相似度时总是通过
+
+    Args:
+        prompt_paths (dict): 包含提示词文件路径的字典
+        course_score (Optional[float]): 最佳课程相似度
+
+    Returns:
+        bool: 是否检索报告
+    """
+    score_gate = registrar.get_component("score_gate")
+    if score_gate is None:
+        return True
+    return score_gate.allow(_agent_name(prompt_paths), course_score, record=not is_warmup_request())
+
+
+def _knowledge_item(course_info: Dict[str, Any], report_info: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    由课程与报告构建related_knowledge项
+
+    Args:
+        course_info (Dict[str, Any]): 课程信息
+        report_info (Dict[str, Any]): 报告信息
+
+    Returns:
+        Dict[str, Any]: 相关知识点
+    """
+    return {
+        "resource_name": course_info["resource_name"],
+        "file_name": course_info["file_name"],
+        "video_link": course_info["video_link"],
+        "video_summary": course_info["video_summary"],
+        "start_time": report_info["start_time"],
+        "end_time": report_info["end_time"],
+        "duration": report_info["duration"]
+    }
+
+
+def _load_session(request: ChatRequest):
+    """
+    获取请求对应的会话
+
+    Args:
+        request (ChatRequest): 聊天请求数据
+
+    Returns:
+        Optional[Session]: 会话，未携带session_id或会话不存在时返回None
+    """
+    session_store = registrar.get_component("session_store")
+    if session_store is None or not request.session_id:
+        return None
+    return session_store.get(request.session_id)
+
+
+def _follow_up_turn(session, processed_question: str) -> Optional[DialogueTurn]:
+    """
+    判断是否为追问，是则返回可复用课程信息的上一轮对话
+
+    Args:
+        session (Optional[Session]): 会话
+        processed_question (str): 处理后的问题
+
+    Returns:
+        Optional[DialogueTurn]: 可复用的对话记录，非追问时返回None
+    """
+    session_store = registrar.get_component("session_store")
+    if session_store is None or not session_store.is_follow_up(processed_question, session):
+        return None
+    return session.last_knowledge_turn()
+
+
+def _record_turn(request: ChatRequest, question: str, answer: str, knowledge_turn: Optional[DialogueTurn] = None):
+    """
+    将本轮问答记录到会话中
+
+    Args:
+        request (ChatRequest): 聊天请求数据
+        question (str): 发送给大模型的问题
+        answer (str): 回答
+        knowledge_turn (Optional[DialogueTurn]): 携带课程信息的对话记录，回答未使用知识库时为None
+    """
+    session_store = registrar.get_component("session_store")
+    if session_store is None or not request.session_id:
+        return
+    if knowledge_turn is None:
+        turn = DialogueTurn(question, answer)
+    else:
+        turn = DialogueTurn(question, answer, knowledge_turn.course_uuid,
+                            knowledge_turn.related_knowledge, knowledge_turn.key_points)
+    session_store.record_turn(request.session_id, turn)
+
+
+def _answer_cache_key(prompt_paths: dict, processed_question: str, tier: str) -> str:
+    """
+    构建回答缓存键，按智能体提示词模板与生成档位区分
+
+    Args:
+        prompt_paths (dict): 包含提示词文件路径的字典
+        processed_question (str): 处理后的问题
+        tier (str): 生成档位（fast/full）
+
+    Returns:
+        str: 缓存键
+    """
+    return f"answer:{tier}:{prompt_paths['knowledge']}:{processed_question}"
+
+
+def _answer_tier(generation: Optional[GenerationChoice]) -> str:
+    """
+    回答实际使用的生成档位，未选择档位时使用完整档的默认参数
+
+    Args:
+        generation (Optional[GenerationChoice]): 生成档位
+
+    Returns:
+        str: 生成档位（fast/full）
+    """
+    return generation.tier if generation is not None else TIER_FULL
+
+
+def _get_cached_answer(prompt_paths: dict, processed_question: str, history,
+                       generation: Optional[GenerationChoice]) -> Optional[Dict[str, Any]]:
+    """
+    读取回答缓存，多轮对话中的问题依赖上下文，不使用缓存
+    完整档的请求只使用完整档的回答；快速档的请求先查快速档，再查完整档
+
+    Args:
+        prompt_paths (dict): 包含提示词文件路径的字典
+        processed_question (str): 处理后的问题
+        history (Optional[List[Dict[str, str]]]): 多轮对话历史消息
+        generation (Optional[GenerationChoice]): 生成档位
+
+    Returns:
+        Optional[Dict[str, Any]]: 包含answer和related_knowledge的字典，未命中时返回None
+    """
+    cache = registrar.get_component("cache")
+    if cache is None or history or not config.ANSWER_CACHE_ENABLED:
+        return None
+    tiers = (TIER_FAST, TIER_FULL) if _answer_tier(generation) == TIER_FAST else (TIER_FULL,)
+    for tier in tiers:
+        cached = cache.get(_answer_cache_key(prompt_paths, processed_question, tier))
+        if cached is not None:
+            return cached
+    return None
+
+
+def _cache_answer(prompt_paths: dict, processed_question: str, history, generation: Optional[GenerationChoice],
+                  answer: str, related_knowledge: list):
+    """
+    按生成档位写入回答缓存，大模型调用出错与达到最大输出token数被截断的回答不缓存
+
+    Args:
+        prompt_paths (dict): 包含提示词文件路径的字典
+        processed_question (str): 处理后的问题
+        history (Optional[List[Dict[str, str]]]): 多轮对话历史消息
+        generation (Optional[GenerationChoice]): 生成档位
+        answer (str): 回答
+        related_knowledge (list): 相关知识点
+    """
+    cache = registrar.get_component("cache")
+    if cache is None or history or not config.ANSWER_CACHE_ENABLED or is_error_answer(answer):
+        return
+    # 被截断的回答不完整，不缓存
+    if is_truncated_answer(answer):
+        logger.debug("回答被截断，不写入回答缓存")
+        return
+    cache.set(_answer_cache_key(prompt_paths, processed_question, _answer_tier(generation)),
+              {"answer": answer, "related_knowledge": related_knowledge}, config.ANSWER_CACHE_TTL)
+
+
+def _get_faq_answer(prompt_paths: dict, processed_question: str, history) -> Optional[Dict[str, Any]]:
+    """
+    查询离线预生成的FAQ答案库，多轮对话中的问题依赖上下文，不使用答案库
+
+    Args:
+        prompt_paths (dict): 包含提示词文件路径的字典
+        processed_question (str): 处理后的问题
+        history (Optional[List[Dict[str, str]]]): 多轮对话历史消息
+
+    Returns:
+        Optional[Dict[str, Any]]: 包含answer和related_knowledge的字典，未命中时返回None
+    """
+    faq_store = registrar.get_component("faq_store")
+    if faq_store is None or history:
+        return None
+    return faq_store.get(_agent_name(prompt_paths), processed_question)
+
+
+def _agent_name(prompt_paths: dict) -> str:
+    """
+    根据提示词路径获取智能体名称（agents/<agent>/prompt/*.txt）
+
+    Args:
+        prompt_paths (dict): 包含提示词文件路径的字典
+
+    Returns:
+        str: 智能体名称
+    """
+    return os.path.basename(os.path.dirname(os.path.dirname(prompt_paths["knowledge"])))
+
+
+def _finish_request(timer: RequestTimer, request: ChatRequest, agent: str, branch: str, **fields: Any):
+    """
+    请求结束：写入阶段耗时直方图并输出一条请求汇总日志
+    缓存预热发起的请求不计入，避免影响线上指标与下次预热的高频问题统计
+
+    Args:
+        timer (RequestTimer): 请求计时器
+        request (ChatRequest): 聊天请求数据
+        agent (str): 智能体名称（多智能体协作时为collaborate）
+        branch (str): 分支（knowledge/fallback/cache/faq/collaborate）
+        **fields: 汇总日志的附加字段，值为None的字段不输出
+    """
+    if is_warmup_request():
+        return
+    degradation = registrar.get_component("degradation")
+    latency = _load_latency_seconds(timer)
+    if degradation is not None and latency is not None:
+        degradation.record(latency)
+    timer.finish(agent, branch)
+    log_request_summary(agent, branch, request.user_question, timer.durations, session_id=request.session_id,
+                        **{name: value for name, value in fields.items() if value is not None})
+
+
+def _admit(prompt_paths: dict, enforce: bool = True) -> Optional[AdmissionTicket]:
+    """
+    准入控制：预计无法在截止时间内完成时拒绝新请求
+
+    Args:
+        prompt_paths (dict): 包含提示词文件路径的字典
+        enforce (bool): 是否执行拒绝判断，为False时只计入处理中的请求
+
+    Returns:
+        Optional[AdmissionTicket]: 请求凭证，未启用准入控制时为None
+
+    Raises:
+        AdmissionRejected: 预计完成时间超过截止时间
+    """
+    admission = registrar.get_component("admission")
+    if admission is None:
+        return None
+    try:
+        return admission.admit(_agent_name(prompt_paths), enforce)
+    except AdmissionRejected as e:
+        logger.info(f"服务繁忙，拒绝新请求: {e}，建议{e.retry_after}秒后重试")
+        raise
+
+
+def _busy_exception(e: AdmissionRejected) -> HTTPException:
+    """
+    构建服务繁忙的503响应
+
+    Args:
+        e (AdmissionRejected): 拒绝异常
+
+    Returns:
+        HTTPException: 携带Retry-After响应头的503异常
+    """
+    return HTTPException(status_code=503, detail="服务繁忙，请稍后重试。", headers={"Retry-After": str(e.retry_after)})
+
+
+def _upstream_seconds(timer: RequestTimer) -> Optional[float]:
+    """
+    本次请求的上游耗时（课程/报告检索与大模型生成）
+
+    Args:
+        timer (RequestTimer): 请求计时器
+
+    Returns:
+        Optional[float]: 上游耗时（秒），未调用上游（如命中缓存）时为None
+    """
+    upstream = [timer.durations[stage] for stage in ("course_search", "report_search", "llm_total") if stage in timer.durations]
+    return sum(upstream) if upstream else None
+
+
+def _load_latency_seconds(timer: RequestTimer) -> Optional[float]:
+    """
+    本次请求随负载增长的上游等待耗时：课程/报告检索（含线程池排队）与流式生成的首字耗时
+    不含大模型生成全文的耗时与客户端读取耗时，长回答与慢客户端不会被当作负载升高
+
+    Args:
+        timer (RequestTimer): 请求计时器
+
+    Returns:
+        Optional[float]: 等待耗时（秒），未调用上游（如命中缓存）时为None
+    """
+    latency = [timer.durations[stage] for stage in ("course_search", "report_search", "llm_ttft") if stage in timer.durations]
+    return sum(latency) if latency else None
+
+
+def _release_admission(ticket: Optional[AdmissionTicket], timer: RequestTimer):
+    """
+    释放准入凭证，回报本次请求的上游耗时（课程/报告检索与大模型生成）
+
+    Args:
+        ticket (Optional[AdmissionTicket]): 请求凭证
+        timer (RequestTimer): 请求计时器
+    """
+    if ticket is None:
+        return
+    ticket.release(_upstream_seconds(timer))
+
+
+async def _busy_stream(retry_after: int) -> AsyncGenerator[str, None]:
+    """
+    服务繁忙时的SSE流：通过retry字段告知客户端重连间隔，并发送busy事件
+
+    Args:
+        retry_after (int): 建议重试等待秒数
+
+    Yields:
+        str: SSE格式的数据片段
+    """
+    yield f"retry: {retry_after * 1000}\n\n"
+    yield _sse_event("busy", {"retry_after": retry_after, "message": "服务繁忙，请稍后重试。"})
+
+
+async def _timed_llm_stream(chunks: AsyncGenerator[str, None], timer: RequestTimer) -> AsyncGenerator[str, None]:
+    """
+    记录大模型流式生成的首字耗时与总耗时
+
+    Args:
+        chunks (AsyncGenerator[str, None]): 大模型生成的文本片段
+        timer (RequestTimer): 请求计时器
+
+    Yields:
+        str: 大模型生成的文本片段
+    """
+    start = time.perf_counter()
+    first = True
+    async for chunk in chunks:
+        if first:
+            timer.record("llm_ttft", time.perf_counter() - start)
+            first = False
+        yield chunk
+    timer.record("llm_total", time.perf_counter() - start)
+
+
+async def _timed_frames(frames: AsyncGenerator[str, None], timer: RequestTimer) -> AsyncGenerator[str, None]:
+    """
+    记录SSE帧写出到客户端的累计耗时
+
+    Args:
+        frames (AsyncGenerator[str, None]): SSE帧
+        timer (RequestTimer): 请求计时器
+
+    Yields:
+        str: SSE帧
+    """
+    write_seconds = 0.0
+    async for frame in frames:
+        start = time.perf_counter()
+        yield frame
+        write_seconds += time.perf_counter() - start
+    timer.observe_late("sse_write", write_seconds)
+
+
+def _solve_fast_path(prompt_paths: dict, processed_question: str, timer: RequestTimer) -> Tuple[Optional[FastPathSolver], Optional[FastPathResult]]:
+    """
+    使用智能体注册的快速路径求解器求解问题
+
+    Args:
+        prompt_paths (dict): 包含提示词文件路径的字典
+        processed_question (str): 处理后的问题
+        timer (RequestTimer): 请求计时器
+
+    Returns:
+        Tuple[Optional[FastPathSolver], Optional[FastPathResult]]: 求解器与求解结果，智能体未注册求解器时均为None
+    """
+    fast_paths = registrar.get_component("fast_paths") or {}
+    solver = fast_paths.get(_agent_name(prompt_paths))
+    if solver is None:
+        return None, None
+    with timer.stage("fast_path"):
+        result = solver.solve(processed_question)
+    if result is not None:
+        logger.debug(f"快速路径命中（{result.kind}）: {processed_question}")
+    return solver, result
+
+
+def _select_generation(request: ChatRequest, prompt_paths: dict, processed_question: str) -> Optional[GenerationChoice]:
+    """
+    按请求的延迟模式与问题难度选择生成档位
+
+    Args:
+        request (ChatRequest): 聊天请求数据
+        prompt_paths (dict): 包含提示词文件路径的字典
+        processed_question (str): 处理后的问题
+
+    Returns:
+        Optional[GenerationChoice]: 选择结果，未注册生成档位时为None（使用大模型默认参数）
+    """
+    generation_profiles = registrar.get_component("generation_profiles")
+    if generation_profiles is None:
+        return None
+    mode = request.mode or config.GENERATION_DEFAULT_MODE
+    return generation_profiles.select(_agent_name(prompt_paths), mode, processed_question)
+
+
+def _generation_fields(generation: Optional[GenerationChoice]) -> Dict[str, Any]:
+    """
+    请求汇总日志中的生成档位字段
+
+    Args:
+        generation (Optional[GenerationChoice]): 选择结果
+
+    Returns:
+        Dict[str, Any]: mode、tier与difficulty，未选择时为空
+    """
+    if generation is None:
+        return {}
+    return {"mode": generation.mode, "tier": generation.tier, "difficulty": generation.difficulty}
+
+
+def _record_generation(generation: Optional[GenerationChoice], seconds: float, system_prompt: str,
+                       question: str, history, answer: str):
+    """
+    记录一次大模型调用的耗时与估算成本
+
+    Args:
+        generation (Optional[GenerationChoice]): 选择结果
+        seconds (float): 大模型耗时（秒）
+        system_prompt (str): 系统提示词
+        question (str): 发送给大模型的问题
+        history (Optional[List[Dict[str, str]]]): 多轮对话历史消息
+        answer (str): 回答
+    """
+    generation_profiles = registrar.get_component("generation_profiles")
+    if generation is None or generation_profiles is None or is_warmup_request():
+        return
+    prompt_texts = [system_prompt, question, *(message["content"] for message in history or [])]
+    generation_profiles.record(generation, seconds, prompt_texts, answer)
+
+
+async def _generate(dispatch, system_prompt: str, question: str, history,
+                    fast_path: Tuple[Optional[FastPathSolver], Optional[FastPathResult]],
+                    generation: Optional[GenerationChoice], timer: RequestTimer) -> str:
+    """
+    生成回答：快速路径直接回答时跳过大模型，否则将已验证的计算结果注入系统提示词后按选中的档位调用大模型
+
+    Args:
+        dispatch: 大模型调度方法（dispatch_with_knowledge/dispatch_fallback）
+        system_prompt (str): 系统提示词
+        question (str): 发送给大模型的问题
+        history (Optional[List[Dict[str, str]]]): 多轮对话历史消息
+        fast_path (Tuple[Optional[FastPathSolver], Optional[FastPathResult]]): 快速路径求解器与求解结果
+        generation (Optional[GenerationChoice]): 生成档位
+        timer (RequestTimer): 请求计时器
+
+    Returns:
+        str: 回答
+    """
+    solver, result = fast_path
+    if result is not None and result.kind == FAST_PATH_DIRECT:
+        return result.answer
+    if result is not None:
+        system_prompt = f"{system_prompt}\n\n{result.facts}"
+    profile = generation.profile if generation is not None else None
+    start = time.perf_counter()
+    with timer.stage("llm_total"):
+        answer = await _run_stage(STAGE_LLM, dispatch, system_prompt, question, history, profile)
+    seconds = time.perf_counter() - start
+    if solver is not None:
+        solver.statistics.record_llm(seconds)
+    _record_generation(generation, seconds, system_prompt, question, history, answer)
+    return answer
+
+
+async def _generate_stream(dispatch_stream, system_prompt: str, question: str, history,
+                           fast_path: Tuple[Optional[FastPathSolver], Optional[FastPathResult]],
+                           generation: Optional[GenerationChoice], timer: RequestTimer) -> AsyncGenerator[str, None]:
+    """
+    流式生成回答，快速路径直接回答时一次性返回
+
+    Args:
+        dispatch_stream: 大模型流式调度方法（dispatch_with_knowledge_stream/dispatch_fallback_stream）
+        system_prompt (str): 系统提示词
+        question (str): 发送给大模型的问题
+        history (Optional[List[Dict[str, str]]]): 多轮对话历史消息
+        fast_path (Tuple[Optional[FastPathSolver], Optional[FastPathResult]]): 快速路径求解器与求解结果
+        generation (Optional[GenerationChoice]): 生成档位
+        timer (RequestTimer): 请求计时器
+
+    Yields:
+        str: 回答片段
+    """
+    solver, result = fast_path
+    if result is not None and result.kind == FAST_PATH_DIRECT:
+        yield result.answer
+        return
+    if result is not None:
+        system_prompt = f"{system_prompt}\n\n{result.facts}"
+    profile = generation.profile if generation is not None else None
+    chunks = []
+    start = time.perf_counter()
+    async for chunk in _timed_llm_stream(dispatch_stream(system_prompt, question, history, profile), timer):
+        chunks.append(chunk)
+        yield chunk
+    seconds = time.perf_counter() - start
+    if solver is not None:
+        solver.statistics.record_llm(seconds)
+    _record_generation(generation, seconds, system_prompt, question, history, "".join(chunks))
+
+
+def _degradation_level() -> int:
+    """
+    获取本次请求的降级等级
+
+    Returns:
+        int: 降级等级，未启用降级时为0
+    """
+    degradation = registrar.get_component("degradation")
+    return degradation.current_level() if degradation is not None else LEVEL_NORMAL
+
+
+def _degrade_generation(generation: Optional[GenerationChoice], agent: str, level: int) -> Optional[GenerationChoice]:
+    """
+    按降级等级调整生成档位：限制输出长度等级起限制最大输出token数，改用快速档等级起使用快速档模型
+
+    Args:
+        generation (Optional[GenerationChoice]): 选择结果
+        agent (str): 智能体名称
+        level (int): 降级等级
+
+    Returns:
+        Optional[GenerationChoice]: 调整后的选择结果
+    """
+    generation_profiles = registrar.get_component("generation_profiles")
+    if generation is None or generation_profiles is None or level < LEVEL_CAP_TOKENS:
+        return generation
+    tier, profile = generation.tier, generation.profile
+    if level >= LEVEL_FAST_MODEL and tier != TIER_FAST and generation_profiles.fast_enabled:
+        tier, profile = TIER_FAST, generation_profiles.profile(agent, TIER_FAST)
+    max_tokens = min(profile.max_tokens or config.DEGRADE_MAX_TOKENS, config.DEGRADE_MAX_TOKENS)
+    return GenerationChoice(generation.mode, tier, generation.difficulty,
+                            GenerationProfile(profile.model, max_tokens, profile.temperature))
+
+
+def _brief_generation(generation: Optional[GenerationChoice]) -> Optional[GenerationChoice]:
+    """
+    协作子请求只生成解题要点：最大输出token数限制为COLLABORATE_BRIEF_MAX_TOKENS
+
+    Args:
+        generation (Optional[GenerationChoice]): 选择结果
+
+    Returns:
+        Optional[GenerationChoice]: 调整后的选择结果
+    """
+    if generation is None:
+        return None
+    profile = generation.profile
+    max_tokens = min(profile.max_tokens or config.COLLABORATE_BRIEF_MAX_TOKENS, config.COLLABORATE_BRIEF_MAX_TOKENS)
+    return GenerationChoice(generation.mode, generation.tier, generation.difficulty,
+                            GenerationProfile(profile.model, max_tokens, profile.temperature))
+
+
+def _degraded_busy(ctx: PipelineContext):
+    """
+    只用缓存等级下未命中缓存：发出busy事件并停止，不调用上游
+    """
+    logger.info("降级为只用缓存回答，未命中缓存，返回服务繁忙")
+    ctx.emit("busy", {"retry_after": config.DEGRADE_RETRY_AFTER, "message": "服务繁忙，请稍后重试。"})
+    ctx.stop()
+
+
+class _MathContext(PipelineContext):
+    """
+    数学问题流水线的上下文，各阶段通过它传递数据，结束时用于请求汇总日志
+    """
+
+    def __init__(self, request: ChatRequest, prompt_paths: dict, stream: bool, brief: bool = False):
+        """
+        初始化上下文
+
+        Args:
+            request (ChatRequest): 聊天请求数据
+            prompt_paths (dict): 包含提示词文件路径的字典
+            stream (bool): 是否流式生成回答
+            brief (bool): 是否只生成解题要点（多智能体协作的子请求）
+        """
+        super().__init__(current_timer())
+        self.request = request
+        self.prompt_paths = prompt_paths
+        self.stream = stream
+        self.brief = brief
+        self.branch = "fallback"
+        # 课程相似度与检索结果，写入请求汇总日志用于调整阈值
+        self.course_score: Optional[float] = None
+        self.outcome: Optional[str] = None
+        self.generation: Optional[GenerationChoice] = None
+        self.processed_question: Optional[str] = None
+        # 发送给大模型与记入对话历史的问题（只整理空白的原问题）
+        self.question: Optional[str] = None
+        self.fast_path: Tuple[Optional[FastPathSolver], Optional[FastPathResult]] = (None, None)
+        self.history = None
+        # 追问时复用的上一轮对话
+        self.previous_turn: Optional[DialogueTurn] = None
+        # FAQ答案库或回答缓存命中的回答，命中时跳过检索与生成
+        self.resolved: Optional[Dict[str, Any]] = None
+        self.courses: List[Dict[str, Any]] = []
+        self.related_knowledge: List[Dict[str, Any]] = []
+        # 携带课程信息的对话记录，为None时使用备用方式回答
+        self.knowledge_turn: Optional[DialogueTurn] = None
+        self.system_prompt: Optional[str] = None
+        self.answer = ""
+        # 请求开始时确定的降级等级
+        self.degradation = _degradation_level()
+
+
+async def _normalize_stage(ctx: _MathContext):
+    """
+    检查组件并处理用户问题，组件缺失时发出error事件并停止
+    """
+    components = [registrar.get_component(name) for name in ("question_processor", "prompt_builder", "llm_dispatcher", "knowledge_retriever")]
+    if not all(components):
+        logger.warning("组件缺失，返回初始化错误")
+        ctx.emit("error", "系统初始化未完成，请稍后重试。")
+        ctx.stop()
+        return
+    logger.debug("开始处理用户问题")
+    ctx.processed_question = components[0].process(ctx.request.user_question)
+    ctx.question = components[0].clean(ctx.request.user_question)
+    logger.debug(f"问题处理完成: {ctx.processed_question}")
+
+
+async def _lookup_stage(ctx: _MathContext):
+    """
+    快速路径与生成档位选择，加载会话；追问时复用上一轮的课程信息，无对话历史时查询FAQ答案库与回答缓存，均未命中时按降级等级处理
+    """
+    request, prompt_paths, processed_question = ctx.request, ctx.prompt_paths, ctx.processed_question
+    ctx.fast_path = _solve_fast_path(prompt_paths, processed_question, ctx.timer)
+    ctx.generation = _degrade_generation(_select_generation(request, prompt_paths, processed_question),
+                                         _agent_name(prompt_paths), ctx.degradation)
+    if ctx.brief:
+        ctx.generation = _brief_generation(ctx.generation)
+    ctx.emit("stage", {"stage": "question_processed", "processed_question": processed_question})
+
+    # 多轮对话：加载会话历史，追问时复用上一轮检索到的课程信息，跳过检索
+    session = _load_session(request)
+    ctx.history = session.history_messages() if session else None
+    ctx.previous_turn = _follow_up_turn(session, processed_question)
+    if ctx.previous_turn is not None:
+        logger.debug(f"识别为追问，复用课程信息，course_uuid: {ctx.previous_turn.course_uuid}")
+        ctx.branch = "knowledge"
+        ctx.knowledge_turn = ctx.previous_turn
+        ctx.related_knowledge = ctx.previous_turn.related_knowledge
+        _apply_degradation(ctx)
+        return
+
+    # 无对话历史时，优先使用FAQ答案库，其次使用回答缓存（可能由其他worker写入）
+    faq_answer = _get_faq_answer(prompt_paths, processed_question, ctx.history)
+    if faq_answer is not None:
+        logger.debug("FAQ答案库命中")
+        ctx.branch = "faq"
+        ctx.resolved = faq_answer
+        return
+    cached_answer = await _cache_io(_get_cached_answer, prompt_paths, processed_question, ctx.history, ctx.generation)
+    if cached_answer is not None:
+        logger.debug("回答缓存命中")
+        ctx.branch = "cache"
+        ctx.resolved = cached_answer
+        return
+    _apply_degradation(ctx)
+
+
+def _apply_degradation(ctx: _MathContext):
+    """
+    未命中FAQ答案库与回答缓存时按降级等级处理：只用缓存等级下快速路径无法直接回答时返回busy，
+    跳过报告检索等级起不检索课程与报告（课程检索结果只用于报告检索），使用备用方式回答
+    """
+    _, result = ctx.fast_path
+    if ctx.degradation >= LEVEL_CACHE_ONLY and (result is None or result.kind != FAST_PATH_DIRECT):
+        ctx.branch = "shed"
+        _degraded_busy(ctx)
+    elif ctx.degradation >= LEVEL_SKIP_REPORTS and ctx.previous_turn is None:
+        logger.debug(f"降级等级 {ctx.degradation}，跳过课程与报告检索")
+        ctx.outcome = "degraded"
+
+
+async def _retrieve_courses_stage(ctx: _MathContext):
+    """
+    调用外部推荐系统API获取课程信息，最佳课程相似度低于智能体阈值时不检索报告
+    GET /api/v1/recommendation/rag/search/courses?query={查询字符串}&top_k={RETRIEVAL_TOP_K}
+    """
+    logger.debug("开始获取课程信息")
+    ctx.emit("stage", {"stage": "course_search"})
+    knowledge_retriever = registrar.get_component("knowledge_retriever")
+    courses_status, courses_data = await _run_stage(STAGE_RETRIEVAL, knowledge_retriever.search_courses, ctx.processed_question, config.RETRIEVAL_TOP_K)
+    logger.debug(f"课程信息获取完成，状态码: {courses_status}")
+    if courses_status != 200:
+        # 如果API调用失败，使用备用方式
+        logger.warning(f"课程信息获取失败，状态码: {courses_status}")
+        ctx.outcome = "course_error"
+        return
+    log_payload(logger, "课程数据解析完成", courses_data)
+
+    courses = (courses_data.get("data") or [])[:max(1, config.RETRIEVAL_TOP_K)]
+    ctx.course_score = best_course_score(courses)
+    if not courses or not _passes_score_gate(ctx.prompt_paths, ctx.course_score):
+        # 如果没有匹配的课程或匹配较弱，使用备用方式
+        ctx.outcome = "gated" if courses else "no_course"
+        logger.debug(f"未找到匹配的课程数据或课程相似度低于阈值，相似度: {ctx.course_score}")
+        return
+    logger.debug(f"获取到课程信息，course_uuid: {[course['course_uuid'] for course in courses]}")
+    ctx.courses = courses
+    ctx.emit("stage", {"stage": "report_search", "course_uuid": courses[0]["course_uuid"],
+                       "course_uuids": [course["course_uuid"] for course in courses]})
+
+
+async def _retrieve_reports_stage(ctx: _MathContext) -> Tuple[int, List[Tuple[Dict[str, Any], Dict[str, Any]]]]:
+    """
+    调用外部推荐系统API获取报告信息，多个课程时并发检索各课程的报告并在本地重排
+    GET /api/v1/recommendation/rag/search/reports/{course_id}?query={查询字符串}&top_k=1
+    返回值可能来自阶段缓存，本阶段不修改上下文
+    """
+    logger.debug("开始获取报告信息")
+    return await _search_reports(registrar.get_component("knowledge_retriever"), ctx.processed_question, ctx.courses)
+
+
+def _report_selection_cache_key(ctx: _MathContext) -> Optional[str]:
+    """
+    多课程重排结果的阶段缓存键：命中时省去各课程报告的缓存查询与重排；单个课程时检索器已缓存，不再缓存
+    """
+    if len(ctx.courses) < 2:
+        return None
+    course_uuids = ",".join(course["course_uuid"] for course in ctx.courses)
+    return f"{course_uuids}:{config.RETRIEVAL_LEXICAL_WEIGHT}:{int(config.RETRIEVAL_MERGE_KEY_POINTS)}:{ctx.processed_question}"
+
+
+async def _load_templates_stage(ctx: _MathContext):
+    """
+    预加载知识库与备用提示词模板，与检索重叠执行，构建提示词时直接使用内存中的模板
+    """
+    prompt_builder = registrar.get_component("prompt_builder")
+    if prompt_builder is None:
+        return
+    await _run_stage(STAGE_CPU, prompt_builder.prompt_manager.preload, [ctx.prompt_paths["knowledge"], ctx.prompt_paths["fallback"]])
+
+
+async def _build_prompt_stage(ctx: _MathContext):
+    """
+    根据报告检索结果确定回答方式，发出knowledge事件并构建系统提示词
+    """
+    reports = ctx.results.get("retrieve_reports")
+    if reports is not None:
+        reports_status, selected = reports
+        logger.debug(f"报告信息获取完成，状态码: {reports_status}")
+        if reports_status != 200:
+            # 如果API调用失败，使用备用方式
+            logger.warning(f"报告信息获取失败，状态码: {reports_status}")
+            ctx.outcome = "report_error"
+        elif selected:
+            # 如果有匹配的报告，使用得分最高的课程与报告（开启合并时附加次优候选）
+            ctx.outcome = "report_hit"
+            ctx.branch = "knowledge"
+            ctx.related_knowledge = [_knowledge_item(course_info, report_info) for course_info, report_info in selected]
+            log_payload(logger, "相关知识点构建完成", ctx.related_knowledge)
+            key_points = merge_key_points([report_info for _, report_info in selected])
+            log_payload(logger, "获取到关键点", key_points)
+            ctx.knowledge_turn = DialogueTurn(ctx.processed_question, "", selected[0][0]["course_uuid"], ctx.related_knowledge, key_points)
+        else:
+            # 如果没有匹配的报告，使用备用方式
+            logger.debug("未找到报告数据，使用备用方式")
+            ctx.outcome = "report_miss"
+
+    # 发送相关知识点，前端可在大模型生成期间先行渲染视频链接和时间点
+    ctx.emit("knowledge", {"related_knowledge": ctx.related_knowledge})
+    prompt_builder = registrar.get_component("prompt_builder")
+    if ctx.knowledge_turn is not None:
+        ctx.system_prompt = await _run_stage(STAGE_CPU, prompt_builder.build_with_knowledge_and_key_points, ctx.knowledge_turn.key_points, ctx.prompt_paths["knowledge"])
+    else:
+        ctx.system_prompt = await _run_stage(STAGE_CPU, prompt_builder.build_fallback, ctx.question, ctx.prompt_paths["fallback"])
+    if ctx.brief:
+        ctx.system_prompt += _BRIEF_INSTRUCTION
+    logger.debug("提示词构建完成")
+
+
+async def _generate_stage(ctx: _MathContext):
+    """
+    调用大模型生成回答，流式时逐段发出answer_chunk事件，否则生成完成后发出一个
+    """
+    llm_dispatcher = registrar.get_component("llm_dispatcher")
+    knowledge = ctx.knowledge_turn is not None
+    logger.debug("开始调用大模型生成回答")
+    ctx.emit("stage", {"stage": "generating", "branch": ctx.branch})
+    args = (ctx.system_prompt, ctx.question, ctx.history, ctx.fast_path, ctx.generation, ctx.timer)
+    if ctx.stream:
+        dispatch_stream = llm_dispatcher.dispatch_with_knowledge_stream if knowledge else llm_dispatcher.dispatch_fallback_stream
+        answer_parts = []
+        async for chunk in _generate_stream(dispatch_stream, *args):
+            answer_parts.append(chunk)
+            ctx.emit("answer_chunk", chunk)
+        ctx.answer = "".join(answer_parts)
+    else:
+        dispatch = llm_dispatcher.dispatch_with_knowledge if knowledge else llm_dispatcher.dispatch_fallback
+        ctx.answer = await _generate(dispatch, *args)
+        ctx.emit("answer_chunk", ctx.answer)
+    log_payload(logger, "大模型回答生成完成" if knowledge else "使用备用方式生成回答", ctx.answer)
+
+
+async def _emit_stage(ctx: _MathContext):
     """
-    处理数学问题的共享逻辑
+    输出FAQ答案库或回答缓存命中的回答，记录本轮对话，写入回答缓存并发出complete事件
+    """
+    if ctx.resolved is not None:
+        ctx.answer = ctx.resolved["answer"]
+        ctx.related_knowledge = ctx.resolved["related_knowledge"]
+        ctx.emit("knowledge", {"related_knowledge": ctx.related_knowledge})
+        ctx.emit("stage", {"stage": "generating", "branch": ctx.branch})
+        ctx.emit("answer_chunk", ctx.answer)
+    _record_turn(ctx.request, ctx.question, ctx.answer, ctx.knowledge_turn)
+    # 只缓存检索了报告的完整回答，检索出错、跳过检索与只生成要点时不缓存
+    if ctx.outcome in ("report_hit", "report_miss") and not ctx.brief:
+        await _cache_io(_cache_answer, ctx.prompt_paths, ctx.processed_question, ctx.history, ctx.generation,
+                        ctx.answer, ctx.related_knowledge)
+    logger.debug("处理完成，发送完成信号")
+    ctx.emit("complete", {"related_knowledge": ctx.related_knowledge})
+
+
+def _needs_retrieval(ctx: _MathContext) -> bool:
+    return ctx.resolved is None and ctx.previous_turn is None and ctx.degradation < LEVEL_SKIP_REPORTS
+
+
+def _needs_generation(ctx: _MathContext) -> bool:
+    return ctx.resolved is None
+
+
+# 数学问题处理流水线：提示词模板加载不依赖其他阶段，与问题处理、检索重叠执行
+_MATH_PIPELINE = Pipeline([
+    Stage("normalize", _normalize_stage, timer="question_processing"),
+    Stage("lookup", _lookup_stage, deps=["normalize"]),
+    Stage("retrieve_courses", _retrieve_courses_stage, deps=["lookup"], when=_needs_retrieval, timer="course_search"),
+    Stage("retrieve_reports", _retrieve_reports_stage, deps=["retrieve_courses"], when=lambda ctx: bool(ctx.courses),
+          timer="report_search", cache_key=_report_selection_cache_key, cache_if=lambda result: result[0] == 200),
+    Stage("load_templates", _load_templates_stage),
+    Stage("build_prompt", _build_prompt_stage, deps=["retrieve_reports", "load_templates"], when=_needs_generation, timer="prompt_build"),
+    Stage("generate", _generate_stage, deps=["build_prompt"], when=_needs_generation),
+    Stage("emit", _emit_stage, deps=["generate"]),
+], hooks=[TimingHook(), CacheHook(lambda: registrar.get_component("cache"), config.RETRIEVAL_CACHE_TTL, _cache_io)])
+
+
+async def _run_math_pipeline(ctx: _MathContext, ticket: Optional[AdmissionTicket]) -> AsyncGenerator[Tuple[str, Any], None]:
+    """
+    运行数学问题流水线，出错时产出error事件；结束时写入请求汇总日志并释放准入凭证
+
+    Args:
+        ctx (_MathContext): 上下文
+        ticket (Optional[AdmissionTicket]): 准入凭证
+
+    Yields:
+        Tuple[str, Any]: (事件类型, 事件数据)，事件类型为stage/knowledge/answer_chunk/complete/error/busy
+    """
+    try:
+        logger.debug(f"开始处理请求: {ctx.request.user_question}")
+        async for event in _MATH_PIPELINE.run(ctx):
+            yield event
+    except Exception as e:
+        # 全局异常处理
+        logger.error(f"处理请求时发生错误: {e}", exc_info=True)
+        yield "error", "系统出现错误，请稍后重试。"
+    finally:
+        _finish_request(ctx.timer, ctx.request, _agent_name(ctx.prompt_paths), ctx.branch, course_score=ctx.course_score,
+                        outcome=ctx.outcome, degradation=ctx.degradation or None, **_generation_fields(ctx.generation))
+        _release_admission(ticket, ctx.timer)
+
+
+async def handle_math_question(request: ChatRequest, prompt_paths: dict, enforce_admission: bool = True) -> ChatResponse:
+    """
+    处理数学问题的共享逻辑，汇总流水线事件为一次响应
     
     Args:
         request (ChatRequest): 聊天请求数据
         prompt_paths (dict): 包含提示词文件路径的字典
+        enforce_admission (bool): 是否执行准入拒绝判断（批量请求已整体准入、后台预热时为False）
         
     Returns:
         ChatResponse: 包含回答和相关知识点的响应数据
+
+    Raises:
+        HTTPException: 服务繁忙时返回503与Retry-After响应头
     """
-    start_time = time.time()
     try:
-        logger.info(f"开始处理请求: {request.user_question}")
-        
-        # 获取注册的组件
-        question_processor = registrar.get_component("question_processor")
-        prompt_builder = registrar.get_component("prompt_builder")
-        llm_dispatcher = registrar.get_component("llm_dispatcher")
-        
-        logger.info(f"组件获取状态 - question_processor: {question_processor is not None}")
-        logger.info(f"组件获取状态 - prompt_builder: {prompt_builder is not None}")
-        logger.info(f"组件获取状态 - llm_dispatcher: {llm_dispatcher is not None}")
-        
-        # 检查必要组件是否存在
-        if not all([question_processor, prompt_builder, llm_dispatcher]):
-            logger.warning("组件缺失，返回初始化错误")
-            return ChatResponse(
-                answer="系统初始化未完成，请稍后重试。",
-                related_knowledge=[]
-            )
-        
-        # 1. 处理用户问题
-        logger.info("开始处理用户问题")
-        processed_question = question_processor.process(request.user_question)
-        logger.info(f"问题处理完成: {processed_question}")
-        
-        # 2. 调用外部推荐系统API获取课程信息
-        # GET /api/v1/recommendation/rag/search/courses?query={查询字符串}&top_k=1
-        logger.info("开始获取课程信息")
-        courses_api_url = config.GET_IP_URL + f"/api/v1/recommendation/rag/search/courses?query={processed_question}&top_k=1"
-        courses_response = requests.get(courses_api_url)
-        logger.info(f"课程信息获取完成，状态码: {courses_response.status_code}")
-        
-        if courses_response.status_code != 200:
-            # 如果API调用失败，使用备用方式
-            logger.warning(f"课程信息获取失败，状态码: {courses_response.status_code}")
-            fallback_prompt = prompt_builder.build_fallback(processed_question, prompt_paths["fallback"])
-            answer = llm_dispatcher.dispatch_fallback(fallback_prompt, processed_question)
-            logger.info(f"使用备用方式生成回答: {answer}")
-            total_time = time.time() - start_time
-            logger.info(f"请求处理完成，总耗时: {total_time:.2f}秒")
-            return ChatResponse(
-                answer=answer,
-                related_knowledge=[]
-            )
-        
-        courses_data = courses_response.json()
-        logger.info(f"课程数据解析完成: {courses_data}")
-        
-        # 检查是否有匹配的课程
-        if not courses_data.get("data"):
-            # 如果没有匹配的课程，使用备用方式
-            logger.info("未找到匹配的课程数据")
-            fallback_prompt = prompt_builder.build_fallback(processed_question, prompt_paths["fallback"])
-            answer = llm_dispatcher.dispatch_fallback(fallback_prompt, processed_question)
-            logger.info(f"使用备用方式生成回答: {answer}")
-            total_time = time.time() - start_time
-            logger.info(f"请求处理完成，总耗时: {total_time:.2f}秒")
-            return ChatResponse(
-                answer=answer,
-                related_knowledge=[]
-            )
-        
-        # 获取第一个匹配的课程
-        course_info = courses_data["data"][0]
-        course_uuid = course_info["course_uuid"]
-        logger.info(f"获取到课程信息，course_uuid: {course_uuid}")
-        
-        # 3. 调用外部推荐系统API获取报告信息
-        # GET /api/v1/recommendation/rag/search/reports/{course_id}?query={查询字符串}&top_k=1
-        logger.info("开始获取报告信息")
-        reports_api_url = config.GET_IP_URL + f"/api/v1/recommendation/rag/search/reports/{course_uuid}?query={processed_question}&top_k=1"
-        reports_response = requests.get(reports_api_url)
-        logger.info(f"报告信息获取完成，状态码: {reports_response.status_code}")
-        
-        if reports_response.status_code != 200:
-            # 如果API调用失败，使用备用方式
-            logger.warning(f"报告信息获取失败，状态码: {reports_response.status_code}")
-            fallback_prompt = prompt_builder.build_fallback(processed_question, prompt_paths["fallback"])
-            answer = llm_dispatcher.dispatch_fallback(fallback_prompt, processed_question)
-            logger.info(f"使用备用方式生成回答: {answer}")
-            total_time = time.time() - start_time
-            logger.info(f"请求处理完成，总耗时: {total_time:.2f}秒")
-            return ChatResponse(
-                answer=answer,
-                related_knowledge=[]
-            )
-        
-        reports_data = reports_response.json()
-        logger.info(f"报告数据解析完成: {reports_data}")
-        
-        # 构建related_knowledge数据
-        related_knowledge = []
-        if reports_data.get("data"):
-            # 如果有匹配的报告，使用报告信息
-            report_info = reports_data["data"][0]
-            
-            # 构建related_knowledge项
-            related_knowledge_item = {
-                "resource_name": course_info["resource_name"],
-                "file_name": course_info["file_name"],
-                "video_link": course_info["video_link"],
-                "video_summary": course_info["video_summary"],
-                "start_time": report_info["start_time"],
-                "end_time": report_info["end_time"],
-                "duration": report_info["duration"]
-            }
-            related_knowledge.append(related_knowledge_item)
-            logger.info(f"相关知识点构建完成: {related_knowledge_item}")
-            
-            # 构建包含key_points的系统提示词
-            key_points = report_info.get("key_points", [])
-            logger.info(f"获取到关键点: {key_points}")
-            system_prompt = prompt_builder.build_with_knowledge_and_key_points(key_points, prompt_paths["knowledge"])
-            logger.info("提示词构建完成")
-            
-            # 调用大模型生成回答
-            logger.info("开始调用大模型生成回答")
-            answer = llm_dispatcher.dispatch_with_knowledge(system_prompt, processed_question)
-            logger.info(f"大模型回答生成完成: {answer}")
-        else:
-            # 如果没有匹配的报告，使用备用方式
-            logger.info("未找到报告数据，使用备用方式")
-            fallback_prompt = prompt_builder.build_fallback(processed_question, prompt_paths["fallback"])
-            answer = llm_dispatcher.dispatch_fallback(fallback_prompt, processed_question)
-            logger.info(f"使用备用方式生成回答: {answer}")
-            related_knowledge = []
-        
-        # 4. 返回结果
-        logger.info("处理完成，返回结果")
-        total_time = time.time() - start_time
-        logger.info(f"请求处理完成，总耗时: {total_time:.2f}秒")
-        return ChatResponse(
-            answer=answer,
-            related_knowledge=related_knowledge
-        )
-    except Exception as e:
-        # 全局异常处理
-        logger.error(f"处理请求时发生错误: {e}", exc_info=True)
-        total_time = time.time() - start_time
-        logger.info(f"请求处理异常结束，总耗时: {total_time:.2f}秒")
-        return ChatResponse(
-            answer="系统出现错误，请稍后重试。",
-            related_knowledge=[]
-        )
+        ticket = _admit(prompt_paths, enforce_admission)
+    except AdmissionRejected as e:
+        raise _busy_exception(e)
+    return await _collect_response(_run_math_pipeline(_MathContext(request, prompt_paths, stream=False), ticket))
+
+
+async def _collect_response(events: AsyncGenerator[Tuple[str, Any], None]) -> ChatResponse:
+    """
+    汇总流水线事件为一次响应
+
+    Args:
+        events (AsyncGenerator[Tuple[str, Any], None]): 流水线事件
+
+    Returns:
+        ChatResponse: 回答与相关知识点，出错时回答为错误信息
+    """
+    answer_parts = []
+    related_knowledge = []
+    error = None
+    async with aclosing(events):
+        async for event_type, data in events:
+            if event_type == "answer_chunk":
+                answer_parts.append(data)
+            elif event_type == "complete":
+                related_knowledge = data["related_knowledge"]
+            elif event_type == "error":
+                error = data
+            elif event_type == "busy":
+                error = data["message"]
+    if error is not None:
+        return ChatResponse.construct(answer=error, related_knowledge=[])
+    return ChatResponse.construct(answer="".join(answer_parts), related_knowledge=related_knowledge)
 
 
-async def handle_math_question_stream(request: ChatRequest, prompt_paths: dict) -> StreamingResponse:
+async def handle_math_question_stream(request: ChatRequest, prompt_paths: dict, last_event_id: Optional[str] = None) -> StreamingResponse:
     """
     处理数学问题并以SSE流式方式返回结果
+    每个事件携带id，断线重连时携带Last-Event-ID可从断点续传，生成仍在进行时直接接入
     
     Args:
         request (ChatRequest): 聊天请求数据
         prompt_paths (dict): 包含提示词文件路径的字典
+        last_event_id (Optional[str]): 客户端重连时携带的Last-Event-ID
         
     Returns:
-        StreamingResponse: SSE流式响应
+        StreamingResponse: SSE流式响应，服务繁忙时只包含一个busy事件
     """
+    headers = {
+        "Cache-Control": "no-cache",
+        "Connection": "keep-alive",
+        "Access-Control-Allow-Origin": "*",
+    }
+    stream_buffer = registrar.get_component("stream_buffer")
+    resumed = stream_buffer.resume(last_event_id) if stream_buffer is not None and last_event_id else None
+    if resumed is None:
+        # 断点续传接入已接收的生成，不重复准入
+        try:
+            ticket = _admit(prompt_paths)
+        except AdmissionRejected as e:
+            headers["Retry-After"] = str(e.retry_after)
+            return StreamingResponse(_busy_stream(e.retry_after), media_type="text/event-stream", headers=headers)
+    if stream_buffer is None:
+        return StreamingResponse(
+            stream_math_question_handler(request, prompt_paths, ticket),
+            media_type="text/event-stream",
+            headers=headers
+        )
+
+    if resumed is not None:
+        record, offset = resumed
+    else:
+        producer = stream_math_question_handler(request, prompt_paths, ticket)
+        record, offset = stream_buffer.start(producer), 0
+        if record is None:
+            # 缓冲区已满时直接输出，不支持断点续传
+            return StreamingResponse(producer, media_type="text/event-stream", headers=headers)
+    headers["X-Stream-Id"] = record.stream_id
     return StreamingResponse(
-        stream_math_question_handler(request, prompt_paths),
+        _timed_frames(stream_buffer.replay(record, offset), current_timer()),
         media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "Access-Control-Allow-Origin": "*",
-        }
+        headers=headers
     )
 
 
-async def stream_math_question_handler(request: ChatRequest, prompt_paths: dict) -> AsyncGenerator[str, None]:
+async def stream_math_question_handler(request: ChatRequest, prompt_paths: dict, ticket: Optional[AdmissionTicket] = None) -> AsyncGenerator[str, None]:
     """
-    流式处理数学问题的生成器函数
+    流式处理数学问题的生成器函数，将流水线事件转为SSE事件
     
     Args:
         request (ChatRequest): 聊天请求数据
         prompt_paths (dict): 包含提示词文件路径的字典
+        ticket (Optional[AdmissionTicket]): 准入凭证，生成结束时释放
         
     Yields:
         str: SSE格式的数据片段
     """
+    async with aclosing(_run_math_pipeline(_MathContext(request, prompt_paths, stream=True), ticket)) as events:
+        async for event_type, data in events:
+            yield _sse_event(event_type, data)
+
+
+def _group_batch_questions(questions: List[str]) -> Dict[str, List[int]]:
+    """
+    按规范化后的问题对批量请求去重
+
+    Args:
+        questions (List[str]): 问题列表
+
+    Returns:
+        Dict[str, List[int]]: 规范化后的问题 -> 该问题在请求中的所有位置，按首次出现顺序排列
+    """
+    question_processor = registrar.get_component("question_processor")
+    groups: Dict[str, List[int]] = {}
+    for index, question in enumerate(questions):
+        key = question_processor.process(question) if question_processor is not None else question
+        groups.setdefault(key, []).append(index)
+    return groups
+
+
+async def _iter_batch_answers(questions: List[str], groups: Dict[str, List[int]], prompt_paths: dict,
+                              mode: Optional[str] = None) -> AsyncGenerator[Tuple[List[int], ChatResponse], None]:
+    """
+    在有界并发下处理去重后的问题，按完成顺序产出结果；生成器提前关闭时取消未完成的问题
+
+    Args:
+        questions (List[str]): 问题列表
+        groups (Dict[str, List[int]]): 规范化后的问题 -> 在请求中的位置
+        prompt_paths (dict): 包含提示词文件路径的字典
+        mode (Optional[str]): 延迟模式
+
+    Yields:
+        Tuple[List[int], ChatResponse]: 问题在请求中的所有位置与回答
+    """
+    semaphore = asyncio.Semaphore(config.BATCH_CONCURRENCY)
+
+    async def answer(indices: List[int]) -> Tuple[List[int], ChatResponse]:
+        async with semaphore:
+            # 每个问题单独计时，按单个请求写入指标与汇总日志
+            start_request_timer()
+            return indices, await handle_math_question(ChatRequest(user_question=questions[indices[0]], mode=mode), prompt_paths,
+                                                       enforce_admission=False)
+
+    tasks = [asyncio.ensure_future(answer(indices)) for indices in groups.values()]
     try:
-        logger.info(f"开始流式处理请求: {request.user_question}")
-        
-        # 获取注册的组件
-        question_processor = registrar.get_component("question_processor")
-        prompt_builder = registrar.get_component("prompt_builder")
-        llm_dispatcher = registrar.get_component("llm_dispatcher")
-        
-        # 检查必要组件是否存在
-        if not all([question_processor, prompt_builder, llm_dispatcher]):
-            yield f"data: {json.dumps({'type': 'error', 'data': '系统初始化未完成，请稍后重试。'})}\n\n"
-            return
-        
-        # 1. 处理用户问题
-        logger.info("开始处理用户问题")
-        processed_question = question_processor.process(request.user_question)
-        logger.info(f"问题处理完成: {processed_question}")
-        
-        
-        # 2. 调用外部推荐系统API获取课程信息
-        # GET /api/v1/recommendation/rag/search/courses?query={查询字符串}&top_k=1
-        logger.info("开始获取课程信息")
-        courses_api_url = config.GET_IP_URL + f"/api/v1/recommendation/rag/search/courses?query={processed_question}&top_k=1"
-        courses_response = requests.get(courses_api_url)
-        logger.info(f"课程信息获取完成，状态码: {courses_response.status_code}")
-        
-        if courses_response.status_code != 200:
-            # 如果API调用失败，使用备用方式
-            logger.warning(f"课程信息获取失败，状态码: {courses_response.status_code}")
-            fallback_prompt = prompt_builder.build_fallback(processed_question, prompt_paths["fallback"])
-            
-            # 调用备用大模型 (CPU密集型) 并流式返回
-            
-            async for chunk in llm_dispatcher.dispatch_fallback_stream(fallback_prompt, processed_question):
-                yield f"data: {json.dumps({'type': 'answer_chunk', 'data': chunk})}\n\n"
-            
-            yield f"data: {json.dumps({'type': 'complete', 'data': {'related_knowledge': []}})}\n\n"
-            return
-        
-        courses_data = courses_response.json()
-        logger.info(f"课程数据解析完成: {courses_data}")
-        
-        
-        # 检查是否有匹配的课程
-        if not courses_data.get("data"):
-            # 如果没有匹配的课程，使用备用方式
-            logger.info("未找到匹配的课程数据")
-            fallback_prompt = prompt_builder.build_fallback(processed_question, prompt_paths["fallback"])
-
-            # 调用备用大模型 (CPU密集型) 并流式返回
-            async for chunk in llm_dispatcher.dispatch_fallback_stream(fallback_prompt, processed_question):
-                yield f"data: {json.dumps({'type': 'answer_chunk', 'data': chunk})}\n\n"
-            
-            yield f"data: {json.dumps({'type': 'complete', 'data': {'related_knowledge': []}})}\n\n"
-            return
-        
-        # 获取第一个匹配的课程
-        course_info = courses_data["data"][0]
-        course_uuid = course_info["course_uuid"]
-        logger.info(f"获取到课程信息，course_uuid: {course_uuid}")
-        
-        
-        # 3. 调用外部推荐系统API获取报告信息
-        # GET /api/v1/recommendation/rag/search/reports/{course_id}?query={查询字符串}&top_k=1
-        logger.info("开始获取报告信息")
-        reports_api_url = config.GET_IP_URL + f"/api/v1/recommendation/rag/search/reports/{course_uuid}?query={processed_question}&top_k=1"
-        reports_response = requests.get(reports_api_url)
-        logger.info(f"报告信息获取完成，状态码: {reports_response.status_code}")
-        
-        if reports_response.status_code != 200:
-            # 如果API调用失败，使用备用方式
-            logger.warning(f"报告信息获取失败，状态码: {reports_response.status_code}")
-            fallback_prompt = prompt_builder.build_fallback(processed_question, prompt_paths["fallback"])
-
-            # 调用备用大模型 (CPU密集型) 并流式返回
-            async for chunk in llm_dispatcher.dispatch_fallback_stream(fallback_prompt, processed_question):
-                yield f"data: {json.dumps({'type': 'answer_chunk', 'data': chunk})}\n\n"
-            
-            yield f"data: {json.dumps({'type': 'complete', 'data': {'related_knowledge': []}})}\n\n"
-            return
-        
-        reports_data = reports_response.json()
-        logger.info(f"报告数据解析完成: {reports_data}")
-        
-        # 发送报告数据
-        
-        
-        # 构建related_knowledge数据
-        related_knowledge = []
-        if reports_data.get("data"):
-            # 如果有匹配的报告，使用报告信息
-            report_info = reports_data["data"][0]
-            
-            # 构建related_knowledge项
-            related_knowledge_item = {
-                "resource_name": course_info["resource_name"],
-                "file_name": course_info["file_name"],
-                "video_link": course_info["video_link"],
-                "video_summary": course_info["video_summary"],
-                "start_time": report_info["start_time"],
-                "end_time": report_info["end_time"],
-                "duration": report_info["duration"]
-            }
-            related_knowledge.append(related_knowledge_item)
-            logger.info(f"相关知识点构建完成: {related_knowledge_item}")
-            
-            # 发送相关知识点
-            
-            # 构建包含key_points的系统提示词
-            key_points = report_info.get("key_points", [])
-            logger.info(f"获取到关键点: {key_points}")
-            system_prompt = prompt_builder.build_with_knowledge_and_key_points(key_points, prompt_paths["knowledge"])
-            logger.info("提示词构建完成")
-            
-            
-            # 调用大模型生成回答 (CPU密集型) 并流式返回
-            logger.info("开始调用大模型生成回答")
-            
-            async for chunk in llm_dispatcher.dispatch_with_knowledge_stream(system_prompt, processed_question):
-                yield f"data: {json.dumps({'type': 'answer_chunk', 'data': chunk})}\n\n"
-            
-            logger.info(f"大模型回答生成完成")
+        for future in asyncio.as_completed(tasks):
+            yield await future
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def _check_batch_admission(prompt_paths: dict):
+    """
+    批量请求整体准入，接收后批次内的问题只计入处理中的请求，不再逐个拒绝
+
+    Args:
+        prompt_paths (dict): 包含提示词文件路径的字典
+
+    Raises:
+        HTTPException: 服务繁忙时返回503与Retry-After响应头
+    """
+    admission = registrar.get_component("admission")
+    if admission is None:
+        return
+    try:
+        admission.check(_agent_name(prompt_paths))
+    except AdmissionRejected as e:
+        logger.info(f"服务繁忙，拒绝批量请求: {e}")
+        raise _busy_exception(e)
+
+
+def _batch_item(index: int, question: str, response: ChatResponse) -> BatchItemResponse:
+    """
+    构建批量请求中单个问题的结果
+
+    Args:
+        index (int): 问题在请求中的位置
+        question (str): 原始问题
+        response (ChatResponse): 回答
+
+    Returns:
+        BatchItemResponse: 单个问题的结果
+    """
+    return BatchItemResponse.construct(index=index, question=question, answer=response.answer,
+                                       related_knowledge=response.related_knowledge)
+
+
+async def handle_math_batch(request: BatchChatRequest, prompt_paths: dict) -> BatchChatResponse:
+    """
+    批量处理数学问题：规范化后去重，并发检索与生成，结果按请求顺序返回
+
+    Args:
+        request (BatchChatRequest): 批量聊天请求数据
+        prompt_paths (dict): 包含提示词文件路径的字典
+
+    Returns:
+        BatchChatResponse: 按请求顺序排列的回答
+
+    Raises:
+        HTTPException: 服务繁忙时返回503与Retry-After响应头
+    """
+    _check_batch_admission(prompt_paths)
+    groups = _group_batch_questions(request.questions)
+    logger.debug(f"开始批量处理，问题数: {len(request.questions)}，去重后: {len(groups)}")
+    results: List[Optional[BatchItemResponse]] = [None] * len(request.questions)
+    async for indices, response in _iter_batch_answers(request.questions, groups, prompt_paths, request.mode):
+        for index in indices:
+            results[index] = _batch_item(index, request.questions[index], response)
+    return BatchChatResponse.construct(total=len(request.questions), unique=len(groups), results=results)
+
+
+async def handle_math_batch_stream(request: BatchChatRequest, prompt_paths: dict) -> StreamingResponse:
+    """
+    批量处理数学问题并以NDJSON流式返回，每个问题完成后立即输出一行（按完成顺序，用index对应请求位置）
+
+    Args:
+        request (BatchChatRequest): 批量聊天请求数据
+        prompt_paths (dict): 包含提示词文件路径的字典
+
+    Returns:
+        StreamingResponse: NDJSON流式响应
+
+    Raises:
+        HTTPException: 服务繁忙时返回503与Retry-After响应头
+    """
+    _check_batch_admission(prompt_paths)
+    groups = _group_batch_questions(request.questions)
+    logger.debug(f"开始批量流式处理，问题数: {len(request.questions)}，去重后: {len(groups)}")
+
+    async def lines() -> AsyncGenerator[str, None]:
+        async for indices, response in _iter_batch_answers(request.questions, groups, prompt_paths, request.mode):
+            for index in indices:
+                yield dumps_str(_batch_item(index, request.questions[index], response)) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson",
+                             headers={"Cache-Control": "no-cache", "X-Batch-Unique": str(len(groups))})
+
+
+def _ws_question(payload: Dict[str, Any], session_id: str) -> Tuple[str, ChatRequest]:
+    """
+    解析WebSocket的ask消息
+
+    Args:
+        payload (Dict[str, Any]): 客户端消息
+        session_id (str): 连接的会话ID
+
+    Returns:
+        Tuple[str, ChatRequest]: 问题ID与聊天请求（使用连接的会话ID）
+
+    Raises:
+        ValueError: 缺少问题ID、问题内容或模式错误
+    """
+    question_id = payload.get("id")
+    if not isinstance(question_id, (str, int)) or isinstance(question_id, bool) or question_id == "":
+        raise ValueError("缺少问题ID")
+    question = payload.get("user_question")
+    if not isinstance(question, str) or not question.strip():
+        raise ValueError("缺少问题内容")
+    try:
+        request = ChatRequest(user_question=question, session_id=session_id, mode=payload.get("mode"))
+    except ValidationError as e:
+        raise ValueError("; ".join(error["msg"] for error in e.errors()))
+    return str(question_id), request
+
+
+async def _answer_ws_question(question_id: str, request: ChatRequest, prompt_paths: dict,
+                              send: Callable[[str, Optional[str], Any], None]):
+    """
+    处理WebSocket连接中的一个问题，流水线事件带上问题ID发送
+
+    Args:
+        question_id (str): 问题ID
+        request (ChatRequest): 聊天请求数据
+        prompt_paths (dict): 包含提示词文件路径的字典
+        send (Callable): 发送消息的函数 send(事件类型, 问题ID, 事件数据)
+    """
+    # 每个问题单独计时与采样，按单个请求写入指标与汇总日志
+    start_request_timer()
+    begin_request_logging()
+    try:
+        ticket = _admit(prompt_paths)
+    except AdmissionRejected as e:
+        send("busy", question_id, {"retry_after": e.retry_after, "message": "服务繁忙，请稍后重试。"})
+        return
+    async with aclosing(_run_math_pipeline(_MathContext(request, prompt_paths, stream=True), ticket)) as events:
+        async for event_type, data in events:
+            send(event_type, question_id, data)
+
+
+async def handle_math_websocket(websocket: WebSocket, prompt_paths: dict):
+    """
+    WebSocket多问题会话：一个连接上连续提问，多个问题可同时处理，回答片段带问题ID交错返回
+    连接对应一个会话（查询参数session_id可续接已有会话，未携带时自动生成），追问复用上一轮的课程信息
+
+    客户端消息：
+        {"type": "ask", "id": 问题ID, "user_question": ..., "mode": ...}
+        {"type": "cancel", "id": 问题ID}
+        {"type": "ping"}
+    服务端消息为 {"type": ..., "id": 问题ID, "data": ...}，事件类型与SSE接口一致，另有ready/cancelled/pong
+
+    Args:
+        websocket (WebSocket): WebSocket连接
+        prompt_paths (dict): 包含提示词文件路径的字典
+    """
+    await websocket.accept()
+    session_id = websocket.query_params.get("session_id") or uuid.uuid4().hex
+    outbox: asyncio.Queue = asyncio.Queue()
+    tasks: Dict[str, asyncio.Task] = {}
+
+    def send(event_type: str, question_id: Optional[str], data: Any = None):
+        outbox.put_nowait(dumps_str({"type": event_type, "id": question_id, "data": data}))
+
+    async def send_loop():
+        # 单一发送任务，避免多个问题同时写入连接
+        try:
+            while True:
+                await websocket.send_text(await outbox.get())
+        except (WebSocketDisconnect, RuntimeError, OSError) as e:
+            logger.debug(f"WebSocket发送结束: {e}")
+
+    sender = asyncio.ensure_future(send_loop())
+    send("ready", None, {"session_id": session_id, "max_inflight": config.WS_MAX_INFLIGHT})
+    logger.debug(f"WebSocket连接建立，会话: {session_id}")
+    try:
+        while True:
+            try:
+                payload = loads(await websocket.receive_text())
+                if not isinstance(payload, dict):
+                    raise ValueError("消息应为JSON对象")
+            except ValueError as e:
+                send("error", None, f"消息格式错误: {e}")
+                continue
+            message_type = payload.get("type")
+            if message_type == "ask":
+                try:
+                    question_id, request = _ws_question(payload, session_id)
+                except ValueError as e:
+                    send("error", payload.get("id"), str(e))
+                    continue
+                if question_id in tasks:
+                    send("error", question_id, "问题ID正在处理中")
+                    continue
+                if len(tasks) >= config.WS_MAX_INFLIGHT:
+                    send("error", question_id, f"同时处理的问题不能超过{config.WS_MAX_INFLIGHT}个")
+                    continue
+                task = asyncio.ensure_future(_answer_ws_question(question_id, request, prompt_paths, send))
+                tasks[question_id] = task
+                task.add_done_callback(lambda _, question_id=question_id: tasks.pop(question_id, None))
+            elif message_type == "cancel":
+                question_id = str(payload.get("id"))
+                task = tasks.get(question_id)
+                if task is not None and not task.done():
+                    # 取消后流水线不再发出事件，cancelled是该问题的最后一条消息
+                    task.cancel()
+                    logger.debug(f"问题已取消: {question_id}")
+                    send("cancelled", question_id)
+            elif message_type == "ping":
+                send("pong", None)
+            else:
+                send("error", payload.get("id"), f"未知的消息类型: {message_type}")
+    except WebSocketDisconnect:
+        logger.debug(f"WebSocket连接断开，会话: {session_id}，取消处理中的问题: {len(tasks)}")
+    finally:
+        pending = list(tasks.values())
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        sender.cancel()
+        await asyncio.gather(sender, return_exceptions=True)
+
+
+# 多智能体协作在指标与汇总日志中使用的智能体名称
+_COLLABORATE_AGENT = "collaborate"
+# 协作子请求附加在系统提示词末尾的要求：只列出解题要点，完整讲解由汇总生成
+_BRIEF_INSTRUCTION = ("\n\n本题涉及多个知识领域，你的回答将与其他领域老师的回答汇总后再讲解给学生。"
+                      "请只用简短的要点列出与你的领域相关的已知条件、公式、关键步骤和计算结果，不要写完整的讲解。")
+_SYNTHESIS_PROMPT_PATH = os.path.join(config.PROJECT_ROOT, "agents", "tool_agent", "prompt", "collaborate_synthesis_prompt.txt")
+
+
+def _match_agents(request: ChatRequest, agents: Dict[str, Tuple[str, dict]]) -> Tuple[str, List[str]]:
+    """
+    按智能体的关键词规则匹配问题涉及的领域
+
+    Args:
+        request (ChatRequest): 聊天请求数据
+        agents (Dict[str, Tuple[str, dict]]): 智能体名称 -> (领域名称, 提示词文件路径)
+
+    Returns:
+        Tuple[str, List[str]]: 处理后的问题与匹配到的智能体（按命中关键词数排列，最多COLLABORATE_MAX_AGENTS个）
+
+    Raises:
+        HTTPException: 组件缺失时返回503，未匹配到任何智能体时返回400
+    """
+    question_processor = registrar.get_component("question_processor")
+    agent_matcher = registrar.get_component("agent_matcher")
+    if question_processor is None or agent_matcher is None:
+        raise HTTPException(status_code=503, detail="系统初始化未完成，请稍后重试。")
+    processed_question = question_processor.process(request.user_question)
+    matched = [match.name for match in agent_matcher.match(processed_question) if match.name in agents]
+    if not matched:
+        raise HTTPException(status_code=400, detail="未识别到问题涉及的知识领域，请使用对应智能体的问答接口。")
+    matched = matched[:max(1, config.COLLABORATE_MAX_AGENTS)]
+    logger.debug(f"多智能体协作匹配结果: {matched}")
+    return processed_question, matched
+
+
+def _check_collaborate_admission(agents: Dict[str, Tuple[str, dict]], matched: List[str]):
+    """
+    协作请求整体准入，任一参与的智能体繁忙时拒绝；接收后各智能体的子请求只计入处理中的请求
+
+    Args:
+        agents (Dict[str, Tuple[str, dict]]): 智能体名称 -> (领域名称, 提示词文件路径)
+        matched (List[str]): 参与协作的智能体
+
+    Raises:
+        AdmissionRejected: 预计完成时间超过截止时间
+    """
+    admission = registrar.get_component("admission")
+    if admission is None:
+        return
+    for agent in matched:
+        try:
+            admission.check(_agent_name(agents[agent][1]))
+        except AdmissionRejected as e:
+            logger.info(f"服务繁忙，拒绝协作请求: {e}")
+            raise
+
+
+def _merge_knowledge(responses: List[ChatResponse]) -> List[Dict[str, Any]]:
+    """
+    合并各智能体的相关知识点，同一视频片段只保留一次
+
+    Args:
+        responses (List[ChatResponse]): 各智能体的回答
+
+    Returns:
+        List[Dict[str, Any]]: 相关知识点，按智能体顺序排列
+    """
+    merged, seen = [], set()
+    for response in responses:
+        for item in response.related_knowledge:
+            key = (item["video_link"], item["start_time"])
+            if key not in seen:
+                seen.add(key)
+                merged.append(item)
+    return merged
+
+
+class _CollaborateContext(PipelineContext):
+    """
+    多智能体协作流水线的上下文
+    """
+
+    def __init__(self, request: ChatRequest, agents: Dict[str, Tuple[str, dict]], processed_question: str,
+                 matched: List[str], stream: bool):
+        """
+        初始化上下文
+
+        Args:
+            request (ChatRequest): 聊天请求数据
+            agents (Dict[str, Tuple[str, dict]]): 智能体名称 -> (领域名称, 提示词文件路径)
+            processed_question (str): 处理后的问题
+            matched (List[str]): 参与协作的智能体
+            stream (bool): 是否流式生成汇总回答
+        """
+        super().__init__(current_timer())
+        self.request = request
+        self.agents = agents
+        self.processed_question = processed_question
+        self.question = registrar.get_component("question_processor").clean(request.user_question)
+        self.matched = matched
+        self.stream = stream
+        self.branch = _COLLABORATE_AGENT
+        self.mode = request.mode or config.COLLABORATE_DEFAULT_MODE
+        # 成功回答的智能体及其回答，按匹配顺序排列
+        self.answers: List[Tuple[str, ChatResponse]] = []
+        self.related_knowledge: List[Dict[str, Any]] = []
+        self.history = None
+        self.generation: Optional[GenerationChoice] = None
+        self.system_prompt: Optional[str] = None
+        self.answer = ""
+        self.degradation = _degradation_level()
+
+
+async def _fan_out_stage(ctx: _CollaborateContext):
+    """
+    各智能体并发检索并只生成解题要点，每个智能体完成后发出agent_answered事件
+    子请求不使用会话，按各智能体的单个请求写入指标与汇总日志
+    """
+    ctx.emit("stage", {"stage": "question_processed", "processed_question": ctx.processed_question, "agents": ctx.matched})
+
+    async def answer(agent: str) -> Tuple[str, Optional[ChatResponse]]:
+        start_request_timer()
+        prompt_paths = ctx.agents[agent][1]
+        sub_request = ChatRequest(user_question=ctx.request.user_question, mode=ctx.mode)
+        # 协作请求已整体准入，子请求只计入处理中的请求
+        events = _run_math_pipeline(_MathContext(sub_request, prompt_paths, stream=False, brief=True), _admit(prompt_paths, enforce=False))
+        answer_parts, related_knowledge, failed = [], [], False
+        async with aclosing(events):
+            async for event_type, data in events:
+                if event_type == "answer_chunk":
+                    answer_parts.append(data)
+                elif event_type == "complete":
+                    related_knowledge = data["related_knowledge"]
+                elif event_type in ("error", "busy"):
+                    failed = True
+        # 流水线出错、降级拒绝或大模型调用出错时不参与汇总
+        answer_text = "".join(answer_parts)
+        if failed or is_error_answer(answer_text):
+            return agent, None
+        return agent, ChatResponse.construct(answer=answer_text, related_knowledge=related_knowledge)
+
+    tasks = [asyncio.ensure_future(answer(agent)) for agent in ctx.matched]
+    responses: Dict[str, Optional[ChatResponse]] = {}
+    try:
+        for future in asyncio.as_completed(tasks):
+            agent, response = await future
+            responses[agent] = response
+            ctx.emit("stage", {"stage": "agent_answered", "agent": agent})
+    finally:
+        for task in tasks:
+            task.cancel()
+    for agent in ctx.matched:
+        if responses[agent] is None:
+            logger.warning(f"协作智能体未能回答: {agent}")
+            continue
+        ctx.answers.append((agent, responses[agent]))
+
+
+async def _synthesis_prompt_stage(ctx: _CollaborateContext):
+    """
+    合并相关知识点并发出knowledge事件，构建汇总提示词；子请求只生成了要点，只有一个智能体回答成功时同样汇总
+    """
+    if not ctx.answers:
+        if ctx.degradation >= LEVEL_CACHE_ONLY:
+            _degraded_busy(ctx)
         else:
-            # 如果没有匹配的报告，使用备用方式
-            logger.info("未找到报告数据，使用备用方式")
-            fallback_prompt = prompt_builder.build_fallback(processed_question, prompt_paths["fallback"])
-
-            async for chunk in llm_dispatcher.dispatch_fallback_stream(fallback_prompt, processed_question):
-                yield f"data: {json.dumps({'type': 'answer_chunk', 'data': chunk})}\n\n"
-            
-            logger.info(f"使用备用方式生成回答")
-            related_knowledge = []
-        
-        # 4. 发送完成信号
-        logger.info("流式处理完成，发送完成信号")
-        yield f"data: {json.dumps({'type': 'complete', 'data': {'related_knowledge': related_knowledge}})}\n\n"
+            ctx.emit("error", "系统出现错误，请稍后重试。")
+            ctx.stop()
+        return
+    ctx.related_knowledge = _merge_knowledge([response for _, response in ctx.answers])
+    ctx.emit("knowledge", {"related_knowledge": ctx.related_knowledge})
+    session = _load_session(ctx.request)
+    ctx.history = session.history_messages() if session else None
+    generation_profiles = registrar.get_component("generation_profiles")
+    if generation_profiles is not None:
+        ctx.generation = _degrade_generation(generation_profiles.select(_COLLABORATE_AGENT, ctx.mode, ctx.processed_question),
+                                             _COLLABORATE_AGENT, ctx.degradation)
+    answers = [(ctx.agents[agent][0], response.answer) for agent, response in ctx.answers]
+    prompt_builder = registrar.get_component("prompt_builder")
+    ctx.system_prompt = await _run_stage(STAGE_CPU, prompt_builder.build_synthesis, ctx.question, answers, _SYNTHESIS_PROMPT_PATH)
+
+
+async def _synthesize_stage(ctx: _CollaborateContext):
+    """
+    调用一次大模型汇总各智能体的回答，流式时逐段发出answer_chunk事件
+    """
+    llm_dispatcher = registrar.get_component("llm_dispatcher")
+    ctx.emit("stage", {"stage": "generating", "branch": ctx.branch})
+    args = (ctx.system_prompt, ctx.question, ctx.history, (None, None), ctx.generation, ctx.timer)
+    if ctx.stream:
+        answer_parts = []
+        async for chunk in _generate_stream(llm_dispatcher.dispatch_fallback_stream, *args):
+            answer_parts.append(chunk)
+            ctx.emit("answer_chunk", chunk)
+        ctx.answer = "".join(answer_parts)
+    else:
+        ctx.answer = await _generate(llm_dispatcher.dispatch_fallback, *args)
+        ctx.emit("answer_chunk", ctx.answer)
+    log_payload(logger, "协作汇总回答生成完成", ctx.answer)
+
+
+async def _collaborate_emit_stage(ctx: _CollaborateContext):
+    """
+    记录本轮对话并发出complete事件
+    """
+    _record_turn(ctx.request, ctx.question, ctx.answer)
+    ctx.emit("complete", {"related_knowledge": ctx.related_knowledge, "agents": [agent for agent, _ in ctx.answers]})
+
+
+# 多智能体协作流水线：各智能体运行自己的流水线并只生成要点，汇总调用一次大模型生成完整讲解
+_COLLABORATE_PIPELINE = Pipeline([
+    Stage("fan_out", _fan_out_stage, timer="collaborate_agents"),
+    Stage("synthesis_prompt", _synthesis_prompt_stage, deps=["fan_out"], timer="prompt_build"),
+    Stage("synthesize", _synthesize_stage, deps=["synthesis_prompt"]),
+    Stage("emit", _collaborate_emit_stage, deps=["synthesize"]),
+], hooks=[TimingHook()])
+
+
+async def _run_collaborate_pipeline(ctx: _CollaborateContext) -> AsyncGenerator[Tuple[str, Any], None]:
+    """
+    运行多智能体协作流水线，出错时产出error事件；结束时写入请求汇总日志
+
+    Args:
+        ctx (_CollaborateContext): 上下文
+
+    Yields:
+        Tuple[str, Any]: (事件类型, 事件数据)
+    """
+    try:
+        logger.debug(f"开始多智能体协作: {ctx.matched}")
+        async for event in _COLLABORATE_PIPELINE.run(ctx):
+            yield event
     except Exception as e:
-        # 全局异常处理
-        logger.error(f"处理请求时发生错误: {e}", exc_info=True)
-        yield f"data: {json.dumps({'type': 'error', 'data': '系统出现错误，请稍后重试。'})}\n\n"
\ No newline at end of file
+        logger.error(f"多智能体协作时发生错误: {e}", exc_info=True)
+        yield "error", "系统出现错误，请稍后重试。"
+    finally:
+        _finish_request(ctx.timer, ctx.request, _COLLABORATE_AGENT, ctx.branch, agents=ctx.matched,
+                        degradation=ctx.degradation or None, **_generation_fields(ctx.generation))
+
+
+async def handle_collaborate_question(request: ChatRequest, agents: Dict[str, Tuple[str, dict]]) -> ChatResponse:
+    """
+    多智能体协作问答：问题只涉及一个领域时交给该智能体处理，涉及多个领域时各智能体并发回答后汇总
+
+    Args:
+        request (ChatRequest): 聊天请求数据
+        agents (Dict[str, Tuple[str, dict]]): 智能体名称 -> (领域名称, 提示词文件路径)
+
+    Returns:
+        ChatResponse: 包含回答和相关知识点的响应数据
+
+    Raises:
+        HTTPException: 未匹配到智能体时返回400，服务繁忙时返回503与Retry-After响应头
+    """
+    processed_question, matched = _match_agents(request, agents)
+    if len(matched) == 1:
+        return await handle_math_question(request, agents[matched[0]][1])
+    try:
+        _check_collaborate_admission(agents, matched)
+    except AdmissionRejected as e:
+        raise _busy_exception(e)
+    return await _collect_response(_run_collaborate_pipeline(
+        _CollaborateContext(request, agents, processed_question, matched, stream=False)))
+
+
+async def handle_collaborate_stream(request: ChatRequest, agents: Dict[str, Tuple[str, dict]]) -> StreamingResponse:
+    """
+    多智能体协作问答的SSE流式版本，汇总回答逐段返回；响应头X-Collaborate-Agents为参与的智能体
+
+    Args:
+        request (ChatRequest): 聊天请求数据
+        agents (Dict[str, Tuple[str, dict]]): 智能体名称 -> (领域名称, 提示词文件路径)
+
+    Returns:
+        StreamingResponse: SSE流式响应，服务繁忙时只包含一个busy事件
+
+    Raises:
+        HTTPException: 未匹配到智能体时返回400
+    """
+    processed_question, matched = _match_agents(request, agents)
+    if len(matched) == 1:
+        response = await handle_math_question_stream(request, agents[matched[0]][1])
+        response.headers["X-Collaborate-Agents"] = matched[0]
+        return response
+    headers = {
+        "Cache-Control": "no-cache",
+        "Connection": "keep-alive",
+        "Access-Control-Allow-Origin": "*",
+        "X-Collaborate-Agents": ",".join(matched),
+    }
+    try:
+        _check_collaborate_admission(agents, matched)
+    except AdmissionRejected as e:
+        headers["Retry-After"] = str(e.retry_after)
+        return StreamingResponse(_busy_stream(e.retry_after), media_type="text/event-stream", headers=headers)
+
+    async def frames() -> AsyncGenerator[str, None]:
+        ctx = _CollaborateContext(request, agents, processed_question, matched, stream=True)
+        async with aclosing(_run_collaborate_pipeline(ctx)) as events:
+            async for event_type, data in events:
+                yield _sse_event(event_type, data)
+
+    return StreamingResponse(_timed_frames(frames(), current_timer()), media_type="text/event-stream", headers=headers)
@@ -5,8 +5,29 @@
 定义请求和响应的数据模型
 """
 
-from pydantic import BaseModel
-from typing import List, Dict, Any
+from pydantic import BaseModel, validator
+from typing import List, Dict, Any, Optional
+from core.conf import config
+from agents.tool_agent.generation_profiles import MODES
+
+
+def _validate_mode(cls, mode: Optional[str]) -> Optional[str]:
+    """
+    校验延迟模式
+
+    Args:
+        mode (Optional[str]): 延迟模式
+
+    Returns:
+        Optional[str]: 延迟模式
+
+    Raises:
+        ValueError: 模式不在fast/balanced/thorough中
+    """
+    if mode is not None and mode not in MODES:
+        raise ValueError(f"mode应为 {'/'.join(MODES)} 之一")
+    return mode
+
 
 class ChatRequest(BaseModel):
     """
@@ -14,12 +35,20 @@ class ChatRequest(BaseModel):
     用于接收用户的问题
     """
     user_question: str
+    # 会话ID，携带时启用多轮对话，追问可复用上一轮的课程信息
+    session_id: Optional[str] = None
+    # 延迟模式：fast（快速档）、balanced（按问题难度选择）、thorough（大模型），未指定时使用GENERATION_DEFAULT_MODE
+    mode: Optional[str] = None
+
+    _check_mode = validator("mode", allow_reuse=True)(_validate_mode)
     
     class Config:
         # 示例数据仅用于API文档展示
         schema_extra = {
             "example": {
-                "user_question": "什么是二次根式？"
+                "user_question": "什么是二次根式？",
+                "session_id": "student-42",
+                "mode": "balanced"
             }
         }
 
@@ -60,4 +89,62 @@ class ChatResponse(BaseModel):
                     }
                 ]
             }
-        }
\ No newline at end of file
+        }
+
+class BatchChatRequest(BaseModel):
+    """
+    批量聊天请求模型
+    用于一次提交整份练习中的多个问题
+    """
+    questions: List[str]
+    # 延迟模式，作用于批次内的全部问题
+    mode: Optional[str] = None
+
+    _check_mode = validator("mode", allow_reuse=True)(_validate_mode)
+
+    @validator("questions")
+    def check_questions(cls, questions: List[str]) -> List[str]:
+        """
+        校验问题数量
+
+        Args:
+            questions (List[str]): 问题列表
+
+        Returns:
+            List[str]: 问题列表
+
+        Raises:
+            ValueError: 问题列表为空或超过上限
+        """
+        if not questions:
+            raise ValueError("问题列表不能为空")
+        if len(questions) > config.BATCH_MAX_QUESTIONS:
+            raise ValueError(f"单次最多提交{config.BATCH_MAX_QUESTIONS}个问题")
+        return questions
+
+    class Config:
+        # 示例数据仅用于API文档展示
+        schema_extra = {
+            "example": {
+                "questions": ["化简√48", "什么是最简二次根式？", "计算√2×√8"]
+            }
+        }
+
+class BatchItemResponse(BaseModel):
+    """
+    批量请求中单个问题的结果
+    """
+    index: int
+    question: str
+    answer: str
+    related_knowledge: List[RelatedKnowledgeItem]
+
+class BatchChatResponse(BaseModel):
+    """
+    批量聊天响应模型
+    结果顺序与请求中的问题顺序一致
+    """
+    total: int
+    # 规范化去重后实际处理的问题数
+    unique: int
+    results: List[BatchItemResponse]
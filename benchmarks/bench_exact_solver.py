@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+精确求解快速路径吞吐量基准测试
+使用正确性校验语料中的问题，统计各智能体求解器的命中情况与每秒求解问题数（含未命中问题的识别开销）
+
+用法:
+    python benchmarks/bench_exact_solver.py --iterations 2000
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from collections import defaultdict
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from agents.tool_agent.question_normalizer import QuestionNormalizer
+from scripts.verify_fast_paths import CORPUS_PATH, SOLVERS
+
+
+def main():
+    parser = argparse.ArgumentParser(description="精确求解快速路径吞吐量基准测试")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    normalizer = QuestionNormalizer()
+    questions = defaultdict(list)
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                case = json.loads(line)
+                questions[case["agent"]].append(normalizer.normalize(case["question"]))
+
+    print(f"{'智能体':<24} {'问题数':>6} {'直接回答':>8} {'注入':>6} {'问题/秒':>10} {'us/问题':>9}")
+    for agent, solver_class in SOLVERS.items():
+        solver = solver_class()
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            for question in questions[agent]:
+                solver.solve(question)
+        elapsed = time.perf_counter() - start
+        count = args.iterations * len(questions[agent])
+        stats = solver.statistics.stats()
+        print(f"{agent:<24} {len(questions[agent]):>6} {stats['direct_hits'] // args.iterations:>8} "
+              f"{stats['inject_hits'] // args.iterations:>6} {count / elapsed:>10.0f} {elapsed / count * 1e6:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
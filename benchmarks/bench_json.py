@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+响应序列化基准测试
+对比原有路径（pydantic校验构建ChatResponse、FastAPI按response_model再校验与编码、SSE帧ensure_ascii转义）
+与优化路径（construct构建、json_codec直接序列化、SSE帧不转义中文）的每个响应CPU耗时与每个回答的字节数
+
+用法:
+    python benchmarks/bench_json.py --iterations 5000
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from fastapi.routing import serialize_response
+from fastapi.responses import JSONResponse
+from fastapi.utils import create_response_field
+from app.schema.math_schema import ChatResponse
+from utils.json_codec import FastJSONResponse, dumps_str, orjson
+
+RELATED_KNOWLEDGE = [{
+    "resource_name": "初中初二下数学",
+    "file_name": "二次根式（一）二次根式的定义",
+    "video_link": "https://vod.jxeduyun.com/view/G8/SX/RJB/20200211/G8_SX_RJB_20200211_2816b04dac424d1db4885e362b5266dd.mp4",
+    "video_summary": "本节课介绍了二次根式的概念与化简方法，并强调了常见易错点及其纠正。",
+    "start_time": "00:05:30",
+    "end_time": "00:15:45",
+    "duration": "10:15",
+}]
+ANSWER = "二次根式是形如√a（a≥0）的式子。化简√12时，先把被开方数分解为4×3，再利用√(ab)=√a·√b得到2√3。" * 8
+# 模拟大模型流式输出的片段
+CHUNKS = [ANSWER[i:i + 8] for i in range(0, len(ANSWER), 8)]
+
+
+def legacy_frame(event_type: str, data) -> str:
+    return f"data: {json.dumps({'type': event_type, 'data': data})}\n\n"
+
+
+def fast_frame(event_type: str, data) -> str:
+    return f"data: {dumps_str({'type': event_type, 'data': data})}\n\n"
+
+
+def stream_bytes(frame) -> int:
+    """
+    计算一个完整流式回答的字节数
+
+    Args:
+        frame: SSE帧构建函数
+
+    Returns:
+        int: 字节数
+    """
+    frames = [frame("knowledge", {"related_knowledge": RELATED_KNOWLEDGE})]
+    frames += [frame("answer_chunk", chunk) for chunk in CHUNKS]
+    frames.append(frame("complete", {"related_knowledge": RELATED_KNOWLEDGE}))
+    return sum(len(item.encode("utf-8")) for item in frames)
+
+
+async def legacy_response(field) -> bytes:
+    response = ChatResponse(answer=ANSWER, related_knowledge=RELATED_KNOWLEDGE)
+    content = await serialize_response(field=field, response_content=response)
+    return JSONResponse(content).body
+
+
+async def fast_response(_field) -> bytes:
+    response = ChatResponse.construct(answer=ANSWER, related_knowledge=RELATED_KNOWLEDGE)
+    return FastJSONResponse(response).body
+
+
+def measure(func, iterations: int) -> float:
+    """
+    测量平均耗时
+
+    Args:
+        func: 无参函数
+        iterations (int): 迭代次数
+
+    Returns:
+        float: 平均耗时（微秒）
+    """
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="响应序列化基准测试")
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    field = create_response_field(name="response", type_=ChatResponse)
+    results = []
+    for name, respond, frame in (("原有路径", legacy_response, legacy_frame), ("优化路径", fast_response, fast_frame)):
+        body = loop.run_until_complete(respond(field))
+        response_us = measure(lambda: loop.run_until_complete(respond(field)), args.iterations)
+        stream_us = measure(lambda: [frame("answer_chunk", chunk) for chunk in CHUNKS], args.iterations // 10 or 1)
+        results.append((name, response_us, len(body), stream_us, stream_bytes(frame)))
+    loop.close()
+
+    print(f"JSON库: {'orjson' if orjson is not None else 'json（标准库）'}，回答长度: {len(ANSWER)}字，流式片段数: {len(CHUNKS)}")
+    print(f"{'路径':<8} {'非流式(us/响应)':>16} {'非流式字节':>10} {'流式帧(us/回答)':>16} {'流式字节':>10}")
+    for name, response_us, body_size, stream_us, stream_size in results:
+        print(f"{name:<8} {response_us:>16.1f} {body_size:>10} {stream_us:>16.1f} {stream_size:>10}")
+
+
+if __name__ == "__main__":
+    main()
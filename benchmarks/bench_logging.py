@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+日志开销基准测试
+对比原有同步FileHandler+StreamHandler与异步队列管道在请求线程上的耗时，
+模拟每个请求的日志量：原方案约15条INFO（含完整检索数据与回答），新方案为DEBUG步骤日志、采样大字段与一条汇总记录
+
+用法:
+    python benchmarks/bench_logging.py --requests 2000
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from core.conf import config
+from utils.log_pipeline import setup_logging, log_payload, log_request_summary, begin_request_logging
+
+COURSES_DATA = {"data": [{"course_uuid": "c" * 32, "resource_name": "二次根式的化简" * 5,
+                          "video_summary": "本节课讲解二次根式的性质与化简方法。" * 40}]}
+ANSWER = "根据二次根式的性质，√(a²)=|a|，因此……" * 60
+
+
+def legacy_request(logger: logging.Logger):
+    """
+    原有方案：每个请求同步写出的日志
+
+    Args:
+        logger (logging.Logger): 日志器
+    """
+    logger.info("开始处理请求: 化简√12")
+    for name in ("question_processor", "prompt_builder", "llm_dispatcher", "knowledge_retriever"):
+        logger.info(f"组件获取状态 - {name}: True")
+    logger.info("开始处理用户问题")
+    logger.info("问题处理完成: 化简√12")
+    logger.info("开始获取课程信息")
+    logger.info("课程信息获取完成，状态码: 200")
+    logger.info(f"课程数据解析完成: {COURSES_DATA}")
+    logger.info("开始获取报告信息")
+    logger.info("报告信息获取完成，状态码: 200")
+    logger.info(f"报告数据解析完成: {COURSES_DATA}")
+    logger.info("开始调用大模型生成回答")
+    logger.info(f"大模型回答生成完成: {ANSWER}")
+    logger.info("请求处理完成，总耗时: 1.23秒")
+
+
+def pipeline_request(logger: logging.Logger):
+    """
+    新方案：步骤日志为DEBUG，大字段按请求采样，最后输出一条汇总记录
+
+    Args:
+        logger (logging.Logger): 日志器
+    """
+    begin_request_logging()
+    logger.debug("开始处理用户问题")
+    logger.debug("课程信息获取完成，状态码: 200")
+    log_payload(logger, "课程数据解析完成", COURSES_DATA)
+    log_payload(logger, "报告数据解析完成", COURSES_DATA)
+    log_payload(logger, "大模型回答生成完成", ANSWER)
+    log_request_summary("sqrt_agent", "knowledge", "化简√12",
+                        {"course_search": 0.012, "report_search": 0.008, "llm_total": 1.2, "total": 1.23})
+
+
+def measure(func, logger: logging.Logger, requests: int) -> float:
+    """
+    测量请求线程上的日志耗时
+
+    Args:
+        func: 单个请求的日志函数
+        logger (logging.Logger): 日志器
+        requests (int): 请求数
+
+    Returns:
+        float: 平均每个请求的耗时（微秒）
+    """
+    start = time.perf_counter()
+    for _ in range(requests):
+        func(logger)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="日志开销基准测试")
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    root = logging.getLogger()
+    with tempfile.TemporaryDirectory() as log_dir, open(os.devnull, "w") as devnull:
+        # 原有方案：同步文件与控制台输出
+        formatter = logging.Formatter('%(asctime)s - %(name)s - %(filename)s:%(lineno)d - %(levelname)s - %(message)s')
+        handlers = [logging.FileHandler(os.path.join(log_dir, "legacy.log"), encoding="utf-8"), logging.StreamHandler(devnull)]
+        for handler in handlers:
+            handler.setFormatter(formatter)
+            root.addHandler(handler)
+        root.setLevel(logging.INFO)
+        legacy_us = measure(legacy_request, logging.getLogger("bench"), args.requests)
+        for handler in handlers:
+            root.removeHandler(handler)
+            handler.close()
+
+        # 新方案：队列管道，控制台输出同样指向devnull
+        config.LOG_DIR = log_dir
+        pipeline = setup_logging(devnull)
+        pipeline_us = measure(pipeline_request, logging.getLogger("bench"), args.requests)
+        flush_start = time.perf_counter()
+        pipeline.stop()
+        flush_ms = (time.perf_counter() - flush_start) * 1000
+
+        legacy_size = os.path.getsize(os.path.join(log_dir, "legacy.log"))
+        pipeline_size = sum(os.path.getsize(os.path.join(log_dir, name)) for name in os.listdir(log_dir) if name.startswith("agent_"))
+
+    print(f"{'方案':<10} {'请求线程耗时(us/请求)':>22} {'日志量(KB)':>12}")
+    print(f"{'同步写入':<10} {legacy_us:>22.1f} {legacy_size / 1024:>12.1f}")
+    print(f"{'异步管道':<10} {pipeline_us:>22.1f} {pipeline_size / 1024:>12.1f}")
+    print(f"请求线程开销降低: {legacy_us / pipeline_us:.1f}倍，后台线程写完剩余队列耗时: {flush_ms:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
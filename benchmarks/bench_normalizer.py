@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+问题规范化吞吐量基准测试
+对比原有问题处理与规范化器的每秒处理问题数
+
+用法:
+    python benchmarks/bench_normalizer.py --iterations 20000
+"""
+
+import os
+import sys
+import time
+import argparse
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from agents.tool_agent.question_normalizer import QuestionNormalizer
+from scripts.question_dedup_report import legacy_process
+
+QUESTIONS = [
+    "请问老师，根号12怎么化简？",
+    "化简 sqrt(12)",
+    "x² + 2x + 1 = 0怎么解",
+    "直角三角形两条直角边是三和四，斜边是多少？谢谢老师",
+    "一次函数 y = 2x + 1 的图像经过哪几个象限",
+    "平行四边形的面积公式是什么呀",
+    "这组数据 1.50, 2.00, 3.25 的平均数是多少",
+    "什么是二次根式?",
+    "16的平方根是多少",
+    "a的平方差公式",
+    "√81的平方根",
+    "5的平方是多少",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="问题规范化吞吐量基准测试")
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    normalizer = QuestionNormalizer()
+    print(f"{'处理方式':<8} {'问题/秒':>12} {'us/问题':>10}")
+    for name, func in (("原有处理", legacy_process), ("规范化器", normalizer.normalize)):
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            for question in QUESTIONS:
+                func(question)
+        elapsed = time.perf_counter() - start
+        count = args.iterations * len(QUESTIONS)
+        print(f"{name:<8} {count / elapsed:>12.0f} {elapsed / count * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
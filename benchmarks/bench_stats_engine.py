@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+统计快速路径基准测试
+统计样例问题的快速路径命中情况（直接回答/注入提示词/未命中）与平均求解耗时
+
+用法:
+    python benchmarks/bench_stats_engine.py --iterations 2000
+"""
+
+import os
+import sys
+import time
+import argparse
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from agents.tool_agent.question_normalizer import QuestionNormalizer
+from agents.data_analysis_agent.stats_engine import StatsEngine
+
+QUESTIONS = [
+    "求数据 3, 5, 7, 9, 11 的平均数",
+    "一组数据 2, 4, 4, 5, 7, 9 的中位数和众数是多少",
+    "求 6, 8, 10, 12, 14 的方差和标准差",
+    "某同学三次测验成绩为 80, 90, 85，权重分别为 0.2, 0.3, 0.5，求加权平均分",
+    "数据 12, 15, 9, 20, 18 的极差是多少？并说明极差反映了什么",
+    "已知一组数据 x, 3, 5, 7 的平均数是 5，求 x",
+    "什么是方差？",
+    "平均数、中位数和众数有什么区别",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="统计快速路径基准测试")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    normalizer = QuestionNormalizer()
+    questions = [normalizer.normalize(question) for question in QUESTIONS]
+    engine = StatsEngine()
+
+    print(f"{'结果':<8} 问题")
+    for question in questions:
+        result = engine.solve(question)
+        print(f"{result.kind if result else 'miss':<8} {question}")
+
+    engine = StatsEngine()
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        for question in questions:
+            engine.solve(question)
+    elapsed = time.perf_counter() - start
+    count = args.iterations * len(questions)
+    stats = engine.statistics.stats()
+    print()
+    print(f"命中率: {stats['hit_rate']:.2%}（直接回答 {stats['direct_hits']}，注入提示词 {stats['inject_hits']}，共 {stats['lookups']}）")
+    print(f"平均求解耗时: {elapsed / count * 1e6:.1f} us/问题")
+
+
+if __name__ == "__main__":
+    main()
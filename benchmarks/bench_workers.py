@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+多进程扩展性基准测试
+依次以1..N个worker启动生产模式服务，使用多个客户端进程压测同一接口，输出吞吐量与延迟分位数
+
+用法:
+    python benchmarks/bench_workers.py --max-workers 4 --path /api/v1/agents --duration 10
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+import http.client
+import multiprocessing
+from typing import List
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def client_loop(args) -> List[float]:
+    """
+    单个客户端进程：在保持连接的情况下持续请求，返回每次请求的延迟
+
+    Args:
+        args (tuple): (host, port, method, path, body, duration)
+
+    Returns:
+        List[float]: 每次请求的延迟（秒）
+    """
+    host, port, method, path, body, duration = args
+    latencies = []
+    conn = http.client.HTTPConnection(host, port, timeout=60)
+    headers = {"Content-Type": "application/json"} if body else {}
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            conn.getresponse().read()
+        except (ConnectionError, http.client.HTTPException):
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=60)
+            continue
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+    return latencies
+
+
+def wait_ready(host: str, port: int, timeout: float = 30) -> bool:
+    """
+    等待服务的/health接口可用
+
+    Args:
+        host (str): 服务地址
+        port (int): 服务端口
+        timeout (float): 最长等待时间（秒）
+
+    Returns:
+        bool: 服务是否就绪
+    """
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return True
+        except OSError:
+            pass
+        time.sleep(0.3)
+    return False
+
+
+def percentile(values: List[float], q: float) -> float:
+    """
+    计算分位数
+
+    Args:
+        values (List[float]): 已排序的数值列表
+        q (float): 分位（0-1）
+
+    Returns:
+        float: 分位数
+    """
+    if not values:
+        return 0.0
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多进程扩展性基准测试")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--clients", type=int, default=0, help="客户端进程数，默认为worker数的4倍")
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18848)
+    parser.add_argument("--method", default="GET")
+    parser.add_argument("--path", default="/api/v1/agents")
+    parser.add_argument("--body", default=None, help="POST请求体（JSON字符串）")
+    args = parser.parse_args()
+
+    print(f"{'workers':>8} {'req/s':>10} {'p50(ms)':>10} {'p99(ms)':>10} {'speedup':>8}")
+    baseline = None
+    for workers in range(1, args.max_workers + 1):
+        server = subprocess.Popen(
+            [sys.executable, "main.py", "--prod", "--workers", str(workers), "--host", args.host, "--port", str(args.port)],
+            cwd=PROJECT_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            if not wait_ready(args.host, args.port):
+                print(f"{workers:>8} 服务启动失败")
+                continue
+            clients = args.clients or workers * 4
+            body = args.body.encode("utf-8") if args.body else None
+            with multiprocessing.Pool(clients) as pool:
+                results = pool.map(client_loop, [(args.host, args.port, args.method, args.path, body, args.duration)] * clients)
+            latencies = sorted(latency for result in results for latency in result)
+            throughput = len(latencies) / args.duration
+            baseline = baseline or throughput
+            print(f"{workers:>8} {throughput:>10.1f} {percentile(latencies, 0.5) * 1000:>10.2f} "
+                  f"{percentile(latencies, 0.99) * 1000:>10.2f} {throughput / baseline:>8.2f}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
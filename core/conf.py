@@ -7,6 +7,7 @@
 from dotenv import load_dotenv
 import os
 import datetime
+import tempfile
 
 load_dotenv()
 class Config:
@@ -21,18 +22,162 @@ class Config:
     LLM_MODEL = os.getenv("LLM_MODEL", "")
     LLM_API_KEY = os.getenv("LLM_API_KEY", "")
     LLM_API_URL = os.getenv("LLM_API_URL", "")
+    # 完整档生成参数（默认档位）：温度与最大输出token数（为0时不限制）
+    LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "0.7"))
+    LLM_MAX_TOKENS = int(os.getenv("LLM_MAX_TOKENS", "0"))
+    # 快速档生成参数：较小、较便宜的模型（为空时不启用快速档，所有请求使用完整档）
+    LLM_FAST_MODEL = os.getenv("LLM_FAST_MODEL", "")
+    LLM_FAST_TEMPERATURE = float(os.getenv("LLM_FAST_TEMPERATURE", "0.3"))
+    LLM_FAST_MAX_TOKENS = int(os.getenv("LLM_FAST_MAX_TOKENS", "512"))
+    # 请求未指定mode时的延迟模式（fast/balanced/thorough），balanced模式下难度估计达到阈值的问题使用完整档
+    GENERATION_DEFAULT_MODE = os.getenv("GENERATION_DEFAULT_MODE", "balanced")
+    GENERATION_DIFFICULTY_THRESHOLD = float(os.getenv("GENERATION_DIFFICULTY_THRESHOLD", "0.5"))
+    # 两档的每千token价格，用于估算各模式成本
+    LLM_PRICE_PER_1K_TOKENS = float(os.getenv("LLM_PRICE_PER_1K_TOKENS", "0"))
+    LLM_FAST_PRICE_PER_1K_TOKENS = float(os.getenv("LLM_FAST_PRICE_PER_1K_TOKENS", "0"))
 
     # embedding外部api请求配置
     GET_IP_URL = os.getenv("GET_IP_URL", "")
 
     # 对话历史配置
     MAX_DIALOGUE_HISTORY = 3
+    # 会话历史token预算，超出时压缩较早的对话
+    SESSION_TOKEN_BUDGET = int(os.getenv("SESSION_TOKEN_BUDGET", "1500"))
+    # 压缩后每轮回答保留的字符数
+    SESSION_COMPACT_ANSWER_CHARS = int(os.getenv("SESSION_COMPACT_ANSWER_CHARS", "120"))
+    # 会话空闲过期时间（秒）
+    SESSION_TTL = float(os.getenv("SESSION_TTL", "1800"))
+    # 会话数量与内存上限
+    SESSION_MAX_COUNT = int(os.getenv("SESSION_MAX_COUNT", "5000"))
+    SESSION_MEMORY_CAP_MB = int(os.getenv("SESSION_MEMORY_CAP_MB", "64"))
+
+    # 阶段线程池配置（检索I/O、大模型I/O、CPU计算）
+    POOL_RETRIEVAL_WORKERS = int(os.getenv("POOL_RETRIEVAL_WORKERS", "16"))
+    POOL_LLM_WORKERS = int(os.getenv("POOL_LLM_WORKERS", "32"))
+    POOL_CPU_WORKERS = int(os.getenv("POOL_CPU_WORKERS", str(os.cpu_count() or 4)))
+
+    # 跨进程共享缓存配置（mmap文件，Linux下默认位于/dev/shm）
+    SHARED_CACHE_PATH = os.getenv(
+        "SHARED_CACHE_PATH",
+        os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "agent_shared_cache.bin")
+    )
+    SHARED_CACHE_SLOTS = int(os.getenv("SHARED_CACHE_SLOTS", "4096"))
+    SHARED_CACHE_SLOT_SIZE = int(os.getenv("SHARED_CACHE_SLOT_SIZE", "8192"))
+    # 进程内LRU缓存条目数（为0时不使用）与条目最长保留时间（秒）
+    CACHE_LRU_ENTRIES = int(os.getenv("CACHE_LRU_ENTRIES", "2048"))
+    CACHE_LRU_TTL = float(os.getenv("CACHE_LRU_TTL", "30"))
+    # 多实例共享的网络缓存（Redis协议），如 "redis://127.0.0.1:6379/0"，为空时不使用
+    CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "")
+    CACHE_REDIS_TIMEOUT = float(os.getenv("CACHE_REDIS_TIMEOUT", "0.1"))
+    CACHE_REDIS_KEY_PREFIX = os.getenv("CACHE_REDIS_KEY_PREFIX", "agent:")
+    # 网络缓存出错后跳过它的时间（秒）
+    CACHE_REDIS_RETRY_SECONDS = float(os.getenv("CACHE_REDIS_RETRY_SECONDS", "5"))
+    # 多实例合并检索请求的锁租期（秒），为0时不合并跨实例请求
+    CACHE_LOCK_LEASE = float(os.getenv("CACHE_LOCK_LEASE", "3"))
+    # 缓存值超过该字节数时尝试压缩
+    CACHE_COMPRESS_MIN_BYTES = int(os.getenv("CACHE_COMPRESS_MIN_BYTES", "512"))
+    # 检索结果与回答缓存的过期时间（秒）
+    RETRIEVAL_CACHE_TTL = float(os.getenv("RETRIEVAL_CACHE_TTL", "3600"))
+    # 最佳课程相似度低于阈值时跳过报告检索，直接使用备用方式回答（为0时不跳过）
+    COURSE_SCORE_THRESHOLD = float(os.getenv("COURSE_SCORE_THRESHOLD", "0.6"))
+    # 按智能体覆盖阈值，如 "sqrt_agent:0.55,pythagorean_agent:0.62"（可由 scripts/tune_score_thresholds.py 根据日志给出）
+    COURSE_SCORE_THRESHOLDS = os.getenv("COURSE_SCORE_THRESHOLDS", "")
+    # 检索扇出：获取前k个课程并并发检索各课程的报告，按推荐系统相似度与字面重合度重排，为1时只检索首个课程
+    RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "1"))
+    RETRIEVAL_LEXICAL_WEIGHT = float(os.getenv("RETRIEVAL_LEXICAL_WEIGHT", "0.3"))
+    # 是否合并前两个候选的关键点与相关知识点
+    RETRIEVAL_MERGE_KEY_POINTS = os.getenv("RETRIEVAL_MERGE_KEY_POINTS", "false").lower() == "true"
+    ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+    ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "600"))
+    # 准入控制：按处理中的请求数与近期上游耗时估算新请求的完成时间，超过截止时间（秒）时返回503
+    ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+    ADMISSION_DEADLINE = float(os.getenv("ADMISSION_DEADLINE", "30"))
+    # 上游并发容量，为0时使用大模型线程池大小
+    ADMISSION_CAPACITY = int(os.getenv("ADMISSION_CAPACITY", "0"))
+    # 路由的上游耗时样本数达到该值前不拒绝请求
+    ADMISSION_MIN_SAMPLES = int(os.getenv("ADMISSION_MIN_SAMPLES", "5"))
+
+    # 负载自适应降级：压力 = max(近期平均上游等待耗时 / DEGRADE_LATENCY_TARGET, 线程池排队数 / DEGRADE_QUEUE_TARGET)
+    # 上游等待耗时为课程/报告检索（含线程池排队）与流式生成首字耗时之和，不含生成全文的耗时
+    DEGRADE_ENABLED = os.getenv("DEGRADE_ENABLED", "true").lower() == "true"
+    DEGRADE_LATENCY_TARGET = float(os.getenv("DEGRADE_LATENCY_TARGET", "4"))
+    # 为0时使用大模型线程池大小
+    DEGRADE_QUEUE_TARGET = int(os.getenv("DEGRADE_QUEUE_TARGET", "0"))
+    # 依次进入 跳过报告检索/限制输出长度/改用快速档/只用缓存 的压力阈值
+    DEGRADE_THRESHOLDS = os.getenv("DEGRADE_THRESHOLDS", "1,1.5,2,3")
+    # 压力低于当前等级阈值的该比例、且等级已保持DEGRADE_HOLD_SECONDS秒时才恢复一级
+    DEGRADE_EXIT_RATIO = float(os.getenv("DEGRADE_EXIT_RATIO", "0.7"))
+    DEGRADE_HOLD_SECONDS = float(os.getenv("DEGRADE_HOLD_SECONDS", "10"))
+    # 上游等待耗时样本的时间窗口（秒）与最少样本数
+    DEGRADE_WINDOW_SECONDS = float(os.getenv("DEGRADE_WINDOW_SECONDS", "10"))
+    DEGRADE_MIN_SAMPLES = int(os.getenv("DEGRADE_MIN_SAMPLES", "3"))
+    # 限制输出长度等级的最大输出token数
+    DEGRADE_MAX_TOKENS = int(os.getenv("DEGRADE_MAX_TOKENS", "400"))
+    # 只用缓存等级下未命中缓存时建议的重试等待秒数
+    DEGRADE_RETRY_AFTER = int(os.getenv("DEGRADE_RETRY_AFTER", "5"))
+
+    # 批量问答接口：单次最多问题数与同一批次内的并发处理数
+    BATCH_MAX_QUESTIONS = int(os.getenv("BATCH_MAX_QUESTIONS", "100"))
+    BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+    # 多智能体协作：单个问题最多参与的智能体数，请求未指定mode时各智能体与汇总使用的延迟模式
+    COLLABORATE_MAX_AGENTS = int(os.getenv("COLLABORATE_MAX_AGENTS", "3"))
+    COLLABORATE_DEFAULT_MODE = os.getenv("COLLABORATE_DEFAULT_MODE", "fast")
+    # 多智能体协作：各智能体只生成解题要点，最大输出token数
+    COLLABORATE_BRIEF_MAX_TOKENS = int(os.getenv("COLLABORATE_BRIEF_MAX_TOKENS", "256"))
+    # WebSocket多问题会话：单个连接同时处理的最多问题数
+    WS_MAX_INFLIGHT = int(os.getenv("WS_MAX_INFLIGHT", "4"))
+    # 离线预生成的FAQ答案库（scripts/build_faq_store.py构建），优先于回答缓存
+    FAQ_STORE_ENABLED = os.getenv("FAQ_STORE_ENABLED", "true").lower() == "true"
+    # 为空时使用项目目录下的data/faq_store.bin
+    FAQ_STORE_PATH = os.getenv("FAQ_STORE_PATH") or os.path.join(PROJECT_ROOT, "data", "faq_store.bin")
+
+    # 服务启动配置，生产模式下启用多进程且关闭热重载
+    APP_ENV = os.getenv("APP_ENV", "development")
+    HOST = os.getenv("HOST", "0.0.0.0")
+    PORT = int(os.getenv("PORT", "8848"))
+    WORKERS = int(os.getenv("WORKERS", str(os.cpu_count() or 1)))
+
+    # 管理接口令牌（/admin下的剖析接口），为空时管理接口不可用
+    ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+    # 数据分析智能体确定性统计快速路径（可直接计算的统计题跳过大模型或注入已验证结果）
+    DATA_ANALYSIS_FAST_PATH = os.getenv("DATA_ANALYSIS_FAST_PATH", "true").lower() == "true"
+    # 二次根式、勾股定理、一次函数智能体的精确求解快速路径
+    EXACT_SOLVER_FAST_PATH = os.getenv("EXACT_SOLVER_FAST_PATH", "true").lower() == "true"
+
+    # 启动预热配置
+    WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", "30"))
+    # 是否在预热时发送极小的探测生成请求（会产生少量调用费用）
+    WARMUP_PROBE_ENABLED = os.getenv("WARMUP_PROBE_ENABLED", "false").lower() == "true"
+    # 基于历史请求日志的缓存预热：统计最近若干天各智能体的前N个高频问题，限速预热检索缓存
+    CACHE_WARMUP_ENABLED = os.getenv("CACHE_WARMUP_ENABLED", "true").lower() == "true"
+    CACHE_WARMUP_TOP_N = int(os.getenv("CACHE_WARMUP_TOP_N", "100"))
+    CACHE_WARMUP_LOG_DAYS = int(os.getenv("CACHE_WARMUP_LOG_DAYS", "7"))
+    # 每秒预热的问题数
+    CACHE_WARMUP_RATE = float(os.getenv("CACHE_WARMUP_RATE", "5"))
+    # 是否同时预热回答缓存（会调用大模型，回答缓存过期时间较短时收益有限）
+    CACHE_WARMUP_ANSWERS = os.getenv("CACHE_WARMUP_ANSWERS", "false").lower() == "true"
+    # 是否在/ready就绪前完成缓存预热（受WARMUP_TIMEOUT限制），默认就绪后在后台执行
+    CACHE_WARMUP_BEFORE_READY = os.getenv("CACHE_WARMUP_BEFORE_READY", "false").lower() == "true"
+
+    # SSE流重放缓冲区配置
+    STREAM_REPLAY_MAX_STREAMS = int(os.getenv("STREAM_REPLAY_MAX_STREAMS", "200"))
+    STREAM_REPLAY_TTL = float(os.getenv("STREAM_REPLAY_TTL", "300"))
 
     # 日志配置
     LOG_DIR = os.path.join(PROJECT_ROOT, "logs")
-    # 按日期生成日志文件名
+    # 按日期生成日志文件名（启动当天的文件，运行中由日志管道在零点切换）
     today = datetime.datetime.now().strftime("%Y%m%d")
     LOG_FILE_PATH = os.path.join(LOG_DIR, f"agent_{today}.log")
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+    # 日志格式：json（结构化）或 text（原有文本格式）
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+    # 日志队列长度，写入跟不上时丢弃而不阻塞请求
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    LOG_BACKUP_DAYS = int(os.getenv("LOG_BACKUP_DAYS", "30"))
+    # 记录检索结果、完整回答等大字段的请求采样比例，以及每个字段的最大字符数
+    LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0.01"))
+    LOG_PAYLOAD_MAX_CHARS = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "500"))
 
     # 确保日志目录存在
     os.makedirs(LOG_DIR, exist_ok=True)
@@ -5,10 +5,32 @@
 启动时注册智能体、大模型，确保组件可调用
 """
 
+import os
+import glob
+import json
 from agents.tool_agent.question_processor import QuestionProcessor
 from agents.tool_agent.prompt_builder import PromptBuilder
 from agents.tool_agent.llm_dispatcher import LLMDispatcher
-from llms.qwen_llm import QwenLLM
+from agents.tool_agent.knowledge_retriever import KnowledgeRetriever
+from agents.tool_agent.score_gate import ScoreGate, parse_thresholds
+from agents.tool_agent.agent_matcher import AgentMatcher
+from agents.tool_agent.generation_profiles import GenerationProfiles, TIER_FAST, TIER_FULL
+from llms.qwen_llm import GenerationProfile, QwenLLM
+from utils.stream_buffer import StreamReplayBuffer
+from utils.session_store import SessionStore
+from utils.agent_manager import AgentManager
+from utils.shared_cache import SharedCache
+from utils.resp_client import RespClient
+from utils.tiered_cache import LRUCache, TieredCache
+from utils.warmup import WarmupManager
+from utils.faq_store import FaqStore, prompt_fingerprint
+from utils.admission import AdmissionController
+from utils.degradation import DegradationController, parse_levels
+from agents.data_analysis_agent.stats_engine import StatsEngine
+from agents.sqrt_agent.radical_solver import RadicalSolver
+from agents.pythagorean_agent.pythagorean_solver import PythagoreanSolver
+from agents.linear_function_agent.linear_solver import LinearFunctionSolver
+from utils.metrics import metrics
 from core.conf import config
 
 class Registrar:
@@ -51,15 +73,273 @@ class Registrar:
         # 注册sqrt_agent组件
         self.register_component("question_processor", QuestionProcessor())
         self.register_component("prompt_builder", PromptBuilder())
-        self.register_component("llm_dispatcher", LLMDispatcher())
+        self.register_component("llm_dispatcher", LLMDispatcher(self.get_component("llm"), self.get_component("agent_manager")))
+        self.register_component("knowledge_retriever", KnowledgeRetriever(self.get_component("cache")))
 
     
     def register_llm(self):
         """
-        注册大模型
+        注册大模型，整个进程共享同一个客户端，需在register_all_agents之前调用
         """
         llm = QwenLLM(config.LLM_API_KEY, config.LLM_API_URL)
         self.register_component("llm", llm)
 
+    def register_agent_manager(self):
+        """
+        注册智能体管理器，为各阻塞阶段提供独立的有界线程池
+        需在register_all_agents之前调用
+        """
+        agent_manager = AgentManager(
+            retrieval_workers=config.POOL_RETRIEVAL_WORKERS,
+            llm_workers=config.POOL_LLM_WORKERS,
+            cpu_workers=config.POOL_CPU_WORKERS
+        )
+        self.register_component("agent_manager", agent_manager)
+
+    def register_cache(self):
+        """
+        注册多级缓存：进程内LRU、本机跨进程共享缓存与可选的网络共享缓存，需在register_all_agents之前调用
+        网络缓存按需连接，启动时不可用不影响服务
+        """
+        lru = LRUCache(config.CACHE_LRU_ENTRIES) if config.CACHE_LRU_ENTRIES > 0 else None
+        local = SharedCache(config.SHARED_CACHE_PATH, config.SHARED_CACHE_SLOTS, config.SHARED_CACHE_SLOT_SIZE)
+        remote = None
+        if config.CACHE_REDIS_URL:
+            remote = RespClient.from_url(config.CACHE_REDIS_URL, timeout=config.CACHE_REDIS_TIMEOUT,
+                                         pool_size=config.POOL_RETRIEVAL_WORKERS)
+        cache = TieredCache(lru, local, remote, key_prefix=config.CACHE_REDIS_KEY_PREFIX, lru_ttl=config.CACHE_LRU_TTL,
+                            lock_lease=config.CACHE_LOCK_LEASE, retry_seconds=config.CACHE_REDIS_RETRY_SECONDS,
+                            compress_min_bytes=config.CACHE_COMPRESS_MIN_BYTES)
+        self.register_component("cache", cache)
+
+    def register_warmup(self):
+        """
+        注册启动预热管理器
+        """
+        self.register_component("warmup", WarmupManager(self))
+
+    def register_fast_paths(self):
+        """
+        注册各智能体的确定性快速路径求解器
+        """
+        fast_paths = {}
+        if config.DATA_ANALYSIS_FAST_PATH:
+            fast_paths["data_analysis_agent"] = StatsEngine()
+        if config.EXACT_SOLVER_FAST_PATH:
+            fast_paths["sqrt_agent"] = RadicalSolver()
+            fast_paths["pythagorean_agent"] = PythagoreanSolver()
+            fast_paths["linear_function_agent"] = LinearFunctionSolver()
+        self.register_component("fast_paths", fast_paths)
+
+    def register_faq_store(self):
+        """
+        注册离线预生成的FAQ答案库，按当前提示词模板与大模型计算各智能体的指纹，变更过的智能体不使用答案库
+        """
+        if not config.FAQ_STORE_ENABLED:
+            return
+        fingerprints = {
+            os.path.basename(os.path.dirname(prompt_dir)): prompt_fingerprint(prompt_dir, config.LLM_MODEL)
+            for prompt_dir in glob.glob(os.path.join(config.PROJECT_ROOT, "agents", "*", "prompt"))
+        }
+        self.register_component("faq_store", FaqStore(config.FAQ_STORE_PATH, fingerprints))
+
+    def register_admission(self):
+        """
+        注册准入控制器，上游并发容量默认取大模型线程池大小
+        """
+        if not config.ADMISSION_ENABLED:
+            return
+        capacity = config.ADMISSION_CAPACITY or config.POOL_LLM_WORKERS
+        self.register_component("admission", AdmissionController(config.ADMISSION_DEADLINE, capacity, config.ADMISSION_MIN_SAMPLES))
+
+    def register_degradation(self):
+        """
+        注册负载自适应降级控制器，排队数取各阶段线程池排队任务数之和，需在register_agent_manager之后调用
+        """
+        if not config.DEGRADE_ENABLED:
+            return
+
+        def queue_depth() -> float:
+            agent_manager = self.get_component("agent_manager")
+            if agent_manager is None:
+                return 0
+            return sum(stats["queued"] for stats in agent_manager.stats().values())
+
+        degradation = DegradationController(
+            parse_levels(config.DEGRADE_THRESHOLDS),
+            latency_target=config.DEGRADE_LATENCY_TARGET,
+            queue_target=config.DEGRADE_QUEUE_TARGET or config.POOL_LLM_WORKERS,
+            queue_depth=queue_depth,
+            exit_ratio=config.DEGRADE_EXIT_RATIO,
+            hold_seconds=config.DEGRADE_HOLD_SECONDS,
+            window_seconds=config.DEGRADE_WINDOW_SECONDS,
+            min_samples=config.DEGRADE_MIN_SAMPLES,
+        )
+        self.register_component("degradation", degradation)
+
+    def register_score_gate(self):
+        """
+        注册课程相似度阈值判断
+        """
+        self.register_component("score_gate", ScoreGate(config.COURSE_SCORE_THRESHOLD, parse_thresholds(config.COURSE_SCORE_THRESHOLDS)))
+
+    def register_agent_matcher(self):
+        """
+        注册多智能体协作使用的关键词匹配器，关键词取自智能体信息中的【关键词匹配】
+        """
+        # 延迟导入：路由模块依赖注册器
+        from app.router.agents_router import AGENTS_INFO
+        self.register_component("agent_matcher", AgentMatcher.from_agents_info(AGENTS_INFO))
+
+    def register_generation_profiles(self):
+        """
+        注册生成档位，读取各智能体目录下generation_profile.json中对快速档/完整档的覆盖
+        """
+        overrides = {}
+        for path in glob.glob(os.path.join(config.PROJECT_ROOT, "agents", "*", "generation_profile.json")):
+            with open(path, encoding="utf-8") as f:
+                overrides[os.path.basename(os.path.dirname(path))] = json.load(f)
+        full = GenerationProfile(config.LLM_MODEL, config.LLM_MAX_TOKENS or None, config.LLM_TEMPERATURE)
+        # 未配置快速档模型时不启用快速档，所有请求保持原有的生成参数
+        fast = GenerationProfile(config.LLM_FAST_MODEL, config.LLM_FAST_MAX_TOKENS or None, config.LLM_FAST_TEMPERATURE) \
+            if config.LLM_FAST_MODEL else None
+        prices = {TIER_FAST: config.LLM_FAST_PRICE_PER_1K_TOKENS, TIER_FULL: config.LLM_PRICE_PER_1K_TOKENS}
+        self.register_component("generation_profiles", GenerationProfiles(fast, full, prices, config.GENERATION_DIFFICULTY_THRESHOLD, overrides))
+
+    def register_metrics(self):
+        """
+        注册运行时仪表盘指标（线程池饱和度、缓存命中率），在/metrics导出时实时采集
+        """
+        def collect_pools():
+            agent_manager = self.get_component("agent_manager")
+            if agent_manager is None:
+                return {}
+            values = {}
+            for stage, stats in agent_manager.stats().items():
+                for field in ("active", "queued", "saturation", "avg_wait_ms"):
+                    values[(("pool", stage), ("field", field))] = stats[field]
+            return values
+
+        def collect_cache():
+            cache = self.get_component("cache")
+            if cache is None:
+                return {}
+            return {(("field", field),): value for field, value in cache.stats().items()}
+
+        def collect_cache_tiers():
+            cache = self.get_component("cache")
+            if cache is None:
+                return {}
+            values = {}
+            for tier, stats in cache.tier_stats().items():
+                for field, value in stats.items():
+                    values[(("tier", tier), ("field", field))] = value
+            return values
+
+        def collect_fast_paths():
+            values = {}
+            for agent, solver in (self.get_component("fast_paths") or {}).items():
+                for field, value in solver.statistics.stats().items():
+                    values[(("agent", agent), ("field", field))] = value
+            return values
+
+        def collect_faq_store():
+            faq_store = self.get_component("faq_store")
+            if faq_store is None:
+                return {}
+            return {(("field", field),): value for field, value in faq_store.stats().items()}
+
+        def collect_cache_warmup():
+            warmup = self.get_component("warmup")
+            if warmup is None or warmup.cache_warmer is None:
+                return {}
+            status = warmup.cache_warmer.status()
+            values = {(("field", field),): status[field] for field in ("planned", "warmed", "failed", "answers")}
+            if status["coverage"]:
+                values[(("field", "coverage"),)] = status["coverage"]["coverage"]
+            return values
+
+        def collect_admission():
+            admission = self.get_component("admission")
+            if admission is None:
+                return {}
+            values = {}
+            for agent, stats in admission.stats().items():
+                for field, value in stats.items():
+                    values[(("agent", agent), ("field", field))] = value
+            return values
+
+        def collect_score_gate():
+            score_gate = self.get_component("score_gate")
+            if score_gate is None:
+                return {}
+            values = {}
+            for agent, stats in score_gate.stats().items():
+                for field, value in stats.items():
+                    values[(("agent", agent), ("field", field))] = value
+            return values
+
+        def collect_generation():
+            generation_profiles = self.get_component("generation_profiles")
+            if generation_profiles is None:
+                return {}
+            values = {}
+            for (mode, tier), stats in generation_profiles.stats().items():
+                for field, value in stats.items():
+                    values[(("mode", mode), ("tier", tier), ("field", field))] = value
+            return values
+
+        def collect_degradation():
+            degradation = self.get_component("degradation")
+            if degradation is None:
+                return {}
+            return {(("field", field),): value for field, value in degradation.stats().items()}
+
+        metrics.gauge("agent_pool_stats", "Stage thread pool saturation metrics", collect_pools)
+        metrics.gauge("agent_cache_stats", "Shared cache hit statistics for this worker", collect_cache)
+        metrics.gauge("cache_tier_stats", "Per-tier cache hit rate, errors and average read latency for this worker", collect_cache_tiers)
+        metrics.gauge("fast_path_stats", "Deterministic fast path hit rate and estimated saved LLM time", collect_fast_paths)
+        metrics.gauge("faq_store_stats", "Pre-generated FAQ answer bank entries and hit rate for this worker", collect_faq_store)
+        metrics.gauge("cache_warmup_stats", "Log-based cache warm-up progress and last-day traffic coverage", collect_cache_warmup)
+        metrics.gauge("admission_stats", "Admission control in-flight requests, service time estimates and rejections", collect_admission)
+        metrics.gauge("generation_mode_stats", "LLM calls, latency and estimated token cost by request mode and model tier", collect_generation)
+        metrics.gauge("degradation_stats", "Degradation level (0 normal .. 4 cache only), load pressure and its latency/queue inputs", collect_degradation)
+        metrics.gauge("score_gate_stats", "Course score threshold checks and report lookups skipped for weak matches", collect_score_gate)
+
+    async def close(self):
+        """
+        关闭需要释放资源的组件
+        """
+        agent_manager = self.get_component("agent_manager")
+        if agent_manager is not None:
+            await agent_manager.close()
+        cache = self.get_component("cache")
+        if cache is not None:
+            cache.close()
+        faq_store = self.get_component("faq_store")
+        if faq_store is not None:
+            faq_store.close()
+
+    def register_stream_buffer(self):
+        """
+        注册SSE流重放缓冲区
+        """
+        stream_buffer = StreamReplayBuffer(config.STREAM_REPLAY_MAX_STREAMS, config.STREAM_REPLAY_TTL)
+        self.register_component("stream_buffer", stream_buffer)
+
+    def register_session_store(self):
+        """
+        注册多轮对话会话存储
+        """
+        session_store = SessionStore(
+            max_turns=config.MAX_DIALOGUE_HISTORY,
+            token_budget=config.SESSION_TOKEN_BUDGET,
+            compact_answer_chars=config.SESSION_COMPACT_ANSWER_CHARS,
+            ttl_seconds=config.SESSION_TTL,
+            max_sessions=config.SESSION_MAX_COUNT,
+            memory_cap_bytes=config.SESSION_MEMORY_CAP_MB * 1024 * 1024
+        )
+        self.register_component("session_store", session_store)
+
 # 创建全局注册器实例
 registrar = Registrar()
\ No newline at end of file
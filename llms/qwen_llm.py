@@ -9,10 +9,49 @@ import time
 import logging
 from openai import OpenAI
 from core.conf import config
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator, Dict, Iterator, List, Optional
 
 logger = logging.getLogger(__name__)
 
+# 回答达到最大输出token数被截断（finish_reason为length）时附加在回答末尾的提示
+TRUNCATED_NOTICE = "\n\n（回答达到最大输出长度，已截断）"
+
+
+class GenerationProfile:
+    """
+    生成参数档位：模型、最大输出token数与温度
+    """
+    __slots__ = ("model", "max_tokens", "temperature")
+
+    def __init__(self, model: str, max_tokens: Optional[int] = None, temperature: float = 0.7):
+        """
+        初始化生成参数
+
+        Args:
+            model (str): 模型名称
+            max_tokens (Optional[int]): 最大输出token数，为None时不限制
+            temperature (float): 温度
+        """
+        self.model = model
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+
+    def completion_args(self) -> Dict[str, Any]:
+        """
+        生成chat.completions.create的参数
+
+        Returns:
+            Dict[str, Any]: model、temperature与可选的max_tokens
+        """
+        args = {"model": self.model, "temperature": self.temperature}
+        if self.max_tokens:
+            args["max_tokens"] = self.max_tokens
+        return args
+
+    def __repr__(self) -> str:
+        return f"GenerationProfile(model={self.model!r}, max_tokens={self.max_tokens}, temperature={self.temperature})"
+
+
 class QwenLLM:
     """
     Qwen Plus大模型接口类
@@ -31,139 +70,236 @@ class QwenLLM:
             base_url=api_url
         )
         self.model = config.LLM_MODEL
+        # 未指定生成参数时使用的默认档位
+        self.default_profile = GenerationProfile(config.LLM_MODEL, config.LLM_MAX_TOKENS or None, config.LLM_TEMPERATURE)
+    
+    def probe(self) -> bool:
+        """
+        发送一个极小的生成请求，预热连接与模型
+        
+        Returns:
+            bool: 探测是否成功
+        """
+        try:
+            self.client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": "你好"}],
+                max_tokens=1
+            )
+            return True
+        except Exception as e:
+            logger.warning(f"大模型探测请求失败: {e}")
+            return False
+    
+    def preconnect(self) -> bool:
+        """
+        预先建立到大模型服务的连接（DNS解析与TLS握手），不产生生成费用
+        
+        Returns:
+            bool: 是否成功连通
+        """
+        try:
+            self.client.models.list()
+            return True
+        except Exception as e:
+            # 部分服务不支持模型列表接口，但连接已建立并进入连接池
+            logger.info(f"大模型预连接完成（模型列表接口不可用: {e}）")
+            return False
     
-    def generate_with_knowledge(self, system_prompt: str, user_question: str) -> str:
+    def generate_with_knowledge(self, system_prompt: str, user_question: str, history: Optional[List[Dict[str, str]]] = None, profile: Optional[GenerationProfile] = None) -> str:
         """
         使用带知识库的Prompt调用大模型
         
         Args:
             system_prompt (str): 系统提示词（包含知识库信息）
             user_question (str): 用户问题
+            history (Optional[List[Dict[str, str]]]): 多轮对话历史消息
+            profile (Optional[GenerationProfile]): 生成参数，为None时使用默认档位
             
         Returns:
             str: 大模型生成的回答
         """
         messages = [
             {"role": "system", "content": system_prompt},
+            *(history or []),
             {"role": "user", "content": user_question}
         ]
         
         try:
-            logger.info("调用大模型generate_with_knowledge方法")
+            logger.debug("调用大模型generate_with_knowledge方法")
             start_time = time.time()
             response = self.client.chat.completions.create(
-                model=self.model,
                 messages=messages,
-                temperature=0.7
+                **(profile or self.default_profile).completion_args()
             )
             answer = response.choices[0].message.content
+            if response.choices[0].finish_reason == "length":
+                logger.warning("大模型回答达到最大输出token数，已截断")
+                answer += TRUNCATED_NOTICE
             elapsed_time = time.time() - start_time
-            logger.info(f"大模型回答生成成功，耗时: {elapsed_time:.2f}秒")
+            logger.debug(f"大模型回答生成成功，耗时: {elapsed_time:.2f}秒")
             return answer
         except Exception as e:
             logger.error(f"调用大模型时出错: {str(e)}", exc_info=True)
             return f"调用大模型时出错: {str(e)}"
     
-    def generate_fallback(self, fallback_prompt: str, user_prompt: str) -> str:
+    def generate_fallback(self, fallback_prompt: str, user_prompt: str, history: Optional[List[Dict[str, str]]] = None, profile: Optional[GenerationProfile] = None) -> str:
         """
         使用备用Prompt调用大模型
         
         Args:
             fallback_prompt (str): 备用系统提示词
             user_prompt (str): 用户提示词
+            history (Optional[List[Dict[str, str]]]): 多轮对话历史消息
+            profile (Optional[GenerationProfile]): 生成参数，为None时使用默认档位
             
         Returns:
             str: 大模型生成的回答
         """
         messages = [
             {"role": "system", "content": fallback_prompt},
+            *(history or []),
             {"role": "user", "content": user_prompt}
         ]
         
         try:
-            logger.info("调用大模型generate_fallback方法")
+            logger.debug("调用大模型generate_fallback方法")
             start_time = time.time()
             response = self.client.chat.completions.create(
-                model=self.model,
                 messages=messages,
-                temperature=0.7
+                **(profile or self.default_profile).completion_args()
             )
             answer = response.choices[0].message.content
+            if response.choices[0].finish_reason == "length":
+                logger.warning("大模型备用回答达到最大输出token数，已截断")
+                answer += TRUNCATED_NOTICE
             elapsed_time = time.time() - start_time
-            logger.info(f"大模型备用回答生成成功，耗时: {elapsed_time:.2f}秒")
+            logger.debug(f"大模型备用回答生成成功，耗时: {elapsed_time:.2f}秒")
             return answer
         except Exception as e:
             logger.error(f"调用大模型时出错: {str(e)}", exc_info=True)
             return f"调用大模型时出错: {str(e)}"
     
-    async def generate_with_knowledge_stream(self, system_prompt: str, user_question: str) -> AsyncGenerator[str, None]:
+    def iter_with_knowledge(self, system_prompt: str, user_question: str, history: Optional[List[Dict[str, str]]] = None, profile: Optional[GenerationProfile] = None) -> Iterator[str]:
         """
-        使用带知识库的Prompt调用大模型并以流式方式返回结果
+        使用带知识库的Prompt调用大模型，以同步迭代器方式逐片返回结果
+        供线程池逐项消费，避免阻塞事件循环
         
         Args:
             system_prompt (str): 系统提示词（包含知识库信息）
             user_question (str): 用户问题
+            history (Optional[List[Dict[str, str]]]): 多轮对话历史消息
+            profile (Optional[GenerationProfile]): 生成参数，为None时使用默认档位
             
         Yields:
             str: 大模型生成的文本片段
         """
         messages = [
             {"role": "system", "content": system_prompt},
+            *(history or []),
             {"role": "user", "content": user_question}
         ]
         
         try:
-            logger.info("调用大模型generate_with_knowledge_stream方法")
+            logger.debug("调用大模型generate_with_knowledge_stream方法")
             start_time = time.time()
             response = self.client.chat.completions.create(
-                model=self.model,
                 messages=messages,
-                temperature=0.7,
-                stream=True
+                stream=True,
+                **(profile or self.default_profile).completion_args()
             )
             
+            finish_reason = None
             for chunk in response:
+                if not chunk.choices:
+                    continue
                 if chunk.choices[0].delta.content is not None:
                     yield chunk.choices[0].delta.content
+                finish_reason = chunk.choices[0].finish_reason or finish_reason
+            if finish_reason == "length":
+                logger.warning("大模型流式回答达到最大输出token数，已截断")
+                yield TRUNCATED_NOTICE
             
             elapsed_time = time.time() - start_time
-            logger.info(f"大模型流式回答生成成功，耗时: {elapsed_time:.2f}秒")
+            logger.debug(f"大模型流式回答生成成功，耗时: {elapsed_time:.2f}秒")
         except Exception as e:
             logger.error(f"调用大模型时出错: {str(e)}", exc_info=True)
             yield f"调用大模型时出错: {str(e)}"
     
-    async def generate_fallback_stream(self, fallback_prompt: str, user_prompt: str) -> AsyncGenerator[str, None]:
+    def iter_fallback(self, fallback_prompt: str, user_prompt: str, history: Optional[List[Dict[str, str]]] = None, profile: Optional[GenerationProfile] = None) -> Iterator[str]:
         """
-        使用备用Prompt调用大模型并以流式方式返回结果
+        使用备用Prompt调用大模型，以同步迭代器方式逐片返回结果
+        供线程池逐项消费，避免阻塞事件循环
         
         Args:
             fallback_prompt (str): 备用系统提示词
             user_prompt (str): 用户提示词
+            history (Optional[List[Dict[str, str]]]): 多轮对话历史消息
+            profile (Optional[GenerationProfile]): 生成参数，为None时使用默认档位
             
         Yields:
             str: 大模型生成的文本片段
         """
         messages = [
             {"role": "system", "content": fallback_prompt},
+            *(history or []),
             {"role": "user", "content": user_prompt}
         ]
         
         try:
-            logger.info("调用大模型generate_fallback_stream方法")
+            logger.debug("调用大模型generate_fallback_stream方法")
             start_time = time.time()
             response = self.client.chat.completions.create(
-                model=self.model,
                 messages=messages,
-                temperature=0.7,
-                stream=True
+                stream=True,
+                **(profile or self.default_profile).completion_args()
             )
             
+            finish_reason = None
             for chunk in response:
+                if not chunk.choices:
+                    continue
                 if chunk.choices[0].delta.content is not None:
                     yield chunk.choices[0].delta.content
+                finish_reason = chunk.choices[0].finish_reason or finish_reason
+            if finish_reason == "length":
+                logger.warning("大模型流式回答达到最大输出token数，已截断")
+                yield TRUNCATED_NOTICE
             
             elapsed_time = time.time() - start_time
-            logger.info(f"大模型备用流式回答生成成功，耗时: {elapsed_time:.2f}秒")
+            logger.debug(f"大模型备用流式回答生成成功，耗时: {elapsed_time:.2f}秒")
         except Exception as e:
             logger.error(f"调用大模型时出错: {str(e)}", exc_info=True)
-            yield f"调用大模型时出错: {str(e)}"
\ No newline at end of file
+            yield f"调用大模型时出错: {str(e)}"
+    
+    async def generate_with_knowledge_stream(self, system_prompt: str, user_question: str, history: Optional[List[Dict[str, str]]] = None, profile: Optional[GenerationProfile] = None) -> AsyncGenerator[str, None]:
+        """
+        使用带知识库的Prompt调用大模型并以流式方式返回结果
+        
+        Args:
+            system_prompt (str): 系统提示词（包含知识库信息）
+            user_question (str): 用户问题
+            history (Optional[List[Dict[str, str]]]): 多轮对话历史消息
+            profile (Optional[GenerationProfile]): 生成参数，为None时使用默认档位
+            
+        Yields:
+            str: 大模型生成的文本片段
+        """
+        for chunk in self.iter_with_knowledge(system_prompt, user_question, history, profile):
+            yield chunk
+    
+    async def generate_fallback_stream(self, fallback_prompt: str, user_prompt: str, history: Optional[List[Dict[str, str]]] = None, profile: Optional[GenerationProfile] = None) -> AsyncGenerator[str, None]:
+        """
+        使用备用Prompt调用大模型并以流式方式返回结果
+        
+        Args:
+            fallback_prompt (str): 备用系统提示词
+            user_prompt (str): 用户提示词
+            history (Optional[List[Dict[str, str]]]): 多轮对话历史消息
+            profile (Optional[GenerationProfile]): 生成参数，为None时使用默认档位
+            
+        Yields:
+            str: 大模型生成的文本片段
+        """
+        for chunk in self.iter_fallback(fallback_prompt, user_prompt, history, profile):
+            yield chunk
\ No newline at end of file
@@ -5,23 +5,24 @@
 FastAPI启动、加载配置、开启并发
 """
 
+import argparse
+import importlib.util
 import logging
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.router import sqrt_router, agents_router, pythagorean_router, parallelogram_router, linear_function_router, data_analysis_router
+from app.router import sqrt_router, agents_router, pythagorean_router, parallelogram_router, linear_function_router, data_analysis_router, session_router, admin_router, collaborate_router
 from core.registrar import registrar
 from core.conf import config
+from utils.metrics import metrics, start_request_timer
+from utils.log_pipeline import setup_logging, begin_request_logging
+from utils.profiler import profiler, profiled_body
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(filename)s:%(lineno)d - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(config.LOG_FILE_PATH, encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
+# 配置日志：请求路径只入队，由后台线程写文件与控制台
+log_pipeline = setup_logging()
+metrics.gauge("log_queue_stats", "Async log queue backlog and dropped records",
+              lambda: {(("field", field),): value for field, value in log_pipeline.stats().items()})
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +42,40 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def server_timing_middleware(request: Request, call_next):
+    """
+    为每个请求创建阶段计时器、决定日志采样并确定降级等级（X-Degradation-Level响应头），
+    在非流式响应中添加Server-Timing响应头；有剖析任务时对匹配的请求进行剖析
+    
+    Args:
+        request (Request): 请求
+        call_next: 下一个处理器
+        
+    Returns:
+        Response: 响应
+    """
+    timer = start_request_timer()
+    begin_request_logging()
+    degradation = registrar.get_component("degradation")
+    degradation_level = degradation.begin_request() if degradation is not None else None
+    profiled = profiler.session is not None and profiler.should_profile(request.url.path)
+    try:
+        response = await call_next(request)
+    except Exception:
+        if profiled:
+            profiler.request_finished()
+        raise
+    if profiled:
+        response.body_iterator = profiled_body(response.body_iterator)
+    if degradation_level is not None:
+        response.headers["X-Degradation-Level"] = str(degradation_level)
+    server_timing = timer.server_timing()
+    # SSE响应头在生成开始前已发送，阶段耗时只记录到直方图
+    if server_timing and not response.headers.get("content-type", "").startswith("text/event-stream"):
+        response.headers["Server-Timing"] = server_timing
+    return response
+
 # 注册路由
 app.include_router(sqrt_router.router)
 app.include_router(agents_router.router)
@@ -48,6 +83,9 @@ app.include_router(pythagorean_router.router)
 app.include_router(parallelogram_router.router)
 app.include_router(linear_function_router.router)
 app.include_router(data_analysis_router.router)
+app.include_router(session_router.router)
+app.include_router(admin_router.router)
+app.include_router(collaborate_router.router)
 
 @app.on_event("startup")
 async def startup_event():
@@ -56,10 +94,38 @@ async def startup_event():
     """
     logger.info("应用启动中...")
     # 注册所有组件
-    registrar.register_all_agents()
+    registrar.register_agent_manager()
+    registrar.register_cache()
     registrar.register_llm()
+    registrar.register_all_agents()
+    registrar.register_stream_buffer()
+    registrar.register_session_store()
+    registrar.register_fast_paths()
+    registrar.register_faq_store()
+    registrar.register_admission()
+    registrar.register_degradation()
+    registrar.register_score_gate()
+    registrar.register_generation_profiles()
+    registrar.register_agent_matcher()
+    registrar.register_warmup()
+    registrar.register_metrics()
+    # 后台执行预热，完成前/ready返回503，避免滚动发布时把流量导向未预热的worker
+    registrar.get_component("warmup").start()
     logger.info("应用启动完成")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """
+    应用关闭时释放线程池等资源
+    """
+    logger.info("应用关闭中...")
+    warmup = registrar.get_component("warmup")
+    if warmup is not None:
+        await warmup.stop()
+    await registrar.close()
+    logger.info("应用关闭完成")
+    log_pipeline.stop()
+
 @app.get("/")
 async def root():
     """
@@ -76,10 +142,63 @@ async def health_check():
     健康检查接口
     
     Returns:
-        dict: 包含健康状态的字典
+        dict: 包含健康状态及各阶段线程池饱和度的字典
+    """
+    agent_manager = registrar.get_component("agent_manager")
+    pools = agent_manager.stats() if agent_manager is not None else {}
+    return {"status": "healthy", "pools": pools}
+
+@app.get("/ready")
+async def readiness_check():
+    """
+    就绪检查接口，启动预热完成前返回503
+    
+    Returns:
+        JSONResponse: 包含就绪状态与预热步骤结果的响应
     """
-    return {"status": "healthy"}
+    warmup = registrar.get_component("warmup")
+    if warmup is None or not warmup.ready:
+        status = warmup.status() if warmup is not None else {"ready": False}
+        return JSONResponse(status_code=503, content={"status": "warming_up", **status})
+    return {"status": "ready", **warmup.status()}
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """
+    以Prometheus文本格式导出各阶段耗时直方图及运行时指标
+    
+    Returns:
+        PlainTextResponse: Prometheus文本格式的指标
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+def run_server(production: bool, workers: int, host: str, port: int):
+    """
+    启动服务
+    开发模式：单进程并开启热重载
+    生产模式：多worker进程、关闭热重载，可用时使用uvloop与httptools
+    
+    Args:
+        production (bool): 是否以生产模式启动
+        workers (int): 生产模式下的worker进程数
+        host (str): 监听地址
+        port (int): 监听端口
+    """
+    if not production:
+        uvicorn.run("main:app", host=host, port=port, reload=True)
+        return
+
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+    logger.info(f"以生产模式启动，worker数: {workers}，事件循环: {loop}，HTTP解析: {http}")
+    uvicorn.run("main:app", host=host, port=port, workers=workers, loop=loop, http=http, reload=False)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="智能数学教学助手服务")
+    parser.add_argument("--prod", action="store_true", default=config.APP_ENV == "production", help="以生产模式（多进程、无热重载）启动")
+    parser.add_argument("--workers", type=int, default=config.WORKERS, help="生产模式下的worker进程数")
+    parser.add_argument("--host", default=config.HOST, help="监听地址")
+    parser.add_argument("--port", type=int, default=config.PORT, help="监听端口")
+    args = parser.parse_args()
     # 启动应用
-    uvicorn.run("main:app", host="0.0.0.0", port=8848, reload=True)
\ No newline at end of file
+    run_server(args.prod, args.workers, args.host, args.port)
\ No newline at end of file
@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+FAQ答案库离线构建
+按 scripts/data/faq_questions.json 中各智能体的常见问题（可选追加由课程列表生成的问题），
+走与线上相同的处理流程生成回答与相关知识点，写入只读mmap答案库（原子替换，运行中的服务约30秒内自动切换）
+
+问题文件格式:
+    {"sqrt_agent": ["什么是二次根式？", ...], ...}
+
+提示词模板或大模型变更后，对应智能体的条目在线上自动失效，需重新构建
+
+用法:
+    python scripts/build_faq_store.py
+    python scripts/build_faq_store.py --include-courses --concurrency 8
+    python scripts/build_faq_store.py --check       # 答案库缺失或过期时退出码为1
+    python scripts/build_faq_store.py --if-stale    # 仅在答案库缺失或过期时构建
+"""
+
+import os
+import re
+import sys
+import json
+import asyncio
+import argparse
+import importlib
+from typing import Dict, List, Tuple
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from core.conf import config
+from core.registrar import registrar
+from app.schema.math_schema import ChatRequest
+from app.router.agents_router import AGENTS_INFO
+from app.router.shared_math_handler import handle_math_question
+from agents.tool_agent.question_normalizer import QuestionNormalizer
+from agents.tool_agent.generation_profiles import MODE_THOROUGH
+from agents.tool_agent.llm_dispatcher import is_error_answer, is_truncated_answer
+from utils.faq_store import FaqStore, build_faq_store, prompt_fingerprint
+
+QUESTIONS_PATH = os.path.join(PROJECT_ROOT, "scripts", "data", "faq_questions.json")
+
+_COURSE_PATTERN = re.compile(r"《([^》]+)》")
+
+
+def load_prompt_paths() -> Dict[str, Dict[str, str]]:
+    """
+    读取各智能体路由的提示词路径
+
+    Returns:
+        Dict[str, Dict[str, str]]: 智能体名称 -> 提示词路径
+    """
+    prompt_paths = {}
+    for agent in AGENTS_INFO:
+        router_module = importlib.import_module(f"app.router.{agent.name[:-len('_agent')]}_router")
+        prompt_paths[agent.name] = router_module.PROMPT_PATHS
+    return prompt_paths
+
+
+def current_fingerprints(prompt_paths: Dict[str, Dict[str, str]]) -> Dict[str, str]:
+    """
+    计算各智能体当前的提示词指纹
+
+    Args:
+        prompt_paths (Dict[str, Dict[str, str]]): 智能体名称 -> 提示词路径
+
+    Returns:
+        Dict[str, str]: 智能体名称 -> 指纹
+    """
+    return {agent: prompt_fingerprint(os.path.dirname(paths["knowledge"]), config.LLM_MODEL)
+            for agent, paths in prompt_paths.items()}
+
+
+def load_questions(path: str, include_courses: bool) -> Dict[str, List[str]]:
+    """
+    读取各智能体的常见问题，规范化后去重
+
+    Args:
+        path (str): 问题文件路径
+        include_courses (bool): 是否追加由智能体描述中的课程列表生成的问题
+
+    Returns:
+        Dict[str, List[str]]: 智能体名称 -> 规范化后的问题
+    """
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    if include_courses:
+        for agent in AGENTS_INFO:
+            courses = dict.fromkeys(_COURSE_PATTERN.findall(agent.description))
+            raw.setdefault(agent.name, []).extend(f"《{course}》这节课讲了什么？" for course in courses)
+    normalizer = QuestionNormalizer()
+    return {agent: list(dict.fromkeys(normalizer.normalize(question) for question in questions))
+            for agent, questions in raw.items()}
+
+
+def stale_agents(path: str, fingerprints: Dict[str, str], agents: List[str]) -> List[str]:
+    """
+    检查答案库中缺失或提示词已变更的智能体
+
+    Args:
+        path (str): 答案库文件路径
+        fingerprints (Dict[str, str]): 智能体名称 -> 当前指纹
+        agents (List[str]): 应包含在答案库中的智能体
+
+    Returns:
+        List[str]: 缺失或过期的智能体
+    """
+    store = FaqStore(path, fingerprints)
+    try:
+        return [agent for agent in agents if agent not in store.active_agents]
+    finally:
+        store.close()
+
+
+async def generate(questions: Dict[str, List[str]], prompt_paths: Dict[str, Dict[str, str]],
+                   concurrency: int) -> List[Tuple[str, str, dict]]:
+    """
+    使用线上处理流程生成回答，出错的回答不写入答案库
+
+    Args:
+        questions (Dict[str, List[str]]): 智能体名称 -> 规范化后的问题
+        prompt_paths (Dict[str, Dict[str, str]]): 智能体名称 -> 提示词路径
+        concurrency (int): 并发请求数
+
+    Returns:
+        List[Tuple[str, str, dict]]: (智能体, 规范化后的问题, {"answer", "related_knowledge"})
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    failures = []
+
+    async def answer(agent: str, question: str):
+        # 答案库命中时所有模式都直接返回，统一用完整档生成
+        async with semaphore:
+            response = await handle_math_question(ChatRequest(user_question=question, mode=MODE_THOROUGH), prompt_paths[agent])
+        if is_error_answer(response.answer) or is_truncated_answer(response.answer):
+            failures.append(f"[{agent}] {question}")
+            return None
+        return agent, question, {"answer": response.answer, "related_knowledge": response.related_knowledge}
+
+    results = await asyncio.gather(*(answer(agent, question)
+                                     for agent, agent_questions in questions.items()
+                                     for question in agent_questions))
+    for failure in failures:
+        print(f"生成失败，已跳过: {failure}")
+    return [result for result in results if result is not None]
+
+
+async def build(args, prompt_paths: Dict[str, Dict[str, str]], fingerprints: Dict[str, str]) -> int:
+    """
+    注册线上组件并构建答案库
+
+    Args:
+        args (argparse.Namespace): 命令行参数
+        prompt_paths (Dict[str, Dict[str, str]]): 智能体名称 -> 提示词路径
+        fingerprints (Dict[str, str]): 智能体名称 -> 当前指纹
+
+    Returns:
+        int: 写入的条目数
+    """
+    questions = load_questions(args.questions, args.include_courses)
+    print(f"待生成问题数: {sum(len(items) for items in questions.values())}")
+    # 与线上一致的组件：构建时不读写回答缓存，也不查询旧答案库
+    registrar.register_agent_manager()
+    registrar.register_llm()
+    registrar.register_all_agents()
+    registrar.register_fast_paths()
+    registrar.register_score_gate()
+    registrar.register_generation_profiles()
+    try:
+        entries = await generate(questions, prompt_paths, args.concurrency)
+    finally:
+        await registrar.close()
+    return build_faq_store(args.output, entries, {agent: fingerprints[agent] for agent in questions})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FAQ答案库离线构建")
+    parser.add_argument("--questions", default=QUESTIONS_PATH, help="常见问题文件路径")
+    parser.add_argument("--output", default=config.FAQ_STORE_PATH, help="答案库文件路径")
+    parser.add_argument("--include-courses", action="store_true", help="追加由课程列表生成的“这节课讲了什么”问题")
+    parser.add_argument("--concurrency", type=int, default=4, help="并发请求数")
+    parser.add_argument("--check", action="store_true", help="只检查答案库是否缺失或过期")
+    parser.add_argument("--if-stale", action="store_true", help="仅在答案库缺失或过期时构建")
+    args = parser.parse_args()
+
+    prompt_paths = load_prompt_paths()
+    fingerprints = current_fingerprints(prompt_paths)
+    if args.check or args.if_stale:
+        with open(args.questions, encoding="utf-8") as f:
+            stale = stale_agents(args.output, fingerprints, list(json.load(f)))
+        print(f"缺失或过期的智能体: {stale}" if stale else "答案库为最新")
+        if args.check or not stale:
+            sys.exit(1 if stale else 0)
+
+    count = asyncio.run(build(args, prompt_paths, fingerprints))
+    print(f"已写入 {count} 条回答: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+缓存预热覆盖率离线报告
+从JSON日志的请求汇总记录中统计各智能体的前N个高频问题，计算预热这些问题后，
+最近一天的流量中有多少比例会命中缓存，用于选择 CACHE_WARMUP_TOP_N（不请求推荐系统）
+
+用法:
+    python scripts/cache_coverage_report.py logs/agent_*.log --top 20 50 100 200
+    python scripts/cache_coverage_report.py logs/agent_*.log --holdout   # 只用最近一天之前的日志统计高频问题
+"""
+
+import os
+import sys
+import argparse
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from agents.tool_agent.question_normalizer import QuestionNormalizer
+from utils.cache_warmer import COVERAGE_WINDOW, coverage, read_request_log, top_questions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="缓存预热覆盖率离线报告")
+    parser.add_argument("paths", nargs="+", help="日志文件路径")
+    parser.add_argument("--top", type=int, nargs="+", default=[20, 50, 100, 200], help="每个智能体预热的问题数")
+    parser.add_argument("--holdout", action="store_true", help="只用最近一天之前的请求统计高频问题，评估对新一天流量的覆盖")
+    args = parser.parse_args()
+
+    records = list(read_request_log(args.paths))
+    if not records:
+        print("日志中未找到请求汇总记录（需 LOG_FORMAT=json）")
+        return
+
+    normalize = QuestionNormalizer().normalize
+    # 以日志中最新的请求时间为准，便于分析历史日志
+    since = max(timestamp for timestamp, _, _ in records) - COVERAGE_WINDOW
+    mined = [record for record in records if record[0] < since] if args.holdout else records
+    print(f"请求总数: {len(records)}，用于统计高频问题: {len(mined)}")
+    if not args.holdout:
+        print("未使用--holdout：高频问题包含最近一天的请求，覆盖率为样本内结果（上限）")
+    print(f"{'前N个/智能体':<12} {'预热问题数':>10} {'最近一天请求':>12} {'可命中':>8} {'覆盖率':>8}")
+    for top_n in args.top:
+        questions = top_questions(mined, normalize, top_n)
+        warmed = {(agent, key) for agent, items in questions.items() for key, _, _ in items}
+        result = coverage(records, normalize, warmed, since)
+        print(f"{top_n:<12} {len(warmed):>10} {result['requests']:>12} {result['covered']:>8} {result['coverage']:>8.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+问题重复率离线报告
+从日志中提取用户问题，对比原有处理方式与规范化后的去重数量和重复率，并列出合并最多的问题组
+
+支持的日志格式：
+    JSON日志中 request.summary 汇总记录的 question 字段
+    文本日志中的“开始处理请求: ...”“开始流式处理请求: ...”“开始处理XX问题: ...”
+
+用法:
+    python scripts/question_dedup_report.py logs/agent_*.log --top 20
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+from collections import Counter, defaultdict
+from typing import Iterator, List
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from agents.tool_agent.question_normalizer import QuestionNormalizer
+
+TEXT_PATTERN = re.compile(r" - 开始(?:流式)?处理(?:请求|\S*问题): (.+)$")
+
+
+def legacy_process(question: str) -> str:
+    """
+    原有的问题处理方式：去除首尾空格、末尾问号并合并空格
+
+    Args:
+        question (str): 原始问题
+
+    Returns:
+        str: 处理后的问题
+    """
+    processed = question.strip()
+    if processed.endswith("?") or processed.endswith("？"):
+        processed = processed[:-1]
+    return re.sub(r"\s+", " ", processed)
+
+
+def read_questions(paths: List[str]) -> Iterator[str]:
+    """
+    从日志文件中读取用户问题
+
+    Args:
+        paths (List[str]): 日志文件路径
+
+    Yields:
+        str: 用户问题
+    """
+    for path in paths:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                line = line.rstrip("\n")
+                if line.startswith("{"):
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if record.get("logger") == "request.summary" and record.get("question"):
+                        yield record["question"]
+                    continue
+                match = TEXT_PATTERN.search(line)
+                if match:
+                    yield match.group(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="问题重复率离线报告")
+    parser.add_argument("paths", nargs="+", help="日志文件路径")
+    parser.add_argument("--top", type=int, default=20, help="列出合并最多的问题组数量")
+    args = parser.parse_args()
+
+    questions = list(read_questions(args.paths))
+    if not questions:
+        print("日志中未找到用户问题")
+        return
+
+    normalizer = QuestionNormalizer()
+    legacy_keys = Counter(legacy_process(question) for question in questions)
+    groups = defaultdict(Counter)
+    for question in questions:
+        groups[normalizer.normalize(question)][legacy_process(question)] += 1
+
+    total = len(questions)
+    print(f"问题总数: {total}")
+    print(f"{'处理方式':<8} {'去重后数量':>10} {'重复率':>8}")
+    for name, unique in (("原有处理", len(legacy_keys)), ("规范化后", len(groups))):
+        print(f"{name:<8} {unique:>10} {1 - unique / total:>8.2%}")
+
+    merged = sorted(((key, variants) for key, variants in groups.items() if len(variants) > 1),
+                    key=lambda item: (-len(item[1]), -sum(item[1].values())))
+    print(f"\n规范化后合并的问题组: {len(merged)}，前{min(args.top, len(merged))}组:")
+    for key, variants in merged[:args.top]:
+        print(f"  {key}  （{len(variants)}种写法，{sum(variants.values())}次）")
+        for variant, count in variants.most_common(5):
+            print(f"      {count:>5}  {variant}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+本地RESP缓存服务
+兼容Redis协议的单进程内存服务，只支持网络共享缓存用到的命令（PING/GET/SET/DEL/EXISTS/PTTL/DBSIZE/FLUSHDB/SELECT/AUTH），
+用于在没有Redis的环境下测试多实例共享缓存与合并请求，不做持久化，不用于生产
+
+用法:
+    python scripts/resp_cache_server.py --port 6390
+    CACHE_REDIS_URL=redis://127.0.0.1:6390/0 python main.py
+"""
+
+import time
+import asyncio
+import argparse
+from typing import Dict, List, Optional, Tuple
+
+
+class RespStore:
+    """
+    带过期时间的内存键值存储
+    """
+
+    def __init__(self):
+        self._data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] <= time.monotonic():
+            del self._data[key]
+            return None
+        return entry[0]
+
+    def execute(self, args: List[bytes]) -> object:
+        """
+        执行一条命令
+
+        Args:
+            args (List[bytes]): 命令与参数
+
+        Returns:
+            object: 回复，异常实例表示错误回复
+        """
+        command = args[0].upper()
+        if command == b"PING":
+            return "PONG"
+        if command in (b"SELECT", b"AUTH"):
+            return "OK"
+        if command == b"GET" and len(args) == 2:
+            return self.get(args[1])
+        if command == b"SET" and len(args) >= 3:
+            return self._set(args[1], args[2], args[3:])
+        if command == b"DEL":
+            return sum(1 for key in args[1:] if self.get(key) is not None and self._data.pop(key, None))
+        if command == b"EXISTS":
+            return sum(1 for key in args[1:] if self.get(key) is not None)
+        if command == b"PTTL" and len(args) == 2:
+            if self.get(args[1]) is None:
+                return -2
+            expires_at = self._data[args[1]][1]
+            return -1 if expires_at is None else int((expires_at - time.monotonic()) * 1000)
+        if command == b"DBSIZE":
+            return len(self._data)
+        if command == b"FLUSHDB":
+            self._data.clear()
+            return "OK"
+        return ValueError(f"ERR unknown command or wrong number of arguments for '{args[0].decode(errors='replace')}'")
+
+    def _set(self, key: bytes, value: bytes, options: List[bytes]) -> object:
+        expires_at = None
+        nx = xx = False
+        i = 0
+        while i < len(options):
+            option = options[i].upper()
+            if option in (b"PX", b"EX") and i + 1 < len(options):
+                amount = int(options[i + 1])
+                expires_at = time.monotonic() + (amount / 1000 if option == b"PX" else amount)
+                i += 2
+                continue
+            if option == b"NX":
+                nx = True
+            elif option == b"XX":
+                xx = True
+            else:
+                return ValueError("ERR syntax error")
+            i += 1
+        exists = self.get(key) is not None
+        if (nx and exists) or (xx and not exists):
+            return None
+        self._data[key] = (value, expires_at)
+        return "OK"
+
+
+def encode_reply(reply: object) -> bytes:
+    """
+    编码RESP回复
+    """
+    if isinstance(reply, Exception):
+        return f"-{reply}\r\n".encode()
+    if isinstance(reply, str):
+        return f"+{reply}\r\n".encode()
+    if isinstance(reply, int):
+        return f":{reply}\r\n".encode()
+    if reply is None:
+        return b"$-1\r\n"
+    return f"${len(reply)}\r\n".encode() + reply + b"\r\n"
+
+
+async def read_command(reader: asyncio.StreamReader) -> Optional[List[bytes]]:
+    """
+    读取一条命令（数组格式或内联格式），连接关闭时返回None
+    """
+    line = await reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b"*"):
+        return line.split()
+    args = []
+    for _ in range(int(line[1:])):
+        header = await reader.readline()
+        length = int(header[1:])
+        args.append((await reader.readexactly(length + 2))[:-2])
+    return args
+
+
+async def serve(host: str, port: int):
+    store = RespStore()
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                args = await read_command(reader)
+                if args is None:
+                    break
+                if args:
+                    writer.write(encode_reply(store.execute(args)))
+                    await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    print(f"RESP缓存服务已启动: redis://{host}:{port}/0")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地RESP缓存服务（测试用）")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=6390, help="监听端口")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
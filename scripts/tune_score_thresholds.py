@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+课程相似度阈值调整离线报告
+从JSON日志的请求汇总记录中读取各智能体的最佳课程相似度（course_score）与检索结果（outcome），
+统计不同阈值下的跳过率、损失的知识库回答比例与避免的无效报告检索比例，并给出各智能体的建议阈值
+
+低于线上阈值的请求没有检索结果，无法评估更低的阈值；需要评估时可先在部分worker上设置较低的阈值收集日志
+
+用法:
+    python scripts/tune_score_thresholds.py logs/agent_*.log
+    python scripts/tune_score_thresholds.py logs/agent_*.log --max-loss 0.01 --thresholds 0.5 0.55 0.6 0.65 0.7
+"""
+
+import os
+import sys
+import argparse
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from utils.json_codec import loads
+
+# 检索了报告的请求：命中报告时使用知识库回答，未命中时退回备用方式
+OUTCOME_HIT = "report_hit"
+OUTCOME_MISS = "report_miss"
+OUTCOME_GATED = "gated"
+
+
+def read_score_log(paths: Iterable[str]) -> Iterator[Tuple[str, float, str]]:
+    """
+    从JSON日志中读取带课程相似度的请求汇总记录
+
+    Args:
+        paths (Iterable[str]): 日志文件路径
+
+    Yields:
+        Tuple[str, float, str]: (智能体名称, 最佳课程相似度, 检索结果)
+    """
+    for path in paths:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if not line.startswith("{") or '"course_score"' not in line:
+                    continue
+                try:
+                    record = loads(line)
+                except ValueError:
+                    continue
+                if record.get("logger") == "request.summary" and record.get("agent") and record.get("outcome"):
+                    yield record["agent"], float(record["course_score"]), record["outcome"]
+
+
+def evaluate(scores: List[Tuple[float, bool]], threshold: float) -> Dict[str, float]:
+    """
+    评估阈值：低于阈值的请求跳过报告检索
+
+    Args:
+        scores (List[Tuple[float, bool]]): 检索了报告的请求的(相似度, 是否命中报告)
+        threshold (float): 阈值
+
+    Returns:
+        Dict[str, float]: 跳过率、损失的命中比例、避免的未命中比例
+    """
+    hits = sum(1 for _, hit in scores if hit)
+    misses = len(scores) - hits
+    skipped_hits = sum(1 for score, hit in scores if hit and score < threshold)
+    skipped_misses = sum(1 for score, hit in scores if not hit and score < threshold)
+    return {
+        "skip_rate": (skipped_hits + skipped_misses) / len(scores) if scores else 0.0,
+        "lost_hits": skipped_hits / hits if hits else 0.0,
+        "saved_misses": skipped_misses / misses if misses else 0.0,
+    }
+
+
+def recommend(scores: List[Tuple[float, bool]], max_loss: float) -> Optional[float]:
+    """
+    选择损失的命中比例不超过上限的最高阈值（取某个观测到的相似度）
+
+    Args:
+        scores (List[Tuple[float, bool]]): 检索了报告的请求的(相似度, 是否命中报告)
+        max_loss (float): 可接受的命中损失比例
+
+    Returns:
+        Optional[float]: 建议阈值，没有命中记录时返回None
+    """
+    hit_scores = sorted(score for score, hit in scores if hit)
+    if not hit_scores:
+        return None
+    # 阈值取第k个命中的相似度时，恰好跳过k个命中
+    allowed = min(int(max_loss * len(hit_scores)), len(hit_scores) - 1)
+    return round(hit_scores[allowed], 4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="课程相似度阈值调整离线报告")
+    parser.add_argument("paths", nargs="+", help="日志文件路径")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.4, 0.5, 0.6, 0.7, 0.8], help="要评估的阈值")
+    parser.add_argument("--max-loss", type=float, default=0.02, help="可接受的知识库回答损失比例")
+    parser.add_argument("--min-samples", type=int, default=50, help="给出建议阈值所需的最少检索记录数")
+    args = parser.parse_args()
+
+    scores: Dict[str, List[Tuple[float, bool]]] = defaultdict(list)
+    gated: Dict[str, int] = defaultdict(int)
+    for agent, score, outcome in read_score_log(args.paths):
+        if outcome in (OUTCOME_HIT, OUTCOME_MISS):
+            scores[agent].append((score, outcome == OUTCOME_HIT))
+        elif outcome == OUTCOME_GATED:
+            gated[agent] += 1
+    if not scores and not gated:
+        print("日志中未找到带课程相似度的请求汇总记录（需 LOG_FORMAT=json）")
+        return
+
+    recommended = {}
+    for agent in sorted(set(scores) | set(gated)):
+        agent_scores = scores[agent]
+        total = len(agent_scores) + gated[agent]
+        hits = sum(1 for _, hit in agent_scores if hit)
+        print(f"\n[{agent}] 请求数: {total}，线上跳过率: {gated[agent] / total:.2%}，检索报告: {len(agent_scores)}，命中报告: {hits}")
+        print(f"{'阈值':>6} {'跳过率':>8} {'损失命中':>8} {'避免未命中':>10}")
+        for threshold in args.thresholds:
+            result = evaluate(agent_scores, threshold)
+            print(f"{threshold:>6.2f} {result['skip_rate']:>8.2%} {result['lost_hits']:>8.2%} {result['saved_misses']:>10.2%}")
+        if len(agent_scores) < args.min_samples:
+            print(f"检索记录少于 {args.min_samples} 条，不给出建议阈值")
+            continue
+        threshold = recommend(agent_scores, args.max_loss)
+        if threshold is not None:
+            result = evaluate(agent_scores, threshold)
+            recommended[agent] = threshold
+            print(f"建议阈值: {threshold}（跳过率 {result['skip_rate']:.2%}，损失命中 {result['lost_hits']:.2%}）")
+
+    if recommended:
+        print("\nCOURSE_SCORE_THRESHOLDS=" + ",".join(f"{agent}:{threshold}" for agent, threshold in recommended.items()))
+
+
+if __name__ == "__main__":
+    main()
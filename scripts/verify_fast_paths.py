@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+快速路径正确性校验
+1. 语料校验：按 scripts/data/fast_path_corpus.jsonl 逐条校验问题规范化后的命中类型（direct/inject/miss）
+   与注入提示词的已验证结果
+2. 随机校验：随机生成二次根式、勾股定理、一次函数题目，用浮点计算与回代独立验证精确结果
+
+语料格式（每行一个JSON，normalized可选，给出时同时校验规范化结果）:
+    {"agent": "sqrt_agent", "question": "化简√48", "kind": "direct", "facts": ["计算结果：4√3"]}
+    {"agent": "sqrt_agent", "question": "16的平方根是多少", "normalized": "16的平方根是多少", "kind": "miss", "facts": []}
+
+用法:
+    python scripts/verify_fast_paths.py
+    python scripts/verify_fast_paths.py --random 2000 --seed 1
+"""
+
+import os
+import sys
+import json
+import math
+import random
+import argparse
+from fractions import Fraction
+from typing import Callable, Dict, List
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from agents.tool_agent.question_normalizer import QuestionNormalizer
+from agents.tool_agent.radical import RadicalValue, evaluate
+from agents.data_analysis_agent.stats_engine import StatsEngine
+from agents.sqrt_agent.radical_solver import RadicalSolver
+from agents.pythagorean_agent.pythagorean_solver import PythagoreanSolver
+from agents.linear_function_agent.linear_solver import LinearFunctionSolver, format_linear
+
+CORPUS_PATH = os.path.join(PROJECT_ROOT, "scripts", "data", "fast_path_corpus.jsonl")
+
+SOLVERS = {
+    "data_analysis_agent": StatsEngine,
+    "sqrt_agent": RadicalSolver,
+    "pythagorean_agent": PythagoreanSolver,
+    "linear_function_agent": LinearFunctionSolver,
+}
+
+
+def verify_corpus(path: str) -> List[str]:
+    """
+    校验语料
+
+    Args:
+        path (str): 语料文件路径
+
+    Returns:
+        List[str]: 失败说明
+    """
+    normalizer = QuestionNormalizer()
+    solvers = {agent: solver_class() for agent, solver_class in SOLVERS.items()}
+    failures = []
+    total = 0
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            case = json.loads(line)
+            total += 1
+            question = normalizer.normalize(case["question"])
+            if "normalized" in case and question != case["normalized"]:
+                failures.append(f"[{case['agent']}] {case['question']}: 期望规范化为 {case['normalized']}，实际 {question}")
+                continue
+            result = solvers[case["agent"]].solve(question)
+            kind = result.kind if result is not None else "miss"
+            if kind != case["kind"]:
+                failures.append(f"[{case['agent']}] {case['question']}: 期望 {case['kind']}，实际 {kind}")
+                continue
+            facts = set(result.facts.splitlines()) if result is not None else set()
+            missing = [fact for fact in case["facts"] if f"- {fact}" not in facts]
+            if missing:
+                failures.append(f"[{case['agent']}] {case['question']}: 缺少结果 {missing}，实际\n{result.facts}")
+    print(f"语料校验: {total - len(failures)}/{total} 通过")
+    return failures
+
+
+def _close(value: RadicalValue, expected: float) -> bool:
+    return math.isclose(float(value), expected, rel_tol=1e-9, abs_tol=1e-9)
+
+
+def check_radicals(rng: random.Random) -> str:
+    """
+    随机校验二次根式化简与运算：结果与浮点计算一致，且被开方数不含平方因数
+    """
+    a, b, c = rng.randint(1, 500), rng.randint(1, 500), rng.randint(1, 9)
+    cases = {
+        f"√{a}": math.sqrt(a),
+        f"{c}√{a}+√{b}": c * math.sqrt(a) + math.sqrt(b),
+        f"√{a}×√{b}": math.sqrt(a * b),
+        f"√{a}÷√{b}": math.sqrt(a / b),
+        f"(√{a}+{c})(√{a}-{c})": a - c * c,
+        f"√({c}/{b})": math.sqrt(c / b),
+    }
+    for expression, expected in cases.items():
+        value = evaluate(expression)
+        if not _close(value, expected):
+            return f"{expression} = {value}，浮点值 {expected}"
+        for radicand in value.terms:
+            if any(radicand % (i * i) == 0 for i in range(2, math.isqrt(radicand) + 1)):
+                return f"{expression} = {value}，被开方数{radicand}不是最简"
+    return ""
+
+
+def check_pythagorean(rng: random.Random) -> str:
+    """
+    随机校验勾股定理：求出的斜边满足a²+b²=c²
+    """
+    a, b = rng.randint(1, 60), rng.randint(1, 60)
+    result = PythagoreanSolver().solve(f"直角三角形的两条直角边分别为{a}和{b},求斜边长")
+    if result is None:
+        return f"直角边{a}、{b}未命中"
+    hypotenuse = result.facts.splitlines()[-1].split("斜边长为")[-1]
+    if not _close(evaluate(hypotenuse), math.hypot(a, b)):
+        return f"直角边{a}、{b}: 斜边{hypotenuse}"
+    return ""
+
+
+def check_linear(rng: random.Random) -> str:
+    """
+    随机校验一次函数：把两个已知点回代到求出的解析式
+    """
+    x1, x2 = rng.sample(range(-20, 21), 2)
+    y1, y2 = rng.randint(-20, 20), rng.randint(-20, 20)
+    result = LinearFunctionSolver().solve(f"一次函数的图像经过({x1},{y1})和({x2},{y2}),求解析式")
+    if y1 == y2:
+        return "" if result is None else f"({x1},{y1})、({x2},{y2}): k=0不应命中"
+    k = Fraction(y2 - y1, x2 - x1)
+    expected = format_linear(k, y1 - k * x1)
+    if result is None or f"- 解析式：{expected}" not in result.facts.splitlines():
+        return f"({x1},{y1})、({x2},{y2}): 期望 {expected}"
+    return ""
+
+
+def verify_random(count: int, seed: int) -> List[str]:
+    """
+    随机校验
+
+    Args:
+        count (int): 每类题目的随机用例数
+        seed (int): 随机种子
+
+    Returns:
+        List[str]: 失败说明
+    """
+    rng = random.Random(seed)
+    checks: Dict[str, Callable[[random.Random], str]] = {
+        "二次根式": check_radicals,
+        "勾股定理": check_pythagorean,
+        "一次函数": check_linear,
+    }
+    failures = []
+    for name, check in checks.items():
+        errors = [error for error in (check(rng) for _ in range(count)) if error]
+        print(f"随机校验 {name}: {count - len(errors)}/{count} 通过")
+        failures.extend(f"[{name}] {error}" for error in errors)
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="快速路径正确性校验")
+    parser.add_argument("--corpus", default=CORPUS_PATH, help="语料文件路径")
+    parser.add_argument("--random", type=int, default=500, help="每类题目的随机用例数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    args = parser.parse_args()
+
+    failures = verify_corpus(args.corpus) + verify_random(args.random, args.seed)
+    for failure in failures:
+        print(failure)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+准入控制
+按智能体路由统计处理中的请求数与近期上游耗时（检索+大模型），估算新请求的完成时间，
+超过截止时间时提前拒绝，保证已接收的请求仍能在时限内完成
+"""
+
+import math
+import threading
+from typing import Any, Dict, Optional
+
+# 上游耗时指数滑动平均的权重
+EWMA_ALPHA = 0.2
+# 建议客户端重试的最长等待（秒）
+MAX_RETRY_AFTER = 60
+
+
+class AdmissionRejected(Exception):
+    """
+    请求因预计无法在截止时间内完成而被拒绝
+    """
+
+    def __init__(self, agent: str, estimated: float, retry_after: int):
+        """
+        初始化拒绝异常
+
+        Args:
+            agent (str): 智能体名称
+            estimated (float): 预计完成耗时（秒）
+            retry_after (int): 建议重试等待秒数
+        """
+        super().__init__(f"{agent} 预计耗时 {estimated:.1f}秒，超过截止时间")
+        self.agent = agent
+        self.estimated = estimated
+        self.retry_after = retry_after
+
+
+class AdmissionTicket:
+    """
+    已接收请求的凭证，请求结束时释放并回报上游耗时
+    """
+
+    def __init__(self, controller: "AdmissionController", agent: str, load: float):
+        """
+        初始化凭证
+
+        Args:
+            controller (AdmissionController): 准入控制器
+            agent (str): 智能体名称
+            load (float): 接收时的负载系数（处理中的请求数 / 上游并发容量，不小于1）
+        """
+        self.controller = controller
+        self.agent = agent
+        self.load = load
+        self._released = False
+
+    def release(self, upstream_seconds: Optional[float] = None):
+        """
+        释放凭证，重复调用无效
+
+        Args:
+            upstream_seconds (Optional[float]): 本次请求的上游耗时，未调用上游（如命中缓存）时为None
+        """
+        if self._released:
+            return
+        self._released = True
+        self.controller._release(self, upstream_seconds)
+
+
+class _RouteState:
+    """
+    单个智能体路由的统计
+    """
+
+    def __init__(self):
+        self.in_flight = 0
+        # 按负载折算后的单次上游耗时（秒），即无排队时的服务时间估计
+        self.service_time: Optional[float] = None
+        self.samples = 0
+        self.admitted = 0
+        self.rejected = 0
+
+
+class AdmissionController:
+    """
+    准入控制器
+    上游并发容量为capacity时，处理中的请求数超过容量后按比例共享上游，
+    新请求的预计完成时间 = 该路由的服务时间 × max(1, (处理中请求数 + 1) / capacity)
+    """
+
+    def __init__(self, deadline: float, capacity: int, min_samples: int = 5):
+        """
+        初始化准入控制器
+
+        Args:
+            deadline (float): 请求截止时间（秒）
+            capacity (int): 上游并发容量（通常为大模型线程池大小）
+            min_samples (int): 路由的上游耗时样本数达到该值前不拒绝请求
+        """
+        self.deadline = deadline
+        self.capacity = max(1, capacity)
+        self.min_samples = min_samples
+        self.in_flight = 0
+        self._routes: Dict[str, _RouteState] = {}
+        self._lock = threading.Lock()
+
+    def admit(self, agent: str, enforce: bool = True) -> AdmissionTicket:
+        """
+        接收请求
+
+        Args:
+            agent (str): 智能体名称
+            enforce (bool): 是否执行拒绝判断，为False时只计入处理中的请求（如批量请求中已整体接收的问题）
+
+        Returns:
+            AdmissionTicket: 请求凭证
+
+        Raises:
+            AdmissionRejected: 预计完成时间超过截止时间
+        """
+        with self._lock:
+            route = self._route(agent)
+            if enforce:
+                self._reject_if_late(agent, route)
+            route.admitted += 1
+            route.in_flight += 1
+            self.in_flight += 1
+            return AdmissionTicket(self, agent, max(1.0, self.in_flight / self.capacity))
+
+    def check(self, agent: str):
+        """
+        只判断是否会拒绝，不计入处理中的请求（批量请求整体准入时使用）
+
+        Args:
+            agent (str): 智能体名称
+
+        Raises:
+            AdmissionRejected: 预计完成时间超过截止时间
+        """
+        with self._lock:
+            self._reject_if_late(agent, self._route(agent))
+
+    def estimate(self, agent: str) -> Optional[float]:
+        """
+        估算该路由新请求的完成耗时
+
+        Args:
+            agent (str): 智能体名称
+
+        Returns:
+            Optional[float]: 预计耗时（秒），样本不足时返回None
+        """
+        with self._lock:
+            return self._estimate(self._route(agent))
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        获取各路由的准入统计
+
+        Returns:
+            Dict[str, Dict[str, Any]]: 智能体名称 -> 处理中请求数、服务时间、预计耗时、接收/拒绝数
+        """
+        with self._lock:
+            return {
+                agent: {
+                    "in_flight": route.in_flight,
+                    "service_ms": round(route.service_time * 1000, 1) if route.service_time is not None else 0.0,
+                    "estimated_ms": round((self._estimate(route) or 0.0) * 1000, 1),
+                    "admitted": route.admitted,
+                    "rejected": route.rejected,
+                }
+                for agent, route in self._routes.items()
+            }
+
+    def _route(self, agent: str) -> _RouteState:
+        route = self._routes.get(agent)
+        if route is None:
+            route = self._routes[agent] = _RouteState()
+        return route
+
+    def _reject_if_late(self, agent: str, route: _RouteState):
+        # 路由没有处理中的请求时总是接收，作为探测更新服务时间，避免上游恢复后仍持续拒绝
+        if route.in_flight == 0:
+            return
+        estimated = self._estimate(route)
+        if estimated is not None and estimated > self.deadline:
+            route.rejected += 1
+            retry_after = min(MAX_RETRY_AFTER, max(1, math.ceil(estimated - self.deadline)))
+            raise AdmissionRejected(agent, estimated, retry_after)
+
+    def _estimate(self, route: _RouteState) -> Optional[float]:
+        if route.service_time is None or route.samples < self.min_samples:
+            return None
+        return route.service_time * max(1.0, (self.in_flight + 1) / self.capacity)
+
+    def _release(self, ticket: AdmissionTicket, upstream_seconds: Optional[float]):
+        with self._lock:
+            route = self._route(ticket.agent)
+            route.in_flight -= 1
+            self.in_flight -= 1
+            if upstream_seconds is None:
+                return
+            # 按接收时的负载折算，避免排队造成的耗时增长被重复计入
+            sample = upstream_seconds / ticket.load
+            if route.service_time is None:
+                route.service_time = sample
+            else:
+                route.service_time += EWMA_ALPHA * (sample - route.service_time)
+            route.samples += 1
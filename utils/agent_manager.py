@@ -3,90 +3,295 @@
 """
 智能体管理器
 实现请求并发执行，满足"所有请求并发"要求
+按阶段类型（检索I/O、大模型I/O、CPU计算）划分独立的有界线程池，避免阻塞事件循环
 """
 
 import asyncio
-from typing import Callable, Any
+import logging
+import threading
+import time
+from typing import Callable, Any, AsyncGenerator, Dict, Iterator, Optional
 from concurrent.futures import ThreadPoolExecutor
 import functools
 
+logger = logging.getLogger(__name__)
+
+# 阶段类型
+STAGE_RETRIEVAL = "retrieval"
+STAGE_LLM = "llm"
+STAGE_CPU = "cpu"
+
+# 迭代结束标记
+_EXHAUSTED = object()
+
+
+def _locked_next(lock: threading.Lock, iterator: Iterator[Any]) -> Any:
+    """
+    持锁获取迭代器的下一个元素
+
+    Args:
+        lock (threading.Lock): 迭代器锁
+        iterator (Iterator[Any]): 同步迭代器
+
+    Returns:
+        Any: 下一个元素，迭代结束时返回结束标记
+    """
+    with lock:
+        return next(iterator, _EXHAUSTED)
+
+
+def _close_iterator(lock: threading.Lock, close: Callable):
+    """
+    持锁关闭同步迭代器，关闭失败只记录日志
+
+    Args:
+        lock (threading.Lock): 迭代器锁
+        close (Callable): 迭代器的close方法
+    """
+    with lock:
+        try:
+            close()
+        except Exception as e:
+            logger.warning(f"关闭迭代器失败: {e}")
+
+
+class StagePool:
+    """
+    单个阶段类型的有界线程池，记录饱和度指标
+    """
+
+    def __init__(self, name: str, max_workers: int):
+        """
+        初始化阶段线程池
+
+        Args:
+            name (str): 阶段类型名称
+            max_workers (int): 线程池最大工作线程数
+        """
+        self.name = name
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-pool")
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.active = 0
+        self.peak_active = 0
+        self.total_wait = 0.0
+        self.total_run = 0.0
+
+    def submit(self, func: Callable, *args, **kwargs) -> asyncio.Future:
+        """
+        提交任务到线程池
+
+        Args:
+            func (Callable): 要执行的函数
+            *args: 函数位置参数
+            **kwargs: 函数关键字参数
+
+        Returns:
+            asyncio.Future: 任务结果的Future对象
+        """
+        with self._lock:
+            self.submitted += 1
+        loop = asyncio.get_event_loop()
+        return loop.run_in_executor(self.executor, functools.partial(self._execute, time.perf_counter(), func, args, kwargs))
+
+    def _execute(self, submitted_at: float, func: Callable, args: tuple, kwargs: dict) -> Any:
+        """
+        在工作线程中执行任务并统计排队与执行耗时
+
+        Args:
+            submitted_at (float): 提交时间
+            func (Callable): 要执行的函数
+            args (tuple): 函数位置参数
+            kwargs (dict): 函数关键字参数
+
+        Returns:
+            Any: 函数返回值
+        """
+        started_at = time.perf_counter()
+        with self._lock:
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+            self.total_wait += started_at - submitted_at
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.completed += 1
+                self.total_run += time.perf_counter() - started_at
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取线程池饱和度指标
+
+        Returns:
+            Dict[str, Any]: 容量、活跃数、排队数、饱和度和平均排队/执行耗时
+        """
+        with self._lock:
+            finished = max(self.completed, 1)
+            queued = self.submitted - self.completed - self.active
+            return {
+                "max_workers": self.max_workers,
+                "active": self.active,
+                "queued": queued,
+                "peak_active": self.peak_active,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "saturation": round(self.active / self.max_workers, 3),
+                "avg_wait_ms": round(self.total_wait / finished * 1000, 3),
+                "avg_run_ms": round(self.total_run / finished * 1000, 3),
+            }
+
+    def shutdown(self):
+        """
+        关闭线程池
+        """
+        self.executor.shutdown(wait=True)
+
+
 class AgentManager:
     """
     智能体管理器类
     """
-    
-    def __init__(self, max_workers: int = 10):
+
+    def __init__(self, max_workers: int = 10, retrieval_workers: Optional[int] = None,
+                 llm_workers: Optional[int] = None, cpu_workers: Optional[int] = None):
         """
         初始化智能体管理器
-        
+
         Args:
-            max_workers (int): 线程池最大工作线程数
+            max_workers (int): 未单独指定时各线程池的最大工作线程数
+            retrieval_workers (Optional[int]): 检索I/O线程池大小
+            llm_workers (Optional[int]): 大模型I/O线程池大小
+            cpu_workers (Optional[int]): CPU计算线程池大小
+        """
+        self.pools = {
+            STAGE_RETRIEVAL: StagePool(STAGE_RETRIEVAL, retrieval_workers or max_workers),
+            STAGE_LLM: StagePool(STAGE_LLM, llm_workers or max_workers),
+            STAGE_CPU: StagePool(STAGE_CPU, cpu_workers or max_workers),
+        }
+        # 兼容旧接口，默认使用检索I/O线程池
+        self.executor = self.pools[STAGE_RETRIEVAL].executor
+
+    async def run(self, stage: str, func: Callable, *args, **kwargs) -> Any:
+        """
+        在指定阶段类型的线程池中执行阻塞函数
+
+        Args:
+            stage (str): 阶段类型（retrieval/llm/cpu）
+            func (Callable): 要执行的函数
+            *args: 函数位置参数
+            **kwargs: 函数关键字参数
+
+        Returns:
+            Any: 函数返回值
+        """
+        return await self.pools[stage].submit(func, *args, **kwargs)
+
+    async def iterate(self, stage: str, iterator: Iterator[Any]) -> AsyncGenerator[Any, None]:
+        """
+        在指定阶段类型的线程池中逐项消费同步迭代器（如大模型流式响应）
+
+        Args:
+            stage (str): 阶段类型（retrieval/llm/cpu）
+            iterator (Iterator[Any]): 同步迭代器
+
+        Yields:
+            Any: 迭代器产生的元素
         """
-        self.executor = ThreadPoolExecutor(max_workers=max_workers)
-    
+        pool = self.pools[stage]
+        # next与close可能先后落在不同工作线程，用锁保证不会并发操作同一迭代器
+        lock = threading.Lock()
+        try:
+            while True:
+                item = await pool.submit(_locked_next, lock, iterator)
+                if item is _EXHAUSTED:
+                    return
+                yield item
+        finally:
+            # 消费方提前结束（客户端断开、取消或流水线出错）时关闭迭代器，释放上游流式响应及其HTTP连接；
+            # 取消时工作线程中的next可能仍在执行，关闭会等待其返回。关闭在默认线程池中执行，不排在阶段线程池的任务之后
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                try:
+                    await asyncio.shield(asyncio.get_event_loop().run_in_executor(None, _close_iterator, lock, close))
+                except RuntimeError as e:
+                    # 线程池已关闭（应用关闭中），不掩盖原有的取消或异常
+                    logger.warning(f"关闭迭代器失败: {e}")
+
     async def execute_concurrent(self, tasks: list) -> list:
         """
         并发执行任务列表
-        
+
         Args:
             tasks (list): 任务列表
-            
+
         Returns:
             list: 任务执行结果列表
         """
         # 使用asyncio.gather并发执行所有任务
         results = await asyncio.gather(*tasks, return_exceptions=True)
         return results
-    
+
     def create_task(self, func: Callable, *args, **kwargs) -> asyncio.Task:
         """
         创建异步任务
-        
+
         Args:
             func (Callable): 要执行的函数
             *args: 函数位置参数
             **kwargs: 函数关键字参数
-            
+
         Returns:
             asyncio.Task: 创建的异步任务
         """
         return asyncio.create_task(func(*args, **kwargs))
-    
+
     def create_io_task(self, func: Callable, *args, **kwargs) -> asyncio.Task:
         """
-        创建I/O密集型异步任务
-        
+        创建I/O密集型异步任务（使用检索I/O线程池）
+
         Args:
             func (Callable): 要执行的函数
             *args: 函数位置参数
             **kwargs: 函数关键字参数
-            
+
         Returns:
             asyncio.Task: 创建的异步任务
         """
-        loop = asyncio.get_event_loop()
         if asyncio.iscoroutinefunction(func):
             return asyncio.create_task(func(*args, **kwargs))
         else:
-            return asyncio.create_task(loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs)))
-    
+            return asyncio.create_task(self.run(STAGE_RETRIEVAL, func, *args, **kwargs))
+
     def create_cpu_task(self, func: Callable, *args, **kwargs) -> asyncio.Future:
         """
         创建CPU密集型异步任务
-        
+
         Args:
             func (Callable): 要执行的函数
             *args: 函数位置参数
             **kwargs: 函数关键字参数
-            
+
         Returns:
             asyncio.Future: 创建的异步Future对象
         """
-        loop = asyncio.get_event_loop()
-        return loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
-    
+        return self.pools[STAGE_CPU].submit(func, *args, **kwargs)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        获取各阶段线程池的饱和度指标
+
+        Returns:
+            Dict[str, Dict[str, Any]]: 按阶段类型划分的线程池指标
+        """
+        return {stage: pool.stats() for stage, pool in self.pools.items()}
+
     async def close(self):
         """
-        关闭线程池
+        关闭所有线程池
         """
-        self.executor.shutdown(wait=True)
\ No newline at end of file
+        for pool in self.pools.values():
+            pool.shutdown()
@@ -0,0 +1,333 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+缓存预热
+从历史请求日志（request.summary汇总记录）中统计各智能体的高频问题，
+限速预先填充课程/报告检索缓存（可选回答缓存），并统计预热集合对最近一天流量的覆盖率
+"""
+
+import os
+import glob
+import time
+import asyncio
+import datetime
+import logging
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from core.conf import config
+from utils.agent_manager import STAGE_CPU, STAGE_RETRIEVAL
+from utils.json_codec import loads
+from utils.metrics import start_request_timer
+from agents.tool_agent.score_gate import best_course_score
+
+try:
+    import fcntl
+except ImportError:  # Windows下无fcntl，各worker各自预热（检索结果已缓存时不会重复请求）
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# 覆盖率统计窗口（秒）
+COVERAGE_WINDOW = 86400
+
+# 当前是否处于预热请求中，预热发起的请求不计入指标与请求汇总日志
+_warming: ContextVar[bool] = ContextVar("cache_warming", default=False)
+
+
+def is_warmup_request() -> bool:
+    """
+    当前请求是否由缓存预热发起
+
+    Returns:
+        bool: 是否为预热请求
+    """
+    return _warming.get()
+
+
+def recent_log_files(log_dir: str, days: int) -> List[str]:
+    """
+    获取最近若干天的日志文件
+
+    Args:
+        log_dir (str): 日志目录
+        days (int): 天数
+
+    Returns:
+        List[str]: 日志文件路径，按日期从旧到新
+    """
+    return sorted(glob.glob(os.path.join(log_dir, "agent_*.log")))[-days:]
+
+
+def read_request_log(paths: Iterable[str]) -> Iterator[Tuple[float, str, str]]:
+    """
+    从JSON日志中读取请求汇总记录（文本格式日志不含结构化字段，不支持）
+
+    Args:
+        paths (Iterable[str]): 日志文件路径
+
+    Yields:
+        Tuple[float, str, str]: (时间戳, 智能体名称, 用户问题)
+    """
+    for path in paths:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if not line.startswith("{") or '"request.summary"' not in line:
+                    continue
+                try:
+                    record = loads(line)
+                    timestamp = datetime.datetime.fromisoformat(record["ts"]).timestamp()
+                except (ValueError, KeyError):
+                    continue
+                if record.get("agent") and record.get("question"):
+                    yield timestamp, record["agent"], record["question"]
+
+
+def top_questions(records: Iterable[Tuple[float, str, str]], normalize: Callable[[str], str],
+                  top_n: int) -> Dict[str, List[Tuple[str, int, str]]]:
+    """
+    按规范化后的问题统计各智能体的高频问题
+
+    Args:
+        records (Iterable[Tuple[float, str, str]]): 请求汇总记录
+        normalize (Callable[[str], str]): 问题处理函数（与线上一致）
+        top_n (int): 每个智能体保留的问题数
+
+    Returns:
+        Dict[str, List[Tuple[str, int, str]]]: 智能体名称 -> [(规范化后的问题, 次数, 最常见的原问题)]，按次数从高到低
+    """
+    counters: Dict[str, Counter] = defaultdict(Counter)
+    # 规范化结果只作为检索与缓存的键，生成回答时使用用户实际提出的原问题
+    phrasings: Dict[Tuple[str, str], Counter] = defaultdict(Counter)
+    for _, agent, question in records:
+        key = normalize(question)
+        counters[agent][key] += 1
+        phrasings[(agent, key)][" ".join(question.split())] += 1
+    return {
+        agent: [(key, count, phrasings[(agent, key)].most_common(1)[0][0]) for key, count in counter.most_common(top_n)]
+        for agent, counter in counters.items()
+    }
+
+
+def coverage(records: Iterable[Tuple[float, str, str]], normalize: Callable[[str], str],
+             warmed: Set[Tuple[str, str]], since: float) -> Dict[str, Any]:
+    """
+    统计某时刻之后的请求中，问题在预热集合内（即会命中缓存）的比例
+
+    Args:
+        records (Iterable[Tuple[float, str, str]]): 请求汇总记录
+        normalize (Callable[[str], str]): 问题处理函数
+        warmed (Set[Tuple[str, str]]): 已预热的(智能体, 规范化后的问题)
+        since (float): 统计起始时间戳
+
+    Returns:
+        Dict[str, Any]: 请求数、可命中数与覆盖率
+    """
+    total = covered = 0
+    for timestamp, agent, question in records:
+        if timestamp < since:
+            continue
+        total += 1
+        if (agent, normalize(question)) in warmed:
+            covered += 1
+    return {"requests": total, "covered": covered, "coverage": round(covered / total, 4) if total else 0.0}
+
+
+def holdout_coverage(records: List[Tuple[float, str, str]], normalize: Callable[[str], str],
+                     top_n: int, since: float) -> Dict[str, Any]:
+    """
+    留出法覆盖率：只用某时刻之前的请求选出高频问题，统计其对该时刻之后请求的覆盖率
+    该时刻之前没有请求时，改用全部请求选出高频问题，结果为样本内覆盖率（上限）
+
+    Args:
+        records (List[Tuple[float, str, str]]): 请求汇总记录
+        normalize (Callable[[str], str]): 问题处理函数
+        top_n (int): 每个智能体保留的问题数
+        since (float): 统计起始时间戳
+
+    Returns:
+        Dict[str, Any]: 请求数、可命中数、覆盖率与统计方式（holdout/in_sample）
+    """
+    mined = [record for record in records if record[0] < since]
+    method = "holdout" if mined else "in_sample"
+    questions = top_questions(mined or records, normalize, top_n)
+    warmed = {(agent, key) for agent, items in questions.items() for key, _, _ in items}
+    return {**coverage(records, normalize, warmed, since), "method": method}
+
+
+class CacheWarmer:
+    """
+    缓存预热任务，多worker部署时通过文件锁只由一个worker执行
+    """
+
+    def __init__(self, registrar):
+        """
+        初始化缓存预热任务
+
+        Args:
+            registrar: 组件注册器
+        """
+        self.registrar = registrar
+        self.state = "pending"
+        self.planned = 0
+        self.warmed = 0
+        self.failed = 0
+        self.answers = 0
+        self.coverage: Dict[str, Any] = {}
+        self.seconds: Optional[float] = None
+
+    def status(self) -> Dict[str, Any]:
+        """
+        获取预热进度
+
+        Returns:
+            Dict[str, Any]: 状态、计划/完成/失败的问题数、覆盖率
+        """
+        return {
+            "state": self.state,
+            "planned": self.planned,
+            "warmed": self.warmed,
+            "failed": self.failed,
+            "answers": self.answers,
+            "coverage": self.coverage,
+            "seconds": self.seconds,
+        }
+
+    async def run(self):
+        """
+        执行缓存预热，任何异常都只记录日志，不影响服务
+        """
+        cache = self.registrar.get_component("cache")
+        if cache is None:
+            self.state = "skipped"
+            return
+        lock_file = self._acquire_lock()
+        if lock_file is False:
+            self.state = "skipped"
+            logger.info("其他worker正在执行缓存预热，本worker跳过")
+            return
+        start = time.time()
+        self.state = "running"
+        try:
+            await self._warm()
+            self.state = "done"
+        except asyncio.CancelledError:
+            self.state = "cancelled"
+            raise
+        except Exception as e:
+            self.state = "failed"
+            logger.warning(f"缓存预热失败: {e}")
+        finally:
+            self.seconds = round(time.time() - start, 3)
+            if lock_file is not None:
+                lock_file.close()
+        logger.info(f"缓存预热结束: {self.status()}")
+
+    async def _warm(self):
+        """
+        统计高频问题，限速预热检索缓存与可选的回答缓存，最后统计覆盖率
+        """
+        agent_manager = self.registrar.get_component("agent_manager")
+        question_processor = self.registrar.get_component("question_processor")
+        knowledge_retriever = self.registrar.get_component("knowledge_retriever")
+
+        async def run_stage(stage: str, func, *args):
+            if agent_manager is None:
+                return func(*args)
+            return await agent_manager.run(stage, func, *args)
+
+        paths = recent_log_files(config.LOG_DIR, config.CACHE_WARMUP_LOG_DAYS)
+        records = await run_stage(STAGE_CPU, lambda: list(read_request_log(paths)))
+        questions = await run_stage(STAGE_CPU, top_questions, records, question_processor.process, config.CACHE_WARMUP_TOP_N)
+        plan = [(agent, key, question) for agent, items in questions.items() for key, _, question in items]
+        self.planned = len(plan)
+        logger.info(f"缓存预热：从{len(paths)}个日志文件的{len(records)}条请求中选出{self.planned}个高频问题")
+
+        interval = 1.0 / config.CACHE_WARMUP_RATE if config.CACHE_WARMUP_RATE > 0 else 0.0
+        for agent, key, question in plan:
+            started = time.monotonic()
+            try:
+                await self._warm_retrieval(run_stage, knowledge_retriever, agent, key)
+                if config.CACHE_WARMUP_ANSWERS and config.ANSWER_CACHE_ENABLED:
+                    await self._warm_answer(agent, question)
+                self.warmed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.debug(f"预热问题失败: [{agent}] {question}，{e}")
+            # 限速：按固定间隔发起，检索缓存已命中时同样计入，避免重启风暴时压垮推荐系统
+            await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+        # 预热集合包含最近一天的请求，直接统计覆盖率是样本内结果；用最近一天之前的请求选出高频问题，评估对最近一天的覆盖
+        since = time.time() - COVERAGE_WINDOW
+        self.coverage = await run_stage(STAGE_CPU, holdout_coverage, records, question_processor.process,
+                                        config.CACHE_WARMUP_TOP_N, since)
+
+    async def _warm_retrieval(self, run_stage, knowledge_retriever, agent: str, question: str):
+        """
+        预热一个问题的课程检索与前 RETRIEVAL_TOP_K 个课程下的报告检索（与线上处理流程的请求一致，
+        课程相似度低于阈值时线上不检索报告，也不预热）
+
+        Args:
+            run_stage: 阶段执行函数
+            knowledge_retriever: 知识检索器
+            agent (str): 智能体名称
+            question (str): 规范化后的问题
+        """
+        status, courses_data = await run_stage(STAGE_RETRIEVAL, knowledge_retriever.search_courses, question, config.RETRIEVAL_TOP_K)
+        if status != 200:
+            raise RuntimeError(f"课程检索状态码: {status}")
+        if courses_data and courses_data.get("data"):
+            courses = courses_data["data"][:max(1, config.RETRIEVAL_TOP_K)]
+            score_gate = self.registrar.get_component("score_gate")
+            if score_gate is not None and not score_gate.allow(agent, best_course_score(courses), record=False):
+                return
+            await asyncio.gather(*(run_stage(STAGE_RETRIEVAL, knowledge_retriever.search_reports, course["course_uuid"], question)
+                                   for course in courses))
+
+    async def _warm_answer(self, agent: str, question: str):
+        """
+        走线上处理流程生成回答并写入回答缓存
+
+        Args:
+            agent (str): 智能体名称
+            question (str): 该问题最常见的原始提问（回答缓存的键由线上流程规范化得到）
+        """
+        from app.schema.math_schema import ChatRequest
+        from app.router.shared_math_handler import handle_math_question
+
+        from agents.tool_agent.llm_dispatcher import is_error_answer
+
+        prompt_dir = os.path.join(config.PROJECT_ROOT, "agents", agent, "prompt")
+        if not os.path.isdir(prompt_dir):
+            return
+        prompt_paths = {
+            "knowledge": os.path.join(prompt_dir, "system_prompt_with_knowledge.txt"),
+            "fallback": os.path.join(prompt_dir, "system_fallback_prompt.txt"),
+        }
+        token = _warming.set(True)
+        start_request_timer()
+        try:
+            response = await handle_math_question(ChatRequest(user_question=question), prompt_paths, enforce_admission=False)
+        finally:
+            _warming.reset(token)
+        if not is_error_answer(response.answer):
+            self.answers += 1
+
+    @staticmethod
+    def _acquire_lock():
+        """
+        获取跨进程预热锁
+
+        Returns:
+            持有锁的文件对象；不支持文件锁时返回None；锁被其他worker持有时返回False
+        """
+        if fcntl is None:
+            return None
+        lock_file = open(f"{config.SHARED_CACHE_PATH}.warmup.lock", "a")
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        return lock_file
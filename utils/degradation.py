@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+负载自适应降级
+按近期上游等待耗时（检索+大模型首字）与线程池排队数计算负载压力，压力升高时逐级降级：
+跳过报告检索 -> 限制输出长度 -> 改用快速档模型 -> 只使用缓存与FAQ答案库回答；
+升级立即生效，降级恢复需压力低于进入阈值的一定比例并保持一段时间（迟滞），避免等级来回切换
+"""
+
+import time
+import logging
+import threading
+from collections import deque
+from contextvars import ContextVar
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+LEVEL_NORMAL = 0
+LEVEL_SKIP_REPORTS = 1
+LEVEL_CAP_TOKENS = 2
+LEVEL_FAST_MODEL = 3
+LEVEL_CACHE_ONLY = 4
+LEVEL_NAMES = ("normal", "skip_reports", "cap_tokens", "fast_model", "cache_only")
+
+# 请求开始时确定的降级等级，同一请求的各阶段与响应头使用同一等级
+_request_level: ContextVar[Optional[int]] = ContextVar("degradation_level", default=None)
+
+
+def parse_levels(text: str) -> List[float]:
+    """
+    解析各降级等级的进入阈值
+
+    Args:
+        text (str): 逗号分隔的4个阈值，如 "1,1.5,2,3"
+
+    Returns:
+        List[float]: 第1~4级的进入阈值
+
+    Raises:
+        ValueError: 数量不为4、不为正数或未递增
+    """
+    thresholds = [float(item) for item in text.split(",") if item.strip()]
+    if len(thresholds) != len(LEVEL_NAMES) - 1:
+        raise ValueError(f"降级阈值应为{len(LEVEL_NAMES) - 1}个: {text}")
+    if thresholds[0] <= 0 or any(later <= earlier for earlier, later in zip(thresholds, thresholds[1:])):
+        raise ValueError(f"降级阈值应为递增的正数: {text}")
+    return thresholds
+
+
+class DegradationController:
+    """
+    降级控制器，压力 = max(窗口内平均上游等待耗时 / 目标耗时, 线程池排队数 / 目标排队数)
+    等待耗时只取随负载增长的部分（检索与首字耗时），不含与回答长度相关的生成耗时
+    等级在读取时按间隔重新计算，线程安全
+    """
+
+    def __init__(self, thresholds: List[float], latency_target: float, queue_target: float,
+                 queue_depth: Callable[[], float], exit_ratio: float = 0.7, hold_seconds: float = 10.0,
+                 window_seconds: float = 10.0, min_samples: int = 3, interval: float = 1.0):
+        """
+        初始化降级控制器
+
+        Args:
+            thresholds (List[float]): 第1~4级的进入阈值（压力倍数）
+            latency_target (float): 上游等待耗时目标（秒）
+            queue_target (float): 排队数目标
+            queue_depth (Callable[[], float]): 获取当前排队数的函数
+            exit_ratio (float): 压力低于当前等级进入阈值的该比例时才可降一级
+            hold_seconds (float): 等级变更后至少保持的秒数，之后才可降级
+            window_seconds (float): 上游等待耗时样本的时间窗口（秒）
+            min_samples (int): 窗口内样本数达到该值才计入耗时压力
+            interval (float): 重新计算等级的最小间隔（秒）
+        """
+        self.thresholds = thresholds
+        self.latency_target = latency_target
+        self.queue_target = queue_target
+        self.queue_depth = queue_depth
+        self.exit_ratio = exit_ratio
+        self.hold_seconds = hold_seconds
+        self.window_seconds = window_seconds
+        self.min_samples = min_samples
+        self.interval = interval
+        self._samples: Deque[Tuple[float, float]] = deque()
+        self._level = LEVEL_NORMAL
+        self._changed_at = time.monotonic()
+        self._evaluated_at = 0.0
+        self._pressure = 0.0
+        self._latency = 0.0
+        self._queued = 0.0
+        self._transitions = 0
+        self._lock = threading.Lock()
+
+    def record(self, latency_seconds: float):
+        """
+        记录一个请求的上游等待耗时
+
+        Args:
+            latency_seconds (float): 课程/报告检索与大模型首字耗时之和（秒）
+        """
+        with self._lock:
+            self._samples.append((time.monotonic(), latency_seconds))
+
+    def level(self) -> int:
+        """
+        获取当前降级等级，距上次计算超过间隔时重新计算
+
+        Returns:
+            int: 降级等级（0~4）
+        """
+        now = time.monotonic()
+        with self._lock:
+            if now - self._evaluated_at >= self.interval:
+                self._evaluate(now)
+            return self._level
+
+    def begin_request(self) -> int:
+        """
+        在请求开始时确定本次请求的降级等级
+
+        Returns:
+            int: 降级等级
+        """
+        level = self.level()
+        _request_level.set(level)
+        return level
+
+    def current_level(self) -> int:
+        """
+        获取本次请求的降级等级，未经过begin_request（如WebSocket与后台请求）时使用当前等级
+
+        Returns:
+            int: 降级等级
+        """
+        level = _request_level.get()
+        return self.level() if level is None else level
+
+    def _evaluate(self, now: float):
+        self._evaluated_at = now
+        while self._samples and now - self._samples[0][0] > self.window_seconds:
+            self._samples.popleft()
+        # 样本过少（包括只用缓存回答、几乎不调用上游时）不计入耗时压力，排队压力仍然有效
+        if len(self._samples) >= self.min_samples:
+            self._latency = sum(seconds for _, seconds in self._samples) / len(self._samples)
+        else:
+            self._latency = 0.0
+        try:
+            self._queued = float(self.queue_depth())
+        except Exception as e:
+            logger.warning(f"获取排队数失败: {e}")
+            self._queued = 0.0
+        self._pressure = max(self._latency / self.latency_target, self._queued / self.queue_target)
+        target = sum(1 for threshold in self.thresholds if self._pressure >= threshold)
+        if target > self._level:
+            self._set_level(target, now)
+        elif (self._level > LEVEL_NORMAL and now - self._changed_at >= self.hold_seconds
+              and self._pressure < self.thresholds[self._level - 1] * self.exit_ratio):
+            # 逐级恢复
+            self._set_level(self._level - 1, now)
+
+    def _set_level(self, level: int, now: float):
+        logger.warning(f"降级等级变更: {LEVEL_NAMES[self._level]} -> {LEVEL_NAMES[level]}，"
+                       f"压力 {self._pressure:.2f}（上游等待耗时 {self._latency:.2f}秒，排队 {self._queued:.0f}）")
+        self._level = level
+        self._changed_at = now
+        self._transitions += 1
+
+    def stats(self) -> Dict[str, float]:
+        """
+        获取降级状态
+
+        Returns:
+            Dict[str, float]: 当前等级、压力、窗口内平均上游等待耗时、排队数、等级变更次数与当前等级持续秒数
+        """
+        level = self.level()
+        with self._lock:
+            return {
+                "level": level,
+                "pressure": round(self._pressure, 3),
+                "latency_seconds": round(self._latency, 3),
+                "queued": self._queued,
+                "transitions": self._transitions,
+                "level_seconds": round(time.monotonic() - self._changed_at, 1),
+            }
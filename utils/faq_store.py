@@ -0,0 +1,258 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+FAQ答案库
+离线预生成的常见问题回答，存储为只读mmap文件（开放寻址哈希索引 + 紧凑数据区），
+多个worker进程共享同一份页缓存；按智能体记录提示词指纹，提示词或模型变更后对应智能体的条目失效
+"""
+
+import os
+import mmap
+import time
+import glob
+import struct
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from utils.json_codec import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+# 文件头：魔数、版本、条目数、索引槽位数、元数据长度
+HEADER_FORMAT = "<8sIIII"
+HEADER_SIZE = 64
+MAGIC = b"AGFAQ001"
+VERSION = 1
+# 索引槽位：键哈希、数据偏移、数据长度（长度为0表示空槽位）
+INDEX_FORMAT = "<QQI"
+INDEX_SIZE = struct.calcsize(INDEX_FORMAT)
+# 文件变更检查间隔（秒），重新构建后各worker自动切换到新文件
+RELOAD_CHECK_INTERVAL = 30.0
+
+
+def faq_key(agent: str, processed_question: str) -> str:
+    """
+    构建答案库键
+
+    Args:
+        agent (str): 智能体名称
+        processed_question (str): 规范化后的问题
+
+    Returns:
+        str: 键
+    """
+    return f"{agent}:{processed_question}"
+
+
+def _hash(key: str) -> int:
+    """
+    计算64位键哈希（跨进程稳定）
+
+    Args:
+        key (str): 键
+
+    Returns:
+        int: 64位哈希值
+    """
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def prompt_fingerprint(prompt_dir: str, model: str) -> str:
+    """
+    计算智能体提示词指纹：提示词目录下所有模板的内容与大模型名称
+
+    Args:
+        prompt_dir (str): 智能体提示词目录（agents/<agent>/prompt）
+        model (str): 大模型名称
+
+    Returns:
+        str: 十六进制指纹
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(model.encode("utf-8"))
+    for file_path in sorted(glob.glob(os.path.join(prompt_dir, "*.txt"))):
+        digest.update(os.path.basename(file_path).encode("utf-8"))
+        with open(file_path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def build_faq_store(path: str, entries: Iterable[Tuple[str, str, Dict[str, Any]]], fingerprints: Dict[str, str]) -> int:
+    """
+    构建答案库文件，先写临时文件再原子替换，运行中的worker不会读到半写的文件
+
+    Args:
+        path (str): 答案库文件路径
+        entries (Iterable[Tuple[str, str, Dict[str, Any]]]): (智能体, 规范化后的问题, {"answer", "related_knowledge"})
+        fingerprints (Dict[str, str]): 智能体 -> 构建时的提示词指纹
+
+    Returns:
+        int: 写入的条目数
+    """
+    records = {}
+    for agent, question, value in entries:
+        key = faq_key(agent, question)
+        records[key] = dumps({"key": key, "answer": value["answer"], "related_knowledge": value["related_knowledge"]})
+    metadata = dumps({"fingerprints": fingerprints, "built_at": time.time()})
+    # 槽位数取不小于条目数2倍的2的幂，负载因子不超过0.5
+    slots = 1
+    while slots < max(len(records) * 2, 8):
+        slots *= 2
+    index = bytearray(slots * INDEX_SIZE)
+    data = bytearray()
+    data_start = HEADER_SIZE + len(metadata) + slots * INDEX_SIZE
+    for key, record in records.items():
+        slot = _hash(key) & (slots - 1)
+        while struct.unpack_from(INDEX_FORMAT, index, slot * INDEX_SIZE)[2] != 0:
+            slot = (slot + 1) & (slots - 1)
+        struct.pack_into(INDEX_FORMAT, index, slot * INDEX_SIZE, _hash(key), data_start + len(data), len(record))
+        data += record
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        header = struct.pack(HEADER_FORMAT, MAGIC, VERSION, len(records), slots, len(metadata))
+        f.write(header.ljust(HEADER_SIZE, b"\0"))
+        f.write(metadata)
+        f.write(index)
+        f.write(data)
+    os.replace(temp_path, path)
+    return len(records)
+
+
+class FaqStore:
+    """
+    只读答案库，查询只读取一个索引槽位和一条记录，无锁
+    """
+
+    def __init__(self, path: str, current_fingerprints: Dict[str, str]):
+        """
+        初始化答案库
+
+        Args:
+            path (str): 答案库文件路径
+            current_fingerprints (Dict[str, str]): 智能体 -> 当前提示词指纹，与构建时不一致的智能体不提供答案
+        """
+        self.path = path
+        self.current_fingerprints = current_fingerprints
+        self.hits = 0
+        self.misses = 0
+        self.entries = 0
+        self.slots = 0
+        self.built_at: Optional[float] = None
+        self.active_agents: set = set()
+        self.stale_agents: set = set()
+        self._mm: Optional[mmap.mmap] = None
+        self._metadata_length = 0
+        self._file_id: Optional[Tuple[int, int]] = None
+        self._next_check = time.monotonic() + RELOAD_CHECK_INTERVAL
+        self._lock = threading.Lock()
+        self._open()
+
+    def get(self, agent: str, processed_question: str) -> Optional[Dict[str, Any]]:
+        """
+        查询预生成的回答
+
+        Args:
+            agent (str): 智能体名称
+            processed_question (str): 规范化后的问题
+
+        Returns:
+            Optional[Dict[str, Any]]: 包含answer和related_knowledge的字典，未命中或智能体条目已失效时返回None
+        """
+        self._maybe_reload()
+        mm = self._mm
+        if mm is None or agent not in self.active_agents:
+            return None
+        key = faq_key(agent, processed_question)
+        key_hash = _hash(key)
+        slot = key_hash & (self.slots - 1)
+        index_start = HEADER_SIZE + self._metadata_length
+        for _ in range(self.slots):
+            slot_hash, offset, length = struct.unpack_from(INDEX_FORMAT, mm, index_start + slot * INDEX_SIZE)
+            if length == 0:
+                break
+            if slot_hash == key_hash:
+                record = loads(mm[offset:offset + length])
+                if record["key"] == key:
+                    self.hits += 1
+                    return {"answer": record["answer"], "related_knowledge": record["related_knowledge"]}
+            slot = (slot + 1) & (self.slots - 1)
+        self.misses += 1
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取答案库统计
+
+        Returns:
+            Dict[str, Any]: 条目数、可用/失效智能体数、当前进程的命中统计
+        """
+        total = self.hits + self.misses
+        return {
+            "entries": self.entries,
+            "active_agents": len(self.active_agents),
+            "stale_agents": len(self.stale_agents),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    def close(self):
+        """
+        关闭mmap
+        """
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    def _open(self):
+        """
+        打开答案库文件并校验文件头与提示词指纹，文件不存在或格式不符时不提供答案
+        """
+        try:
+            with open(self.path, "rb") as f:
+                stat = os.fstat(f.fileno())
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            logger.info(f"FAQ答案库不可用: {self.path}，{e}")
+            self._file_id = None
+            return
+        magic, version, entries, slots, metadata_length = struct.unpack_from(HEADER_FORMAT, mm, 0)
+        if magic != MAGIC or version != VERSION:
+            logger.warning(f"FAQ答案库格式不符，已忽略: {self.path}")
+            mm.close()
+            return
+        metadata = loads(mm[HEADER_SIZE:HEADER_SIZE + metadata_length])
+        built = metadata.get("fingerprints", {})
+        self.active_agents = {agent for agent, fingerprint in built.items()
+                              if self.current_fingerprints.get(agent) == fingerprint}
+        self.stale_agents = set(built) - self.active_agents
+        if self.stale_agents:
+            logger.warning(f"FAQ答案库中以下智能体的提示词或模型已变更，条目失效，请重新构建: {sorted(self.stale_agents)}")
+        # 旧映射不主动关闭，由垃圾回收释放，避免其他线程正在读取时失效
+        self._metadata_length = metadata_length
+        self.entries, self.slots, self.built_at = entries, slots, metadata.get("built_at")
+        self._mm = mm
+        self._file_id = (stat.st_dev, stat.st_ino)
+        logger.info(f"加载FAQ答案库: {self.path}，条目数: {entries}，可用智能体: {sorted(self.active_agents)}")
+
+    def _maybe_reload(self):
+        """
+        定期检查文件是否被重新构建（原子替换后inode变化），是则重新映射
+        """
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        with self._lock:
+            if now < self._next_check:
+                return
+            self._next_check = now + RELOAD_CHECK_INTERVAL
+            try:
+                stat = os.stat(self.path)
+            except OSError:
+                return
+            if (stat.st_dev, stat.st_ino) != self._file_id:
+                self._open()
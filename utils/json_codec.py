@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+JSON编解码
+优先使用orjson（可选依赖），未安装时回退到标准库json；统一输出不转义中文的UTF-8，
+并提供跳过response_model二次校验的JSON响应类
+"""
+
+import json
+from typing import Any
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # 未安装orjson时使用标准库
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    """
+    序列化非原生类型，支持pydantic模型（含construct构建的模型）
+
+    Args:
+        obj (Any): 待序列化对象
+
+    Returns:
+        Any: 可序列化的对象
+
+    Raises:
+        TypeError: 不支持的类型
+    """
+    if hasattr(obj, "dict"):
+        return obj.dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    序列化为UTF-8编码的JSON字节串，中文不转义
+
+    Args:
+        obj (Any): 待序列化对象
+
+    Returns:
+        bytes: JSON字节串
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+def dumps_str(obj: Any) -> str:
+    """
+    序列化为JSON字符串，中文不转义
+
+    Args:
+        obj (Any): 待序列化对象
+
+    Returns:
+        str: JSON字符串
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_default)
+
+
+def loads(data: Any) -> Any:
+    """
+    反序列化JSON
+
+    Args:
+        data (Any): JSON字节串或字符串
+
+    Returns:
+        Any: 反序列化结果
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONResponse(Response):
+    """
+    直接序列化服务端构建的响应，路由返回该类型时FastAPI不再按response_model重新校验和编码
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,279 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+异步日志管道
+请求路径上只把日志记录放入队列，由后台线程完成格式化与写文件；支持JSON结构化输出、
+按请求采样记录大字段（课程数据、报告数据、完整回答）并截断，以及按自然日切换日志文件
+"""
+
+import os
+import glob
+import json
+import time
+import queue
+import random
+import logging
+import datetime
+import logging.handlers
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, TextIO
+
+from core.conf import config
+
+# 结构化日志的附加字段放在LogRecord的该属性中
+FIELDS_ATTR = "fields"
+_payload_sampled: ContextVar[bool] = ContextVar("log_payload_sampled", default=False)
+summary_logger = logging.getLogger("request.summary")
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    单行JSON日志格式，附加字段平铺到顶层
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        """
+        格式化日志记录
+
+        Args:
+            record (logging.LogRecord): 日志记录
+
+        Returns:
+            str: 单行JSON
+        """
+        entry: Dict[str, Any] = {
+            "ts": datetime.datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "location": f"{record.filename}:{record.lineno}",
+            "message": record.getMessage(),
+        }
+        fields = getattr(record, FIELDS_ATTR, None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """
+    沿用原有文本格式，附加字段以key=value追加在消息后
+    """
+
+    def __init__(self):
+        super().__init__('%(asctime)s - %(name)s - %(filename)s:%(lineno)d - %(levelname)s - %(message)s')
+
+    def format(self, record: logging.LogRecord) -> str:
+        """
+        格式化日志记录
+
+        Args:
+            record (logging.LogRecord): 日志记录
+
+        Returns:
+            str: 文本日志
+        """
+        text = super().format(record)
+        fields = getattr(record, FIELDS_ATTR, None)
+        if fields:
+            text += " | " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return text
+
+
+class DailyFileHandler(logging.handlers.TimedRotatingFileHandler):
+    """
+    每天零点切换到新的 agent_YYYYMMDD.log 文件，日期在写入时计算，而不是导入时固定
+    """
+
+    def __init__(self, log_dir: str, prefix: str = "agent", backup_days: int = 30):
+        """
+        初始化按日切换的文件处理器
+
+        Args:
+            log_dir (str): 日志目录
+            prefix (str): 日志文件名前缀
+            backup_days (int): 保留的日志天数，0表示不清理
+        """
+        self.log_dir = log_dir
+        self.prefix = prefix
+        os.makedirs(log_dir, exist_ok=True)
+        super().__init__(self._path_for(time.time()), when="midnight", backupCount=backup_days, encoding="utf-8")
+
+    def _path_for(self, timestamp: float) -> str:
+        """
+        获取指定时间对应的日志文件路径
+
+        Args:
+            timestamp (float): 时间戳
+
+        Returns:
+            str: 日志文件路径
+        """
+        day = datetime.datetime.fromtimestamp(timestamp).strftime("%Y%m%d")
+        return os.path.join(self.log_dir, f"{self.prefix}_{day}.log")
+
+    def doRollover(self):
+        """
+        关闭当天的文件并打开新一天的文件，按保留天数清理旧文件
+        """
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        now = time.time()
+        self.baseFilename = self._path_for(now)
+        self.stream = self._open()
+        self.rolloverAt = self.computeRollover(int(now))
+        if self.backupCount > 0:
+            files = sorted(glob.glob(os.path.join(self.log_dir, f"{self.prefix}_[0-9]*.log")))
+            for path in files[:-self.backupCount]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    队列已满时丢弃日志而不是阻塞请求，并统计丢弃数量
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        仅合并消息参数，异常堆栈交给后台线程格式化
+
+        Args:
+            record (logging.LogRecord): 日志记录
+
+        Returns:
+            logging.LogRecord: 可跨线程传递的日志记录
+        """
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+class LogPipeline:
+    """
+    日志管道，持有队列监听线程
+    """
+
+    def __init__(self, handler: DroppingQueueHandler, listener: logging.handlers.QueueListener):
+        self.handler = handler
+        self.listener = listener
+
+    def stats(self) -> Dict[str, int]:
+        """
+        获取日志队列状态
+
+        Returns:
+            Dict[str, int]: 队列积压数与丢弃数
+        """
+        return {"queued": self.handler.queue.qsize(), "dropped": self.handler.dropped}
+
+    def stop(self):
+        """
+        写出队列中剩余的日志并停止后台线程
+        """
+        self.listener.stop()
+
+
+def setup_logging(stream: Optional[TextIO] = None) -> LogPipeline:
+    """
+    配置根日志器：请求路径只入队，后台线程写文件与控制台
+
+    Args:
+        stream (Optional[TextIO]): 控制台输出流，默认为sys.stderr
+
+    Returns:
+        LogPipeline: 日志管道，关闭服务时调用stop
+    """
+    formatter = JsonFormatter() if config.LOG_FORMAT == "json" else TextFormatter()
+    file_handler = DailyFileHandler(config.LOG_DIR, backup_days=config.LOG_BACKUP_DAYS)
+    stream_handler = logging.StreamHandler(stream)
+    for handler in (file_handler, stream_handler):
+        handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(maxsize=config.LOG_QUEUE_SIZE)
+    queue_handler = DroppingQueueHandler(log_queue)
+    listener = logging.handlers.QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(config.LOG_LEVEL)
+    listener.start()
+    return LogPipeline(queue_handler, listener)
+
+
+def begin_request_logging():
+    """
+    在请求开始时决定本次请求是否采样记录大字段
+    """
+    _payload_sampled.set(random.random() < config.LOG_PAYLOAD_SAMPLE_RATE)
+
+
+def truncate(value: Any, limit: Optional[int] = None) -> str:
+    """
+    将任意值转为字符串并截断
+
+    Args:
+        value (Any): 要记录的值
+        limit (Optional[int]): 最大字符数，默认使用LOG_PAYLOAD_MAX_CHARS
+
+    Returns:
+        str: 截断后的字符串
+    """
+    limit = config.LOG_PAYLOAD_MAX_CHARS if limit is None else limit
+    text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, default=str)
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}...(共{len(text)}字符)"
+
+
+def log_payload(logger: logging.Logger, message: str, payload: Any):
+    """
+    记录大字段（检索结果、完整回答），仅在本次请求被采样时写入且内容被截断
+
+    Args:
+        logger (logging.Logger): 日志器
+        message (str): 日志消息
+        payload (Any): 大字段内容
+    """
+    if _payload_sampled.get() and logger.isEnabledFor(logging.INFO):
+        logger.info(message, extra={FIELDS_ATTR: {"payload": truncate(payload)}})
+
+
+def log_request_summary(agent: str, branch: str, question: str, durations: Dict[str, float], **fields: Any):
+    """
+    每个请求输出一条汇总日志
+
+    Args:
+        agent (str): 智能体名称
+        branch (str): 分支（knowledge/fallback/cache）
+        question (str): 用户问题
+        durations (Dict[str, float]): 各阶段耗时（秒）
+        **fields: 其他附加字段
+    """
+    if not summary_logger.isEnabledFor(logging.INFO):
+        return
+    summary = {
+        "agent": agent,
+        "branch": branch,
+        "question": truncate(question, 200),
+        "durations_ms": {name: round(seconds * 1000, 1) for name, seconds in durations.items()},
+        **fields,
+    }
+    summary_logger.info("请求完成", extra={FIELDS_ATTR: summary})
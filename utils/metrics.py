@@ -0,0 +1,276 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+性能指标
+按阶段记录耗时直方图（标签：阶段、智能体、分支），以Prometheus文本格式导出，并生成Server-Timing响应头
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+
+# 默认直方图分桶（秒），覆盖毫秒级本地阶段到数十秒的大模型生成
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40)
+
+
+def _escape(value: str) -> str:
+    """
+    转义Prometheus标签值
+
+    Args:
+        value (str): 标签值
+
+    Returns:
+        str: 转义后的标签值
+    """
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    """
+    格式化标签
+
+    Args:
+        labels (Tuple[Tuple[str, str], ...]): 标签键值对
+
+    Returns:
+        str: Prometheus标签字符串
+    """
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels) + "}"
+
+
+class Histogram:
+    """
+    带标签的直方图
+    """
+
+    def __init__(self, name: str, documentation: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        初始化直方图
+
+        Args:
+            name (str): 指标名称
+            documentation (str): 指标说明
+            buckets (Tuple[float, ...]): 分桶上界
+        """
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # 标签 -> [各分桶计数..., 总和, 总数]
+        self._series: Dict[Tuple[Tuple[str, str], ...], List[float]] = {}
+
+    def observe(self, value: float, **labels: str):
+        """
+        记录一次观测值
+
+        Args:
+            value (float): 观测值（秒）
+            **labels: 标签
+        """
+        key = tuple(sorted(labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = [0.0] * (len(self.buckets) + 2)
+                self._series[key] = series
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        """
+        以Prometheus文本格式输出
+
+        Returns:
+            List[str]: 指标行
+        """
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {key: list(series) for key, series in self._series.items()}
+        for key, series in sorted(snapshot.items()):
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', repr(float(bound))),))} {int(cumulative)}")
+            lines.append(f"{self.name}_bucket{_format_labels(key + (('le', '+Inf'),))} {int(series[-1])}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {series[-2]:.6f}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {int(series[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    指标注册表，包含直方图与在导出时计算的仪表盘指标
+    """
+
+    def __init__(self):
+        """
+        初始化指标注册表
+        """
+        self._histograms: Dict[str, Histogram] = {}
+        self._gauges: Dict[str, Tuple[str, Callable[[], Dict[Tuple[Tuple[str, str], ...], float]]]] = {}
+
+    def histogram(self, name: str, documentation: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        """
+        获取或创建直方图
+
+        Args:
+            name (str): 指标名称
+            documentation (str): 指标说明
+            buckets (Tuple[float, ...]): 分桶上界
+
+        Returns:
+            Histogram: 直方图
+        """
+        if name not in self._histograms:
+            self._histograms[name] = Histogram(name, documentation, buckets)
+        return self._histograms[name]
+
+    def gauge(self, name: str, documentation: str, collect: Callable[[], Dict[Tuple[Tuple[str, str], ...], float]]):
+        """
+        注册仪表盘指标，导出时调用collect获取当前值
+
+        Args:
+            name (str): 指标名称
+            documentation (str): 指标说明
+            collect (Callable): 返回 {标签元组: 数值} 的函数
+        """
+        self._gauges[name] = (documentation, collect)
+
+    def render(self) -> str:
+        """
+        以Prometheus文本格式导出全部指标
+
+        Returns:
+            str: 指标文本
+        """
+        lines: List[str] = []
+        for histogram in self._histograms.values():
+            lines.extend(histogram.render())
+        for name, (documentation, collect) in self._gauges.items():
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} gauge")
+            for key, value in sorted(collect().items()):
+                lines.append(f"{name}{_format_labels(key)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+# 全局指标注册表
+metrics = MetricsRegistry()
+STAGE_DURATION = metrics.histogram(
+    "agent_stage_duration_seconds",
+    "Duration of each pipeline stage by agent and branch (knowledge/fallback/cache)"
+)
+
+
+class RequestTimer:
+    """
+    单个请求的阶段计时器，请求结束时写入直方图并生成Server-Timing头
+    """
+
+    def __init__(self):
+        """
+        初始化计时器
+        """
+        self.started_at = time.perf_counter()
+        self.durations: Dict[str, float] = {}
+        self.agent = ""
+        self.branch = ""
+        self.finished = False
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        计时一个阶段
+
+        Args:
+            name (str): 阶段名称
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, seconds: float):
+        """
+        累加阶段耗时
+
+        Args:
+            name (str): 阶段名称
+            seconds (float): 耗时（秒）
+        """
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def finish(self, agent: str, branch: str):
+        """
+        请求结束，按智能体和分支写入直方图
+
+        Args:
+            agent (str): 智能体名称
+            branch (str): 分支（knowledge/fallback/cache）
+        """
+        if self.finished:
+            return
+        self.finished = True
+        self.agent, self.branch = agent, branch
+        self.durations["total"] = time.perf_counter() - self.started_at
+        for name, seconds in self.durations.items():
+            STAGE_DURATION.observe(seconds, stage=name, agent=agent, branch=branch)
+
+    def observe_late(self, name: str, seconds: float):
+        """
+        请求结束后补充记录的阶段（如SSE写出耗时）
+
+        Args:
+            name (str): 阶段名称
+            seconds (float): 耗时（秒）
+        """
+        self.record(name, seconds)
+        if self.finished:
+            STAGE_DURATION.observe(seconds, stage=name, agent=self.agent, branch=self.branch)
+
+    def server_timing(self) -> str:
+        """
+        生成Server-Timing响应头的值
+
+        Returns:
+            str: 形如 "course_search;dur=12.3, total;dur=850.0" 的字符串
+        """
+        return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.durations.items())
+
+
+_current_timer: ContextVar[Optional[RequestTimer]] = ContextVar("request_timer", default=None)
+
+
+def start_request_timer() -> RequestTimer:
+    """
+    为当前请求上下文创建计时器
+
+    Returns:
+        RequestTimer: 新建的计时器
+    """
+    timer = RequestTimer()
+    _current_timer.set(timer)
+    return timer
+
+
+def current_timer() -> RequestTimer:
+    """
+    获取当前请求上下文的计时器，不存在时新建一个
+
+    Returns:
+        RequestTimer: 计时器
+    """
+    timer = _current_timer.get()
+    if timer is None:
+        timer = start_request_timer()
+    return timer
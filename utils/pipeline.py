@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+分阶段处理流水线
+各阶段声明依赖，依赖完成后立即并发执行（互不依赖的阶段可重叠，如提示词模板加载与检索），
+阶段执行被钩子包裹（计时、缓存），阶段通过上下文按顺序发出事件，同步接口与SSE接口只是同一事件流的适配器
+"""
+
+import asyncio
+import logging
+from functools import partial
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from utils.metrics import RequestTimer
+
+logger = logging.getLogger(__name__)
+
+# 队列中的内部标记：全部阶段结束 / 某阶段失败
+_DONE = object()
+_FAILED = object()
+
+
+class PipelineContext:
+    """
+    单次运行的上下文，阶段之间通过上下文属性与results传递数据
+    """
+
+    def __init__(self, timer: Optional[RequestTimer] = None):
+        """
+        初始化上下文
+
+        Args:
+            timer (Optional[RequestTimer]): 请求计时器，供计时钩子使用
+        """
+        self.timer = timer
+        self.results: Dict[str, Any] = {}
+        self.stopped = False
+        self._events: Optional[asyncio.Queue] = None
+
+    def emit(self, event_type: str, data: Any = None):
+        """
+        发出事件，按发出顺序交给适配器
+
+        Args:
+            event_type (str): 事件类型
+            data (Any): 事件数据
+        """
+        self._events.put_nowait((event_type, data))
+
+    def stop(self):
+        """
+        停止运行，尚未开始的阶段全部跳过
+        """
+        self.stopped = True
+
+
+class Stage:
+    """
+    流水线阶段声明
+    """
+    __slots__ = ("name", "func", "deps", "when", "timer", "cache_key", "cache_if")
+
+    def __init__(self, name: str, func: Callable[[PipelineContext], Awaitable[Any]], deps: Sequence[str] = (),
+                 when: Optional[Callable[[PipelineContext], bool]] = None, timer: Optional[str] = None,
+                 cache_key: Optional[Callable[[PipelineContext], Optional[str]]] = None,
+                 cache_if: Optional[Callable[[Any], bool]] = None):
+        """
+        初始化阶段
+
+        Args:
+            name (str): 阶段名称
+            func (Callable): 阶段函数，接收上下文，返回值写入 ctx.results[name]
+            deps (Sequence[str]): 依赖的阶段名称（须在本阶段之前声明）
+            when (Optional[Callable]): 依赖完成后判断是否执行，返回False时跳过
+            timer (Optional[str]): 计时钩子记录的阶段耗时名称
+            cache_key (Optional[Callable]): 缓存钩子使用的缓存键，返回None时不缓存；使用缓存的阶段函数不应有副作用
+            cache_if (Optional[Callable]): 判断返回值是否写入缓存
+        """
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.when = when
+        self.timer = timer
+        self.cache_key = cache_key
+        self.cache_if = cache_if
+
+
+class PipelineHook:
+    """
+    阶段钩子基类，around包裹阶段执行；消费方关闭或其他阶段失败导致取消时，CancelledError会经过around抛出
+    """
+
+    async def around(self, ctx: PipelineContext, stage: Stage, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        包裹一次阶段执行
+
+        Args:
+            ctx (PipelineContext): 上下文
+            stage (Stage): 阶段
+            call (Callable): 执行阶段（及内层钩子）的函数
+
+        Returns:
+            Any: 阶段返回值
+        """
+        return await call()
+
+
+class TimingHook(PipelineHook):
+    """
+    按阶段声明的timer名称记录耗时
+    """
+
+    async def around(self, ctx: PipelineContext, stage: Stage, call: Callable[[], Awaitable[Any]]) -> Any:
+        if stage.timer is None or ctx.timer is None:
+            return await call()
+        with ctx.timer.stage(stage.timer):
+            return await call()
+
+
+class CacheHook(PipelineHook):
+    """
+    使用共享缓存保存阶段返回值，命中时跳过阶段函数
+    """
+
+    def __init__(self, get_cache: Callable[[], Any], ttl: float,
+                 run_io: Optional[Callable[..., Awaitable[Any]]] = None):
+        """
+        初始化缓存钩子
+
+        Args:
+            get_cache (Callable[[], Any]): 获取共享缓存的函数（缓存未注册时返回None）
+            ttl (float): 过期时间（秒）
+            run_io (Optional[Callable]): 执行缓存读写的协程函数 run_io(func, *args)，缓存读写可能阻塞时用于放到线程池，
+                为None时直接调用
+        """
+        self.get_cache = get_cache
+        self.ttl = ttl
+        self.run_io = run_io
+
+    async def around(self, ctx: PipelineContext, stage: Stage, call: Callable[[], Awaitable[Any]]) -> Any:
+        cache = self.get_cache()
+        key = stage.cache_key(ctx) if stage.cache_key is not None and cache is not None else None
+        if key is None:
+            return await call()
+        key = f"stage:{stage.name}:{key}"
+        cached = await self._io(cache.get, key)
+        if cached is not None:
+            logger.debug(f"阶段缓存命中: {key}")
+            return cached
+        result = await call()
+        if stage.cache_if is None or stage.cache_if(result):
+            await self._io(cache.set, key, result, self.ttl)
+        return result
+
+    async def _io(self, func: Callable, *args: Any) -> Any:
+        if self.run_io is None:
+            return func(*args)
+        return await self.run_io(func, *args)
+
+
+class Pipeline:
+    """
+    分阶段流水线，每次run为每个阶段创建一个任务，任务等待依赖完成后执行
+    """
+
+    def __init__(self, stages: List[Stage], hooks: Sequence[PipelineHook] = ()):
+        """
+        初始化流水线
+
+        Args:
+            stages (List[Stage]): 阶段，按依赖顺序声明
+            hooks (Sequence[PipelineHook]): 钩子，第一个在最外层
+
+        Raises:
+            ValueError: 阶段重名或依赖未在之前声明
+        """
+        declared = set()
+        for stage in stages:
+            if stage.name in declared:
+                raise ValueError(f"阶段重名: {stage.name}")
+            missing = [dep for dep in stage.deps if dep not in declared]
+            if missing:
+                raise ValueError(f"阶段 {stage.name} 的依赖未在之前声明: {missing}")
+            declared.add(stage.name)
+        self.stages = stages
+        self.hooks = list(hooks)
+
+    async def run(self, ctx: PipelineContext) -> AsyncGenerator[Tuple[str, Any], None]:
+        """
+        运行流水线并按顺序产出阶段发出的事件；生成器关闭（如客户端断开）时取消仍在执行的阶段
+
+        Args:
+            ctx (PipelineContext): 上下文
+
+        Yields:
+            Tuple[str, Any]: (事件类型, 事件数据)
+
+        Raises:
+            Exception: 某阶段抛出的第一个异常，此时其余阶段被取消
+        """
+        ctx._events = asyncio.Queue()
+        tasks: Dict[str, asyncio.Task] = {}
+        pending = [len(self.stages)]
+        for stage in self.stages:
+            tasks[stage.name] = asyncio.ensure_future(
+                self._run_stage(ctx, stage, [tasks[dep] for dep in stage.deps], pending))
+        try:
+            while True:
+                event = await ctx._events.get()
+                if event is _DONE:
+                    return
+                if event[0] is _FAILED:
+                    raise event[1]
+                yield event
+        finally:
+            unfinished = [task for task in tasks.values() if not task.done()]
+            for task in unfinished:
+                task.cancel()
+            if unfinished:
+                logger.debug(f"流水线结束，取消未完成的阶段: {[name for name, task in tasks.items() if task in unfinished]}")
+                await asyncio.gather(*unfinished, return_exceptions=True)
+
+    async def _run_stage(self, ctx: PipelineContext, stage: Stage, deps: List[asyncio.Task], pending: List[int]) -> bool:
+        """
+        等待依赖后执行阶段
+
+        Returns:
+            bool: 阶段是否成功（跳过视为成功；依赖失败时不执行并返回False）
+        """
+        try:
+            ok = True
+            for dep in deps:
+                ok = await dep and ok
+            if not ok or ctx.stopped or (stage.when is not None and not stage.when(ctx)):
+                return ok
+            call = partial(stage.func, ctx)
+            for hook in reversed(self.hooks):
+                call = partial(hook.around, ctx, stage, call)
+            ctx.results[stage.name] = await call()
+            return True
+        except Exception as e:
+            ctx._events.put_nowait((_FAILED, e))
+            return False
+        finally:
+            pending[0] -= 1
+            if pending[0] == 0:
+                ctx._events.put_nowait(_DONE)
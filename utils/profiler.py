@@ -0,0 +1,388 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+按需性能剖析
+对指定路由的后续N个请求执行cProfile或栈采样剖析，以及启停tracemalloc查看内存分配热点；
+未开启时请求路径上只有一次属性判断
+"""
+
+import io
+import os
+import sys
+import time
+import cProfile
+import pstats
+import marshal
+import threading
+import tracemalloc
+from collections import Counter
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+MODE_CPROFILE = "cprofile"
+MODE_SAMPLING = "sampling"
+# 栈顶位于这些模块时视为线程空闲等待（含线程池worker阻塞在任务队列上），采样时跳过
+_IDLE_MODULES = ("threading.py", "queue.py", "thread.py", "selectors.py", "socket.py", "ssl.py")
+
+
+class StackSampler:
+    """
+    后台线程定期采集所有线程的调用栈，按折叠栈格式（collapsed stack）计数
+    """
+
+    def __init__(self, interval: float = 0.005):
+        """
+        初始化栈采样器
+
+        Args:
+            interval (float): 采样间隔（秒）
+        """
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """
+        启动采样线程
+        """
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        停止采样线程
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def collapsed(self) -> str:
+        """
+        输出折叠栈文本，可直接用于flamegraph.pl或speedscope
+
+        Returns:
+            str: 每行"帧1;帧2;...;帧N 次数"
+        """
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def _run(self):
+        """
+        采样循环
+        """
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or os.path.basename(frame.f_code.co_filename) in _IDLE_MODULES:
+                    continue
+                frames = []
+                while frame is not None:
+                    code = frame.f_code
+                    frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                frames.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(frames))] += 1
+            self.samples += 1
+
+
+class ProfileSession:
+    """
+    一次剖析任务：对匹配路径的后续N个请求计时剖析
+    """
+
+    def __init__(self, path_prefix: str, requests: int, mode: str, interval: float):
+        """
+        初始化剖析任务
+
+        Args:
+            path_prefix (str): 要剖析的请求路径前缀
+            requests (int): 要剖析的请求数
+            mode (str): 剖析方式（cprofile/sampling）
+            interval (float): 采样间隔（秒），仅sampling方式使用
+        """
+        self.path_prefix = path_prefix
+        self.requests = requests
+        self.mode = mode
+        self.remaining = requests
+        self.active = 0
+        self.completed = 0
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.profile = cProfile.Profile() if mode == MODE_CPROFILE else None
+        self.sampler = StackSampler(interval) if mode == MODE_SAMPLING else None
+
+    @property
+    def done(self) -> bool:
+        return self.finished_at is not None
+
+    def status(self) -> Dict[str, Any]:
+        """
+        获取剖析任务状态
+
+        Returns:
+            Dict[str, Any]: 剖析任务状态
+        """
+        status = {
+            "pid": os.getpid(),
+            "path_prefix": self.path_prefix,
+            "mode": self.mode,
+            "requests": self.requests,
+            "completed": self.completed,
+            "active": self.active,
+            "done": self.done,
+            "created_at": self.created_at,
+        }
+        if self.started_at is not None:
+            status["elapsed_seconds"] = round((self.finished_at or time.time()) - self.started_at, 3)
+        if self.sampler is not None:
+            status["samples"] = self.sampler.samples
+        return status
+
+
+class RequestProfiler:
+    """
+    请求剖析器，同一时间只允许一个剖析任务
+    cProfile方式剖析事件循环线程（含协程内的同步代码）；阶段线程池中的阻塞调用请使用sampling方式
+    """
+
+    def __init__(self):
+        """
+        初始化请求剖析器
+        """
+        self.session: Optional[ProfileSession] = None
+        self._lock = threading.Lock()
+
+    def start(self, path_prefix: str, requests: int, mode: str = MODE_CPROFILE, interval: float = 0.005) -> Dict[str, Any]:
+        """
+        开始剖析匹配路径的后续N个请求
+
+        Args:
+            path_prefix (str): 请求路径前缀
+            requests (int): 要剖析的请求数
+            mode (str): 剖析方式（cprofile/sampling）
+            interval (float): 采样间隔（秒）
+
+        Returns:
+            Dict[str, Any]: 剖析任务状态
+
+        Raises:
+            ValueError: 参数不合法
+            RuntimeError: 已有未完成的剖析任务
+        """
+        if mode not in (MODE_CPROFILE, MODE_SAMPLING):
+            raise ValueError(f"不支持的剖析方式: {mode}")
+        if requests <= 0:
+            raise ValueError("剖析的请求数必须大于0")
+        with self._lock:
+            if self.session is not None and not self.session.done:
+                raise RuntimeError("已有进行中的剖析任务")
+            self.session = ProfileSession(path_prefix, requests, mode, interval)
+            return self.session.status()
+
+    def cancel(self) -> Optional[Dict[str, Any]]:
+        """
+        结束当前剖析任务，已采集的数据保留
+
+        Returns:
+            Optional[Dict[str, Any]]: 剖析任务状态，无任务时返回None
+        """
+        with self._lock:
+            session = self.session
+            if session is None:
+                return None
+            session.remaining = 0
+            if not session.done:
+                self._finish(session)
+            return session.status()
+
+    def should_profile(self, path: str) -> bool:
+        """
+        判断请求是否需要剖析，并预占一个名额
+
+        Args:
+            path (str): 请求路径
+
+        Returns:
+            bool: 是否剖析该请求
+        """
+        session = self.session
+        if session is None or session.remaining <= 0 or not path.startswith(session.path_prefix):
+            return False
+        with self._lock:
+            if session.remaining <= 0:
+                return False
+            session.remaining -= 1
+            if session.active == 0 and session.started_at is None:
+                session.started_at = time.time()
+                if session.profile is not None:
+                    session.profile.enable()
+                else:
+                    session.sampler.start()
+            session.active += 1
+            return True
+
+    def request_finished(self):
+        """
+        被剖析的请求结束（流式响应在最后一帧发送后），全部完成时停止剖析
+        """
+        with self._lock:
+            session = self.session
+            if session is None or session.done:
+                return
+            session.active -= 1
+            session.completed += 1
+            if session.remaining <= 0 and session.active <= 0:
+                self._finish(session)
+
+    def status(self) -> Optional[Dict[str, Any]]:
+        """
+        获取当前剖析任务状态
+
+        Returns:
+            Optional[Dict[str, Any]]: 剖析任务状态，无任务时返回None
+        """
+        session = self.session
+        return session.status() if session is not None else None
+
+    def result(self, fmt: str, limit: int = 50) -> bytes:
+        """
+        导出剖析结果
+
+        Args:
+            fmt (str): 输出格式，cprofile方式支持pstats（二进制，可用snakeviz等工具打开）和text，
+                sampling方式支持collapsed
+            limit (int): text格式输出的函数数量
+
+        Returns:
+            bytes: 剖析结果
+
+        Raises:
+            LookupError: 没有已完成的剖析任务
+            ValueError: 格式与剖析方式不匹配
+        """
+        session = self.session
+        if session is None or not session.done:
+            raise LookupError("没有已完成的剖析任务")
+        if session.mode == MODE_SAMPLING:
+            if fmt != "collapsed":
+                raise ValueError("sampling方式仅支持collapsed格式")
+            return session.sampler.collapsed().encode("utf-8")
+        stats = pstats.Stats(session.profile)
+        if fmt == "pstats":
+            return marshal.dumps(stats.stats)
+        if fmt == "text":
+            stream = io.StringIO()
+            stats.stream = stream
+            stats.sort_stats("cumulative").print_stats(limit)
+            return stream.getvalue().encode("utf-8")
+        raise ValueError("cprofile方式仅支持pstats和text格式")
+
+    @staticmethod
+    def _finish(session: ProfileSession):
+        """
+        停止剖析
+
+        Args:
+            session (ProfileSession): 剖析任务
+        """
+        if session.started_at is not None:
+            if session.profile is not None:
+                session.profile.disable()
+            else:
+                session.sampler.stop()
+        session.finished_at = time.time()
+
+
+async def profiled_body(body: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    包装响应体，最后一帧发送后（或客户端断开时）结束该请求的剖析
+
+    Args:
+        body (AsyncIterator[bytes]): 原响应体
+
+    Yields:
+        bytes: 响应体片段
+    """
+    try:
+        async for chunk in body:
+            yield chunk
+    finally:
+        profiler.request_finished()
+
+
+def start_tracemalloc(frames: int = 10) -> Dict[str, Any]:
+    """
+    开始跟踪内存分配
+
+    Args:
+        frames (int): 每次分配记录的调用栈深度
+
+    Returns:
+        Dict[str, Any]: 跟踪状态
+    """
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+    return tracemalloc_status()
+
+
+def stop_tracemalloc() -> Dict[str, Any]:
+    """
+    停止跟踪内存分配并释放跟踪数据
+
+    Returns:
+        Dict[str, Any]: 跟踪状态
+    """
+    tracemalloc.stop()
+    return tracemalloc_status()
+
+
+def tracemalloc_status() -> Dict[str, Any]:
+    """
+    获取内存跟踪状态
+
+    Returns:
+        Dict[str, Any]: 是否在跟踪、当前与峰值跟踪内存（字节）
+    """
+    status: Dict[str, Any] = {"pid": os.getpid(), "tracing": tracemalloc.is_tracing()}
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        status.update({"traced_bytes": current, "peak_bytes": peak, "frames": tracemalloc.get_traceback_limit()})
+    return status
+
+
+def tracemalloc_top(limit: int = 20, group_by: str = "lineno") -> List[Dict[str, Any]]:
+    """
+    获取当前内存分配最多的位置
+
+    Args:
+        limit (int): 返回条数
+        group_by (str): 分组方式（lineno/filename/traceback）
+
+    Returns:
+        List[Dict[str, Any]]: 按分配大小降序排列的分配位置
+
+    Raises:
+        RuntimeError: 未开启内存跟踪
+    """
+    if not tracemalloc.is_tracing():
+        raise RuntimeError("未开启内存跟踪")
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+    return [
+        {
+            "size_bytes": stat.size,
+            "count": stat.count,
+            "traceback": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+        }
+        for stat in snapshot.statistics(group_by)[:limit]
+    ]
+
+
+# 全局剖析器
+profiler = RequestProfiler()
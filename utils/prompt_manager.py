@@ -7,7 +7,7 @@
 
 import os
 import logging
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -20,7 +20,44 @@ class PromptManager:
         """
         初始化提示词管理器
         """
-        pass
+        # 模板缓存：文件路径 -> (修改时间, 模板内容)，文件修改后自动重新读取
+        self._template_cache: Dict[str, Tuple[float, str]] = {}
+    
+    def load_template(self, file_path: str) -> str:
+        """
+        读取提示词模板，优先使用内存缓存
+        
+        Args:
+            file_path (str): 提示词模板文件路径
+            
+        Returns:
+            str: 模板内容
+        """
+        mtime = os.path.getmtime(file_path)
+        cached = self._template_cache.get(file_path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        with open(file_path, 'r', encoding='utf-8') as f:
+            template = f.read()
+        self._template_cache[file_path] = (mtime, template)
+        return template
+    
+    def preload(self, file_paths: Iterable[str]) -> int:
+        """
+        预加载提示词模板到内存
+        
+        Args:
+            file_paths (Iterable[str]): 提示词模板文件路径
+            
+        Returns:
+            int: 成功加载的模板数量
+        """
+        loaded = 0
+        for file_path in file_paths:
+            if os.path.exists(file_path):
+                self.load_template(file_path)
+                loaded += 1
+        return loaded
     
     def get_system_prompt_with_key_points(self, key_points: List[str], file_path: Optional[str] = None) -> str:
         """
@@ -38,16 +75,15 @@ class PromptManager:
         
         if file_path and os.path.exists(file_path):
             # 从文件读取模板
-            logger.info(f"从文件读取系统提示词模板: {file_path}")
-            with open(file_path, 'r', encoding='utf-8') as f:
-                template = f.read()
+            logger.debug(f"从文件读取系统提示词模板: {file_path}")
+            template = self.load_template(file_path)
             # 将格式化后的字符串传递给模板
             result = template.format(key_points_str=key_points_str)
-            logger.info("系统提示词构建完成")
+            logger.debug("系统提示词构建完成")
             return result
         else:
             # 使用默认模板
-            logger.info("使用默认系统提示词模板")
+            logger.debug("使用默认系统提示词模板")
             default_template = """你是一个智能教学助手，请根据以下关键知识点回答用户的问题：
 
 关键知识点：
@@ -58,7 +94,7 @@ class PromptManager:
 2. 适当举例说明
 3. 回答要准确、简洁"""
             result = default_template.format(key_points_str=key_points_str)
-            logger.info("默认系统提示词构建完成")
+            logger.debug("默认系统提示词构建完成")
             return result
     
     def get_fallback_prompt(self, question: str, file_path: Optional[str] = None) -> str:
@@ -74,20 +110,43 @@ class PromptManager:
         """
         if file_path and os.path.exists(file_path):
             # 从文件读取模板
-            logger.info(f"从文件读取备用提示词模板: {file_path}")
-            with open(file_path, 'r', encoding='utf-8') as f:
-                template = f.read()
+            logger.debug(f"从文件读取备用提示词模板: {file_path}")
+            template = self.load_template(file_path)
             result = template.format(question=question)
-            logger.info("备用提示词构建完成")
+            logger.debug("备用提示词构建完成")
             return result
         else:
             # 使用默认模板
-            logger.info("使用默认备用提示词模板")
+            logger.debug("使用默认备用提示词模板")
             default_template = """你是一名数学家教，请用简洁的语言回答八年级二次根式问题：{question}
 请注意：
 1. 回答要准确、简洁
 2. 使用学生容易理解的语言
 3. 适当举例说明"""
             result = default_template.format(question=question)
-            logger.info("默认备用提示词构建完成")
-            return result
\ No newline at end of file
+            logger.debug("默认备用提示词构建完成")
+            return result
+    
+    def get_synthesis_prompt(self, question: str, answers: List[Tuple[str, str]], file_path: Optional[str] = None) -> str:
+        """
+        获取多智能体协作的汇总提示词
+        
+        Args:
+            question (str): 用户问题
+            answers (List[Tuple[str, str]]): (领域名称, 该领域智能体的回答)列表
+            file_path (Optional[str]): 提示词模板文件路径，如果未提供则使用默认模板
+            
+        Returns:
+            str: 汇总提示词
+        """
+        answers_str = "\n\n".join(f"【{domain}】\n{answer}" for domain, answer in answers)
+        if file_path and os.path.exists(file_path):
+            logger.debug(f"从文件读取汇总提示词模板: {file_path}")
+            template = self.load_template(file_path)
+        else:
+            logger.debug("使用默认汇总提示词模板")
+            template = """你是一名数学家教，请将以下各知识领域的讲解整合为一份完整、简洁的解答。
+学生问题：{question}
+
+{answers_str}"""
+        return template.format(question=question, answers_str=answers_str)
@@ -0,0 +1,250 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Redis协议（RESP2）客户端
+只实现缓存需要的少量命令（GET/SET/DEL/PING），不引入额外依赖；连接按需建立并放回连接池复用，
+可连接Redis及兼容RESP协议的服务（本地测试可使用 scripts/resp_cache_server.py）
+"""
+
+import queue
+import socket
+import threading
+from typing import List, Optional, Union
+from urllib.parse import urlparse, unquote
+
+
+class RespError(Exception):
+    """
+    服务端返回的错误回复
+    """
+
+
+class _Connection:
+    """
+    单个RESP连接
+    """
+
+    def __init__(self, host: str, port: int, timeout: float):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.sock.makefile("rb")
+
+    def execute(self, *args: Union[str, bytes, int]) -> object:
+        """
+        发送一条命令并读取回复
+
+        Args:
+            *args: 命令与参数
+
+        Returns:
+            object: 回复（简单字符串为str，批量字符串为bytes，空回复为None，整数为int，数组为list）
+
+        Raises:
+            RespError: 服务端返回错误
+            OSError: 连接错误或超时
+        """
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(f"${len(data)}\r\n".encode())
+            parts.append(data)
+            parts.append(b"\r\n")
+        self.sock.sendall(b"".join(parts))
+        return self._read_reply()
+
+    def _read_reply(self) -> object:
+        line = self.reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("RESP连接已断开")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode("utf-8")
+        if kind == b"-":
+            raise RespError(body.decode("utf-8", errors="replace"))
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            data = self.reader.read(length + 2)
+            if len(data) != length + 2:
+                raise ConnectionError("RESP连接已断开")
+            return data[:-2]
+        if kind == b"*":
+            count = int(body)
+            if count < 0:
+                return None
+            return [self._read_reply() for _ in range(count)]
+        raise ConnectionError(f"无法解析的RESP回复: {line[:32]!r}")
+
+    def close(self):
+        try:
+            self.reader.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class RespClient:
+    """
+    线程安全的RESP客户端，每次命令从连接池取一个连接，出错的连接直接丢弃
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 6379, db: int = 0, password: Optional[str] = None,
+                 timeout: float = 0.1, pool_size: int = 8):
+        """
+        初始化客户端，不立即建立连接
+
+        Args:
+            host (str): 服务地址
+            port (int): 端口
+            db (int): 数据库编号
+            password (Optional[str]): 密码
+            timeout (float): 连接与读写超时（秒）
+            pool_size (int): 连接池保留的最大空闲连接数
+        """
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[_Connection]" = queue.LifoQueue(maxsize=pool_size)
+        self._closed = threading.Event()
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RespClient":
+        """
+        由地址创建客户端
+
+        Args:
+            url (str): 形如 redis://[:password@]host[:port][/db] 的地址
+            **kwargs: 其他初始化参数（timeout/pool_size）
+
+        Returns:
+            RespClient: 客户端
+
+        Raises:
+            ValueError: 地址格式错误
+        """
+        parsed = urlparse(url)
+        if parsed.scheme != "redis" or not parsed.hostname:
+            raise ValueError(f"共享缓存地址格式错误: {url}，应为 redis://[:password@]host[:port][/db]")
+        db = int(parsed.path.lstrip("/") or 0)
+        password = unquote(parsed.password) if parsed.password else None
+        return cls(parsed.hostname, parsed.port or 6379, db, password, **kwargs)
+
+    def execute(self, *args: Union[str, bytes, int]) -> object:
+        """
+        执行一条命令
+
+        Args:
+            *args: 命令与参数
+
+        Returns:
+            object: 回复
+
+        Raises:
+            RespError: 服务端返回错误
+            OSError: 连接错误或超时
+        """
+        conn = self._acquire()
+        try:
+            reply = conn.execute(*args)
+        except RespError:
+            self._release(conn)
+            raise
+        except Exception:
+            conn.close()
+            raise
+        self._release(conn)
+        return reply
+
+    def ping(self) -> bool:
+        """
+        检查服务是否可用
+
+        Returns:
+            bool: 是否返回PONG
+        """
+        return self.execute("PING") == "PONG"
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        读取键值
+
+        Args:
+            key (str): 键
+
+        Returns:
+            Optional[bytes]: 值，不存在时返回None
+        """
+        return self.execute("GET", key)
+
+    def set(self, key: str, value: bytes, px: Optional[int] = None, nx: bool = False) -> bool:
+        """
+        写入键值
+
+        Args:
+            key (str): 键
+            value (bytes): 值
+            px (Optional[int]): 过期时间（毫秒）
+            nx (bool): 只在键不存在时写入
+
+        Returns:
+            bool: 是否写入（nx且键已存在时为False）
+        """
+        args: List[Union[str, bytes, int]] = ["SET", key, value]
+        if px is not None:
+            args += ["PX", max(1, int(px))]
+        if nx:
+            args.append("NX")
+        return self.execute(*args) == "OK"
+
+    def delete(self, *keys: str) -> int:
+        """
+        删除键
+
+        Args:
+            *keys (str): 键
+
+        Returns:
+            int: 删除的键数量
+        """
+        return self.execute("DEL", *keys)
+
+    def close(self):
+        """
+        关闭所有空闲连接
+        """
+        self._closed.set()
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _acquire(self) -> _Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        conn = _Connection(self.host, self.port, self.timeout)
+        try:
+            if self.password:
+                conn.execute("AUTH", self.password)
+            if self.db:
+                conn.execute("SELECT", self.db)
+        except Exception:
+            conn.close()
+            raise
+        return conn
+
+    def _release(self, conn: _Connection):
+        if self._closed.is_set():
+            conn.close()
+            return
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
@@ -0,0 +1,305 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+多轮对话会话存储
+按会话ID保存最近几轮对话及检索到的课程信息，支持追问时跳过检索，按LRU/TTL与内存上限淘汰
+"""
+
+import re
+import sys
+import time
+import logging
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 追问特征：以承接词开头，或提及“第几步”等上文内容
+_STEP_PATTERN = re.compile(r"第[一二三四五六七八九十\d]+步")
+FOLLOW_UP_PATTERN = re.compile(rf"^(那|那么|然后|接着|继续|还有|所以|为什么|为啥|怎么来的|这一步|上一步|下一步)|{_STEP_PATTERN.pattern}")
+# 问题自带数学内容（算式、数字、字母或知识点名称）时是独立的新问题（如“为什么√(a²)=|a|”），不复用上一轮课程
+MATH_CONTENT_PATTERN = re.compile(
+    r"[√^=+×÷<>|a-zA-Z\d]|根式|勾股|直角|斜边|平行四边形|菱形|矩形|正方形|对角线|函数|解析式|斜率|截距|三角形|"
+    r"平均数|加权|中位数|众数|极差|方差|标准差"
+)
+# 中日韩字符按1个token估算，其余字符按4个字符1个token估算
+CJK_PATTERN = re.compile(r"[\u3000-\u9fff\uff00-\uffef]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    粗略估算文本的token数
+
+    Args:
+        text (str): 文本
+
+    Returns:
+        int: 估算的token数
+    """
+    cjk_count = len(CJK_PATTERN.findall(text))
+    return cjk_count + (len(text) - cjk_count + 3) // 4
+
+
+class DialogueTurn:
+    """
+    单轮对话记录
+    """
+
+    __slots__ = ("question", "answer", "course_uuid", "related_knowledge", "key_points", "compacted")
+
+    def __init__(self, question: str, answer: str, course_uuid: Optional[str] = None,
+                 related_knowledge: Optional[List[Dict[str, Any]]] = None, key_points: Optional[List[str]] = None):
+        """
+        初始化对话记录
+
+        Args:
+            question (str): 用户问题（发送给大模型的原问题）
+            answer (str): 回答
+            course_uuid (Optional[str]): 检索到的课程ID
+            related_knowledge (Optional[List[Dict[str, Any]]]): 相关知识点
+            key_points (Optional[List[str]]): 报告关键点
+        """
+        self.question = question
+        self.answer = answer
+        self.course_uuid = course_uuid
+        self.related_knowledge = related_knowledge or []
+        self.key_points = key_points or []
+        self.compacted = False
+
+    def tokens(self) -> int:
+        """
+        估算本轮对话占用的token数
+
+        Returns:
+            int: 估算的token数
+        """
+        return estimate_tokens(self.question) + estimate_tokens(self.answer)
+
+    def memory_bytes(self) -> int:
+        """
+        估算本轮对话占用的内存字节数
+
+        Returns:
+            int: 估算的内存字节数
+        """
+        size = sys.getsizeof(self.question) + sys.getsizeof(self.answer) + sys.getsizeof(self.course_uuid)
+        size += sum(sys.getsizeof(point) for point in self.key_points)
+        for item in self.related_knowledge:
+            size += sum(sys.getsizeof(value) for value in item.values())
+        return size
+
+
+class Session:
+    """
+    单个会话，使用定长环形缓冲区保存最近几轮对话
+    """
+
+    def __init__(self, session_id: str, max_turns: int):
+        """
+        初始化会话
+
+        Args:
+            session_id (str): 会话ID
+            max_turns (int): 保留的最大对话轮数
+        """
+        self.session_id = session_id
+        self.turns: Deque[DialogueTurn] = deque(maxlen=max_turns)
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+
+    def last_knowledge_turn(self) -> Optional[DialogueTurn]:
+        """
+        获取最近一轮带有课程信息的对话
+
+        Returns:
+            Optional[DialogueTurn]: 对话记录，不存在时返回None
+        """
+        for turn in reversed(self.turns):
+            if turn.course_uuid:
+                return turn
+        return None
+
+    def history_messages(self) -> List[Dict[str, str]]:
+        """
+        将历史对话转换为大模型消息列表
+
+        Returns:
+            List[Dict[str, str]]: 按时间顺序排列的user/assistant消息
+        """
+        messages = []
+        for turn in self.turns:
+            messages.append({"role": "user", "content": turn.question})
+            messages.append({"role": "assistant", "content": turn.answer})
+        return messages
+
+    def tokens(self) -> int:
+        """
+        估算会话历史占用的token数
+
+        Returns:
+            int: 估算的token数
+        """
+        return sum(turn.tokens() for turn in self.turns)
+
+    def memory_bytes(self) -> int:
+        """
+        估算会话占用的内存字节数
+
+        Returns:
+            int: 估算的内存字节数
+        """
+        return sys.getsizeof(self) + sum(turn.memory_bytes() for turn in self.turns)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取会话统计信息
+
+        Returns:
+            Dict[str, Any]: 轮数、token数、内存占用等信息
+        """
+        return {
+            "session_id": self.session_id,
+            "turns": len(self.turns),
+            "tokens": self.tokens(),
+            "memory_bytes": self.memory_bytes(),
+            "course_uuid": self.turns[-1].course_uuid if self.turns else None,
+            "idle_seconds": round(time.time() - self.updated_at, 1),
+        }
+
+
+class SessionStore:
+    """
+    会话存储，按LRU顺序维护会话，支持TTL、会话数量与内存上限淘汰
+    """
+
+    def __init__(self, max_turns: int = 3, token_budget: int = 1500, compact_answer_chars: int = 120,
+                 ttl_seconds: float = 1800, max_sessions: int = 5000, memory_cap_bytes: int = 64 * 1024 * 1024):
+        """
+        初始化会话存储
+
+        Args:
+            max_turns (int): 每个会话保留的最大对话轮数
+            token_budget (int): 每个会话历史的token预算，超出时压缩较早的对话
+            compact_answer_chars (int): 压缩后保留的回答字符数
+            ttl_seconds (float): 会话空闲过期时间（秒）
+            max_sessions (int): 最多保存的会话数量
+            memory_cap_bytes (int): 会话总内存上限（字节）
+        """
+        self.max_turns = max_turns
+        self.token_budget = token_budget
+        self.compact_answer_chars = compact_answer_chars
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.memory_cap_bytes = memory_cap_bytes
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._memory_bytes = 0
+
+    def get(self, session_id: str) -> Optional[Session]:
+        """
+        获取会话并刷新其LRU位置
+
+        Args:
+            session_id (str): 会话ID
+
+        Returns:
+            Optional[Session]: 会话，不存在或已过期时返回None
+        """
+        session = self._sessions.get(session_id)
+        if session is None:
+            return None
+        if time.time() - session.updated_at > self.ttl_seconds:
+            self._remove(session_id)
+            return None
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def is_follow_up(self, question: str, session: Optional[Session]) -> bool:
+        """
+        判断问题是否为对上一轮的追问：以承接词开头或提及“第几步”，且不含自己的算式、数字或知识点名称
+
+        Args:
+            question (str): 处理后的用户问题
+            session (Optional[Session]): 会话
+
+        Returns:
+            bool: 是否为追问
+        """
+        if session is None or session.last_knowledge_turn() is None:
+            return False
+        if not FOLLOW_UP_PATTERN.search(question):
+            return False
+        return not MATH_CONTENT_PATTERN.search(_STEP_PATTERN.sub("", question))
+
+    def record_turn(self, session_id: str, turn: DialogueTurn):
+        """
+        记录一轮对话，必要时压缩历史并淘汰其他会话
+
+        Args:
+            session_id (str): 会话ID
+            turn (DialogueTurn): 对话记录
+        """
+        session = self.get(session_id)
+        if session is None:
+            session = Session(session_id, self.max_turns)
+            self._sessions[session_id] = session
+        else:
+            self._memory_bytes -= session.memory_bytes()
+
+        session.turns.append(turn)
+        session.updated_at = time.time()
+        self._compact(session)
+        self._memory_bytes += session.memory_bytes()
+        self._evict()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取会话存储统计信息
+
+        Returns:
+            Dict[str, Any]: 会话数量、总内存占用与内存上限
+        """
+        return {
+            "sessions": len(self._sessions),
+            "memory_bytes": self._memory_bytes,
+            "memory_cap_bytes": self.memory_cap_bytes,
+        }
+
+    def _compact(self, session: Session):
+        """
+        会话历史超出token预算时，从最早一轮开始截断回答，仍超出时丢弃最早一轮
+
+        Args:
+            session (Session): 会话
+        """
+        for turn in list(session.turns)[:-1]:
+            if session.tokens() <= self.token_budget:
+                return
+            if not turn.compacted and len(turn.answer) > self.compact_answer_chars:
+                turn.answer = turn.answer[:self.compact_answer_chars] + "……"
+                turn.compacted = True
+        while len(session.turns) > 1 and session.tokens() > self.token_budget:
+            session.turns.popleft()
+
+    def _remove(self, session_id: str):
+        """
+        删除会话
+
+        Args:
+            session_id (str): 会话ID
+        """
+        session = self._sessions.pop(session_id)
+        self._memory_bytes -= session.memory_bytes()
+
+    def _evict(self):
+        """
+        淘汰过期会话，并按LRU顺序淘汰超出数量或内存上限的会话
+        """
+        now = time.time()
+        expired = [sid for sid, session in self._sessions.items() if now - session.updated_at > self.ttl_seconds]
+        for session_id in expired:
+            self._remove(session_id)
+
+        while self._sessions and (len(self._sessions) > self.max_sessions or self._memory_bytes > self.memory_cap_bytes):
+            session_id = next(iter(self._sessions))
+            logger.info(f"会话存储超出上限，淘汰会话: {session_id}")
+            self._remove(session_id)
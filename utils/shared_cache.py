@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+跨进程共享缓存
+基于mmap文件的定长槽位哈希表，多个worker进程共享检索结果和回答缓存
+"""
+
+import os
+import mmap
+import time
+import struct
+import hashlib
+import logging
+import threading
+from typing import Any, Optional
+
+from utils.json_codec import dumps, loads
+
+try:
+    import fcntl
+except ImportError:  # Windows下无fcntl，仅支持单进程
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# 文件头：魔数、版本、槽位数、槽位大小
+HEADER_FORMAT = "<8sIII"
+HEADER_SIZE = 64
+MAGIC = b"AGCACHE1"
+VERSION = 1
+# 槽位头：状态、键哈希、过期时间、值长度
+SLOT_HEADER_FORMAT = "<BQdI"
+SLOT_HEADER_SIZE = struct.calcsize(SLOT_HEADER_FORMAT)
+SLOT_EMPTY = 0
+SLOT_USED = 1
+# 线性探测的最大步数
+MAX_PROBES = 8
+
+
+class SharedCache:
+    """
+    mmap共享缓存，值以UTF-8 JSON存储，写入时加文件排他锁，读取时加共享锁
+    """
+
+    def __init__(self, path: str, slots: int = 4096, slot_size: int = 8192):
+        """
+        初始化共享缓存，文件不存在或布局不一致时重建
+
+        Args:
+            path (str): 缓存文件路径，Linux下建议位于/dev/shm
+            slots (int): 槽位数量
+            slot_size (int): 每个槽位的字节数（含槽位头）
+        """
+        self.path = path
+        self.slots = slots
+        self.slot_size = slot_size
+        self.max_value_size = slot_size - SLOT_HEADER_SIZE
+        self.hits = 0
+        self.misses = 0
+        self._thread_lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        total_size = HEADER_SIZE + slots * slot_size
+        with self._file_lock(exclusive=True):
+            header = os.pread(self._fd, struct.calcsize(HEADER_FORMAT), 0)
+            expected = struct.pack(HEADER_FORMAT, MAGIC, VERSION, slots, slot_size)
+            if header != expected or os.fstat(self._fd).st_size != total_size:
+                logger.info(f"初始化共享缓存文件: {path}，槽位数: {slots}，槽位大小: {slot_size}")
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, total_size)
+                os.pwrite(self._fd, expected, 0)
+        self._mm = mmap.mmap(self._fd, total_size)
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        读取缓存
+
+        Args:
+            key (str): 缓存键
+
+        Returns:
+            Optional[Any]: 缓存值，不存在或已过期时返回None
+        """
+        key_hash = self._hash(key)
+        now = time.time()
+        with self._thread_lock, self._file_lock(exclusive=False):
+            for offset in self._probe(key_hash):
+                state, slot_hash, expires_at, length = struct.unpack_from(SLOT_HEADER_FORMAT, self._mm, offset)
+                if state == SLOT_USED and slot_hash == key_hash:
+                    if expires_at < now:
+                        break
+                    data = self._mm[offset + SLOT_HEADER_SIZE:offset + SLOT_HEADER_SIZE + length]
+                    self.hits += 1
+                    return loads(data)
+        self.misses += 1
+        return None
+
+    def set(self, key: str, value: Any, ttl: float) -> bool:
+        """
+        写入缓存，探测范围内无空位时覆盖最早过期的槽位
+
+        Args:
+            key (str): 缓存键
+            value (Any): 可JSON序列化的缓存值
+            ttl (float): 过期时间（秒）
+
+        Returns:
+            bool: 是否写入成功，值超过槽位容量时返回False
+        """
+        data = dumps(value)
+        if len(data) > self.max_value_size:
+            logger.debug(f"缓存值过大，跳过共享缓存: {key}")
+            return False
+        key_hash = self._hash(key)
+        now = time.time()
+        with self._thread_lock, self._file_lock(exclusive=True):
+            target, oldest = None, None
+            for offset in self._probe(key_hash):
+                state, slot_hash, expires_at, _ = struct.unpack_from(SLOT_HEADER_FORMAT, self._mm, offset)
+                if state == SLOT_EMPTY or slot_hash == key_hash or expires_at < now:
+                    target = offset
+                    break
+                if oldest is None or expires_at < oldest[1]:
+                    oldest = (offset, expires_at)
+            if target is None:
+                target = oldest[0]
+            self._mm[target + SLOT_HEADER_SIZE:target + SLOT_HEADER_SIZE + len(data)] = data
+            struct.pack_into(SLOT_HEADER_FORMAT, self._mm, target, SLOT_USED, key_hash, now + ttl, len(data))
+        return True
+
+    def stats(self) -> dict:
+        """
+        获取当前进程的缓存命中统计
+
+        Returns:
+            dict: 命中数、未命中数与命中率
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    def close(self):
+        """
+        关闭mmap与文件描述符
+        """
+        self._mm.close()
+        os.close(self._fd)
+
+    def _probe(self, key_hash: int):
+        """
+        生成线性探测的槽位偏移
+
+        Args:
+            key_hash (int): 键哈希
+
+        Yields:
+            int: 槽位在文件中的偏移
+        """
+        start = key_hash % self.slots
+        for step in range(min(MAX_PROBES, self.slots)):
+            yield HEADER_SIZE + ((start + step) % self.slots) * self.slot_size
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        """
+        计算64位键哈希（跨进程稳定，不受PYTHONHASHSEED影响）
+
+        Args:
+            key (str): 缓存键
+
+        Returns:
+            int: 64位哈希值
+        """
+        return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+    def _file_lock(self, exclusive: bool):
+        """
+        获取跨进程文件锁
+
+        Args:
+            exclusive (bool): 是否排他锁
+
+        Returns:
+            上下文管理器
+        """
+        return _FileLock(self._fd, exclusive)
+
+
+class _FileLock:
+    """
+    基于fcntl.flock的跨进程文件锁
+    """
+
+    def __init__(self, fd: int, exclusive: bool):
+        """
+        初始化文件锁
+
+        Args:
+            fd (int): 文件描述符
+            exclusive (bool): 是否排他锁
+        """
+        self.fd = fd
+        self.mode = None if fcntl is None else (fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+    def __enter__(self):
+        if fcntl is not None:
+            fcntl.flock(self.fd, self.mode)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if fcntl is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+SSE流重放缓冲区
+为每条SSE事件分配id，缓存进行中/已完成的流，支持客户端携带Last-Event-ID断点续传
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import AsyncGenerator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class StreamRecord:
+    """
+    单个SSE流的事件记录
+    """
+
+    def __init__(self, stream_id: str):
+        """
+        初始化流记录
+
+        Args:
+            stream_id (str): 流ID
+        """
+        self.stream_id = stream_id
+        self.events: List[str] = []
+        self.done = False
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.task: Optional[asyncio.Task] = None
+        self._condition = asyncio.Condition()
+
+    async def append(self, event: str):
+        """
+        追加一条事件并唤醒等待中的读取者
+
+        Args:
+            event (str): SSE格式的事件数据（不含id行）
+        """
+        async with self._condition:
+            self.events.append(event)
+            self.updated_at = time.time()
+            self._condition.notify_all()
+
+    async def finish(self):
+        """
+        标记流已结束
+        """
+        async with self._condition:
+            self.done = True
+            self.updated_at = time.time()
+            self._condition.notify_all()
+
+    async def iter_from(self, offset: int) -> AsyncGenerator[Tuple[int, str], None]:
+        """
+        从指定序号开始读取事件，流未结束时等待后续事件
+
+        Args:
+            offset (int): 起始事件序号
+
+        Yields:
+            Tuple[int, str]: 事件序号与事件数据
+        """
+        seq = max(offset, 0)
+        while True:
+            async with self._condition:
+                while seq >= len(self.events) and not self.done:
+                    await self._condition.wait()
+                pending = self.events[seq:]
+                finished = self.done
+            for event in pending:
+                yield seq, event
+                seq += 1
+            if finished and seq >= len(self.events):
+                return
+
+
+class StreamReplayBuffer:
+    """
+    有界、按TTL淘汰的SSE流重放缓冲区
+    """
+
+    def __init__(self, max_streams: int = 200, ttl_seconds: float = 300):
+        """
+        初始化重放缓冲区
+
+        Args:
+            max_streams (int): 最多缓存的流数量
+            ttl_seconds (float): 流结束后的保留时间（秒）
+        """
+        self.max_streams = max_streams
+        self.ttl_seconds = ttl_seconds
+        self._records: "OrderedDict[str, StreamRecord]" = OrderedDict()
+
+    def start(self, producer: AsyncGenerator[str, None]) -> Optional[StreamRecord]:
+        """
+        在后台任务中运行生成器，将其事件写入新的流记录
+        客户端断开连接不会中断后台生成
+
+        Args:
+            producer (AsyncGenerator[str, None]): 产生SSE事件的异步生成器
+
+        Returns:
+            Optional[StreamRecord]: 新建的流记录，缓冲区已满且全部流仍在生成时返回None（不缓冲该流，由调用方直接输出）
+        """
+        if not self._evict():
+            logger.warning(f"重放缓冲区已满（{self.max_streams}条流均在生成中），新的流不支持断点续传")
+            return None
+        record = StreamRecord(uuid.uuid4().hex)
+        self._records[record.stream_id] = record
+        record.task = asyncio.create_task(self._run(record, producer))
+        return record
+
+    def resume(self, last_event_id: str) -> Optional[Tuple[StreamRecord, int]]:
+        """
+        根据Last-Event-ID查找可续传的流
+
+        Args:
+            last_event_id (str): 客户端收到的最后一个事件id
+
+        Returns:
+            Optional[Tuple[StreamRecord, int]]: 流记录与续传起始序号，找不到时返回None
+        """
+        self._evict()
+        stream_id, _, seq = last_event_id.strip().rpartition("-")
+        record = self._records.get(stream_id)
+        if record is None:
+            logger.info(f"未找到可续传的流: {last_event_id}")
+            return None
+        offset = int(seq) + 1 if seq.isdigit() else 0
+        logger.info(f"续传流 {stream_id}，起始序号: {offset}，生成状态: {'已完成' if record.done else '进行中'}")
+        return record, offset
+
+    async def replay(self, record: StreamRecord, offset: int = 0) -> AsyncGenerator[str, None]:
+        """
+        以带id的SSE帧输出流记录中的事件
+
+        Args:
+            record (StreamRecord): 流记录
+            offset (int): 起始事件序号
+
+        Yields:
+            str: 带id行的SSE帧
+        """
+        async for seq, event in record.iter_from(offset):
+            yield f"id: {record.stream_id}-{seq}\n{event}"
+
+    def stats(self) -> dict:
+        """
+        获取缓冲区统计信息
+
+        Returns:
+            dict: 缓存流数量、进行中流数量与事件总数
+        """
+        return {
+            "streams": len(self._records),
+            "running": sum(1 for record in self._records.values() if not record.done),
+            "events": sum(len(record.events) for record in self._records.values()),
+        }
+
+    async def _run(self, record: StreamRecord, producer: AsyncGenerator[str, None]):
+        """
+        消费生成器并写入流记录
+
+        Args:
+            record (StreamRecord): 流记录
+            producer (AsyncGenerator[str, None]): 产生SSE事件的异步生成器
+        """
+        try:
+            async for event in producer:
+                await record.append(event)
+        except asyncio.CancelledError:
+            logger.info(f"流 {record.stream_id} 的后台生成被取消")
+        except Exception as e:
+            logger.error(f"流 {record.stream_id} 后台生成出错: {e}", exc_info=True)
+        finally:
+            await record.finish()
+            # 移到末尾，使淘汰按完成顺序进行
+            if record.stream_id in self._records:
+                self._records.move_to_end(record.stream_id)
+
+    def _evict(self) -> bool:
+        """
+        淘汰过期的已完成流，并在超出容量时按完成顺序淘汰已完成的流
+        进行中的流属于其他客户端正在接收的回答，从不淘汰
+
+        Returns:
+            bool: 是否还能容纳新的流
+        """
+        now = time.time()
+        expired = [
+            stream_id for stream_id, record in self._records.items()
+            if record.done and now - record.updated_at > self.ttl_seconds
+        ]
+        for stream_id in expired:
+            del self._records[stream_id]
+
+        while len(self._records) >= self.max_streams:
+            victim = next((sid for sid, record in self._records.items() if record.done), None)
+            if victim is None:
+                return False
+            del self._records[victim]
+        return True
@@ -0,0 +1,425 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+多级缓存
+进程内LRU -> 本机跨进程共享缓存（mmap） -> 可选的网络共享缓存（Redis协议），读取时逐级查找并回填上层，
+写入时同时写入各层；多实例部署时，检索未命中通过网络缓存中的短期锁合并为一次上游请求
+"""
+
+import time
+import zlib
+import struct
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from utils.json_codec import dumps, loads
+from utils.resp_client import RespClient, RespError
+from utils.shared_cache import SharedCache
+
+logger = logging.getLogger(__name__)
+
+TIER_LRU = "lru"
+TIER_SHM = "shm"
+TIER_REMOTE = "remote"
+
+# 值编码头：标志位、过期时间（Unix时间戳）
+VALUE_HEADER_FORMAT = "<Bd"
+VALUE_HEADER_SIZE = struct.calcsize(VALUE_HEADER_FORMAT)
+FLAG_ZLIB = 1
+
+# 网络缓存不可用时的占位返回值
+_UNAVAILABLE = object()
+
+
+def encode_value(value: Any, expires_at: float, compress_min_bytes: int = 512) -> bytes:
+    """
+    将缓存值编码为紧凑的二进制：9字节头（标志位与过期时间）+ JSON，超过阈值且压缩后更小时使用zlib压缩
+
+    Args:
+        value (Any): 可JSON序列化的缓存值
+        expires_at (float): 过期时间（Unix时间戳）
+        compress_min_bytes (int): 尝试压缩的最小字节数
+
+    Returns:
+        bytes: 编码结果
+    """
+    payload = dumps(value)
+    flags = 0
+    if len(payload) >= compress_min_bytes:
+        compressed = zlib.compress(payload, 1)
+        if len(compressed) < len(payload):
+            payload = compressed
+            flags |= FLAG_ZLIB
+    return struct.pack(VALUE_HEADER_FORMAT, flags, expires_at) + payload
+
+
+def decode_value(data: bytes) -> Tuple[Any, float]:
+    """
+    解码缓存值
+
+    Args:
+        data (bytes): encode_value的编码结果
+
+    Returns:
+        Tuple[Any, float]: (缓存值, 过期时间)
+    """
+    flags, expires_at = struct.unpack_from(VALUE_HEADER_FORMAT, data)
+    payload = data[VALUE_HEADER_SIZE:]
+    if flags & FLAG_ZLIB:
+        payload = zlib.decompress(payload)
+    return loads(payload), expires_at
+
+
+class LRUCache:
+    """
+    进程内LRU缓存，保存编码后的字节串，每次读取都解码出新对象，调用方修改返回值不会影响缓存
+    """
+
+    def __init__(self, max_entries: int):
+        """
+        初始化LRU缓存
+
+        Args:
+            max_entries (int): 最大条目数
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        读取编码后的缓存值
+
+        Args:
+            key (str): 缓存键
+
+        Returns:
+            Optional[bytes]: 编码后的值，不存在或已过期时返回None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, data: bytes, expires_at: float):
+        """
+        写入编码后的缓存值，超过容量时淘汰最久未使用的条目
+
+        Args:
+            key (str): 缓存键
+            data (bytes): 编码后的值
+            expires_at (float): 过期时间（Unix时间戳）
+        """
+        with self._lock:
+            self._entries[key] = (expires_at, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class _TierStats:
+    """
+    单层缓存的读取统计
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.seconds = 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "avg_ms": round(self.seconds / total * 1000, 3) if total else 0.0,
+        }
+
+
+class TieredCache:
+    """
+    多级缓存，对外提供与SharedCache相同的get/set/stats/close接口，值须可JSON序列化
+    进程内LRU条目最多保留lru_ttl秒，从本机共享缓存回填的条目可能比原过期时间晚至多lru_ttl秒失效
+    """
+
+    def __init__(self, lru: Optional[LRUCache], local: Optional[SharedCache], remote: Optional[RespClient],
+                 key_prefix: str = "agent:", lru_ttl: float = 30.0, lock_lease: float = 3.0,
+                 lock_poll_interval: float = 0.02, retry_seconds: float = 5.0, compress_min_bytes: int = 512):
+        """
+        初始化多级缓存
+
+        Args:
+            lru (Optional[LRUCache]): 进程内LRU缓存，为None时不使用
+            local (Optional[SharedCache]): 本机跨进程共享缓存，为None时不使用
+            remote (Optional[RespClient]): 网络共享缓存客户端，为None时不使用
+            key_prefix (str): 网络缓存的键前缀，区分共用同一服务的应用
+            lru_ttl (float): 进程内LRU条目的最长保留时间（秒）
+            lock_lease (float): 合并请求的锁租期（秒），持锁实例异常退出时租期到期后其他实例自行请求，为0时不合并跨实例请求
+            lock_poll_interval (float): 等待其他实例结果时的轮询间隔（秒）
+            retry_seconds (float): 网络缓存出错后跳过它的时间（秒）
+            compress_min_bytes (int): 尝试压缩的最小字节数
+        """
+        self.lru = lru
+        self.local = local
+        self.remote = remote
+        self.key_prefix = key_prefix
+        self.lru_ttl = lru_ttl
+        self.lock_lease = lock_lease
+        self.lock_poll_interval = lock_poll_interval
+        self.retry_seconds = retry_seconds
+        self.compress_min_bytes = compress_min_bytes
+        self._tier_stats = {tier: _TierStats() for tier, enabled in
+                            ((TIER_LRU, lru), (TIER_SHM, local), (TIER_REMOTE, remote)) if enabled is not None}
+        self._stats_lock = threading.Lock()
+        self._remote_down_until = 0.0
+        # 合并请求统计：等待到其他线程或实例的结果 / 等待超时后自行请求
+        self.coalesced = 0
+        self.lease_timeouts = 0
+        self._key_locks: Dict[str, list] = {}
+        self._key_locks_guard = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        逐级读取缓存，下层命中时回填上层
+
+        Args:
+            key (str): 缓存键
+
+        Returns:
+            Optional[Any]: 缓存值，各层均未命中时返回None
+        """
+        if self.lru is not None:
+            start = time.perf_counter()
+            data = self.lru.get(key)
+            self._record(TIER_LRU, data is not None, start)
+            if data is not None:
+                return decode_value(data)[0]
+
+        if self.local is not None:
+            start = time.perf_counter()
+            value = self.local.get(key)
+            self._record(TIER_SHM, value is not None, start)
+            if value is not None:
+                self._fill_lru(key, value, time.time() + self.lru_ttl)
+                return value
+
+        if self.remote is not None:
+            start = time.perf_counter()
+            data = self._remote_call(self.remote.get, self.key_prefix + key)
+            if data is _UNAVAILABLE:
+                return None
+            self._record(TIER_REMOTE, data is not None, start)
+            if data is not None:
+                value, expires_at = decode_value(data)
+                self._fill_local(key, value, expires_at)
+                return value
+        return None
+
+    def set(self, key: str, value: Any, ttl: float) -> bool:
+        """
+        写入各层缓存
+
+        Args:
+            key (str): 缓存键
+            value (Any): 可JSON序列化的缓存值
+            ttl (float): 过期时间（秒）
+
+        Returns:
+            bool: 是否至少写入了一层
+        """
+        expires_at = time.time() + ttl
+        stored = self._fill_lru(key, value, expires_at)
+        if self.local is not None:
+            stored = self.local.set(key, value, ttl) or stored
+        if self.remote is not None:
+            data = encode_value(value, expires_at, self.compress_min_bytes)
+            stored = self._remote_call(self.remote.set, self.key_prefix + key, data, int(ttl * 1000)) is True or stored
+        return stored
+
+    @contextmanager
+    def coalesce(self, key: str) -> Iterator[Optional[Any]]:
+        """
+        合并同一个键的并发未命中：同进程内的并发请求等待第一个请求的结果；配置了网络缓存时，
+        通过网络缓存中的短期锁（SET NX PX）让多个实例中只有一个请求上游，其他实例轮询等待结果写入缓存
+
+        用法:
+            with cache.coalesce(key) as value:
+                if value is not None:
+                    return value
+                value = fetch()
+                cache.set(key, value, ttl)
+
+        Args:
+            key (str): 缓存键
+
+        Yields:
+            Optional[Any]: 等待期间其他请求写入的缓存值，为None时由调用方请求上游并写入缓存
+        """
+        with self._key_lock(key) as waited:
+            if waited:
+                value = self.get(key)
+                if value is not None:
+                    self._count_coalesced()
+                    yield value
+                    return
+            if self.remote is None or self.lock_lease <= 0:
+                yield None
+                return
+            lock_key = f"{self.key_prefix}lock:{key}"
+            acquired = self._remote_call(self.remote.set, lock_key, b"1", int(self.lock_lease * 1000), True)
+            if acquired is not False:
+                # 取得锁或网络缓存不可用时自行请求上游
+                try:
+                    yield None
+                finally:
+                    if acquired is True:
+                        self._remote_call(self.remote.delete, lock_key)
+                return
+            yield self._wait_remote(key, lock_key)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取当前进程的整体命中统计（任意一层命中即计为命中）
+
+        Returns:
+            Dict[str, Any]: 命中数、未命中数、命中率与合并请求统计
+        """
+        with self._stats_lock:
+            tiers = list(self._tier_stats.values())
+            # 每次读取都会落到最后被查询的一层：首层的读取次数即总读取次数
+            total = tiers[0].hits + tiers[0].misses if tiers else 0
+            hits = sum(tier.hits for tier in tiers)
+            return {
+                "hits": hits,
+                "misses": total - hits,
+                "hit_rate": round(hits / total, 4) if total else 0.0,
+                "coalesced": self.coalesced,
+                "lease_timeouts": self.lease_timeouts,
+            }
+
+    def tier_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        获取各层的命中率与平均读取耗时
+
+        Returns:
+            Dict[str, Dict[str, float]]: 层名称（lru/shm/remote）-> 命中数、未命中数、错误数、命中率、平均耗时
+        """
+        with self._stats_lock:
+            return {tier: stats.as_dict() for tier, stats in self._tier_stats.items()}
+
+    def close(self):
+        """
+        关闭本机共享缓存与网络缓存连接
+        """
+        if self.local is not None:
+            self.local.close()
+        if self.remote is not None:
+            self.remote.close()
+
+    def _fill_lru(self, key: str, value: Any, expires_at: float) -> bool:
+        if self.lru is None:
+            return False
+        self.lru.set(key, encode_value(value, expires_at, self.compress_min_bytes), min(expires_at, time.time() + self.lru_ttl))
+        return True
+
+    def _fill_local(self, key: str, value: Any, expires_at: float):
+        """
+        网络缓存命中后按剩余有效期回填本机共享缓存与进程内LRU
+        """
+        ttl = expires_at - time.time()
+        if ttl <= 0:
+            return
+        if self.local is not None:
+            self.local.set(key, value, ttl)
+        self._fill_lru(key, value, expires_at)
+
+    def _wait_remote(self, key: str, lock_key: str) -> Optional[Any]:
+        """
+        其他实例持锁时轮询等待其结果，锁释放或租期到期仍无结果时返回None
+        """
+        deadline = time.monotonic() + self.lock_lease
+        while time.monotonic() < deadline:
+            time.sleep(self.lock_poll_interval)
+            data = self._remote_call(self.remote.get, self.key_prefix + key)
+            if data is _UNAVAILABLE:
+                return None
+            if data is not None:
+                value, expires_at = decode_value(data)
+                self._fill_local(key, value, expires_at)
+                self._count_coalesced()
+                return value
+            if self._remote_call(self.remote.get, lock_key) is None:
+                # 持锁实例请求失败，未写入缓存
+                return None
+        with self._stats_lock:
+            self.lease_timeouts += 1
+        return None
+
+    def _remote_call(self, func, *args) -> Any:
+        """
+        调用网络缓存，出错后retry_seconds内跳过网络缓存，避免每个请求都等待超时
+
+        Returns:
+            Any: 调用结果，网络缓存不可用时返回_UNAVAILABLE
+        """
+        if time.monotonic() < self._remote_down_until:
+            return _UNAVAILABLE
+        try:
+            return func(*args)
+        except (OSError, RespError) as e:
+            self._remote_down_until = time.monotonic() + self.retry_seconds
+            with self._stats_lock:
+                self._tier_stats[TIER_REMOTE].errors += 1
+            logger.warning(f"网络共享缓存不可用，{self.retry_seconds}秒内跳过: {e}")
+            return _UNAVAILABLE
+
+    @contextmanager
+    def _key_lock(self, key: str) -> Iterator[bool]:
+        """
+        同一个键的进程内互斥锁，用完即回收
+
+        Yields:
+            bool: 是否等待过其他线程
+        """
+        with self._key_locks_guard:
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        lock = entry[0]
+        waited = not lock.acquire(blocking=False)
+        if waited:
+            lock.acquire()
+        try:
+            yield waited
+        finally:
+            lock.release()
+            with self._key_locks_guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._key_locks[key]
+
+    def _record(self, tier: str, hit: bool, start: float):
+        with self._stats_lock:
+            stats = self._tier_stats[tier]
+            stats.seconds += time.perf_counter() - start
+            if hit:
+                stats.hits += 1
+            else:
+                stats.misses += 1
+
+    def _count_coalesced(self):
+        with self._stats_lock:
+            self.coalesced += 1
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+启动预热
+预连接大模型与推荐系统、预加载提示词模板、可选发送探测生成，完成后将服务标记为就绪；
+随后（或就绪前）基于历史请求日志预热检索缓存
+"""
+
+import glob
+import os
+import time
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+from core.conf import config
+from utils.agent_manager import STAGE_LLM, STAGE_RETRIEVAL, STAGE_CPU
+from utils.cache_warmer import CacheWarmer
+
+logger = logging.getLogger(__name__)
+
+
+class WarmupManager:
+    """
+    启动预热管理器，维护服务就绪状态
+    """
+
+    def __init__(self, registrar):
+        """
+        初始化预热管理器
+
+        Args:
+            registrar: 组件注册器
+        """
+        self.registrar = registrar
+        self.ready = False
+        self.steps: Dict[str, Any] = {}
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.cache_warmer = CacheWarmer(registrar) if config.CACHE_WARMUP_ENABLED else None
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self) -> asyncio.Task:
+        """
+        在后台任务中执行预热，保留任务引用，避免任务在完成前被垃圾回收
+
+        Returns:
+            asyncio.Task: 预热任务
+        """
+        self.task = asyncio.create_task(self.run())
+        return self.task
+
+    async def stop(self):
+        """
+        应用关闭时取消尚未完成的预热（含缓存预热）
+        """
+        if self.task is None or self.task.done():
+            return
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            logger.info("应用关闭，已取消未完成的预热")
+
+    async def run(self):
+        """
+        依次执行各预热步骤，单个步骤失败不影响就绪，整体超时后同样标记就绪
+        """
+        self.started_at = time.time()
+        logger.info("开始启动预热")
+        try:
+            await asyncio.wait_for(self._run_steps(), timeout=config.WARMUP_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning(f"启动预热超时（{config.WARMUP_TIMEOUT}秒），跳过剩余步骤")
+        self.finished_at = time.time()
+        self.ready = True
+        logger.info(f"启动预热完成，耗时: {self.finished_at - self.started_at:.2f}秒，步骤结果: {self.steps}")
+        if self.cache_warmer is not None and not config.CACHE_WARMUP_BEFORE_READY:
+            await self.cache_warmer.run()
+
+    def status(self) -> Dict[str, Any]:
+        """
+        获取预热状态
+
+        Returns:
+            Dict[str, Any]: 就绪状态、各步骤结果与耗时、缓存预热进度
+        """
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = round((self.finished_at or time.time()) - self.started_at, 3)
+        status = {"ready": self.ready, "steps": self.steps, "elapsed_seconds": elapsed}
+        if self.cache_warmer is not None:
+            status["cache_warmup"] = self.cache_warmer.status()
+        return status
+
+    async def _run_steps(self):
+        """
+        并发执行预连接与模板预加载，随后执行可选的探测生成与就绪前缓存预热
+        """
+        llm = self.registrar.get_component("llm")
+        knowledge_retriever = self.registrar.get_component("knowledge_retriever")
+        prompt_builder = self.registrar.get_component("prompt_builder")
+
+        steps = []
+        if llm is not None and config.LLM_API_URL:
+            steps.append(self._step("llm_preconnect", STAGE_LLM, llm.preconnect))
+        if knowledge_retriever is not None and config.GET_IP_URL:
+            steps.append(self._step("recommendation_preconnect", STAGE_RETRIEVAL, knowledge_retriever.preconnect))
+        if prompt_builder is not None:
+            prompt_files = glob.glob(os.path.join(config.PROJECT_ROOT, "agents", "*", "prompt", "*.txt"))
+            steps.append(self._step("prompt_preload", STAGE_CPU, prompt_builder.prompt_manager.preload, prompt_files))
+        await asyncio.gather(*steps)
+
+        if llm is not None and config.WARMUP_PROBE_ENABLED:
+            await self._step("llm_probe", STAGE_LLM, llm.probe)
+
+        if self.cache_warmer is not None and config.CACHE_WARMUP_BEFORE_READY:
+            await self.cache_warmer.run()
+
+    async def _step(self, name: str, stage: str, func, *args):
+        """
+        执行单个预热步骤并记录结果
+
+        Args:
+            name (str): 步骤名称
+            stage (str): 所用线程池的阶段类型
+            func: 阻塞的预热函数
+            *args: 函数位置参数
+        """
+        start = time.time()
+        agent_manager = self.registrar.get_component("agent_manager")
+        try:
+            if agent_manager is not None:
+                result = await agent_manager.run(stage, func, *args)
+            else:
+                result = func(*args)
+        except Exception as e:
+            logger.warning(f"预热步骤 {name} 失败: {e}")
+            result = False
+        self.steps[name] = {"result": result, "seconds": round(time.time() - start, 3)}